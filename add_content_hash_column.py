@@ -0,0 +1,44 @@
+"""
+Add content_hash column to transcriptions table
+Used for upload deduplication and the transcription result cache
+"""
+
+import os
+import sys
+import logging
+
+from sqlalchemy import create_engine, inspect, text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_content_hash_column():
+    """Add content_hash column (+ index) to existing transcriptions table"""
+    database_url = os.environ.get("DATABASE_URL", "sqlite:///./mp4totext.db")
+    engine = create_engine(database_url)
+    
+    try:
+        columns = [col["name"] for col in inspect(engine).get_columns("transcriptions")]
+        
+        with engine.connect() as conn:
+            if "content_hash" in columns:
+                logger.info("✅ content_hash column already exists")
+            else:
+                logger.info("📝 Adding content_hash column to transcriptions table...")
+                conn.execute(text("ALTER TABLE transcriptions ADD COLUMN content_hash VARCHAR(64)"))
+            
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_transcriptions_content_hash ON transcriptions (content_hash)"
+            ))
+            conn.commit()
+        
+        logger.info("✅ content_hash column and index ready")
+        
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    add_content_hash_column()
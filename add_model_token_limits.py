@@ -0,0 +1,41 @@
+"""
+Add context_window / max_output_tokens columns to ai_model_pricing table
+Used by the chunk planner to size LLM calls per model (empty = built-in defaults)
+"""
+
+import os
+import sys
+import logging
+
+from sqlalchemy import create_engine, inspect, text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_model_token_limits():
+    """Add token limit columns to existing ai_model_pricing table"""
+    database_url = os.environ.get("DATABASE_URL", "sqlite:///./mp4totext.db")
+    engine = create_engine(database_url)
+    
+    try:
+        columns = [col["name"] for col in inspect(engine).get_columns("ai_model_pricing")]
+        
+        with engine.connect() as conn:
+            for column in ("context_window", "max_output_tokens"):
+                if column in columns:
+                    logger.info(f"✅ {column} column already exists")
+                else:
+                    logger.info(f"📝 Adding {column} column to ai_model_pricing table...")
+                    conn.execute(text(f"ALTER TABLE ai_model_pricing ADD COLUMN {column} INTEGER"))
+            conn.commit()
+        
+        logger.info("✅ Token limit columns ready")
+        
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    add_model_token_limits()
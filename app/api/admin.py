@@ -305,6 +305,26 @@ async def check_runpod_health(
         }
 
 
+@router.get("/answer-cache/stats")
+async def get_answer_cache_stats(
+    admin: User = Depends(require_admin)
+):
+    """
+    Get PKB answer cache hit/miss counts
+    
+    Returns counts and hit rate for chat, summary and question answers
+    """
+    from app.services.answer_cache import get_answer_cache
+    
+    answer_cache = get_answer_cache()
+    return {
+        "enabled": answer_cache.enabled,
+        "similarity_threshold": answer_cache.similarity,
+        "ttl_hours": answer_cache.ttl_seconds // 3600,
+        "stats": answer_cache.stats()
+    }
+
+
 # ==============================================================================
 # LEGAL CONTENT ENDPOINTS
 # ==============================================================================
@@ -18,6 +18,8 @@ from app.models.transcription import Transcription
 from app.models.credit_transaction import CreditTransaction
 from app.models.credit_pricing import CreditPricingConfig
 from app.models.ai_model_pricing import AIModelPricing
+from app.services.chunk_planner import invalidate_model_limits
+from app.services.pricing_catalog import invalidate_pricing_catalog
 from app.models.generated_image import GeneratedImage
 from app.models.generated_video import GeneratedVideo
 from app.settings import get_settings
@@ -86,6 +88,8 @@ class AIModelUpdate(BaseModel):
     is_active: Optional[bool] = None
     credit_multiplier: Optional[float] = None
     cost_per_1k_chars: Optional[float] = None
+    context_window: Optional[int] = Field(None, gt=0)
+    max_output_tokens: Optional[int] = Field(None, gt=0)
     is_default: Optional[bool] = None
 
 
@@ -360,6 +364,8 @@ async def get_ai_models(
                 "provider": m.provider,
                 "credit_multiplier": m.credit_multiplier,
                 "cost_per_1k_chars": m.cost_per_1k_chars,
+                "context_window": m.context_window,
+                "max_output_tokens": m.max_output_tokens,
                 "description": m.description,
                 "is_active": m.is_active,
                 "is_default": m.is_default
@@ -388,6 +394,10 @@ async def update_ai_model(
         model.credit_multiplier = update.credit_multiplier
     if update.cost_per_1k_chars is not None:
         model.cost_per_1k_chars = update.cost_per_1k_chars
+    if update.context_window is not None:
+        model.context_window = update.context_window
+    if update.max_output_tokens is not None:
+        model.max_output_tokens = update.max_output_tokens
     if update.is_default is not None:
         if update.is_default:
             # Clear other defaults for same provider
@@ -399,6 +409,8 @@ async def update_ai_model(
     
     db.commit()
     db.refresh(model)
+    invalidate_model_limits()
+    invalidate_pricing_catalog()
     
     logger.info(f"✅ Admin {admin.username} updated AI model {model.model_key}")
     
@@ -408,6 +420,8 @@ async def update_ai_model(
         "is_active": model.is_active,
         "credit_multiplier": model.credit_multiplier,
         "cost_per_1k_chars": model.cost_per_1k_chars,
+        "context_window": model.context_window,
+        "max_output_tokens": model.max_output_tokens,
         "is_default": model.is_default
     }}
 
@@ -463,6 +477,7 @@ async def update_pricing(
     
     db.commit()
     db.refresh(config)
+    invalidate_pricing_catalog()
     
     logger.info(f"✅ Admin {admin.username} updated pricing {config.operation_key}")
     
@@ -540,16 +555,19 @@ async def get_system_health(
         pass
     
     # Check R2/Storage
+    storage_metrics = None
     try:
         from app.services.storage import get_storage_service
         storage = get_storage_service()
         health["storage"] = storage.r2_enabled
+        storage_metrics = storage.get_metrics()
     except:
         pass
     
     return {
         "status": "healthy" if all(health.values()) else "degraded",
         "components": health,
+        "storage_metrics": storage_metrics,
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -13,6 +13,7 @@ from app.api.auth import get_current_active_user, require_superuser
 from app.models.user import User
 from app.models.credit_transaction import CreditTransaction, OperationType
 from app.services.credit_service import get_credit_service, InsufficientCreditsError, CreditPricing
+from app.services.pricing_catalog import invalidate_pricing_catalog
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -428,6 +429,7 @@ async def update_pricing_configs(
     
     try:
         db.commit()
+        invalidate_pricing_catalog()
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Failed to update pricing: {e}")
@@ -561,6 +563,7 @@ async def update_model_pricing_admin(
         
         db.commit()
         db.refresh(model)
+        invalidate_pricing_catalog()
         
         logger.info(
             f"👮 Admin {current_user.username} updated model {model.model_name}: "
@@ -637,6 +640,7 @@ async def create_model_admin(
         db.add(new_model)
         db.commit()
         db.refresh(new_model)
+        invalidate_pricing_catalog()
         
         logger.info(f"👮 Admin {current_user.username} created model: {new_model.model_name}")
         return new_model
@@ -701,6 +705,7 @@ async def bulk_create_models_admin(
                 errors.append(f"{model_data.model_key}: {str(e)}")
         
         db.commit()
+        invalidate_pricing_catalog()
         
         logger.info(f"👮 Admin {current_user.username} bulk created {created} models, skipped {skipped}")
         
@@ -2,6 +2,7 @@
 Sources API Router
 Handles CRUD operations for user-generated Sources (Mix Up feature)
 """
+import asyncio
 import logging
 import re
 from datetime import datetime, timedelta
@@ -744,11 +745,14 @@ BEGIN YOUR ARTICLE:
 async def update_source(
     source_id: int,
     update_data: SourceUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Update an existing Source
+    
+    A content change on a source with a ready PKB re-indexes only the changed chunks.
     """
     source = db.query(Source).filter(
         Source.id == source_id,
@@ -766,6 +770,7 @@ async def update_source(
         source.title = update_data.title
     if update_data.description is not None:
         source.description = update_data.description
+    content_changed = update_data.content is not None and update_data.content != source.content
     if update_data.content is not None:
         source.content = update_data.content
     if update_data.tags is not None:
@@ -777,9 +782,27 @@ async def update_source(
     
     source.updated_at = datetime.utcnow()
     
+    reindex_pkb = content_changed and source.pkb_status == "ready" and bool(source.pkb_collection_name)
+    if reindex_pkb:
+        source.pkb_status = "processing"
+    
     db.commit()
     db.refresh(source)
     
+    if reindex_pkb:
+        background_tasks.add_task(
+            process_pkb_creation,
+            source_id=source.id,
+            user_id=current_user.id,
+            content=source.content,
+            collection_name=source.pkb_collection_name,
+            embedding_model=source.pkb_embedding_model,
+            chunk_size=source.pkb_chunk_size or 512,
+            chunk_overlap=source.pkb_chunk_overlap if source.pkb_chunk_overlap is not None else 50,
+            reindex=True
+        )
+        logger.info(f"🔄 PKB re-index scheduled for source {source.id}")
+    
     logger.info(f"📝 Source updated: id={source.id}")
     
     return source
@@ -956,10 +979,10 @@ async def create_pkb(
             raise
         
         try:
-            from app.services.rag_service import VectorStoreService
-            logger.info("✅ VectorStoreService imported successfully")
+            from app.services.rag_service import get_vector_store
+            logger.info("✅ Vector store imported successfully")
         except Exception as e3:
-            logger.error(f"❌ VectorStoreService import failed: {type(e3).__name__}: {e3}")
+            logger.error(f"❌ Vector store import failed: {type(e3).__name__}: {e3}")
             raise
             
     except Exception as e:
@@ -1033,7 +1056,8 @@ async def create_pkb(
         )
     
     # Update source status using raw SQL
-    collection_name = f"source_{source_id}_{uuid.uuid4().hex[:8]}"
+    from app.services.rag_service import new_pkb_collection
+    collection_name = new_pkb_collection(f"source_{source_id}_{uuid.uuid4().hex[:8]}")
     try:
         update_sql = text("""
             UPDATE sources SET
@@ -1091,13 +1115,18 @@ async def process_pkb_creation(
     collection_name: str,
     embedding_model: str,
     chunk_size: int,
-    chunk_overlap: int
+    chunk_overlap: int,
+    reindex: bool = False
 ):
     """
-    Background task to create PKB
+    Background task to create PKB, or bring it up to date after a content edit
+    
+    Only chunks whose text is new are embedded and charged; moved chunks are
+    patched and vanished ones deleted (see PKBIndexer).
     """
     from app.database import SessionLocal
-    from app.services.rag_service import TextChunker, EmbeddingService, VectorStoreService
+    from app.services.rag_service import EmbeddingModel
+    from app.services.pkb_indexer import PKBIndexer
     from app.services.credit_service import get_credit_service
     
     db = SessionLocal()
@@ -1108,77 +1137,57 @@ async def process_pkb_creation(
             logger.error(f"❌ Source {source_id} not found")
             return
         
-        # Chunk the content
-        chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        chunk_results = chunker.chunk_text(content)
-        
-        # Extract text from chunk results
-        chunk_texts = [chunk.content for chunk in chunk_results]
-        
-        logger.info(f"📦 Created {len(chunk_texts)} chunks for source {source_id}")
-        
-        # Get embeddings (sync method, no await)
-        embedding_service = EmbeddingService()
-        from app.services.rag_service import EmbeddingModel
-        embedding_results = embedding_service.get_embeddings_batch(
-            texts=chunk_texts,
-            model=EmbeddingModel.OPENAI_SMALL
+        # Chunk, diff against PKBChunk rows, embed and store only what changed
+        indexer = PKBIndexer(db)
+        result = await asyncio.to_thread(
+            indexer.sync,
+            source_id=source_id,
+            user_id=user_id,
+            content=content,
+            collection_name=collection_name,
+            title=source.title,
+            embedding_model=EmbeddingModel.OPENAI_SMALL.value,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
         )
         
-        # Extract embedding vectors
-        embeddings = [result.embedding for result in embedding_results]
-        
-        logger.info(f"🔢 Generated {len(embeddings)} embeddings")
-        
-        # Store in vector database (sync methods)
-        vector_store = VectorStoreService()
-        vector_store.create_collection(collection_name, dimensions=len(embeddings[0]))
+        logger.info(
+            f"💾 Indexed source {source_id} into {collection_name}: {result['added']} added, "
+            f"{result['moved']} moved, {result['removed']} removed, {result['unchanged']} unchanged"
+        )
         
-        # Prepare points for Qdrant
-        import uuid
-        points = [
-            {
-                "id": str(uuid.uuid4()),
-                "vector": embeddings[i],
-                "payload": {
-                    "text": chunk_texts[i],
+        # Calculate and deduct credits (newly embedded chunks only)
+        credits_used = result["added"] * 0.001
+        if credits_used > 0:
+            credit_service = get_credit_service(db)
+            # Use AI_ENHANCEMENT temporarily until rag_pkb_creation is added to PostgreSQL enum
+            credit_service.deduct_credits(
+                user_id=user_id,
+                amount=credits_used,
+                operation_type=OperationType.AI_ENHANCEMENT,  # TODO: Change to RAG_PKB_CREATION after enum migration
+                description=f"PKB {'updated' if reindex else 'created'} for source: {source.title[:50]}",
+                metadata={
                     "source_id": source_id,
-                    "chunk_idx": i
+                    "chunk_count": result["chunk_count"],
+                    "embedded_chunks": result["added"],
+                    "type": "rag_pkb_creation"
                 }
-            }
-            for i in range(len(chunk_texts))
-        ]
-        
-        vector_store.upsert_vectors(
-            collection_name=collection_name,
-            points=points
-        )
-        
-        logger.info(f"💾 Stored vectors in collection {collection_name}")
-        
-        # Calculate and deduct credits
-        credits_used = len(chunk_texts) * 0.001
-        credit_service = get_credit_service(db)
-        # Use AI_ENHANCEMENT temporarily until rag_pkb_creation is added to PostgreSQL enum
-        credit_service.deduct_credits(
-            user_id=user_id,
-            amount=credits_used,
-            operation_type=OperationType.AI_ENHANCEMENT,  # TODO: Change to RAG_PKB_CREATION after enum migration
-            description=f"PKB created for source: {source.title[:50]}",
-            metadata={"source_id": source_id, "chunk_count": len(chunk_texts), "type": "rag_pkb_creation"}
-        )
+            )
         
         # Update source
         source.pkb_enabled = True
         source.pkb_status = "ready"
-        source.pkb_chunk_count = len(chunk_texts)
-        source.pkb_credits_used = credits_used
-        source.pkb_created_at = datetime.utcnow()
+        source.pkb_chunk_count = result["chunk_count"]
+        if reindex:
+            source.pkb_credits_used = (source.pkb_credits_used or 0) + credits_used
+        else:
+            source.pkb_credits_used = credits_used
+            source.pkb_created_at = datetime.utcnow()
         source.pkb_error_message = None
         source.updated_at = datetime.utcnow()
         db.commit()
         
-        logger.info(f"✅ PKB created for source {source_id}: {len(chunk_texts)} chunks, {credits_used:.4f} credits")
+        logger.info(f"✅ PKB {'updated' if reindex else 'created'} for source {source_id}: {result['chunk_count']} chunks, {credits_used:.4f} credits")
         
     except Exception as e:
         logger.error(f"❌ PKB creation failed for source {source_id}: {e}")
@@ -1201,7 +1210,8 @@ async def delete_pkb(
     """
     Delete PKB for a source
     """
-    from app.services.rag_service import VectorStoreService
+    from app.models.rag import PKBChunk
+    from app.services.rag_service import get_vector_store, pkb_location
     from sqlalchemy import text
     
     # Query PKB status using raw SQL
@@ -1233,16 +1243,22 @@ async def delete_pkb(
             detail="No PKB exists for this source"
         )
     
-    # Delete collection from vector store
+    # Delete vectors (the source's points in the shared collection, or its own collection)
     if pkb_collection_name:
         try:
-            vector_store = VectorStoreService()
-            await vector_store.delete_collection(pkb_collection_name)
-            logger.info(f"🗑️ Deleted collection {pkb_collection_name}")
+            location = pkb_location(current_user.id, source_id, pkb_collection_name)
+            if location.shared:
+                await get_vector_store().delete_points_by_filter(pkb_collection_name, location.filter_conditions)
+                logger.info(f"🗑️ Deleted source {source_id} vectors from {pkb_collection_name}")
+            else:
+                await get_vector_store().delete_collection(pkb_collection_name)
+                logger.info(f"🗑️ Deleted collection {pkb_collection_name}")
         except Exception as e:
             logger.warning(f"⚠️ Failed to delete collection: {e}")
     
-    # Reset PKB fields using raw SQL
+    # Reset PKB fields using raw SQL, and drop the chunk rows in the same
+    # transaction (the indexer would otherwise treat the deleted points as
+    # still indexed when the PKB is created again)
     try:
         update_sql = text("""
             UPDATE sources SET
@@ -1256,7 +1272,9 @@ async def delete_pkb(
             WHERE id = :source_id
         """)
         db.execute(update_sql, {"updated_at": datetime.utcnow(), "source_id": source_id})
+        deleted_chunks = db.query(PKBChunk).filter(PKBChunk.source_id == source_id).delete()
         db.commit()
+        logger.info(f"🗑️ Deleted {deleted_chunks} PKB chunk rows of source {source_id}")
     except Exception as e:
         logger.error(f"❌ Failed to reset PKB fields: {e}")
         raise HTTPException(
@@ -1264,23 +1282,68 @@ async def delete_pkb(
             detail=f"Failed to delete PKB: {str(e)}"
         )
     
+    from app.services.answer_cache import get_answer_cache
+    get_answer_cache().invalidate_source(source_id)
+    
     logger.info(f"🗑️ PKB deleted for source {source_id}")
     
     return {"success": True, "message": "PKB deleted"}
 
 
-@router.post("/{source_id}/pkb/chat")
-async def chat_with_pkb(
-    source_id: int,
-    request: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
+def _pkb_chat_cost(llm_model: str, input_tokens: int, output_tokens: int) -> float:
     """
-    Chat with source PKB using RAG
+    Credits for one PKB chat answer
+    
+    Pricing:
+      - Embedding: 0.001 credits per query
+      - GPT-4o-mini: $0.15/1M input, $0.60/1M output -> ~0.0001 per 1K tokens
+      - GPT-4o: $2.50/1M input, $10/1M output -> ~0.001 per 1K tokens
     """
-    from app.services.rag_service import VectorStoreService, EmbeddingService, LLMService
-    from app.services.credit_service import get_credit_service
+    embedding_cost = 0.001  # Per query embedding
+    
+    if "mini" in llm_model.lower():
+        # GPT-4o-mini pricing (cheaper)
+        input_cost = (input_tokens / 1000) * 0.0002   # $0.15/1M = ~0.0002 per 1K
+        output_cost = (output_tokens / 1000) * 0.0008  # $0.60/1M = ~0.0008 per 1K
+    else:
+        # GPT-4o pricing (more expensive)
+        input_cost = (input_tokens / 1000) * 0.003    # $2.50/1M = ~0.003 per 1K
+        output_cost = (output_tokens / 1000) * 0.012  # $10/1M = ~0.012 per 1K
+    
+    credits_used = embedding_cost + input_cost + output_cost
+    credits_used = round(max(credits_used, 0.005), 4)  # Minimum 0.005, round to 4 decimals
+    
+    logger.info(f"💰 Chat cost breakdown: embedding={embedding_cost:.4f}, input={input_cost:.4f} ({input_tokens} tokens), output={output_cost:.4f} ({output_tokens} tokens), total={credits_used:.4f}")
+    return credits_used
+
+
+def _request_temperature(request: dict) -> float:
+    """Optional "temperature" of a PKB request (422 if it is not a number)"""
+    try:
+        return float(request.get("temperature", 0.7))
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="temperature must be a number"
+        )
+
+
+async def _prepare_pkb_chat(source_id: int, request: dict, db: Session, current_user: User) -> dict:
+    """
+    Validate a PKB chat request, retrieve context and build the LLM messages
+    
+    Shared by the blocking and the streaming chat endpoints. Request errors
+    raise HTTPException; retrieval errors are left to the caller.
+    
+    Returns:
+        Dict with message, llm_model, llm_model_enum, temperature, results,
+        no_context_found, messages and the answer cache entry (answer_cache,
+        cache_key, query_vector, cached - set on a cache hit, in which case
+        results/messages are not computed)
+    """
+    from app.services.rag_service import get_vector_store, pkb_location, EmbeddingService, EmbeddingModel, LLMModel
+    from app.services.answer_cache import AnswerCache, get_answer_cache
+    from app.settings import get_settings
     from sqlalchemy import text
     
     # Query PKB status using raw SQL
@@ -1314,6 +1377,7 @@ async def chat_with_pkb(
     
     message = request.get("message", "").strip()
     llm_model = request.get("llm_model", "gpt-4o-mini")
+    temperature = _request_temperature(request)
     
     if not message:
         raise HTTPException(
@@ -1329,68 +1393,102 @@ async def chat_with_pkb(
             detail=f"Insufficient credits"
         )
     
-    try:
-        # Get query embedding (sync method)
-        embedding_service = EmbeddingService()
-        from app.services.rag_service import EmbeddingModel
-        query_result = embedding_service.get_embedding(
-            text=message,
-            model=EmbeddingModel.OPENAI_SMALL
+    chat = {
+        "message": message,
+        "llm_model": llm_model,
+        "llm_model_enum": LLMModel.GPT4O_MINI if "mini" in llm_model.lower() else LLMModel.GPT4O,
+        "temperature": temperature,
+        "cached": None
+    }
+    
+    # Get query embedding (sync method)
+    embedding_service = EmbeddingService()
+    query_result = embedding_service.get_embedding(
+        text=message,
+        model=EmbeddingModel.OPENAI_SMALL
+    )
+    query_vector = query_result.embedding
+    chat["query_vector"] = query_vector
+    logger.info(f"🔍 Query embedding generated for: {message[:50]}...")
+    
+    # Same or similar question on an unchanged PKB: reuse the answer, no LLM call or charge
+    answer_cache = get_answer_cache()
+    cache_version = answer_cache.source_version(source_id)
+    chat["answer_cache"] = answer_cache
+    chat["cache_key"] = None
+    if cache_version is not None:
+        chat["cache_key"] = AnswerCache.make_key(
+            "chat", source_id, cache_version, model=llm_model, temperature=temperature
         )
-        query_vector = query_result.embedding
-        logger.info(f"🔍 Query embedding generated for: {message[:50]}...")
-        
-        # Search vector store (sync method)
-        vector_store = VectorStoreService()
-        
+        if not request.get("refresh"):
+            chat["cached"] = await asyncio.to_thread(answer_cache.get_similar, chat["cache_key"], message, query_vector)
+            if chat["cached"] is not None:
+                logger.info(f"⚡ PKB chat answered from cache for source {source_id}")
+                return chat
+    
+    # Search vector store
+    vector_store = get_vector_store()
+    location = pkb_location(current_user.id, source_id, pkb_collection_name)
+    
+    settings = get_settings()
+    if settings.RAG_HYBRID_ENABLED:
+        # Dense candidates + BM25 over the source's chunks (proper nouns, technical terms),
+        # fused by rank: better recall with fewer chunks in the LLM context
+        from app.services.hybrid_search import hybrid_rank, get_source_index
+        results = await vector_store.search(
+            collection_name=location.collection_name,
+            query_vector=query_vector,
+            top_k=settings.RAG_HYBRID_CANDIDATES,
+            score_threshold=settings.RAG_VECTOR_SCORE_THRESHOLD,
+            filter_conditions=location.filter_conditions
+        )
+        index = await get_source_index(db, source_id, location, vector_store)
+        results = hybrid_rank(message, results, index, settings.RAG_HYBRID_TOP_K)
+    else:
         # Get more context chunks for comprehensive responses
-        results = vector_store.search(
-            collection_name=pkb_collection_name,
+        results = await vector_store.search(
+            collection_name=location.collection_name,
             query_vector=query_vector,
             top_k=12,  # More chunks for creative content generation
-            score_threshold=0.15  # Lower threshold to capture more relevant content
+            score_threshold=0.15,  # Lower threshold to capture more relevant content
+            filter_conditions=location.filter_conditions
         )
-        
-        logger.info(f"📊 Vector search returned {len(results)} results for collection {pkb_collection_name}")
-        for i, r in enumerate(results):
-            logger.info(f"  Result {i+1}: score={r.score:.3f}, content_len={len(r.content)}")
-        
-        # Build context from SearchResult objects
-        context_chunks = [r.content for r in results]
-        context = "\n\n---\n\n".join(context_chunks)
-        
-        # Check if we got meaningful context
-        no_context_found = not context.strip() or len(results) == 0
-        
-        # If no results, try to get source content directly as fallback
-        fallback_context = None
-        if no_context_found:
-            logger.warning(f"⚠️ No context found for query: {message[:50]}, trying fallback...")
-            try:
-                # Get source content directly for general questions
-                source_sql = text("SELECT content FROM sources WHERE id = :source_id")
-                source_result = db.execute(source_sql, {"source_id": source_id})
-                source_row = source_result.fetchone()
-                if source_row and source_row[0]:
-                    # Take first 8000 chars as fallback context (enough for A4 page content)
-                    fallback_context = source_row[0][:8000]
-                    context = fallback_context
-                    no_context_found = False
-                    logger.info(f"📝 Using source content fallback: {len(fallback_context)} chars")
-            except Exception as fallback_err:
-                logger.warning(f"⚠️ Fallback failed: {fallback_err}")
-        
-        if no_context_found:
-            context = "No relevant context found in the knowledge base."
-        
-        # Generate response with LLM (sync method)
-        llm_service = LLMService()
-        from app.services.rag_service import LLMModel
-        llm_model_enum = LLMModel.GPT4O_MINI if "mini" in llm_model.lower() else LLMModel.GPT4O
-        
-        # Build better system prompt
-        if no_context_found:
-            system_prompt = """You are a helpful assistant. The knowledge base search returned no relevant results.
+    
+    logger.info(f"📊 Retrieval returned {len(results)} results for collection {pkb_collection_name}")
+    for i, r in enumerate(results):
+        logger.info(f"  Result {i+1}: score={r.score:.3f}, content_len={len(r.content)}")
+    
+    # Build context from SearchResult objects
+    context_chunks = [r.content for r in results]
+    context = "\n\n---\n\n".join(context_chunks)
+    
+    # Check if we got meaningful context
+    no_context_found = not context.strip() or len(results) == 0
+    
+    # If no results, try to get source content directly as fallback
+    fallback_context = None
+    if no_context_found:
+        logger.warning(f"⚠️ No context found for query: {message[:50]}, trying fallback...")
+        try:
+            # Get source content directly for general questions
+            source_sql = text("SELECT content FROM sources WHERE id = :source_id")
+            source_result = db.execute(source_sql, {"source_id": source_id})
+            source_row = source_result.fetchone()
+            if source_row and source_row[0]:
+                # Take first 8000 chars as fallback context (enough for A4 page content)
+                fallback_context = source_row[0][:8000]
+                context = fallback_context
+                no_context_found = False
+                logger.info(f"📝 Using source content fallback: {len(fallback_context)} chars")
+        except Exception as fallback_err:
+            logger.warning(f"⚠️ Fallback failed: {fallback_err}")
+    
+    if no_context_found:
+        context = "No relevant context found in the knowledge base."
+    
+    # Build better system prompt
+    if no_context_found:
+        system_prompt = """You are a helpful assistant. The knowledge base search returned no relevant results.
             
 Please respond with a helpful message explaining that:
 1. No relevant information was found in the knowledge base for this query
@@ -1398,9 +1496,9 @@ Please respond with a helpful message explaining that:
 3. Suggest the user to wait a moment and try again, or rephrase their question
 
 Respond in the same language as the user's question."""
-        else:
-            # Context found - use creative and comprehensive prompt
-            system_prompt = f"""Sen son derece yetenekli bir AI asistanısın. Kullanıcının belgelerinden elde edilen aşağıdaki bağlam bilgisini kullanarak HER TÜRLÜ görevi yerine getir.
+    else:
+        # Context found - use creative and comprehensive prompt
+        system_prompt = f"""Sen son derece yetenekli bir AI asistanısın. Kullanıcının belgelerinden elde edilen aşağıdaki bağlam bilgisini kullanarak HER TÜRLÜ görevi yerine getir.
 
 📄 KAYNAK İÇERİK:
 {context}
@@ -1426,70 +1524,223 @@ Respond in the same language as the user's question."""
 🌍 DİL: Kullanıcının dilinde yanıt ver (Türkçe soru = Türkçe cevap)
 
 Şimdi kullanıcının isteğini yerine getir:"""
+    
+    chat.update({
+        "results": results,
+        "no_context_found": no_context_found,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ]
+    })
+    return chat
+
+
+def _charge_pkb_chat(
+    db: Session,
+    current_user: User,
+    source_id: int,
+    chat: dict,
+    input_tokens: int,
+    output_tokens: int,
+    completed: bool = True
+) -> float:
+    """
+    Deduct the credits of a PKB chat answer
+    
+    Returns:
+        Credits deducted
+    """
+    from app.services.credit_service import get_credit_service
+    
+    credits_used = _pkb_chat_cost(chat["llm_model"], input_tokens, output_tokens)
+    
+    # Deduct credits
+    credit_service = get_credit_service(db)
+    # Use AI_ENHANCEMENT temporarily until rag_chat is added to PostgreSQL enum
+    credit_service.deduct_credits(
+        user_id=current_user.id,
+        amount=credits_used,
+        operation_type=OperationType.AI_ENHANCEMENT,  # TODO: Change to RAG_CHAT after enum migration
+        description=f"PKB chat: {chat['message'][:50]}",
+        metadata={
+            "source_id": source_id, 
+            "llm_model": chat["llm_model"], 
+            "type": "rag_chat",
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "completed": completed
+        }
+    )
+    return credits_used
+
+
+def _settle_pkb_chat(
+    db: Session,
+    current_user: User,
+    source_id: int,
+    chat: dict,
+    response_text: str,
+    input_tokens: int,
+    output_tokens: int
+) -> dict:
+    """
+    Charge a generated PKB chat answer and store it in the answer cache
+    
+    Returns:
+        Response body (answer fields + credits_used, cached=False)
+    """
+    credits_used = _charge_pkb_chat(db, current_user, source_id, chat, input_tokens, output_tokens)
+    
+    answer = {
+        "response": response_text,
+        "sources_used": [{"content_preview": r.content[:100], "score": r.score} for r in chat["results"]],
+        "no_context_warning": chat["no_context_found"],
+        "token_usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens
+        }
+    }
+    # "No context" answers only tell the user to retry later - don't keep them
+    if chat["cache_key"] is not None and not chat["no_context_found"]:
+        chat["answer_cache"].set_similar(chat["cache_key"], chat["message"], chat["query_vector"], answer)
+    
+    return {**answer, "credits_used": credits_used, "cached": False}
+
+
+@router.post("/{source_id}/pkb/chat")
+async def chat_with_pkb(
+    source_id: int,
+    request: dict,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Chat with source PKB using RAG
+    """
+    from app.services.rag_service import LLMService
+    
+    try:
+        chat = await _prepare_pkb_chat(source_id, request, db, current_user)
+        if chat["cached"] is not None:
+            return {**chat["cached"], "credits_used": 0.0, "cached": True}
         
+        # Generate response with LLM (sync method)
+        llm_service = LLMService()
         response_text, input_tokens, output_tokens = llm_service.generate_response(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ],
-            model=llm_model_enum
+            messages=chat["messages"],
+            model=chat["llm_model_enum"],
+            temperature=chat["temperature"]
         )
         
-        # Calculate credits based on token usage
-        # Pricing: 
-        #   - Embedding: 0.001 credits per query
-        #   - GPT-4o-mini: $0.15/1M input, $0.60/1M output -> ~0.0001 per 1K tokens
-        #   - GPT-4o: $2.50/1M input, $10/1M output -> ~0.001 per 1K tokens
-        embedding_cost = 0.001  # Per query embedding
+        return _settle_pkb_chat(db, current_user, source_id, chat, response_text, input_tokens, output_tokens)
         
-        if "mini" in llm_model.lower():
-            # GPT-4o-mini pricing (cheaper)
-            input_cost = (input_tokens / 1000) * 0.0002   # $0.15/1M = ~0.0002 per 1K
-            output_cost = (output_tokens / 1000) * 0.0008  # $0.60/1M = ~0.0008 per 1K
-        else:
-            # GPT-4o pricing (more expensive)
-            input_cost = (input_tokens / 1000) * 0.003    # $2.50/1M = ~0.003 per 1K
-            output_cost = (output_tokens / 1000) * 0.012  # $10/1M = ~0.012 per 1K
-        
-        credits_used = embedding_cost + input_cost + output_cost
-        credits_used = round(max(credits_used, 0.005), 4)  # Minimum 0.005, round to 4 decimals
-        
-        logger.info(f"💰 Chat cost breakdown: embedding={embedding_cost:.4f}, input={input_cost:.4f} ({input_tokens} tokens), output={output_cost:.4f} ({output_tokens} tokens), total={credits_used:.4f}")
-        
-        # Deduct credits
-        credit_service = get_credit_service(db)
-        # Use AI_ENHANCEMENT temporarily until rag_chat is added to PostgreSQL enum
-        credit_service.deduct_credits(
-            user_id=current_user.id,
-            amount=credits_used,
-            operation_type=OperationType.AI_ENHANCEMENT,  # TODO: Change to RAG_CHAT after enum migration
-            description=f"PKB chat: {message[:50]}",
-            metadata={
-                "source_id": source_id, 
-                "llm_model": llm_model, 
-                "type": "rag_chat",
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens
-            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ PKB chat failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Chat failed: {str(e)}"
         )
-        
-        return {
-            "response": response_text,
-            "sources_used": [{"content_preview": r.content[:100], "score": r.score} for r in results],
-            "credits_used": credits_used,
-            "no_context_warning": no_context_found,
-            "token_usage": {
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens
-            }
-        }
-        
+
+
+@router.post("/{source_id}/pkb/chat/stream")
+async def chat_with_pkb_stream(
+    source_id: int,
+    request: dict,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Streaming variant of PKB chat (Server-Sent Events)
+    
+    Events: "start" (sources used), "token" ({"text"}, repeated), "done"
+    (same body as /pkb/chat without "response") or "error". Credits are
+    deducted after the last token; a client that disconnects early is
+    charged for the tokens already sent. Cached answers are sent as a single
+    token.
+    """
+    from fastapi.responses import StreamingResponse
+    from app.database import SessionLocal
+    from app.services.rag_service import LLMService
+    from app.services.chunk_planner import count_tokens
+    from app.services.llm_streaming import SSE_HEADERS, StreamCharge, iterate_in_thread, sse_event
+    
+    try:
+        chat = await _prepare_pkb_chat(source_id, request, db, current_user)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ PKB chat failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Chat failed: {str(e)}"
         )
+    
+    async def events():
+        if chat["cached"] is not None:
+            cached = chat["cached"]
+            yield sse_event("start", {"sources_used": cached.get("sources_used", []), "cached": True})
+            yield sse_event("token", {"text": cached.get("response", "")})
+            yield sse_event("done", {
+                **{k: v for k, v in cached.items() if k != "response"},
+                "credits_used": 0.0,
+                "cached": True
+            })
+            return
+        
+        yield sse_event("start", {
+            "sources_used": [{"content_preview": r.content[:100], "score": r.score} for r in chat["results"]],
+            "cached": False
+        })
+        stream = None
+        
+        def charge(text: str, completed: bool) -> Optional[dict]:
+            session = SessionLocal()
+            try:
+                if completed:
+                    return _settle_pkb_chat(
+                        session, current_user, source_id, chat,
+                        stream.text, stream.input_tokens, stream.output_tokens
+                    )
+                # Abandoned stream: charge the tokens sent, don't cache the partial answer
+                _charge_pkb_chat(
+                    session, current_user, source_id, chat,
+                    stream.input_tokens, count_tokens(text), completed=False
+                )
+                return None
+            finally:
+                session.close()
+        
+        billing = StreamCharge(charge)
+        try:
+            llm_service = LLMService()
+            stream = await asyncio.to_thread(
+                llm_service.stream_response,
+                chat["messages"],
+                chat["llm_model_enum"],
+                chat["temperature"]
+            )
+            async for delta in iterate_in_thread(stream):
+                billing.delivered(delta)
+                yield sse_event("token", {"text": delta})
+            
+            body = billing.settle()
+        except Exception as e:
+            billing.failed = True
+            logger.error(f"❌ PKB chat stream failed: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        finally:
+            billing.close()
+        
+        if stream.first_token_seconds is not None:
+            body["first_token_seconds"] = round(stream.first_token_seconds, 3)
+        body.pop("response", None)
+        yield sse_event("done", body)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 # ============================================================================
@@ -1506,7 +1757,7 @@ async def search_pkb(
     """
     Semantic search in PKB - find most relevant passages
     """
-    from app.services.rag_service import VectorStoreService, EmbeddingService
+    from app.services.rag_service import get_vector_store, pkb_location, EmbeddingService
     from app.services.credit_service import get_credit_service
     from sqlalchemy import text
     
@@ -1553,12 +1804,13 @@ async def search_pkb(
         query_vector = query_result.embedding
         
         # Search vector store
-        vector_store = VectorStoreService()
-        results = vector_store.search(
-            collection_name=pkb_collection_name,
+        location = pkb_location(current_user.id, source_id, pkb_collection_name)
+        results = await get_vector_store().search(
+            collection_name=location.collection_name,
             query_vector=query_vector,
             top_k=top_k,
-            score_threshold=score_threshold
+            score_threshold=score_threshold,
+            filter_conditions=location.filter_conditions
         )
         
         logger.info(f"🔍 Search returned {len(results)} results for: {query[:50]}...")
@@ -1591,6 +1843,127 @@ async def search_pkb(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Search failed: {str(e)}")
 
 
+@router.post("/pkb/search")
+async def search_library(
+    request: dict,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Semantic search across all of the user's PKBs
+    
+    Sources in the shared collection are searched with a single filtered
+    query; sources still in their own (pre-migration) collections are
+    searched alongside and merged by score.
+    """
+    from app.services.rag_service import get_vector_store, shared_collection_name, EmbeddingService, EmbeddingModel
+    from app.services.credit_service import get_credit_service
+    from sqlalchemy import text
+    
+    query = request.get("query", "").strip()
+    top_k = min(request.get("top_k", 10), 50)  # Max 50 results
+    score_threshold = request.get("score_threshold", 0.3)
+    source_ids = request.get("source_ids")  # Optional subset of the library
+    
+    if not query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query is required")
+    
+    try:
+        sql = text("""
+            SELECT id, title, pkb_enabled, pkb_status, pkb_collection_name
+            FROM sources
+            WHERE user_id = :user_id
+        """)
+        rows = db.execute(sql, {"user_id": current_user.id}).fetchall()
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PKB feature requires database migration"
+        )
+    
+    ready = [
+        row for row in rows
+        if row[2] and row[3] == "ready" and row[4]
+        and (not source_ids or row[0] in source_ids)
+    ]
+    if not ready:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ready PKB found")
+    
+    # Credit check (search is cheap - only embedding cost)
+    credits_needed = 0.002
+    if current_user.credits < credits_needed:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient credits")
+    
+    titles = {row[0]: row[1] for row in ready}
+    shared = shared_collection_name()
+    shared_ids = [row[0] for row in ready if row[4] == shared]
+    dedicated = [(row[0], row[4]) for row in ready if row[4] != shared]
+    
+    try:
+        embedding_service = EmbeddingService()
+        query_result = embedding_service.get_embedding(text=query, model=EmbeddingModel.OPENAI_SMALL)
+        query_vector = query_result.embedding
+        
+        vector_store = get_vector_store()
+        searches = []
+        if shared_ids:
+            searches.append(vector_store.search(
+                collection_name=shared,
+                query_vector=query_vector,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                filter_conditions={"user_id": current_user.id, "source_id": shared_ids}
+            ))
+        for _, collection_name in dedicated:
+            searches.append(vector_store.search(
+                collection_name=collection_name,
+                query_vector=query_vector,
+                top_k=top_k,
+                score_threshold=score_threshold
+            ))
+        
+        batches = await asyncio.gather(*searches)
+        results = []
+        for batch, source_id in zip(batches, ([None] if shared_ids else []) + [sid for sid, _ in dedicated]):
+            for r in batch:
+                results.append((r.metadata.get("source_id", source_id), r))
+        results.sort(key=lambda item: item[1].score, reverse=True)
+        results = results[:top_k]
+        
+        logger.info(
+            f"🔍 Library search returned {len(results)} results for: {query[:50]}... "
+            f"({len(shared_ids)} shared, {len(dedicated)} dedicated sources)"
+        )
+        
+        credit_service = get_credit_service(db)
+        credit_service.deduct_credits(
+            user_id=current_user.id,
+            amount=credits_needed,
+            operation_type=OperationType.AI_ENHANCEMENT,
+            description=f"PKB library search: {query[:50]}",
+            metadata={"type": "rag_library_search", "sources": len(ready), "results_count": len(results)}
+        )
+        
+        return {
+            "results": [
+                {
+                    "source_id": source_id,
+                    "source_title": titles.get(source_id),
+                    "content": r.content,
+                    "score": round(r.score, 4),
+                    "metadata": r.metadata
+                }
+                for source_id, r in results
+            ],
+            "total_results": len(results),
+            "credits_used": credits_needed
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ PKB library search failed: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Search failed: {str(e)}")
+
+
 # ============================================================================
 # PKB SUMMARIZE
 # ============================================================================
@@ -1606,7 +1979,8 @@ async def summarize_pkb(
     Generate summary of PKB content
     Styles: bullet_points, paragraph, executive, detailed
     """
-    from app.services.rag_service import VectorStoreService, LLMService
+    from app.services.rag_service import get_vector_store, pkb_location, LLMService
+    from app.services.answer_cache import AnswerCache, get_answer_cache
     from app.services.credit_service import get_credit_service
     from sqlalchemy import text
     
@@ -1633,16 +2007,35 @@ async def summarize_pkb(
     style = request.get("style", "paragraph")  # bullet_points, paragraph, executive, detailed
     llm_model = request.get("llm_model", "gpt-4o-mini")
     max_chunks = min(request.get("max_chunks", 20), 50)  # Limit chunks to process
+    temperature = _request_temperature(request)
     
     # Summarization costs more (uses LLM)
     min_credits = 0.05
     if current_user.credits < min_credits:
         raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient credits")
     
+    # Summaries only change when the PKB is reindexed
+    answer_cache = get_answer_cache()
+    cache_version = answer_cache.source_version(source_id)
+    cache_key = None
+    if cache_version is not None:
+        cache_key = AnswerCache.make_key(
+            "summary", source_id, cache_version,
+            style=style, max_chunks=max_chunks, model=llm_model, temperature=temperature
+        )
+        cached = None if request.get("refresh") else answer_cache.get("summary", cache_key)
+        if cached is not None:
+            logger.info(f"⚡ PKB summary served from cache for source {source_id}")
+            return {**cached, "credits_used": 0.0, "cached": True}
+    
     try:
         # Get all chunks from PKB (or sample if too many)
-        vector_store = VectorStoreService()
-        all_points = vector_store.get_all_points(collection_name=pkb_collection_name, limit=max_chunks)
+        location = pkb_location(current_user.id, source_id, pkb_collection_name)
+        all_points = await get_vector_store().get_all_points(
+            collection_name=location.collection_name,
+            limit=max_chunks,
+            filter_conditions=location.filter_conditions
+        )
         
         if not all_points:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No content found in PKB")
@@ -1680,7 +2073,8 @@ Summarize the following content:"""
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": full_content}
             ],
-            model=llm_model_enum
+            model=llm_model_enum,
+            temperature=temperature
         )
         
         # Calculate credits
@@ -1705,13 +2099,16 @@ Summarize the following content:"""
             metadata={"source_id": source_id, "type": "rag_summarize", "style": style, "chunks_used": len(content_parts)}
         )
         
-        return {
+        answer = {
             "summary": summary,
             "style": style,
             "chunks_processed": len(content_parts),
-            "credits_used": credits_used,
             "token_usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}
         }
+        if cache_key is not None:
+            answer_cache.set(cache_key, answer)
+        
+        return {**answer, "credits_used": credits_used, "cached": False}
         
     except HTTPException:
         raise
@@ -1735,7 +2132,8 @@ async def generate_questions_from_pkb(
     Generate quiz/exam questions from PKB content
     Types: multiple_choice, true_false, short_answer, essay, flashcard
     """
-    from app.services.rag_service import VectorStoreService, LLMService
+    from app.services.rag_service import get_vector_store, pkb_location, LLMService
+    from app.services.answer_cache import AnswerCache, get_answer_cache
     from app.services.credit_service import get_credit_service
     from sqlalchemy import text
     
@@ -1765,16 +2163,36 @@ async def generate_questions_from_pkb(
     difficulty = request.get("difficulty", "medium")  # easy, medium, hard
     language = request.get("language", "en")  # Output language
     llm_model = request.get("llm_model", "gpt-4o-mini")
+    temperature = _request_temperature(request)
     
     # Credit check
     min_credits = 0.05
     if current_user.credits < min_credits:
         raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient credits")
     
+    # Same request on an unchanged PKB: reuse the question set ("refresh" forces a new one)
+    answer_cache = get_answer_cache()
+    cache_version = answer_cache.source_version(source_id)
+    cache_key = None
+    if cache_version is not None:
+        cache_key = AnswerCache.make_key(
+            "questions", source_id, cache_version,
+            count=question_count, type=question_type, difficulty=difficulty,
+            language=language, model=llm_model, temperature=temperature
+        )
+        cached = None if request.get("refresh") else answer_cache.get("questions", cache_key)
+        if cached is not None:
+            logger.info(f"⚡ PKB questions served from cache for source {source_id}")
+            return {**cached, "credits_used": 0.0, "cached": True}
+    
     try:
         # Get content from PKB
-        vector_store = VectorStoreService()
-        all_points = vector_store.get_all_points(collection_name=pkb_collection_name, limit=30)
+        location = pkb_location(current_user.id, source_id, pkb_collection_name)
+        all_points = await get_vector_store().get_all_points(
+            collection_name=location.collection_name,
+            limit=30,
+            filter_conditions=location.filter_conditions
+        )
         
         if not all_points:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No content found in PKB")
@@ -1839,7 +2257,8 @@ Ensure questions cover different topics from the content."""
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Generate questions from this content:\n\n{full_content}"}
             ],
-            model=llm_model_enum
+            model=llm_model_enum,
+            temperature=temperature
         )
         
         # Parse JSON response
@@ -1881,14 +2300,19 @@ Ensure questions cover different topics from the content."""
             metadata={"source_id": source_id, "type": "rag_questions", "question_type": question_type, "count": question_count}
         )
         
-        return {
+        answer = {
             "questions": questions,
             "question_type": question_type,
             "difficulty": difficulty,
             "language": language,
-            "credits_used": credits_used,
             "token_usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}
         }
+        # Unparseable output is not worth repeating
+        parse_failed = isinstance(questions, list) and bool(questions) and isinstance(questions[0], dict) and questions[0].get("parse_error")
+        if cache_key is not None and not parse_failed:
+            answer_cache.set(cache_key, answer)
+        
+        return {**answer, "credits_used": credits_used, "cached": False}
         
     except HTTPException:
         raise
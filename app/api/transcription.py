@@ -3,9 +3,13 @@ Transcription API endpoints
 File upload, transcription creation, status checking
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from typing import Awaitable, Callable, List, Optional, Set
+import asyncio
 import json
 import logging
 import time
@@ -17,15 +21,25 @@ from app.models.transcription import Transcription, TranscriptionStatus, Speaker
 from app.models.credit_transaction import OperationType
 from app.schemas.transcription import (
     FileUploadResponse,
+    ResumableUploadCreate,
+    ResumableUploadStatus,
     TranscriptionCreate,
     TranscriptionResponse,
+    TranscriptionSummary,
     TranscriptionListResponse,
     CostEstimationRequest,
     CostEstimationResponse
 )
 from app.auth.utils import get_current_active_user
-from app.services.storage import get_storage_service
+from app.services.storage import (
+    get_storage_service,
+    FileTooLargeError,
+    StoredFile,
+    UploadSessionError,
+    UPLOAD_CHUNK_SIZE
+)
 from app.services.credit_service import get_credit_service, CreditPricing, InsufficientCreditsError
+from app.services.progress_reporter import get_live_progress
 from app.settings import get_settings
 from app.websocket import get_ws_manager
 
@@ -50,6 +64,63 @@ except ImportError:
     CELERY_AVAILABLE = False
     logger.warning("⚠️ Celery not available. Using synchronous processing.")
 
+# Upload size limits
+MAX_MEDIA_UPLOAD_SIZE = 500 * 1024 * 1024  # 500MB
+MAX_DOCUMENT_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+
+ALLOWED_MEDIA_TYPES = [
+    "audio/mpeg", "audio/wav", "audio/x-wav", "audio/mp4", "audio/m4a",
+    "audio/flac", "audio/ogg", "audio/x-m4a",
+    "video/mp4", "video/x-msvideo", "video/quicktime", "video/x-matroska",
+    "video/webm", "application/octet-stream"
+]
+
+
+def _get_upload_size(upload: UploadFile) -> int:
+    """
+    Get upload size without reading it into memory
+    
+    The multipart parser has already spooled the body to a temp file,
+    so seeking to the end is enough.
+    """
+    upload.file.seek(0, 2)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+async def _save_upload(
+    storage,
+    upload: UploadFile,
+    filename: str,
+    max_size: int,
+    label: str = "File"
+) -> StoredFile:
+    """
+    Stream an upload to storage in blocks, enforcing the size limit
+    
+    Runs in the threadpool so disk I/O doesn't block the event loop.
+    Saved content is registered in the content-addressed store.
+    """
+    await upload.seek(0)
+    try:
+        stored = await run_in_threadpool(storage.save_file_stream, upload.file, filename, max_size)
+    except FileTooLargeError:
+        size = _get_upload_size(upload)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{label} too large: {size / 1024 / 1024:.1f}MB. Max: {max_size // (1024 * 1024)}MB"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"File upload failed: {str(e)}"
+        )
+    
+    # Keep identical content on disk once
+    await run_in_threadpool(storage.register_content, stored.file_id, stored.sha256)
+    return stored
+
 
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
@@ -67,55 +138,202 @@ async def upload_file(
     - Video: MP4, AVI, MOV, MKV, WEBM
     """
     # Validate file type
-    allowed_types = [
-        "audio/mpeg", "audio/wav", "audio/x-wav", "audio/mp4", "audio/m4a",
-        "audio/flac", "audio/ogg", "audio/x-m4a",
-        "video/mp4", "video/x-msvideo", "video/quicktime", "video/x-matroska",
-        "video/webm", "application/octet-stream"
-    ]
-    
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_MEDIA_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Unsupported file type: {file.content_type}. "
                    f"Supported: MP3, MP4, WAV, M4A, FLAC, OGG, AVI, MOV, MKV, WEBM"
         )
     
-    # Check file size (max 500MB)
-    max_size = 500 * 1024 * 1024  # 500MB
-    file_content = await file.read()
-    file_size = len(file_content)
+    # Stream file to storage (max 500MB, enforced while writing)
+    stored = await _save_upload(storage, file, file.filename, MAX_MEDIA_UPLOAD_SIZE)
     
-    if file_size > max_size:
+    return FileUploadResponse(
+        file_id=stored.file_id,
+        filename=file.filename,
+        file_size=stored.file_size,
+        content_type=file.content_type,
+        content_hash=stored.sha256,
+        message=f"File uploaded successfully: {file.filename}"
+    )
+
+
+async def _get_owned_upload_session(storage, upload_id: str, current_user: User) -> dict:
+    """Load a resumable upload session, 404 if missing or owned by someone else"""
+    session = await run_in_threadpool(storage.get_upload_session, upload_id)
+    if not session or session["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Upload session not found: {upload_id}"
+        )
+    return session
+
+
+def _upload_status(session: dict) -> ResumableUploadStatus:
+    return ResumableUploadStatus(
+        upload_id=session["upload_id"],
+        filename=session["filename"],
+        content_type=session["content_type"],
+        total_size=session["total_size"],
+        offset=session["offset"],
+        status=session["status"],
+        expires_at=datetime.fromtimestamp(session["expires_at"]) if session["expires_at"] else None
+    )
+
+
+@router.post("/uploads", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    upload: ResumableUploadCreate,
+    current_user: User = Depends(get_current_active_user),
+    storage = Depends(get_storage_service)
+) -> ResumableUploadStatus:
+    """
+    Start a resumable (chunked) upload
+    
+    Flow:
+    1. POST /uploads → upload_id
+    2. PATCH /uploads/{upload_id} with `Upload-Offset` header and raw bytes (repeat)
+    3. GET /uploads/{upload_id} after a dropped connection to get the offset to resume from
+    4. POST /uploads/{upload_id}/complete → file_id for POST /transcriptions/
+    """
+    if upload.content_type not in ALLOWED_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {upload.content_type}"
+        )
+    
+    if upload.file_size > MAX_MEDIA_UPLOAD_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large: {file_size / 1024 / 1024:.1f}MB. Max: 500MB"
+            detail=f"File too large: {upload.file_size / 1024 / 1024:.1f}MB. Max: 500MB"
         )
     
-    # Reset file pointer
-    await file.seek(0)
+    session = await run_in_threadpool(
+        storage.create_upload_session,
+        filename=upload.filename,
+        total_size=upload.file_size,
+        content_type=upload.content_type,
+        user_id=current_user.id
+    )
+    return _upload_status(session)
+
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(
+    upload_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    storage = Depends(get_storage_service)
+) -> ResumableUploadStatus:
+    """
+    Get resumable upload offset
+    
+    Clients resume by sending the next PATCH at the returned `offset`.
+    """
+    session = await _get_owned_upload_session(storage, upload_id, current_user)
+    response.headers["Upload-Offset"] = str(session["offset"])
+    response.headers["Upload-Length"] = str(session["total_size"])
+    return _upload_status(session)
+
+
+@router.patch("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., description="Byte offset of this chunk"),
+    current_user: User = Depends(get_current_active_user),
+    storage = Depends(get_storage_service)
+) -> ResumableUploadStatus:
+    """
+    Append a byte range to a resumable upload
+    
+    - **Upload-Offset** header: must equal the current offset (409 otherwise)
+    - Body: raw bytes (any length; the request body is streamed to disk)
+    
+    If the connection drops mid-request, everything received so far is kept.
+    """
+    await _get_owned_upload_session(storage, upload_id, current_user)
     
-    # Save file
+    offset = upload_offset
+    buffer = bytearray()
     try:
-        file_id, file_path = storage.save_file(file.file, file.filename)
-    except Exception as e:
+        try:
+            async for chunk in request.stream():
+                buffer.extend(chunk)
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    offset = await run_in_threadpool(storage.write_upload_chunk, upload_id, offset, bytes(buffer))
+                    buffer.clear()
+        except ClientDisconnect:
+            logger.info(f"📴 Client disconnected during upload {upload_id}, keeping received bytes")
+        if buffer:
+            offset = await run_in_threadpool(storage.write_upload_chunk, upload_id, offset, bytes(buffer))
+    except UploadSessionError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": str(e), "offset": e.offset}
+        )
+    
+    session = await _get_owned_upload_session(storage, upload_id, current_user)
+    response.headers["Upload-Offset"] = str(session["offset"])
+    return _upload_status(session)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse)
+async def complete_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    storage = Depends(get_storage_service)
+) -> FileUploadResponse:
+    """
+    Finalize a resumable upload
+    
+    Returns a file_id that can be passed to POST /transcriptions/ instead of a file.
+    """
+    session = await _get_owned_upload_session(storage, upload_id, current_user)
+    
+    try:
+        stored = await run_in_threadpool(storage.complete_upload_session, upload_id)
+    except UploadSessionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": str(e), "offset": e.offset}
         )
+    await run_in_threadpool(storage.register_content, stored.file_id, stored.sha256)
     
     return FileUploadResponse(
-        file_id=file_id,
-        filename=file.filename,
-        file_size=file_size,
-        content_type=file.content_type,
-        message=f"File uploaded successfully: {file.filename}"
+        file_id=stored.file_id,
+        filename=session["filename"],
+        file_size=stored.file_size,
+        content_type=session["content_type"],
+        content_hash=stored.sha256,
+        message=f"File uploaded successfully: {session['filename']}"
     )
 
 
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    storage = Depends(get_storage_service)
+) -> None:
+    """
+    Cancel a resumable upload and discard received data
+    """
+    await _get_owned_upload_session(storage, upload_id, current_user)
+    try:
+        await run_in_threadpool(storage.abort_upload_session, upload_id)
+    except UploadSessionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": str(e), "offset": e.offset}
+        )
+
+
 @router.post("/", response_model=TranscriptionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transcription(
-    file: UploadFile = File(...),
+    file: UploadFile | None = File(None),
+    file_id: str | None = Form(None),  # Completed resumable upload (instead of file)
     whisper_model: str = Form("tiny"),
     transcription_provider: str = Form("openai_whisper"),  # "openai_whisper" or "assemblyai"
     enable_diarization: bool = Form(False),
@@ -138,6 +356,7 @@ async def create_transcription(
     Create transcription job with direct file upload
     
     - **file**: Audio or video file
+    - **file_id**: ID of a completed resumable upload (alternative to file)
     - **whisper_model**: Whisper model size (tiny, base, small, medium, large)
     - **language**: Language code (tr, en, de, etc.) or null for auto-detect
     - **enable_diarization**: Enable speaker diarization with pyannote.audio 3.1
@@ -148,42 +367,41 @@ async def create_transcription(
     - **gemini_mode**: Processing mode (text, note, custom)
     - **custom_prompt**: Custom prompt (required if gemini_mode=custom)
     """
-    # Validate file type
-    allowed_types = [
-        "audio/mpeg", "audio/wav", "audio/x-wav", "audio/mp4", "audio/m4a",
-        "audio/flac", "audio/ogg", "audio/x-m4a",
-        "video/mp4", "video/x-msvideo", "video/quicktime", "video/x-matroska",
-        "video/webm", "application/octet-stream"
-    ]
-    
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file type: {file.content_type}"
-        )
-    
-    # Check file size (max 500MB)
-    max_size = 500 * 1024 * 1024
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    if file_size > max_size:
+    if (file is None) == (file_id is None):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large: {file_size / 1024 / 1024:.1f}MB. Max: 500MB"
+            detail="Provide either file or file_id"
         )
     
-    # Reset file pointer and save file
-    await file.seek(0)
-    try:
-        file_id, file_path = storage.save_file(file.file, file.filename)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
-        )
+    if file is not None:
+        # Validate file type
+        if file.content_type not in ALLOWED_MEDIA_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported file type: {file.content_type}"
+            )
+        
+        # Stream file to storage (max 500MB, enforced while writing)
+        stored = await _save_upload(storage, file, file.filename, MAX_MEDIA_UPLOAD_SIZE)
+        file_id, file_path, file_size = stored.file_id, stored.file_path, stored.file_size
+        content_hash = stored.sha256
+        original_filename = file.filename
+        content_type = file.content_type
+    else:
+        # Use a completed resumable upload
+        session = await _get_owned_upload_session(storage, file_id, current_user)
+        file_path = storage.get_file_path(file_id)
+        if session["status"] != "completed" or file_path is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Upload not completed: {file_id}"
+            )
+        file_size = session["total_size"]
+        content_hash = session.get("sha256")
+        original_filename = session["filename"]
+        content_type = session["content_type"]
     
-    filename = file.filename
+    filename = original_filename
     
     # Validate gemini_mode
     from app.models.transcription import GeminiMode
@@ -207,7 +425,7 @@ async def create_transcription(
     
     # Estimate duration based on file size (rough estimate: 128kbps audio)
     # Audio: ~960 KB/min (128kbps), Video: ~7-15 MB/min
-    is_video = file.content_type.startswith('video/')
+    is_video = content_type.startswith('video/')
     estimated_minutes = file_size / (10 * 1024 * 1024) if is_video else file_size / (960 * 1024)
     estimated_duration = max(1, int(estimated_minutes * 60))  # At least 1 second
     
@@ -254,7 +472,7 @@ async def create_transcription(
     logger.info(f"=" * 80)
     logger.info(f"🎯 NEW TRANSCRIPTION REQUEST")
     logger.info(f"   User: {current_user.username} (ID: {current_user.id})")
-    logger.info(f"   File: {file.filename}")
+    logger.info(f"   File: {original_filename}")
     logger.info(f"   Provider: {transcription_provider}")
     logger.info(f"   🔍 enable_assemblyai_speech_understanding: {enable_assemblyai_speech_understanding} (type: {type(enable_assemblyai_speech_understanding)})")
     logger.info(f"   🤖 enable_assemblyai_llm_gateway: {enable_assemblyai_llm_gateway} (type: {type(enable_assemblyai_llm_gateway)})")
@@ -285,10 +503,11 @@ async def create_transcription(
         user_id=current_user.id,
         file_id=file_id,
         filename=filename,
-        original_filename=file.filename,
+        original_filename=original_filename,
         file_size=file_size,
         file_path=str(file_path),
-        content_type=file.content_type,
+        content_type=content_type,
+        content_hash=content_hash,
         language=language,
         whisper_model=whisper_model,
         transcription_provider=transcription_provider,  # "openai_whisper" or "assemblyai"
@@ -342,9 +561,51 @@ async def create_transcription(
     return transcription
 
 
+TEXT_PREVIEW_CHARS = 200
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """
+    Validate a comma-separated fields= list against TranscriptionResponse
+    
+    Returns:
+        Requested response fields, or None for the full response
+    """
+    if not fields:
+        return None
+    
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    column_names = set(Transcription.__table__.columns.keys())
+    allowed = {
+        name for name in TranscriptionResponse.model_fields
+        if name in column_names or name in Transcription.PROPERTY_COLUMNS
+    }
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return requested
+
+
+def _projection_columns(requested: Set[str]) -> List[str]:
+    """Columns to load for the summary plus the requested fields"""
+    columns = set(Transcription.SUMMARY_COLUMNS)
+    for name in requested:
+        columns.update(Transcription.PROPERTY_COLUMNS.get(name, (name,)))
+    return sorted(columns)
+
+
 @router.get("/{transcription_id}", response_model=TranscriptionResponse)
 async def get_transcription(
     transcription_id: int,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated heavy fields to include (e.g. text,segments,summary). "
+                    "Only list-view fields plus these are loaded; others are returned as null. "
+                    "Omit for the full transcription."
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> TranscriptionResponse:
@@ -353,10 +614,16 @@ async def get_transcription(
     
     Returns transcription status and result
     """
-    transcription = db.query(Transcription).filter(
+    requested = _parse_fields(fields)
+    
+    query = db.query(Transcription).filter(
         Transcription.id == transcription_id,
         Transcription.user_id == current_user.id
-    ).first()
+    )
+    if requested is not None:
+        columns = _projection_columns(requested)
+        query = query.options(load_only(*[getattr(Transcription, name) for name in columns]))
+    transcription = query.first()
     
     if not transcription:
         raise HTTPException(
@@ -364,6 +631,17 @@ async def get_transcription(
             detail=f"Transcription not found: {transcription_id}"
         )
     
+    if requested is not None:
+        # Build the response from loaded columns only (no lazy loads of deferred blobs)
+        data = {name: getattr(transcription, name) for name in columns}
+        for name in requested & Transcription.PROPERTY_COLUMNS.keys():
+            data[name] = getattr(transcription, name)
+        if transcription.status == TranscriptionStatus.PROCESSING:
+            live = get_live_progress("transcription", transcription_id)
+            if live and live.get("progress", 0) > (data.get("progress") or 0):
+                data["progress"] = live["progress"]
+        return TranscriptionResponse.model_validate(data)
+    
     # Parse JSON fields if they're strings (SQLite stores JSON as TEXT)
     if transcription.custom_prompt_history and isinstance(transcription.custom_prompt_history, str):
         import json
@@ -373,6 +651,12 @@ async def get_transcription(
             logger.warning(f"Failed to parse custom_prompt_history for transcription {transcription_id}")
             transcription.custom_prompt_history = []
     
+    # The worker commits progress in coalesced steps; show the live value
+    if transcription.status == TranscriptionStatus.PROCESSING:
+        live = get_live_progress("transcription", transcription_id)
+        if live and live.get("progress", 0) > (transcription.progress or 0):
+            transcription.progress = live["progress"]
+    
     return transcription
 
 
@@ -389,28 +673,30 @@ async def list_transcriptions(
     Supports pagination
     """
     # Count total
-    total = db.query(Transcription).filter(
+    total = db.query(func.count(Transcription.id)).filter(
         Transcription.user_id == current_user.id
-    ).count()
+    ).scalar()
     
-    # Get page
+    # Get page: list-view columns only, heavy Text/JSON columns stay deferred
+    # (use GET /transcriptions/{id}?fields=... for blobs)
     skip = (page - 1) * page_size
-    transcriptions = db.query(Transcription).filter(
+    rows = db.query(
+        Transcription,
+        func.substr(Transcription.text, 1, TEXT_PREVIEW_CHARS).label("text_preview")
+    ).options(
+        load_only(*[getattr(Transcription, name) for name in Transcription.SUMMARY_COLUMNS])
+    ).filter(
         Transcription.user_id == current_user.id
     ).order_by(Transcription.created_at.desc()).offset(skip).limit(page_size).all()
     
-    # Parse JSON fields if they're strings (SQLite stores JSON as TEXT)
-    for transcription in transcriptions:
-        if transcription.custom_prompt_history and isinstance(transcription.custom_prompt_history, str):
-            import json
-            try:
-                transcription.custom_prompt_history = json.loads(transcription.custom_prompt_history)
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse custom_prompt_history for transcription {transcription.id}")
-                transcription.custom_prompt_history = []
+    items = []
+    for transcription, text_preview in rows:
+        item = TranscriptionSummary.model_validate(transcription)
+        item.text_preview = text_preview
+        items.append(item)
     
     return TranscriptionListResponse(
-        items=transcriptions,
+        items=items,
         total=total,
         page=page,
         page_size=page_size
@@ -441,7 +727,7 @@ async def delete_transcription(
         )
     
     # Delete file from storage
-    storage.delete_file(transcription.file_id)
+    storage.delete_file(transcription.file_id, transcription.content_hash)
     
     # Delete from database
     db.delete(transcription)
@@ -602,6 +888,29 @@ async def generate_lecture_notes(
         )
 
 
+def _push_custom_prompt_history(transcription: Transcription, entry: dict) -> int:
+    """
+    Add a custom prompt result to the transcription's history (newest first)
+    
+    Returns:
+        Number of entries kept
+    """
+    # Get existing history or create new list
+    history = transcription.custom_prompt_history or []
+    if isinstance(history, str):
+        history = json.loads(history)
+    
+    # Add new entry at the beginning (newest first)
+    history.insert(0, entry)
+    
+    # Keep only last 10 entries to avoid DB bloat
+    history = history[:10]
+    
+    # SQLite stores JSON as TEXT, so we need to serialize manually
+    transcription.custom_prompt_history = json.dumps(history, ensure_ascii=False)
+    return len(history)
+
+
 @router.post("/{transcription_id}/apply-custom-prompt", response_model=TranscriptionResponse)
 async def apply_custom_prompt(
     transcription_id: int,
@@ -730,25 +1039,13 @@ async def apply_custom_prompt(
             "metadata": {k: v for k, v in custom_result.items() if k not in ["processed_text"]}
         }
         
-        # Get existing history or create new list
-        history = transcription.custom_prompt_history or []
-        if isinstance(history, str):
-            history = json.loads(history)
-        
-        # Add new entry at the beginning (newest first)
-        history.insert(0, new_entry)
-        
-        # Keep only last 10 entries to avoid DB bloat
-        history = history[:10]
-        
-        # SQLite stores JSON as TEXT, so we need to serialize manually
-        transcription.custom_prompt_history = json.dumps(history, ensure_ascii=False)
+        history_count = _push_custom_prompt_history(transcription, new_entry)
         
         # Update gemini_metadata (JSON column accepts dict directly)
         current_meta = transcription.gemini_metadata or {}
         transcription.gemini_metadata = {
             **current_meta,
-            "custom_prompt_count": len(history),
+            "custom_prompt_count": history_count,
             "last_custom_prompt": {
                 "provider": ai_provider,
                 "model": ai_model,
@@ -1092,6 +1389,425 @@ async def enhance_transcription(
         )
 
 
+# ============================================================================
+# STREAMING POST-PROCESSING (Server-Sent Events)
+# ============================================================================
+#
+# Streaming variants of /enhance, /apply-custom-prompt and
+# /generate-lecture-notes. Tokens are sent as they arrive:
+#
+#   event: start  {"provider", "model", "parts"}
+#   event: token  {"text"}            (repeated)
+#   event: done   {...}               (after the result is saved and charged)
+#   event: error  {"detail"}
+#
+# Credits are deducted once the whole stream has been generated and saved.
+# If the client disconnects after receiving output, the flat fee of the
+# operation is still charged and the partial output is saved (marked
+# partial) so the user keeps what they paid for; a stream that ended
+# before any token was sent is not charged.
+
+def _post_processing_source_text(transcription: Transcription) -> tuple:
+    """
+    Best available text for post-processing
+    
+    Returns:
+        (text, source name) - enhanced > cleaned > document > original
+    """
+    for field in ("enhanced_text", "cleaned_text", "document_text", "text"):
+        value = getattr(transcription, field)
+        if value:
+            return value, field if field != "text" else "original_text"
+    return None, None
+
+
+def _stream_ai_response(
+    transcription_id: int,
+    gemini,
+    chunk_messages: List[List[dict]],
+    settle: Callable[[str, dict], Awaitable[dict]],
+    charge: Optional[Callable[[str, bool], None]] = None
+):
+    """
+    Stream a post-processing operation as Server-Sent Events
+    
+    Args:
+        transcription_id: Transcription being processed (for logs)
+        gemini: GeminiService with the selected provider/model
+        chunk_messages: GeminiService.stream_messages() output, streamed in order
+        settle: async (full text, stream stats) -> "done" payload; saves the result
+        charge: (delivered text, completed) -> None; deducts credits. Runs after
+            settle, or with completed=False if the client disconnects after
+            receiving output (it then also saves the partial text)
+    """
+    from fastapi.responses import StreamingResponse
+    from app.services.llm_streaming import SSE_HEADERS, StreamCharge, iterate_in_thread, sse_event
+    
+    async def events():
+        billing = StreamCharge(charge or (lambda text, completed: None))
+        yield sse_event("start", {
+            "provider": gemini._get_provider_name(),
+            "model": gemini.model_name,
+            "parts": len(chunk_messages)
+        })
+        
+        input_tokens = output_tokens = 0
+        first_token_seconds = None
+        start_time = time.time()
+        try:
+            for i, messages in enumerate(chunk_messages):
+                if i:
+                    billing.delivered("\n\n")
+                    yield sse_event("token", {"text": "\n\n"})
+                stream = await asyncio.to_thread(gemini.stream_completion, messages)
+                async for delta in iterate_in_thread(stream):
+                    if first_token_seconds is None:
+                        first_token_seconds = time.time() - start_time
+                        logger.info(f"⚡ First token for transcription {transcription_id} after {first_token_seconds:.2f}s")
+                    billing.delivered(delta)
+                    yield sse_event("token", {"text": delta})
+                input_tokens += stream.input_tokens
+                output_tokens += stream.output_tokens
+            
+            done = await settle(billing.text, {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "first_token_seconds": first_token_seconds,
+                "total_seconds": time.time() - start_time
+            })
+            billing.settle()
+        except Exception as e:
+            billing.failed = True
+            logger.error(f"❌ Streaming failed for transcription {transcription_id}: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        finally:
+            billing.close()
+        
+        yield sse_event("done", done)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def _load_for_stream(db: Session, transcription_id: int, user_id: int) -> Transcription:
+    """Owned transcription with text to post-process (404 / 400 otherwise)"""
+    transcription = db.query(Transcription).filter(
+        Transcription.id == transcription_id,
+        Transcription.user_id == user_id
+    ).first()
+    
+    if not transcription:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Transcription not found: {transcription_id}"
+        )
+    
+    if not _post_processing_source_text(transcription)[0]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No text available. Wait for transcription or document analysis to complete."
+        )
+    return transcription
+
+
+def _check_stream_credits(credit_service, user_id: int, operation: str, model: str, provider: str) -> float:
+    """Credits the operation will cost (402 if the balance is too low)"""
+    required_credits = credit_service.calculate_operation_cost(operation, model, provider)
+    if not credit_service.check_sufficient_credits(user_id, required_credits):
+        user_balance = credit_service.get_balance(user_id)
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "error": "Insufficient credits",
+                "required": required_credits,
+                "available": user_balance,
+                "model": model,
+                "provider": provider,
+                "message": f"This operation with {model} ({provider}) requires {required_credits} credits but you only have {user_balance}."
+            }
+        )
+    return required_credits
+
+
+def _stream_gemini_service(ai_provider: Optional[str], ai_model: Optional[str]):
+    """GeminiService for a streaming request (503 if the provider is not configured)"""
+    from app.services.gemini_service import GeminiService, get_gemini_service
+    
+    gemini = GeminiService(preferred_provider=ai_provider, preferred_model=ai_model) if ai_provider else get_gemini_service()
+    if not gemini.is_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI provider '{ai_provider or gemini.provider}' is not configured"
+        )
+    return gemini
+
+
+@router.post("/{transcription_id}/enhance/stream")
+async def enhance_transcription_stream(
+    transcription_id: int,
+    include_summary: bool = True,
+    ai_provider: Optional[str] = None,
+    ai_model: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Streaming variant of /enhance (Server-Sent Events)
+    
+    The enhanced text is streamed as it is generated; the summary (if
+    requested) is generated after the text and sent as a "summary" field of
+    the "done" event.
+    """
+    from app.database import SessionLocal
+    
+    transcription = db.query(Transcription).filter(
+        Transcription.id == transcription_id,
+        Transcription.user_id == current_user.id
+    ).first()
+    
+    if not transcription:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transcription not found")
+    
+    audio_completed = transcription.status == TranscriptionStatus.COMPLETED and transcription.text
+    document_completed = transcription.has_document and transcription.vision_status == "completed"
+    content_for_enhance = (
+        transcription.document_text if document_completed and transcription.document_text else
+        transcription.text if audio_completed else
+        None
+    )
+    if not content_for_enhance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either audio transcription or document analysis must be completed"
+        )
+    
+    gemini = _stream_gemini_service(ai_provider, ai_model)
+    language = transcription.language or "tr"
+    chunk_messages = gemini.stream_messages("enhance", content_for_enhance, language)
+    
+    async def settle(enhanced_text: str, stats: dict) -> dict:
+        summary = ""
+        if include_summary:
+            summary = (await gemini._generate_summary_only(enhanced_text, language)).get("summary", "")
+        
+        session = SessionLocal()
+        try:
+            record = session.query(Transcription).filter(Transcription.id == transcription_id).first()
+            record.enhanced_text = enhanced_text
+            record.summary = summary
+            record.gemini_status = "completed"
+            record.gemini_improvements = []
+            record.gemini_metadata = {
+                "model_used": gemini.model_name,
+                "provider": gemini._get_provider_name(),
+                "original_length": len(content_for_enhance),
+                "enhanced_length": len(enhanced_text),
+                "word_count": len(enhanced_text.split()),
+                "enhancement_time": stats["total_seconds"],
+                "first_token_seconds": stats["first_token_seconds"],
+                "language": language,
+                "streamed": True
+            }
+            session.commit()
+        finally:
+            session.close()
+        
+        logger.info(f"✅ Streamed enhancement saved for transcription {transcription_id}")
+        return {"summary": summary, "enhanced_length": len(enhanced_text), **stats}
+    
+    return _stream_ai_response(transcription_id, gemini, chunk_messages, settle)
+
+
+@router.post("/{transcription_id}/generate-lecture-notes/stream")
+async def generate_lecture_notes_stream(
+    transcription_id: int,
+    ai_provider: str = Form("gemini"),
+    ai_model: str | None = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Streaming variant of /generate-lecture-notes (Server-Sent Events)
+    
+    Markdown notes are streamed as they are generated (web search enrichment
+    is skipped so output starts right away). Credits are deducted after the
+    last token; a client that disconnects after receiving output is charged
+    too and the partial notes are saved.
+    """
+    from app.database import SessionLocal
+    
+    selected_model = ai_model or "gemini-2.5-flash"
+    selected_provider = ai_provider or "gemini"
+    
+    credit_service = get_credit_service(db)
+    required_credits = _check_stream_credits(credit_service, current_user.id, "lecture_notes", selected_model, selected_provider)
+    
+    transcription = _load_for_stream(db, transcription_id, current_user.id)
+    source_text, text_source_used = _post_processing_source_text(transcription)
+    original_filename = transcription.original_filename
+    
+    gemini = _stream_gemini_service(selected_provider, ai_model)
+    chunk_messages = gemini.stream_messages("lecture_notes", source_text, transcription.language or "auto")
+    
+    def save(session, lecture_notes: str, partial: bool = False) -> None:
+        record = session.query(Transcription).filter(Transcription.id == transcription_id).first()
+        record.lecture_notes = lecture_notes
+        record.gemini_metadata = {
+            **(record.gemini_metadata or {}),
+            "lecture_notes_source": text_source_used,
+            "lecture_notes_provider": ai_provider,
+            "lecture_notes_model": ai_model,
+            "lecture_notes_streamed": True,
+            "lecture_notes_partial": partial
+        }
+        session.commit()
+    
+    async def settle(lecture_notes: str, stats: dict) -> dict:
+        session = SessionLocal()
+        try:
+            save(session, lecture_notes)
+        finally:
+            session.close()
+        
+        logger.info(f"✅ Streamed lecture notes saved for transcription {transcription_id}")
+        return {"credits_used": required_credits, "notes_length": len(lecture_notes), **stats}
+    
+    def charge(lecture_notes: str, completed: bool) -> None:
+        session = SessionLocal()
+        try:
+            if not completed:
+                # Abandoned stream: the fee is flat, so keep what was generated
+                save(session, lecture_notes, partial=True)
+                logger.info(f"📴 Partial lecture notes saved for transcription {transcription_id}")
+            get_credit_service(session).deduct_credits(
+                user_id=current_user.id,
+                amount=required_credits,
+                operation_type=OperationType.LECTURE_NOTES,
+                description=f"Lecture Notes: {original_filename}",
+                transcription_id=transcription_id,
+                metadata={
+                    "source_text_length": len(source_text),
+                    "notes_length": len(lecture_notes),
+                    "text_source": text_source_used,
+                    "provider": ai_provider,
+                    "model": ai_model,
+                    "streamed": True,
+                    "completed": completed
+                }
+            )
+        finally:
+            session.close()
+        logger.info(f"💰 {required_credits} credits deducted for streamed lecture notes")
+    
+    return _stream_ai_response(transcription_id, gemini, chunk_messages, settle, charge)
+
+
+@router.post("/{transcription_id}/apply-custom-prompt/stream")
+async def apply_custom_prompt_stream(
+    transcription_id: int,
+    custom_prompt: str = Form(..., description="Custom instructions for AI"),
+    ai_provider: str = Form("gemini"),
+    ai_model: str | None = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Streaming variant of /apply-custom-prompt (Server-Sent Events)
+    
+    The result is streamed as it is generated, then added to the custom
+    prompt history and charged. A client that disconnects after receiving
+    output is charged too and the partial result is added to the history.
+    """
+    from app.database import SessionLocal
+    from datetime import datetime
+    
+    if not custom_prompt or not custom_prompt.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Custom prompt cannot be empty"
+        )
+    
+    selected_model = ai_model or "gemini-2.5-flash"
+    selected_provider = ai_provider or "gemini"
+    
+    credit_service = get_credit_service(db)
+    required_credits = _check_stream_credits(credit_service, current_user.id, "custom_prompt", selected_model, selected_provider)
+    
+    transcription = _load_for_stream(db, transcription_id, current_user.id)
+    source_text, text_source_used = _post_processing_source_text(transcription)
+    original_filename = transcription.original_filename
+    
+    gemini = _stream_gemini_service(selected_provider, ai_model)
+    chunk_messages = gemini.stream_messages(
+        "custom_prompt", source_text, transcription.language or "auto", custom_prompt=custom_prompt
+    )
+    
+    def save(session, result_text: str, metadata: dict) -> None:
+        record = session.query(Transcription).filter(Transcription.id == transcription_id).first()
+        record.custom_prompt = custom_prompt
+        record.custom_prompt_result = result_text
+        
+        new_entry = {
+            "prompt": custom_prompt,
+            "result": result_text,
+            "model": selected_model,
+            "provider": selected_provider,
+            "text_source": text_source_used,
+            "timestamp": datetime.now().isoformat(),
+            "credits_used": required_credits,
+            "metadata": {"streamed": True, **metadata}
+        }
+        history_count = _push_custom_prompt_history(record, new_entry)
+        record.gemini_metadata = {
+            **(record.gemini_metadata or {}),
+            "custom_prompt_count": history_count,
+            "last_custom_prompt": {
+                "provider": ai_provider,
+                "model": ai_model,
+                "timestamp": new_entry["timestamp"]
+            }
+        }
+        session.commit()
+    
+    async def settle(result_text: str, stats: dict) -> dict:
+        session = SessionLocal()
+        try:
+            save(session, result_text, stats)
+        finally:
+            session.close()
+        
+        logger.info(f"✅ Streamed custom prompt result saved for transcription {transcription_id}")
+        return {"credits_used": required_credits, "output_length": len(result_text), **stats}
+    
+    def charge(result_text: str, completed: bool) -> None:
+        session = SessionLocal()
+        try:
+            if not completed:
+                # Abandoned stream: the fee is flat, so keep what was generated
+                save(session, result_text, {"partial": True})
+                logger.info(f"📴 Partial custom prompt result saved for transcription {transcription_id}")
+            get_credit_service(session).deduct_credits(
+                user_id=current_user.id,
+                amount=required_credits,
+                operation_type=OperationType.CUSTOM_PROMPT,
+                description=f"Custom Prompt: {original_filename}",
+                transcription_id=transcription_id,
+                metadata={
+                    "prompt_length": len(custom_prompt),
+                    "output_length": len(result_text),
+                    "provider": ai_provider,
+                    "model": ai_model,
+                    "streamed": True,
+                    "completed": completed
+                }
+            )
+        finally:
+            session.close()
+        logger.info(f"💰 {required_credits} credits deducted for streamed custom prompt")
+    
+    return _stream_ai_response(transcription_id, gemini, chunk_messages, settle, charge)
+
+
 @router.post("/{transcription_id}/generate-exam-questions", response_model=TranscriptionResponse)
 async def generate_exam_questions(
     transcription_id: int,
@@ -1464,9 +2180,11 @@ async def create_transcription_from_youtube(
     - **gemini_mode**: Processing mode (text, note, custom)
     - **custom_prompt**: Custom prompt (required if gemini_mode=custom)
     """
-    from app.services.youtube_service import get_youtube_service
+    from app.services.youtube_service import get_youtube_service, extract_video_id
+    from app.services.transcription_cache import get_transcription_cache
     
     youtube_service = get_youtube_service()
+    transcription_cache = get_transcription_cache()
     temp_file = None
     
     try:
@@ -1489,25 +2207,41 @@ async def create_transcription_from_youtube(
                 detail=f"Failed to access YouTube video: {str(e)}"
             )
         
-        # Download audio from YouTube
-        try:
-            temp_file = youtube_service.download_audio(youtube_url)
-            logger.info(f"✅ Audio downloaded: {temp_file}")
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to download YouTube audio: {str(e)}"
-            )
-        
-        # Save to storage
-        with open(temp_file, 'rb') as f:
-            file_id, file_path = storage.save_file(f, f"{video_info['title']}.mp3")
-        
-        # Get file size before cleanup
-        file_size = temp_file.stat().st_size if temp_file.exists() else 0
+        # Reuse previously downloaded audio for the same video (canonical video ID)
+        video_id = video_info.get('id') or extract_video_id(youtube_url)
+        video_alias = f"youtube:{video_id}" if video_id else None
+        stored = None
+        
+        content_hash = transcription_cache.resolve_alias(video_alias) if video_alias else None
+        content_path = storage.get_content_path(content_hash) if content_hash else None
+        if content_path:
+            stored = storage.link_file(content_path, f"{video_info['title']}.mp3")
+            if stored:
+                stored.sha256 = content_hash
+                logger.info(f"♻️ Reusing downloaded audio for {video_alias}")
+        
+        if stored is None:
+            # Download audio from YouTube
+            try:
+                temp_file = youtube_service.download_audio(youtube_url)
+                logger.info(f"✅ Audio downloaded: {temp_file}")
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to download YouTube audio: {str(e)}"
+                )
+            
+            # Save to storage
+            with open(temp_file, 'rb') as f:
+                stored = storage.save_file_stream(f, f"{video_info['title']}.mp3")
+            storage.register_content(stored.file_id, stored.sha256)
+            if video_alias:
+                transcription_cache.remember_alias(video_alias, stored.sha256)
+            
+            # Clean up temp file
+            youtube_service.cleanup_file(temp_file)
         
-        # Clean up temp file
-        youtube_service.cleanup_file(temp_file)
+        file_id, file_path, file_size = stored.file_id, stored.file_path, stored.file_size
         
         # Validate gemini mode
         try:
@@ -1554,6 +2288,7 @@ async def create_transcription_from_youtube(
             file_path=str(file_path),
             file_size=file_size,
             content_type="audio/mpeg",
+            content_hash=stored.sha256,
             whisper_model=whisper_model,
             transcription_provider=transcription_provider,  # "openai_whisper" or "assemblyai"
             language=language,
@@ -1863,6 +2598,7 @@ async def create_combined_transcription(
     file_path = None
     filename = None
     file_size = 0
+    content_hash = None
     content_type = None
     
     document_file_id = None
@@ -1879,17 +2615,12 @@ async def create_combined_transcription(
                 detail=f"Unsupported audio file type: {audio_file.content_type}"
             )
         
-        # Check file size
-        audio_content = await audio_file.read()
-        file_size = len(audio_content)
-        if file_size > 500 * 1024 * 1024:  # 500MB max
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Audio file too large: {file_size / 1024 / 1024:.1f}MB. Max: 500MB"
-            )
-        
-        await audio_file.seek(0)
-        file_id, file_path = storage.save_file(audio_file.file, audio_file.filename)
+        # Stream to storage (500MB max)
+        stored = await _save_upload(
+            storage, audio_file, audio_file.filename, MAX_MEDIA_UPLOAD_SIZE, label="Audio file"
+        )
+        file_id, file_path, file_size = stored.file_id, stored.file_path, stored.file_size
+        content_hash = stored.sha256
         filename = audio_file.filename
         content_type = audio_file.content_type
         
@@ -1904,21 +2635,14 @@ async def create_combined_transcription(
                        f"Supported: PDF, PNG, JPG, WEBP, GIF"
             )
         
-        # Check file size
-        doc_content = await document_file.read()
-        document_file_size = len(doc_content)
-        max_doc_size = 50 * 1024 * 1024  # 50MB for PDFs
-        if document_file_size > max_doc_size:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Document too large: {document_file_size / 1024 / 1024:.1f}MB. Max: 50MB"
-            )
-        
-        await document_file.seek(0)
-        document_file_id, document_file_path = storage.save_file(
-            document_file.file, 
-            f"doc_{document_file.filename}"
+        # Stream to storage (50MB max for PDFs)
+        stored_doc = await _save_upload(
+            storage, document_file, f"doc_{document_file.filename}",
+            MAX_DOCUMENT_UPLOAD_SIZE, label="Document"
         )
+        document_file_id = stored_doc.file_id
+        document_file_path = stored_doc.file_path
+        document_file_size = stored_doc.file_size
         document_filename = document_file.filename
         document_content_type = document_file.content_type
         
@@ -2017,6 +2741,7 @@ async def create_combined_transcription(
         file_size=file_size or document_file_size,
         file_path=str(file_path) if file_path else str(document_file_path),
         content_type=content_type or document_content_type,
+        content_hash=content_hash,
         # Processing mode
         has_audio=audio_file is not None,
         has_document=document_file is not None,
@@ -2115,21 +2840,14 @@ async def add_document_to_transcription(
             detail=f"Unsupported document type: {document_file.content_type}"
         )
     
-    # Read and validate size
-    doc_content = await document_file.read()
-    document_file_size = len(doc_content)
-    if document_file_size > 50 * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Document too large. Max: 50MB"
-        )
-    
-    # Save document
-    await document_file.seek(0)
-    document_file_id, document_file_path = storage.save_file(
-        document_file.file,
-        f"doc_{transcription_id}_{document_file.filename}"
+    # Save document (streamed, 50MB max)
+    stored_doc = await _save_upload(
+        storage, document_file, f"doc_{transcription_id}_{document_file.filename}",
+        MAX_DOCUMENT_UPLOAD_SIZE, label="Document"
     )
+    document_file_id = stored_doc.file_id
+    document_file_path = stored_doc.file_path
+    document_file_size = stored_doc.file_size
     
     # Credit check
     credit_service = get_credit_service(db)
@@ -2250,9 +2968,8 @@ async def create_document_only_transcription(
         )
     
     # Check file size (max 50MB for documents)
-    max_size = 50 * 1024 * 1024
-    file_content = await document_file.read()
-    file_size = len(file_content)
+    max_size = MAX_DOCUMENT_UPLOAD_SIZE
+    file_size = _get_upload_size(document_file)
     
     if file_size > max_size:
         raise HTTPException(
@@ -2282,11 +2999,8 @@ async def create_document_only_transcription(
         )
     
     # Save document
-    await document_file.seek(0)
-    document_file_id, document_file_path = storage.save_file(
-        document_file.file,
-        document_file.filename
-    )
+    stored_doc = await _save_upload(storage, document_file, document_file.filename, max_size, label="Document")
+    document_file_id, document_file_path = stored_doc.file_id, stored_doc.file_path
     
     # ProcessingMode and VisionStatus are now strings, no enum import needed
     
@@ -2404,9 +3118,8 @@ async def create_combined_transcription(
         )
     
     # Check audio file size (max 500MB)
-    audio_content = await audio_file.read()
-    audio_file_size = len(audio_content)
-    if audio_file_size > 500 * 1024 * 1024:
+    audio_file_size = _get_upload_size(audio_file)
+    if audio_file_size > MAX_MEDIA_UPLOAD_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Audio file too large: {audio_file_size / 1024 / 1024:.1f}MB. Max: 500MB"
@@ -2415,9 +3128,8 @@ async def create_combined_transcription(
     # Check document file size if provided (max 50MB)
     doc_file_size = 0
     if document_file:
-        doc_content = await document_file.read()
-        doc_file_size = len(doc_content)
-        if doc_file_size > 50 * 1024 * 1024:
+        doc_file_size = _get_upload_size(document_file)
+        if doc_file_size > MAX_DOCUMENT_UPLOAD_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Document too large: {doc_file_size / 1024 / 1024:.1f}MB. Max: 50MB"
@@ -2451,18 +3163,20 @@ async def create_combined_transcription(
         )
     
     # Save audio file
-    await audio_file.seek(0)
-    audio_file_id, audio_file_path = storage.save_file(audio_file.file, audio_file.filename)
+    stored_audio = await _save_upload(
+        storage, audio_file, audio_file.filename, MAX_MEDIA_UPLOAD_SIZE, label="Audio file"
+    )
+    audio_file_id, audio_file_path = stored_audio.file_id, stored_audio.file_path
     
     # Save document file if provided
     doc_file_id = None
     doc_file_path = None
     if document_file:
-        await document_file.seek(0)
-        doc_file_id, doc_file_path = storage.save_file(
-            document_file.file,
-            f"doc_{document_file.filename}"
+        stored_doc = await _save_upload(
+            storage, document_file, f"doc_{document_file.filename}",
+            MAX_DOCUMENT_UPLOAD_SIZE, label="Document"
         )
+        doc_file_id, doc_file_path = stored_doc.file_id, stored_doc.file_path
     
     # Import enums
     from app.models.transcription import GeminiMode
@@ -2491,6 +3205,7 @@ async def create_combined_transcription(
         original_filename=audio_file.filename,
         file_size=audio_file_size,
         content_type=audio_file.content_type,
+        content_hash=stored_audio.sha256,
         # Processing settings
         processing_mode=proc_mode,
         whisper_model=whisper_model,
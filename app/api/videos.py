@@ -16,6 +16,7 @@ from app.models.credit_transaction import OperationType
 from app.api.auth import get_current_active_user
 from app.services.credit_service import get_credit_service, InsufficientCreditsError
 from app.services.video_generator import get_video_generator_service
+from app.services.progress_reporter import get_live_progress
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -168,6 +169,16 @@ async def generate_video(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _with_live_progress(video: GeneratedVideo) -> dict:
+    """video.to_dict() with the worker's live progress while it is processing"""
+    video_dict = video.to_dict()
+    if video.status == "processing":
+        live = get_live_progress("video", video.id)
+        if live and live.get("progress", 0) > (video.progress or 0):
+            video_dict["progress"] = live["progress"]
+    return video_dict
+
+
 @router.get("/transcription/{transcription_id}")
 async def get_videos_for_transcription(
     transcription_id: int,
@@ -188,7 +199,7 @@ async def get_videos_for_transcription(
     result_videos = []
     
     for video in videos:
-        video_dict = video.to_dict()
+        video_dict = _with_live_progress(video)
         
         if video.status == "completed" and video.filename:
             try:
@@ -223,7 +234,7 @@ async def get_video(
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video_dict = video.to_dict()
+    video_dict = _with_live_progress(video)
     
     if video.status == "completed" and video.filename:
         from app.services.storage import get_storage_service
@@ -277,6 +277,135 @@ async def startup_event():
         await run_pkb_migration()
     except Exception as e:
         logger.warning(f"⚠️ PKB migration skipped: {e}")
+    
+    # Run transcriptions column migration if needed
+    try:
+        await run_transcription_migration()
+    except Exception as e:
+        logger.warning(f"⚠️ Transcription migration skipped: {e}")
+    
+    # Run AI model token limit columns migration if needed
+    try:
+        await run_ai_model_limits_migration()
+    except Exception as e:
+        logger.warning(f"⚠️ AI model limits migration skipped: {e}")
+    
+    # Warm up storage: build the shared R2 client and verify the bucket once
+    try:
+        from fastapi.concurrency import run_in_threadpool
+        from app.services.storage import get_storage_service
+        await run_in_threadpool(get_storage_service)
+        logger.info("✅ Storage service ready")
+    except Exception as e:
+        logger.warning(f"⚠️ Storage warm-up failed: {e}")
+
+
+async def run_transcription_migration():
+    """Add new columns to transcriptions table if they don't exist"""
+    import os
+    from sqlalchemy import create_engine, text
+    
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        logger.info("ℹ️ DATABASE_URL not set, skipping transcription migration")
+        return
+    
+    # Skip for SQLite (local dev)
+    if "sqlite" in database_url.lower():
+        logger.info("ℹ️ SQLite detected, skipping transcription migration (run add_content_hash_column.py manually)")
+        return
+    
+    transcription_fields = [
+        ("content_hash", "VARCHAR(64)"),
+    ]
+    transcription_indexes = [
+        ("ix_transcriptions_content_hash", "content_hash"),
+    ]
+    
+    engine = create_engine(database_url)
+    
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'transcriptions'
+        """))
+        existing_columns = {row[0] for row in result.fetchall()}
+        if not existing_columns:
+            logger.info("ℹ️ transcriptions table doesn't exist yet, skipping migration")
+            return
+        
+        added = []
+        for field_name, field_type in transcription_fields:
+            if field_name not in existing_columns:
+                try:
+                    conn.execute(text(f"ALTER TABLE transcriptions ADD COLUMN {field_name} {field_type}"))
+                    added.append(field_name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not add {field_name}: {e}")
+        
+        for index_name, column_name in transcription_indexes:
+            try:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON transcriptions ({column_name})"))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not create index {index_name}: {e}")
+        
+        conn.commit()
+        
+        if added:
+            logger.info(f"✅ Transcription migration complete! Added columns: {added}")
+        else:
+            logger.info("✅ Transcription columns already exist")
+
+
+async def run_ai_model_limits_migration():
+    """Add token limit columns to ai_model_pricing table if they don't exist"""
+    import os
+    from sqlalchemy import create_engine, text
+    
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        logger.info("ℹ️ DATABASE_URL not set, skipping AI model limits migration")
+        return
+    
+    # Skip for SQLite (local dev)
+    if "sqlite" in database_url.lower():
+        logger.info("ℹ️ SQLite detected, skipping AI model limits migration (run add_model_token_limits.py manually)")
+        return
+    
+    model_fields = [
+        ("context_window", "INTEGER"),
+        ("max_output_tokens", "INTEGER"),
+    ]
+    
+    engine = create_engine(database_url)
+    
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'ai_model_pricing'
+        """))
+        existing_columns = {row[0] for row in result.fetchall()}
+        if not existing_columns:
+            logger.info("ℹ️ ai_model_pricing table doesn't exist yet, skipping migration")
+            return
+        
+        added = []
+        for field_name, field_type in model_fields:
+            if field_name not in existing_columns:
+                try:
+                    conn.execute(text(f"ALTER TABLE ai_model_pricing ADD COLUMN {field_name} {field_type}"))
+                    added.append(field_name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not add {field_name}: {e}")
+        
+        conn.commit()
+        
+        if added:
+            logger.info(f"✅ AI model limits migration complete! Added columns: {added}")
+        else:
+            logger.info("✅ AI model limit columns already exist")
 
 
 async def run_pkb_migration():
@@ -369,6 +498,12 @@ async def run_pkb_migration():
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("👋 MP4toText API Shutting down...")
+    
+    try:
+        from app.services.rag_service import close_vector_store
+        await close_vector_store()
+    except Exception as e:
+        logger.warning(f"⚠️ Vector store shutdown failed: {e}")
 
 
 @app.get("/")
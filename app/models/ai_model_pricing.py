@@ -28,6 +28,10 @@ class AIModelPricing(Base):
     api_cost_per_1m_input = Column(Float, nullable=True)  # Gerçek API maliyeti (referans)
     api_cost_per_1m_output = Column(Float, nullable=True)
     
+    # Token limitleri (boşsa chunk_planner varsayılanları kullanılır)
+    context_window = Column(Integer, nullable=True)  # Toplam context (input + output) token
+    max_output_tokens = Column(Integer, nullable=True)  # Tek çağrıda üretilebilecek max token
+    
     is_active = Column(Boolean, default=True, nullable=False)
     is_default = Column(Boolean, default=False, nullable=False)
     
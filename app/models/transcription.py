@@ -62,6 +62,7 @@ class Transcription(Base):
     file_size = Column(Integer, nullable=False)
     file_path = Column(String, nullable=False)  # MinIO path
     content_type = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of file content (dedup + result cache)
     
     # Transcription settings
     language = Column(String, nullable=True)  # None = auto-detect
@@ -200,6 +201,31 @@ class Transcription(Base):
     def __repr__(self):
         return f"<Transcription(id={self.id}, filename={self.filename}, status={self.status})>"
 
+    # Small columns used by list views. Everything else (transcripts, segments,
+    # AI outputs, document analysis) can be megabytes per row and is only
+    # loaded when a view asks for it (see load_only / defer)
+    SUMMARY_COLUMNS = (
+        "id", "user_id", "file_id", "filename", "original_filename", "file_size",
+        "content_type", "language", "status", "progress", "duration", "processing_time",
+        "transcription_provider", "whisper_model", "ai_provider", "ai_model",
+        "use_gemini_enhancement", "gemini_mode", "gemini_status", "enable_diarization",
+        "speaker_count", "has_audio", "has_document", "processing_mode",
+        "document_filename", "document_file_size", "vision_status",
+        "youtube_url", "youtube_title", "youtube_duration", "error_message",
+        "created_at", "updated_at", "started_at", "completed_at",
+    )
+
+    # Computed properties and the columns they read
+    PROPERTY_COLUMNS = {
+        "speech_understanding": (
+            "sentiment_analysis", "auto_chapters", "entities", "topics",
+            "content_safety", "highlights",
+        ),
+        "llm_gateway": (
+            "lemur_summary", "lemur_questions_answers", "lemur_action_items", "lemur_custom_tasks",
+        ),
+    }
+
     @property
     def speech_understanding(self):
         data = {
@@ -5,6 +5,7 @@ from app.schemas.transcription import (
     FileUploadResponse,
     TranscriptionCreate,
     TranscriptionResponse,
+    TranscriptionSummary,
     TranscriptionListResponse
 )
 
@@ -16,5 +17,6 @@ __all__ = [
     "FileUploadResponse",
     "TranscriptionCreate",
     "TranscriptionResponse",
+    "TranscriptionSummary",
     "TranscriptionListResponse"
 ]
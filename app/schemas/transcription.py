@@ -23,10 +23,29 @@ class FileUploadResponse(BaseModel):
     filename: str
     file_size: int
     content_type: str
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded bytes
     upload_url: Optional[str] = None
     message: str = "File uploaded successfully"
 
 
+class ResumableUploadCreate(BaseModel):
+    """Request to start a resumable upload"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    file_size: int = Field(..., gt=0, description="Total upload size in bytes")
+    content_type: str = Field("application/octet-stream", description="MIME type")
+
+
+class ResumableUploadStatus(BaseModel):
+    """State of a resumable upload session"""
+    upload_id: str
+    filename: str
+    content_type: str
+    total_size: int
+    offset: int = Field(..., description="Bytes received so far; resume from here")
+    status: str = Field(..., description="uploading or completed")
+    expires_at: Optional[datetime] = Field(None, description="None once completed (kept until the file is deleted)")
+
+
 class WhisperModel(str, Enum):
     """Whisper model size enum"""
     TINY = "tiny"
@@ -235,9 +254,47 @@ class TranscriptionResponse(BaseModel):
         from_attributes = True
 
 
+class TranscriptionSummary(BaseModel):
+    """Schema for transcription list items (no transcript/AI output blobs)"""
+    id: int
+    file_id: str
+    filename: str
+    original_filename: Optional[str] = None
+    status: TranscriptionStatus
+    progress: int = Field(0, ge=0, le=100)
+    language: Optional[str] = None
+    file_size: Optional[int] = None
+    duration: Optional[float] = None
+    processing_time: Optional[float] = None
+    transcription_provider: Optional[str] = None
+    ai_provider: Optional[str] = None
+    ai_model: Optional[str] = None
+    gemini_mode: Optional[str] = None
+    gemini_status: Optional[str] = None
+    speaker_count: int = 0
+    has_audio: Optional[bool] = None
+    has_document: Optional[bool] = None
+    processing_mode: Optional[str] = None
+    document_filename: Optional[str] = None
+    vision_status: Optional[str] = None
+    youtube_url: Optional[str] = None
+    youtube_title: Optional[str] = None
+    youtube_duration: Optional[int] = None
+    error_message: Optional[str] = None
+    text_preview: Optional[str] = Field(None, description="First characters of the transcription text")
+    
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class TranscriptionListResponse(BaseModel):
     """Schema for transcription list"""
-    items: List[TranscriptionResponse]
+    items: List[TranscriptionSummary]
     total: int
     page: int
     page_size: int
@@ -0,0 +1,290 @@
+"""
+Answer cache
+Reuses LLM answers of PKB chat, summarize and question generation while the
+source's knowledge base is unchanged
+"""
+
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.embedding_cache import pack_vector
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Kinds reported by stats()
+ANSWER_KINDS = ("chat", "summary", "questions")
+
+
+def normalize_question(question: str) -> str:
+    """Casefold and collapse whitespace/trailing punctuation of a question"""
+    return " ".join(question.casefold().split()).rstrip(" ?!.")
+
+
+def best_match(embedding: Sequence[float], packed: Sequence[bytes]) -> Tuple[Optional[int], float]:
+    """
+    Most similar of several vectors stored by pack_vector()
+
+    All cosine similarities are computed in one matrix product.
+
+    Returns:
+        (index of the best vector, its cosine similarity), (None, 0.0) if empty
+    """
+    if not packed:
+        return None, 0.0
+    matrix = np.frombuffer(b"".join(packed), dtype="<f2").reshape(len(packed), -1).astype(np.float32)
+    query = np.asarray(embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    scores = np.divide(matrix @ query, norms, out=np.zeros(len(packed), dtype=np.float32), where=norms > 0)
+    best = int(np.argmax(scores))
+    return best, float(scores[best])
+
+
+class AnswerCache:
+    """
+    Redis-backed cache of generated PKB answers
+
+    Every source has a version counter that is bumped whenever its index
+    changes; keys include the version, so a reindex makes all older answers
+    unreachable (they expire after the TTL).
+
+    Summaries and question sets are cached under an exact key of their
+    parameters. Chat answers are matched by question: an exact normalized
+    question hits directly, otherwise the question embedding is compared with
+    the cached questions of the same (source, version, model, temperature)
+    and the closest one above the similarity threshold is reused.
+
+    Hits and misses are counted per kind in a Redis hash. If Redis is not
+    reachable the cache simply misses.
+    """
+
+    KEY_PREFIX = "answer_cache"
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: Optional[int] = None,
+        similarity: Optional[float] = None,
+        max_questions: Optional[int] = None
+    ):
+        self.enabled = settings.RAG_ANSWER_CACHE_ENABLED
+        self.ttl_seconds = ttl_seconds or settings.RAG_ANSWER_CACHE_TTL_HOURS * 3600
+        self.similarity = similarity or settings.RAG_ANSWER_CACHE_SIMILARITY
+        self.max_questions = max_questions or settings.RAG_ANSWER_CACHE_MAX_QUESTIONS
+        self._redis = redis_client
+        self.stats_key = f"{self.KEY_PREFIX}:stats"
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def make_key(kind: str, source_id: int, version: int, **params: Any) -> str:
+        """
+        Build the cache key of one answer
+
+        Args:
+            kind: "chat", "summary" or "questions"
+            source_id: Source ID
+            version: Source version (see source_version())
+            **params: Everything else that changes the answer (model, temperature, ...)
+        """
+        fingerprint = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{kind}:{source_id}:{version}:{fingerprint}"
+
+    def _version_key(self, source_id: int) -> str:
+        return f"{self.KEY_PREFIX}:version:{source_id}"
+
+    def _answer_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:answer:{key}"
+
+    def _questions_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:questions:{key}"
+
+    # =========================================================================
+    # VERSIONS
+    # =========================================================================
+
+    def source_version(self, source_id: int) -> Optional[int]:
+        """
+        Current version of a source
+
+        Returns:
+            Version number, or None when the cache is disabled or unreachable
+        """
+        if not self.enabled:
+            return None
+        try:
+            raw = self.redis.get(self._version_key(source_id))
+            return int(raw) if raw is not None else 0
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache version read failed: {e}")
+            return None
+
+    def invalidate_source(self, source_id: int) -> None:
+        """Bump a source's version so cached answers are no longer used"""
+        if not self.enabled:
+            return
+        try:
+            version = self.redis.incr(self._version_key(source_id))
+            logger.info(f"🧹 Answer cache invalidated for source {source_id} (version {version})")
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache invalidation failed for source {source_id}: {e}")
+
+    # =========================================================================
+    # EXACT ANSWERS (summary, questions)
+    # =========================================================================
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached answer by key
+
+        Returns:
+            Stored answer payload, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        try:
+            raw = self.redis.get(self._answer_key(key))
+            self._count(kind, raw is not None)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache read failed: {e}")
+            return None
+
+    def set(self, key: str, answer: Dict[str, Any]) -> None:
+        """Store an answer payload (JSON-serializable)"""
+        if not self.enabled:
+            return
+        try:
+            self.redis.setex(self._answer_key(key), self.ttl_seconds, json.dumps(answer, default=str))
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache write failed: {e}")
+
+    # =========================================================================
+    # CHAT ANSWERS (similar questions)
+    # =========================================================================
+
+    def get_similar(self, scope_key: str, question: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Get the answer of the same or a similar question
+
+        Blocking (Redis round trips and a scan of up to max_questions
+        vectors): async callers go through a thread.
+
+        Args:
+            scope_key: make_key("chat", ...) of the source version, model and temperature
+            question: User question
+            embedding: Question embedding
+
+        Returns:
+            Stored answer payload, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        try:
+            question_hash = hashlib.sha256(normalize_question(question).encode()).hexdigest()
+            raw = self.redis.get(self._answer_key(f"{scope_key}:{question_hash}"))
+
+            if raw is None:
+                questions = self.redis.hgetall(self._questions_key(scope_key))
+                fields = list(questions)
+                best, best_score = best_match(embedding, [questions[field] for field in fields])
+                if best is not None and best_score >= self.similarity:
+                    best_hash = fields[best]
+                    best_hash = best_hash.decode() if isinstance(best_hash, bytes) else best_hash
+                    raw = self.redis.get(self._answer_key(f"{scope_key}:{best_hash}"))
+                    if raw is not None:
+                        logger.info(f"🎯 Similar question matched (cosine {best_score:.3f})")
+
+            self._count("chat", raw is not None)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache read failed: {e}")
+            return None
+
+    def set_similar(self, scope_key: str, question: str, embedding: List[float], answer: Dict[str, Any]) -> None:
+        """
+        Store a chat answer and its question embedding
+
+        Once a scope holds max_questions questions new ones are not added.
+        """
+        if not self.enabled:
+            return
+        try:
+            question_hash = hashlib.sha256(normalize_question(question).encode()).hexdigest()
+            questions_key = self._questions_key(scope_key)
+            if self.redis.hlen(questions_key) >= self.max_questions:
+                return
+
+            pipe = self.redis.pipeline()
+            pipe.setex(self._answer_key(f"{scope_key}:{question_hash}"), self.ttl_seconds, json.dumps(answer, default=str))
+            pipe.hset(questions_key, question_hash, pack_vector(embedding))
+            pipe.expire(questions_key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache write failed: {e}")
+
+    # =========================================================================
+    # STATS
+    # =========================================================================
+
+    def _count(self, kind: str, hit: bool) -> None:
+        try:
+            self.redis.hincrby(self.stats_key, f"{kind}:{'hits' if hit else 'misses'}", 1)
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache stats update failed: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Hit/miss counts per kind
+
+        Returns:
+            {"chat": {"hits", "misses", "hit_rate"}, "summary": {...}, "questions": {...}}
+        """
+        try:
+            raw = self.redis.hgetall(self.stats_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Answer cache stats read failed: {e}")
+            raw = {}
+        counts = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+
+        result = {}
+        for kind in ANSWER_KINDS:
+            hits = counts.get(f"{kind}:hits", 0)
+            misses = counts.get(f"{kind}:misses", 0)
+            total = hits + misses
+            result[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+        return result
+
+
+# Singleton instance
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    Get answer cache singleton
+
+    Returns:
+        AnswerCache instance
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
@@ -87,7 +87,8 @@ class AssemblyAIService:
         features: Optional[TranscriptionFeatures] = None,
         llm_context: Optional[str] = None,
         llm_questions: Optional[List[str]] = None,
-        llm_custom_prompts: Optional[List[str]] = None
+        llm_custom_prompts: Optional[List[str]] = None,
+        language_result: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Full-featured audio transcription with Speech Understanding + LLM Gateway
@@ -104,6 +105,8 @@ class AssemblyAIService:
             llm_context: Context for LLM Gateway summary
             llm_questions: Questions for LLM Gateway Q&A
             llm_custom_prompts: Custom LLM Gateway prompts
+            language_result: Detection result computed from the local file
+                (detect_language_local); skips downloading audio_url again
         
         Returns:
             Comprehensive transcription results with Speech Understanding + LLM Gateway
@@ -130,7 +133,7 @@ class AssemblyAIService:
             logger.info("=" * 80)
             
             try:
-                lang_result = self.language_detector.detect_language_from_url(audio_url)
+                lang_result = language_result or self.language_detector.detect_language_from_url(audio_url)
                 detected_language = lang_result['language_code']
                 language_confidence = lang_result['confidence']
                 language_detection_time = lang_result['detection_time']
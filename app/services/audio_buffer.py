@@ -0,0 +1,143 @@
+"""
+Decode-once audio buffer
+Decodes an uploaded file once to 16 kHz mono float32 PCM on disk and serves
+memory-mapped, zero-copy views of it to the local processing pipeline
+(Whisper, speaker recognition, wav2vec2, language detection, duration)
+"""
+
+import os
+import re
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SAMPLE_RATE = 16000
+DTYPE = np.float32
+
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode the input file"""
+    pass
+
+
+class AudioBuffer:
+    """
+    Memory-mapped 16 kHz mono float32 PCM of one file
+
+    samples and slice() return views of the mapping, so consumers share the
+    page cache instead of holding their own decoded copies.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.sample_rate = SAMPLE_RATE
+        if self.path.stat().st_size == 0:
+            # np.memmap cannot map empty files
+            self.samples = np.zeros(0, dtype=DTYPE)
+        else:
+            self.samples = np.memmap(self.path, dtype=DTYPE, mode="r")
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds"""
+        return len(self.samples) / self.sample_rate
+
+    def slice(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """
+        Zero-copy view of [start, end) seconds
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds (None = end of file)
+        """
+        first = max(int(start * self.sample_rate), 0)
+        last = len(self.samples) if end is None else max(int(end * self.sample_rate), first)
+        return self.samples[first:last]
+
+
+def buffer_dir() -> Path:
+    """Directory decoded buffers are written to"""
+    directory = Path(settings.AUDIO_BUFFER_DIR or Path(tempfile.gettempdir()) / "mp4totext-audio")
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def buffer_path(file_id: str) -> Path:
+    """PCM cache path of an uploaded file"""
+    safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", str(file_id))
+    return buffer_dir() / f"{safe_id}.f32"
+
+
+def decode_to_pcm(source_path: Union[str, Path], output_path: Union[str, Path]) -> None:
+    """
+    Decode any ffmpeg-readable file to raw 16 kHz mono float32 PCM
+
+    ffmpeg writes the samples straight to output_path; nothing passes through Python.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        "-i", str(source_path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        str(output_path)
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg failed ({result.returncode}): {result.stderr.strip()[-500:]}")
+
+
+def get_audio_buffer(file_id: str, source_path: Union[str, Path]) -> AudioBuffer:
+    """
+    Get the decoded buffer of an uploaded file, decoding it on first use
+
+    Retries of a task reuse the buffer of the previous attempt.
+
+    Args:
+        file_id: Storage file ID (cache key)
+        source_path: Path of the uploaded file
+
+    Returns:
+        AudioBuffer
+    """
+    path = buffer_path(file_id)
+    if path.exists():
+        logger.info(f"♻️ Reusing decoded audio buffer: {path.name}")
+        return AudioBuffer(path)
+
+    # Decode next to the final path and rename, so a crash never leaves a partial buffer
+    partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+    try:
+        decode_to_pcm(source_path, partial)
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    buffer = AudioBuffer(path)
+    logger.info(
+        f"🎚️ Decoded {Path(source_path).name} once: {buffer.duration:.1f}s, "
+        f"{path.stat().st_size / (1024 * 1024):.1f}MB PCM"
+    )
+    return buffer
+
+
+def release_audio_buffer(file_id: str) -> None:
+    """Delete the decoded buffer of a file (call when its task is finished)"""
+    try:
+        path = buffer_path(file_id)
+        if path.exists():
+            path.unlink()
+            logger.info(f"🗑️ Deleted audio buffer: {path.name}")
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to delete audio buffer for {file_id}: {e}")
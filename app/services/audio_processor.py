@@ -92,7 +92,8 @@ class AudioProcessor:
     def process_file(
         self,
         audio_path: str,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        audio_buffer=None
     ) -> Dict[str, Any]:
         """
         Process audio file: transcription + speaker recognition
@@ -100,6 +101,8 @@ class AudioProcessor:
         Args:
             audio_path: Path to audio file
             language: Language code (auto-detect if None)
+            audio_buffer: AudioBuffer of the file; Whisper and speaker
+                recognition read its samples instead of decoding the file
             
         Returns:
             {
@@ -124,7 +127,8 @@ class AudioProcessor:
         try:
             # Step 1: Transcribe with Whisper
             logger.info("📝 Step 1: Transcribing with Whisper...")
-            whisper_result = self.whisper_service.transcribe(audio_path, language)
+            whisper_input = audio_buffer.samples if audio_buffer is not None else audio_path
+            whisper_result = self.whisper_service.transcribe(whisper_input, language)
             
             result = {
                 "text": whisper_result["text"],
@@ -139,7 +143,8 @@ class AudioProcessor:
                 logger.info("👤 Step 2: Identifying speakers...")
                 result["segments"] = self._process_segments_with_speakers(
                     audio_path,
-                    whisper_result["segments"]
+                    whisper_result["segments"],
+                    audio_buffer
                 )
                 
                 # Extract unique speakers
@@ -171,7 +176,8 @@ class AudioProcessor:
     def _process_segments_with_speakers(
         self,
         audio_path: str,
-        whisper_segments: List[Dict[str, Any]]
+        whisper_segments: List[Dict[str, Any]],
+        audio_buffer=None
     ) -> List[Dict[str, Any]]:
         """
         Add speaker identification to Whisper segments
@@ -179,38 +185,35 @@ class AudioProcessor:
         Args:
             audio_path: Path to audio file
             whisper_segments: Segments from Whisper
+            audio_buffer: Already decoded AudioBuffer (the file is loaded otherwise)
             
         Returns:
             Enhanced segments with speaker info
         """
         # Load full audio
-        try:
-            audio, sr = librosa.load(audio_path, sr=16000, mono=True)
-        except Exception as e:
-            logger.error(f"Failed to load audio for speaker recognition: {e}")
-            return whisper_segments
+        if audio_buffer is not None:
+            audio, sr = audio_buffer.samples, audio_buffer.sample_rate
+        else:
+            try:
+                audio, sr = librosa.load(audio_path, sr=16000, mono=True)
+            except Exception as e:
+                logger.error(f"Failed to load audio for speaker recognition: {e}")
+                return whisper_segments
+        
+        # Identify all speakers in batched encoder/classifier passes
+        predictions = self.speaker_service.identify_speakers(
+            audio,
+            [(segment["start"], segment["end"]) for segment in whisper_segments],
+            sr
+        )
         
         enhanced_segments = []
         
-        for segment in whisper_segments:
-            start_time = segment["start"]
-            end_time = segment["end"]
-            text = segment["text"]
-            
-            # Extract audio segment
-            start_sample = int(start_time * sr)
-            end_sample = int(end_time * sr)
-            segment_audio = audio[start_sample:end_sample]
-            
-            # Identify speaker
-            speaker_name, confidence = self.speaker_service.identify_speaker(
-                segment_audio, sr
-            )
-            
+        for segment, (speaker_name, confidence) in zip(whisper_segments, predictions):
             enhanced_segment = {
-                "start": start_time,
-                "end": end_time,
-                "text": text,
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
                 "speaker": speaker_name if speaker_name else "Unknown",
                 "speaker_confidence": round(confidence, 3)
             }
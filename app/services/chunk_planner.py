@@ -0,0 +1,320 @@
+"""
+Token-aware chunk planner for LLM post-processing
+Splits long transcripts into as few model calls as the model's context window
+and output budget allow, cutting at paragraph/sentence boundaries
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lazy import (tiktoken is optional, fall back to character estimates)
+_encoding = None
+_encoding_failed = False
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Token limits of an LLM"""
+    context_window: int
+    max_output_tokens: int
+
+
+# Fallback limits when AIModelPricing has no values for a model.
+# Checked in order: (provider, substring of model name, limits)
+DEFAULT_MODEL_LIMITS: List[Tuple[str, str, ModelLimits]] = [
+    ("together", "405b", ModelLimits(context_window=130000, max_output_tokens=800)),
+    ("together", "70b", ModelLimits(context_window=131072, max_output_tokens=6000)),
+    ("together", "24b", ModelLimits(context_window=32768, max_output_tokens=4000)),
+    ("together", "mistral", ModelLimits(context_window=32768, max_output_tokens=4000)),
+    ("together", "", ModelLimits(context_window=8192, max_output_tokens=2000)),
+    ("groq", "", ModelLimits(context_window=131072, max_output_tokens=8192)),
+    ("openai", "gpt-5", ModelLimits(context_window=400000, max_output_tokens=4096)),
+    ("openai", "", ModelLimits(context_window=128000, max_output_tokens=4096)),
+    ("gemini", "", ModelLimits(context_window=1048576, max_output_tokens=8192)),
+]
+
+# Per-model limits read from AIModelPricing, refreshed periodically
+_LIMITS_CACHE_TTL = 300  # seconds
+_limits_cache: Dict[str, Tuple[float, Optional[ModelLimits]]] = {}
+_limits_lock = threading.Lock()
+
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
+
+def count_tokens(text: str, language: str = "tr") -> int:
+    """
+    Count tokens with tiktoken (cl100k_base)
+
+    Falls back to the character-based estimate if tiktoken or its
+    encoding files are unavailable.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoding_failed = True
+            logger.warning(f"⚠️ tiktoken not available, using character estimates: {e}")
+
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    from app.services.gemini_service import estimate_tokens
+    return estimate_tokens(text, language)
+
+
+def _default_limits(model_name: str, provider: str) -> ModelLimits:
+    model_name = (model_name or "").lower()
+    for default_provider, pattern, limits in DEFAULT_MODEL_LIMITS:
+        if default_provider == provider and pattern in model_name:
+            return limits
+    return ModelLimits(context_window=8192, max_output_tokens=2048)
+
+
+def _load_db_limits(model_keys: List[str]) -> Optional[ModelLimits]:
+    from app.database import SessionLocal
+    from app.models.ai_model_pricing import AIModelPricing
+
+    db = SessionLocal()
+    try:
+        rows = db.query(AIModelPricing).filter(AIModelPricing.model_key.in_(model_keys)).all()
+    finally:
+        db.close()
+
+    # Prefer the first key (the model_key the caller selected)
+    rows.sort(key=lambda row: model_keys.index(row.model_key))
+    for row in rows:
+        if row.context_window or row.max_output_tokens:
+            return ModelLimits(
+                context_window=row.context_window or 0,
+                max_output_tokens=row.max_output_tokens or 0
+            )
+    return None
+
+
+def get_model_limits(model_name: str, provider: str, model_key: Optional[str] = None) -> ModelLimits:
+    """
+    Get context window and output budget for a model
+
+    Values from AIModelPricing (context_window / max_output_tokens) win;
+    missing values fall back to DEFAULT_MODEL_LIMITS.
+
+    Args:
+        model_name: Provider API model name
+        provider: together, groq, openai or gemini
+        model_key: AIModelPricing.model_key selected by the user (if any)
+
+    Returns:
+        ModelLimits
+    """
+    keys = [k for k in dict.fromkeys([model_key, model_name]) if k]
+    cache_key = "|".join([provider] + keys)
+    now = time.time()
+
+    with _limits_lock:
+        cached = _limits_cache.get(cache_key)
+    if cached and now - cached[0] < _LIMITS_CACHE_TTL:
+        db_limits = cached[1]
+    else:
+        try:
+            db_limits = _load_db_limits(keys)
+        except Exception as e:
+            logger.debug(f"Model limits lookup failed for {keys}: {e}")
+            db_limits = None
+        with _limits_lock:
+            _limits_cache[cache_key] = (now, db_limits)
+
+    defaults = _default_limits(model_name, provider)
+    if db_limits is None:
+        return defaults
+    return ModelLimits(
+        context_window=db_limits.context_window or defaults.context_window,
+        max_output_tokens=db_limits.max_output_tokens or defaults.max_output_tokens
+    )
+
+
+def invalidate_model_limits() -> None:
+    """Drop cached model limits (call after editing AIModelPricing)"""
+    with _limits_lock:
+        _limits_cache.clear()
+
+
+class ChunkPlanner:
+    """
+    Plan the chunks for a long-text LLM operation
+
+    The per-call input budget is the largest chunk whose prompt + text +
+    expected output fits the context window and whose expected output
+    (text tokens × output_ratio) fits the model's output limit. The text is
+    packed greedily at paragraph boundaries, or sentence boundaries when that
+    needs fewer calls, then re-balanced so chunks are of similar size.
+    """
+
+    SAFETY_MARGIN = 0.1  # Tokenizers differ between providers
+    MIN_CHUNK_TOKENS = 200
+
+    def __init__(
+        self,
+        limits: ModelLimits,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        self.limits = limits
+        self.count_tokens = token_counter or count_tokens
+
+    def input_budget(
+        self,
+        prompt_tokens: int,
+        output_ratio: float,
+        output_overhead: int = 0
+    ) -> int:
+        """
+        Max text tokens per call
+
+        Args:
+            prompt_tokens: Tokens of instructions/system prompt around the text
+            output_ratio: Expected output tokens per input token (0 for
+                fixed-size outputs like summaries)
+            output_overhead: Fixed output tokens (JSON keys, summary, ...)
+        """
+        usable = 1 - self.SAFETY_MARGIN
+        reserved_output = min(self.limits.max_output_tokens, output_overhead)
+
+        by_context = (self.limits.context_window * usable - prompt_tokens - reserved_output) / (1 + output_ratio)
+        if output_ratio > 0:
+            by_output = (self.limits.max_output_tokens * usable - output_overhead) / output_ratio
+            budget = min(by_context, by_output)
+        else:
+            budget = by_context
+        return max(self.MIN_CHUNK_TOKENS, int(budget))
+
+    def plan(
+        self,
+        text: str,
+        prompt_tokens: int = 0,
+        output_ratio: float = 1.0,
+        output_overhead: int = 0
+    ) -> List[str]:
+        """
+        Split text into the fewest chunks that fit the model
+
+        Returns:
+            List of chunks ([text] if it fits in one call)
+        """
+        budget = self.input_budget(prompt_tokens, output_ratio, output_overhead)
+        if not text or not text.strip():
+            return []
+
+        total_tokens = self.count_tokens(text)
+        if total_tokens <= budget:
+            return [text]
+
+        # Cut between paragraphs unless cutting between sentences saves calls
+        units = self._split_units(text, budget)
+        chunks = self._pack(units, budget)
+        sentence_units = self._split_units(text, budget, sentences=True)
+        sentence_chunks = self._pack(sentence_units, budget)
+        if len(sentence_chunks) < len(chunks):
+            units, chunks = sentence_units, sentence_chunks
+
+        # Same number of calls, evenly sized (better for parallel processing):
+        # raise the per-chunk target from the average until it packs as tightly
+        target = math.ceil(sum(unit[1] for unit in units) / len(chunks))
+        while target < budget:
+            balanced = self._pack(units, target)
+            if len(balanced) <= len(chunks):
+                chunks = balanced
+                break
+            target = int(target * 1.05) + 1
+
+        logger.info(
+            f"🧩 Chunk plan: {total_tokens} tokens → {len(chunks)} chunks "
+            f"(≤{budget} tokens each, context {self.limits.context_window}, "
+            f"output {self.limits.max_output_tokens})"
+        )
+        return chunks
+
+    def fit(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0) -> str:
+        """
+        Trim text at a sentence boundary so it fits a single call
+
+        For operations that need the whole text in one request (summaries,
+        exam questions). Returns the text unchanged when it fits.
+        """
+        budget = self.input_budget(prompt_tokens, 0, output_tokens)
+        if self.count_tokens(text) <= budget:
+            return text
+
+        kept = []
+        used = 0
+        for unit in self._split_units(text, budget):
+            if used + unit[1] > budget:
+                break
+            kept.append(unit)
+            used += unit[1]
+        logger.warning(f"⚠️ Text exceeds the model context, using the first {used} of its tokens")
+        return self._pack(kept, budget)[0] if kept else ""
+
+    def _split_units(self, text: str, budget: int, sentences: bool = False) -> List[Tuple[str, int, str]]:
+        """
+        Paragraphs (or sentences), with sentences/word windows for paragraphs
+        larger than budget
+
+        Each unit is (text, tokens, separator to the previous unit).
+        """
+        units = []
+        for paragraph in PARAGRAPH_SPLIT.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if not sentences:
+                tokens = self.count_tokens(paragraph)
+                if tokens <= budget:
+                    units.append((paragraph, tokens, "\n\n"))
+                    continue
+
+            separator = "\n\n"
+            for sentence in SENTENCE_SPLIT.split(paragraph):
+                tokens = self.count_tokens(sentence)
+                if tokens <= budget:
+                    units.append((sentence, tokens, separator))
+                else:
+                    units.extend(self._split_words(sentence, budget, separator))
+                separator = " "
+        return units
+
+    def _split_words(self, sentence: str, budget: int, separator: str) -> List[Tuple[str, int, str]]:
+        """Last resort for run-on text without punctuation"""
+        pieces = []
+        words = sentence.split()
+        # Estimate words per piece from the sentence's token density
+        tokens_per_word = max(1.0, self.count_tokens(sentence) / max(1, len(words)))
+        step = max(1, int(budget / tokens_per_word))
+        for start in range(0, len(words), step):
+            piece = " ".join(words[start:start + step])
+            pieces.append((piece, self.count_tokens(piece), separator if start == 0 else " "))
+        return pieces
+
+    @staticmethod
+    def _pack(units: List[Tuple[str, int, str]], limit: int) -> List[str]:
+        chunks = []
+        current = ""
+        current_tokens = 0
+
+        for unit, tokens, separator in units:
+            if current and current_tokens + tokens > limit:
+                chunks.append(current)
+                current, current_tokens = "", 0
+            current = f"{current}{separator}{unit}" if current else unit
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
@@ -4,11 +4,12 @@ Credit Service - Manages user credits and transactions
 
 import logging
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Mapping
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.models.credit_transaction import CreditTransaction, OperationType
 from app.models.transcription import Transcription
+from app.services.pricing_catalog import get_pricing_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +24,8 @@ class InsufficientCreditsError(Exception):
 
 class CreditPricing:
     """
-    Credit pricing configuration - Dynamically loaded from database
+    Credit pricing configuration - Read from the in-process pricing catalogue
+    (CreditPricingConfig, refreshed when an admin edits pricing)
     Falls back to hardcoded defaults if database is unavailable
     """
     
@@ -50,24 +52,15 @@ class CreditPricing:
     def __init__(self, db: Session):
         """Initialize pricing with database session"""
         self.db = db
-        self._pricing_cache: Dict[str, int] = {}
+        self._pricing_cache: Mapping[str, float] = {}
         self._load_pricing()
     
     def _load_pricing(self):
-        """Load pricing from database"""
-        try:
-            from app.models.credit_pricing import CreditPricingConfig
-            
-            configs = self.db.query(CreditPricingConfig).filter_by(is_active=True).all()
-            
-            if configs:
-                self._pricing_cache = {config.operation_key: config.cost_per_unit for config in configs}
-                logger.info(f"✅ Loaded {len(self._pricing_cache)} pricing configs from database")
-            else:
-                logger.warning("⚠️ No pricing configs found in database, using defaults")
-                self._pricing_cache = self._DEFAULT_PRICING.copy()
-        except Exception as e:
-            logger.error(f"❌ Failed to load pricing from database: {e}")
+        """Load pricing from the catalogue (no query unless pricing changed)"""
+        catalog = get_pricing_catalog(self.db)
+        if catalog.operation_prices:
+            self._pricing_cache = catalog.operation_prices
+        else:
             self._pricing_cache = self._DEFAULT_PRICING.copy()
     
     def get_price(self, operation_key: str) -> float:
@@ -202,24 +195,17 @@ class CreditService:
             >>> calculate_operation_cost("lecture_notes", "gemini-2.5-pro", "gemini")
             75.0  # 30 base × 2.5 multiplier
         """
-        from app.models.ai_model_pricing import AIModelPricing
-        
         # Get base operation cost
         base_cost = self.pricing.get_price(operation_key)
         
-        # Get model multiplier from database (MUST match both provider and model_key)
-        model_pricing = self.db.query(AIModelPricing).filter(
-            AIModelPricing.model_key == model_key,
-            AIModelPricing.provider == provider,  # ← CRITICAL: Must match provider!
-            AIModelPricing.is_active == True
-        ).first()
+        # Get model multiplier from the catalogue (MUST match both provider and model_key)
+        catalog = get_pricing_catalog(self.db)
+        model_pricing = catalog.model(model_key, provider)
         
         # Fallback to default model if requested model not found
         if not model_pricing:
             logger.warning(f"⚠️ Model '{model_key}' (provider: {provider}) not found, using default model")
-            model_pricing = self.db.query(AIModelPricing).filter(
-                AIModelPricing.is_default == True
-            ).first()
+            model_pricing = catalog.default_model
         
         # Get multiplier (default to 1.0 if no model found)
         multiplier = model_pricing.credit_multiplier if model_pricing else 1.0
@@ -247,17 +233,11 @@ class CreditService:
             >>> calculate_text_based_cost("Hello world" * 1000, "meta-llama/Llama-3.3-70B-Instruct-Turbo", "together")
             1.12  # 11000 chars / 1000 × 0.0968 = 1.0648 → rounded to 1.06
         """
-        from app.models.ai_model_pricing import AIModelPricing
-        
         # Get character count
         char_count = len(text)
         
-        # Get model pricing from database
-        model_pricing = self.db.query(AIModelPricing).filter(
-            AIModelPricing.model_key == model_key,
-            AIModelPricing.provider == provider,
-            AIModelPricing.is_active == True
-        ).first()
+        # Get model pricing from the catalogue
+        model_pricing = get_pricing_catalog(self.db).model(model_key, provider)
         
         if not model_pricing:
             logger.warning(f"⚠️ Model '{model_key}' (provider: {provider}) not found for text-based pricing")
@@ -0,0 +1,162 @@
+"""
+Embedding cache
+Lets PKB creation, reindexing and chat skip the OpenAI embeddings call for
+text that was already embedded with the same model
+"""
+
+import time
+import struct
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash of a chunk's text (same value as PKBChunk.content_hash)
+
+    Returns:
+        MD5 hex digest
+    """
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    """Pack an embedding as little-endian float16 (2 bytes per dimension)"""
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def unpack_vector(raw: bytes) -> List[float]:
+    """Unpack a vector stored by pack_vector()"""
+    return list(struct.unpack(f"<{len(raw) // 2}e", raw))
+
+
+class EmbeddingCache:
+    """
+    Redis-backed cache of embedding vectors
+
+    Entries are keyed by (embedding model, content hash) and stored as packed
+    float16 arrays - a 1536-dim vector takes 3 KB instead of ~30 KB of JSON.
+    They expire after a TTL and are evicted least recently used first once the
+    entry limit is reached. If Redis is not reachable the cache simply misses.
+    """
+
+    KEY_PREFIX = "embedding_cache"
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.enabled = settings.EMBEDDING_CACHE_ENABLED
+        self.ttl_seconds = ttl_seconds or settings.EMBEDDING_CACHE_TTL_HOURS * 3600
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self._redis = redis_client
+        self.lru_key = f"{self.KEY_PREFIX}:lru"
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def make_key(model: str, text_hash: str) -> str:
+        return f"{model}:{text_hash}"
+
+    def _vector_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:vec:{key}"
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Get cached vectors
+
+        Args:
+            model: Embedding model name
+            hashes: Content hashes to look up
+
+        Returns:
+            {content hash: vector} for the hits only
+        """
+        if not self.enabled:
+            return {}
+
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+
+        try:
+            keys = [self.make_key(model, h) for h in hashes]
+            raw_values = self.redis.mget([self._vector_key(k) for k in keys])
+
+            hits = {}
+            now = time.time()
+            touched = {}
+            for text_hash, key, raw in zip(hashes, keys, raw_values):
+                if raw is None:
+                    continue
+                hits[text_hash] = unpack_vector(raw)
+                touched[key] = now
+            if touched:
+                self.redis.zadd(self.lru_key, touched)
+            return hits
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache read failed: {e}")
+            return {}
+
+    def set_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """
+        Store vectors and evict least recently used entries
+
+        Args:
+            model: Embedding model name
+            vectors: {content hash: vector}
+        """
+        if not self.enabled or not vectors:
+            return
+
+        try:
+            now = time.time()
+            pipe = self.redis.pipeline()
+            touched = {}
+            for text_hash, vector in vectors.items():
+                key = self.make_key(model, text_hash)
+                pipe.setex(self._vector_key(key), self.ttl_seconds, pack_vector(vector))
+                touched[key] = now
+            pipe.zadd(self.lru_key, touched)
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [k.decode() if isinstance(k, bytes) else k
+                           for k, _ in self.redis.zpopmin(self.lru_key, overflow)]
+                if evicted:
+                    self.redis.delete(*[self._vector_key(k) for k in evicted])
+                    logger.info(f"🧹 Embedding cache evicted {len(evicted)} entries")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache write failed: {e}")
+
+
+# Singleton instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get embedding cache singleton
+
+    Returns:
+        EmbeddingCache instance
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
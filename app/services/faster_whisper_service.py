@@ -6,13 +6,29 @@ Faster-Whisper Service - CTranslate2 backend ile optimize edilmiş
 from faster_whisper import WhisperModel
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
+import numpy as np
 import torch
 from app.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+def _audio_input(audio: Union[str, np.ndarray]) -> Union[str, np.ndarray]:
+    """Path (checked to exist) or float32 samples for WhisperModel.transcribe"""
+    if isinstance(audio, np.ndarray):
+        return np.asarray(audio, dtype=np.float32)
+    if not Path(audio).exists():
+        raise FileNotFoundError(f"Audio file not found: {audio}")
+    return str(audio)
+
+
+def _audio_name(audio: Union[str, np.ndarray]) -> str:
+    if isinstance(audio, np.ndarray):
+        return f"<{len(audio) / 16000:.1f}s decoded audio>"
+    return Path(audio).name
+
+
 class FasterWhisperService:
     """
     Faster-Whisper service with CTranslate2 backend
@@ -79,7 +95,7 @@ class FasterWhisperService:
     
     def transcribe(
         self,
-        audio_path: str,
+        audio_path: Union[str, np.ndarray],
         language: Optional[str] = None,
         task: str = "transcribe",
         beam_size: int = 5,
@@ -97,7 +113,8 @@ class FasterWhisperService:
         Transcribe audio file with Faster-Whisper
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
+                (e.g. AudioBuffer.samples, skips decoding the file again)
             language: Language code (None for auto-detect)
             task: "transcribe" or "translate" (to English)
             beam_size: Beam search size (default: 5)
@@ -116,12 +133,9 @@ class FasterWhisperService:
         # Model yükle (lazy loading)
         self.load_model()
         
-        # Dosya kontrolü
-        audio_file = Path(audio_path)
-        if not audio_file.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        audio_name = _audio_name(audio_path)
         
-        logger.info(f"🎙️  Transcribing with Faster-Whisper: {audio_file.name}")
+        logger.info(f"🎙️  Transcribing with Faster-Whisper: {audio_name}")
         logger.info(f"   🌍 Language: {language or 'auto-detect'}")
         logger.info(f"   📝 Task: {task}")
         
@@ -139,7 +153,7 @@ class FasterWhisperService:
             # Transcribe (generator döndürür - memory efficient)
             # Anti-hallucination parametreleri ekledik
             segments, info = self.model.transcribe(
-                audio=str(audio_path),
+                audio=_audio_input(audio_path),
                 language=language,
                 task=task,
                 beam_size=beam_size,
@@ -263,12 +277,12 @@ class FasterWhisperService:
             "segments": result.get("segments", [])
         }
     
-    def detect_language(self, audio_path: str) -> Dict[str, float]:
+    def detect_language(self, audio_path: Union[str, np.ndarray]) -> Dict[str, float]:
         """
         Detect audio language without full transcription
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
             
         Returns:
             Dictionary with language probabilities
@@ -276,11 +290,11 @@ class FasterWhisperService:
         self.load_model()
         
         try:
-            logger.info(f"🔍 Detecting language: {audio_path}")
+            logger.info(f"🔍 Detecting language: {_audio_name(audio_path)}")
             
             # Sadece ilk 30 saniyeyi kullan (hızlı)
             segments, info = self.model.transcribe(
-                audio=str(audio_path),
+                audio=_audio_input(audio_path),
                 language=None,  # Auto-detect
                 beam_size=1,    # Hızlı detection için
                 best_of=1,
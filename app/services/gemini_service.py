@@ -4,17 +4,30 @@ Provides text correction, summarization, and formatting improvements
 """
 
 import os
+import asyncio
 from openai import OpenAI
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Awaitable
 import logging
 import json
 import re
 from pydantic import BaseModel
 from app.settings import get_settings
+from app.services.chunk_planner import ChunkPlanner, get_model_limits, count_tokens
+from app.services.llm_streaming import TokenStream, stream_chat_completion
 
 logger = logging.getLogger(__name__)
 
 
+# Chunk planning per operation:
+# (prompt tokens around the text, output tokens per input token, fixed output tokens)
+CHUNK_PROFILES = {
+    "enhance": (1500, 1.15, 400),        # Detailed editing rules + JSON summary/improvements
+    "lecture_notes": (700, 1.0, 300),    # Markdown notes are about as long as the segment
+    "custom_prompt": (300, 1.0, 200),    # + the user's prompt
+    "translate": (200, 1.6, 0),          # Target languages can need more tokens (e.g. Turkish)
+}
+
+
 # ============================================================================
 # GEMINI-SPECIFIC OPTIMIZED SYSTEM PROMPTS (Non-Streaming)
 # ============================================================================
@@ -95,6 +108,33 @@ Ders transkriptini profesyonel ders notuna çevir:
 ## ⚠️ KRİTİK: Token limitin 2048, yanıtı mutlaka tamamla, eksik bırakma!"""
 
 
+# ============================================================================
+# STREAMING SYSTEM PROMPTS (plain text / Markdown output, no JSON wrapper)
+# ============================================================================
+
+STREAM_SYSTEM_PROMPTS = {
+    "enhance": """You are a professional transcription editor. The input is a RAW AUDIO TRANSCRIPTION from Whisper ASR: it has recognition errors, no punctuation, no capitalization and filler words (um, uh, yani, işte...).
+
+Fix spelling and recognition errors, add punctuation and capitalization, remove fillers and break long sentences into readable paragraphs. Keep ALL content - enhance, don't summarize.
+
+Write in {language}. Output only the enhanced text: no JSON, no commentary.""",
+
+    "lecture_notes": """You are an expert at turning lecture transcripts into comprehensive, well-organized study notes.
+
+Organize the topics hierarchically, highlight key concepts, keep examples and explanations, and use a student-friendly format:
+- "# Title", then "## Summary" (2-3 sentences) and "## Learning Objectives"
+- "## Main Topics" with a "###" section per topic, key concepts in **bold**
+
+Write in {language}. Output the notes as Markdown only: no JSON, no code fences.""",
+
+    "custom_prompt": """You are a helpful assistant that processes a transcription according to the user's instructions.
+
+Follow the instructions exactly. Write in {language} unless the instructions ask for another language. Output only the result.""",
+}
+
+STREAM_LANGUAGE_NAMES = {"tr": "Turkish", "en": "English", "de": "German", "fr": "French", "es": "Spanish"}
+
+
 # ============================================================================
 # GEMINI-SPECIFIC HELPER FUNCTIONS
 # ============================================================================
@@ -149,31 +189,6 @@ def calculate_safe_max_tokens(estimated_prompt_tokens: int) -> int:
     return safe_max
 
 
-def truncate_smart(text: str, max_chars: int) -> str:
-    """
-    Smart truncation - cut at sentence boundaries
-    """
-    if len(text) <= max_chars:
-        return text
-    
-    # Try to cut at sentence boundary
-    truncated = text[:max_chars]
-    
-    # Find last sentence-ending punctuation
-    for punct in ['. ', '! ', '? ', '.\n', '!\n', '?\n']:
-        last_pos = truncated.rfind(punct)
-        if last_pos > max_chars * 0.8:  # At least 80% of target
-            return truncated[:last_pos + 1] + "\n\n[Metin devamı token limiti nedeniyle kesildi...]"
-    
-    # Fallback: cut at word boundary
-    last_space = truncated.rfind(' ')
-    if last_space > 0:
-        return truncated[:last_space] + "..."
-    
-    # Ultimate fallback
-    return truncated + "..."
-
-
 def build_gemini_user_prompt(
     text: str,
     web_context: str,
@@ -373,8 +388,8 @@ class GeminiService:
             else:
                 self.model_name = settings.GROQ_MODEL or "llama-3.3-70b-versatile"
             
-            # Set max_output_tokens for Groq models
-            self.max_output_tokens = 8192  # Groq default (most models support 8K+)
+            # Context window / output budget for Groq models
+            self._set_model_limits("groq", preferred_model)
             
             if self.api_key:
                 try:
@@ -413,16 +428,8 @@ class GeminiService:
                 model_key = preferred_model if preferred_model else default_model
                 self.model_name = together_model_mapping.get(model_key, model_key if "/" in model_key else default_model)
             
-            # Together AI specific token limits (context window constraints)
-            # Calculate safe output limit: total_context - input_buffer
-            if "405b" in self.model_name.lower():
-                self.max_output_tokens = 800  # 405B: 2048 total - ~1200 input buffer = safe 800
-            elif "70b" in self.model_name.lower():
-                self.max_output_tokens = 6000  # 70B: larger context window
-            elif "24b" in self.model_name.lower() or "mistral" in self.model_name.lower():
-                self.max_output_tokens = 4000  # Mistral 24B: good context window
-            else:
-                self.max_output_tokens = 2000  # Default safe limit for Together AI
+            # Together AI specific token limits (405B has a small output budget)
+            self._set_model_limits("together", preferred_model)
             
             if self.api_key:
                 try:
@@ -450,7 +457,7 @@ class GeminiService:
             self.model_name = preferred_model if preferred_model else settings.OPENAI_MODEL
             
             # OpenAI token limits (most models have 4096 output limit)
-            self.max_output_tokens = 4096
+            self._set_model_limits("openai", preferred_model)
             
             if self.api_key:
                 try:
@@ -475,7 +482,7 @@ class GeminiService:
             self.model_name = preferred_model if preferred_model else "gemini-2.5-flash"
             
             # Gemini token limits (2.5 Flash has 8192 output limit)
-            self.max_output_tokens = 8192
+            self._set_model_limits("gemini", preferred_model)
             
             if self.api_key and self.api_key != "dummy-key":
                 try:
@@ -499,6 +506,31 @@ class GeminiService:
         """Check if AI service is enabled"""
         return self.enabled
     
+    def _set_model_limits(self, provider: str, model_key: Optional[str] = None) -> None:
+        """Load context window / output budget (AIModelPricing or defaults)"""
+        self.model_limits = get_model_limits(self.model_name, provider, model_key)
+        self.max_output_tokens = self.model_limits.max_output_tokens
+    
+    def _plan_chunks(self, text: str, operation: str, extra_prompt_tokens: int = 0) -> List[str]:
+        """
+        Split text into as few chunks as the model's limits allow
+        
+        Args:
+            text: Input text
+            operation: Key of CHUNK_PROFILES
+            extra_prompt_tokens: Prompt tokens on top of the profile (custom prompt, web context)
+            
+        Returns:
+            Chunks (a single item when the text fits in one call)
+        """
+        prompt_tokens, output_ratio, output_overhead = CHUNK_PROFILES[operation]
+        planner = ChunkPlanner(self.model_limits)
+        return planner.plan(text, prompt_tokens + extra_prompt_tokens, output_ratio, output_overhead)
+    
+    def _fit_to_context(self, text: str, prompt_tokens: int, output_tokens: int) -> str:
+        """Text for single-call operations, trimmed only if it exceeds the context window"""
+        return ChunkPlanner(self.model_limits).fit(text, prompt_tokens, output_tokens)
+    
     def _get_temperature(self) -> float:
         """
         Get appropriate temperature for the model.
@@ -521,12 +553,87 @@ class GeminiService:
             return "openai"
         return "gemini"
     
+    def _get_chunk_concurrency(self) -> int:
+        """Max parallel chunk requests for the active provider"""
+        settings = get_settings()
+        limits = {
+            "together": settings.TOGETHER_CHUNK_CONCURRENCY,
+            "groq": settings.GROQ_CHUNK_CONCURRENCY,
+            "openai": settings.OPENAI_CHUNK_CONCURRENCY,
+            "gemini": settings.GEMINI_CHUNK_CONCURRENCY,
+        }
+        return max(1, limits[self._get_provider_name()])
+    
+    async def _process_chunks(
+        self,
+        chunks: List[str],
+        process_chunk: Callable[[int, str], Awaitable[Any]],
+        label: str = "chunk",
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[Any]:
+        """
+        Run process_chunk for every chunk with bounded concurrency
+        
+        Provider SDK calls are blocking, so each chunk runs on its own event
+        loop in a worker thread while a semaphore caps in-flight requests at
+        the provider's limit. Failed chunks are retried with backoff.
+        
+        Args:
+            chunks: Text chunks
+            process_chunk: Coroutine function (index, chunk) -> result
+            label: Name used in log messages
+            progress_callback: Called as (completed, total) after each chunk
+            
+        Returns:
+            Results in chunk order
+        """
+        max_retries = get_settings().AI_CHUNK_MAX_RETRIES
+        concurrency = self._get_chunk_concurrency()
+        semaphore = asyncio.Semaphore(concurrency)
+        total = len(chunks)
+        completed = 0
+        
+        async def run(index: int, chunk: str) -> Any:
+            nonlocal completed
+            async with semaphore:
+                attempt = 0
+                while True:
+                    logger.info(f"   📝 Processing {label} {index+1}/{total} ({len(chunk)} chars)...")
+                    try:
+                        result = await asyncio.to_thread(lambda: asyncio.run(process_chunk(index, chunk)))
+                        break
+                    except Exception as e:
+                        if attempt >= max_retries:
+                            raise
+                        attempt += 1
+                        delay = 2 ** attempt
+                        logger.warning(f"⚠️  {label} {index+1}/{total} failed ({e}), retry {attempt}/{max_retries} in {delay}s")
+                        await asyncio.sleep(delay)
+            
+            completed += 1
+            if progress_callback:
+                try:
+                    progress_callback(completed, total)
+                except Exception as e:
+                    logger.debug(f"Progress callback failed: {e}")
+            return result
+        
+        logger.info(f"   ⚡ Processing {total} {label}s, {concurrency} at a time ({self._get_provider_name()})")
+        tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            return await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+    
     async def enhance_text(
         self,
         text: str,
         language: str = "tr",
         include_summary: bool = True,
-        enable_web_search: bool = True
+        enable_web_search: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> Dict[str, Any]:
         """
         Enhance transcribed text using OpenAI GPT or Gemini AI
@@ -538,6 +645,8 @@ class GeminiService:
             language: Language code (tr, en, etc.)
             include_summary: Whether to generate a summary
             enable_web_search: Whether to enrich prompt with web search context
+            progress_callback: Called as (completed, total) while long texts
+                are processed chunk by chunk
             
         Returns:
             Dict with enhanced_text, summary, and metadata
@@ -552,40 +661,16 @@ class GeminiService:
             logger.info(f"🚀 Starting text enhancement (length: {len(text)} chars)")
             logger.info(f"🤖 Using: {'OpenAI ' + self.model_name if self.use_openai else 'Gemini ' + self.model_name}")
             
-            # 🔧 CHUNKING STRATEGY: If text is too long, split into chunks
-            # v2.5.2: Reduced from 6000 to 4000 to prevent token overflow
-            # English text causes higher token usage than estimated
-            MAX_CHARS_PER_CHUNK = 4000  # ~1000 tokens English, ~1700 tokens Turkish (ultra-safe)
+            # 🔧 CHUNKING STRATEGY: Split only when the text doesn't fit one call
+            # (token-accurate, sized from the model's context window and output budget)
+            chunks = self._plan_chunks(text, "enhance")
             
-            if len(text) > MAX_CHARS_PER_CHUNK:
-                logger.warning(f"⚠️  Text too long ({len(text)} chars > {MAX_CHARS_PER_CHUNK})")
-                logger.warning(f"   🔧 Splitting into chunks for processing...")
-                
-                # Split text into chunks at sentence boundaries
-                chunks = []
-                current_chunk = ""
-                sentences = text.split(". ")
-                
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 2 < MAX_CHARS_PER_CHUNK:
-                        current_chunk += sentence + ". "
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = sentence + ". "
-                
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
+            if len(chunks) > 1:
+                logger.warning(f"⚠️  Text too long for a single call ({len(text)} chars)")
                 logger.info(f"   📦 Split into {len(chunks)} chunks")
                 
-                # Process each chunk
-                enhanced_chunks = []
-                all_improvements = []
-                
-                for i, chunk in enumerate(chunks):
-                    logger.info(f"   📝 Processing chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
-                    
+                # Process chunks concurrently (order is preserved)
+                async def enhance_chunk(i: int, chunk: str) -> Dict[str, Any]:
                     # Disable web search for subsequent chunks (only first chunk needs context)
                     chunk_result = await self._enhance_single_text(
                         chunk, 
@@ -593,7 +678,15 @@ class GeminiService:
                         include_summary=False,  # Only summarize final combined text
                         enable_web_search=(i == 0 and enable_web_search)  # Web search only for first chunk
                     )
-                    
+                    return chunk_result
+                
+                chunk_results = await self._process_chunks(
+                    chunks, enhance_chunk, label="chunk", progress_callback=progress_callback
+                )
+                
+                enhanced_chunks = []
+                all_improvements = []
+                for chunk_result in chunk_results:
                     enhanced_chunks.append(chunk_result["enhanced_text"])
                     all_improvements.extend(chunk_result.get("improvements", []))
                 
@@ -787,28 +880,11 @@ Return a JSON object with this EXACT format (no markdown, no code blocks):
         Includes web search and AI enhancement
         """
         try:
-            # � PRE-TRUNCATION: Prevent token overflow BEFORE building prompt
-            SYSTEM_OVERHEAD = 1500  # System messages + rules
-            text_tokens = estimate_tokens(text, language)
-            MAX_TEXT_TOKENS = 3000  # Conservative limit
-            
-            original_text_len = len(text)
-            
-            if text_tokens > MAX_TEXT_TOKENS:
-                logger.warning(f"⚠️  Text too long! {text_tokens} tokens > {MAX_TEXT_TOKENS} limit")
-                logger.warning(f"   Original: {len(text)} chars")
-                
-                # Calculate truncation target
-                max_chars = int(MAX_TEXT_TOKENS * 2.3) if language.lower() in ["turkish", "tr", "türkçe"] else MAX_TEXT_TOKENS * 4
-                
-                # Smart truncate (sentence boundary)
-                text = truncate_smart(text, max_chars)
-                text_tokens = estimate_tokens(text, language)
-                
-                logger.warning(f"   🔧 Truncated to: {len(text)} chars (~{text_tokens} tokens)")
-                logger.warning(f"   Token reduction: {estimate_tokens(text[:original_text_len], language)} → {text_tokens}")
+            # Chunk sizes come from the chunk planner (enhance_text), so the
+            # text is sent as-is instead of being truncated here
+            logger.info(f"📊 Enhancing {len(text)} chars (~{count_tokens(text, language)} tokens)")
             
-            # �🔍 WEB SEARCH FOR CONTEXT ENRICHMENT
+            # 🔍 WEB SEARCH FOR CONTEXT ENRICHMENT
             web_context = ""
             web_search_metadata = {}
             
@@ -919,7 +995,9 @@ Begin:"""
         Generate summary only for combined text (used after chunking)
         """
         try:
-            prompt = f"Summarize this {language} text in 2-3 concise sentences:\n\n{text[:2000]}"  # Limit to first 2000 chars
+            # Whole text unless it exceeds the model's context window
+            summary_input = self._fit_to_context(text, prompt_tokens=100, output_tokens=500)
+            prompt = f"Summarize this {language} text in 2-3 concise sentences:\n\n{summary_input}"
             
             # GPT-5 series models only support temperature=1.0, other models support 0.3
             temperature = 1.0 if self.use_openai and "gpt-5" in self.model_name.lower() else 0.3
@@ -997,7 +1075,7 @@ Begin:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=temperature,
-                max_tokens=4096,
+                max_tokens=self.max_output_tokens,  # Chunks are planned against this budget
                 response_format={"type": "json_object"}
             )
             
@@ -1218,7 +1296,7 @@ Begin:"""
         try:
             # v2.5: No complex token estimation needed - using model-specific capacity
             # Just log for monitoring
-            text_tokens = estimate_tokens(original_text, language)
+            text_tokens = count_tokens(original_text, language)
             
             logger.info(f"📊 Token info:")
             logger.info(f"   Text tokens: ~{text_tokens}")
@@ -1420,7 +1498,8 @@ Summary:
         self,
         text: str,
         language: str = "tr",
-        enable_web_search: bool = True
+        enable_web_search: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> Dict[str, Any]:
         """
         Convert transcription to structured lecture notes with academic formatting
@@ -1429,6 +1508,8 @@ Summary:
             text: Raw transcription text
             language: Language code
             enable_web_search: Whether to enrich prompt with web search context
+            progress_callback: Called as (completed, total) while long texts
+                are processed chunk by chunk
             
         Returns:
             Dict with lecture_notes, summary, and metadata
@@ -1473,39 +1554,17 @@ Summary:
             
             lang_name = {"tr": "Turkish", "en": "English", "de": "German", "fr": "French"}.get(language, "Turkish")
             
-            # 🔧 CHUNKING STRATEGY: Split long texts to prevent token overflow
-            # v2.5.2: Reduced from 6000 to 4000 to prevent token overflow
-            MAX_CHARS_PER_CHUNK = 4000  # Ultra-safe limit for lecture notes (verbose prompts)
+            # 🔧 CHUNKING STRATEGY: Split only when the text doesn't fit one call
+            chunks = self._plan_chunks(
+                text, "lecture_notes", extra_prompt_tokens=count_tokens(web_context, language)
+            )
             
-            if len(text) > MAX_CHARS_PER_CHUNK:
-                logger.warning(f"⚠️  Text too long ({len(text)} chars > {MAX_CHARS_PER_CHUNK})")
-                logger.warning(f"   🔧 Splitting into chunks for lecture notes...")
-                
-                # Split text into chunks at sentence boundaries
-                chunks = []
-                current_chunk = ""
-                sentences = text.split(". ")
+            if len(chunks) > 1:
+                logger.warning(f"⚠️  Text too long for a single call ({len(text)} chars)")
+                logger.info(f"   📦 Split into {len(chunks)} chunks for lecture notes")
                 
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 2 < MAX_CHARS_PER_CHUNK:
-                        current_chunk += sentence + ". "
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = sentence + ". "
-                
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
-                logger.info(f"   📦 Split into {len(chunks)} chunks")
-                
-                # Process each chunk
-                lecture_notes_chunks = []
-                all_key_concepts = []
-                
-                for i, chunk in enumerate(chunks):
-                    logger.info(f"   📝 Processing lecture notes chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
-                    
+                # Process chunks concurrently (order is preserved)
+                async def convert_chunk(i: int, chunk: str) -> Dict[str, Any]:
                     # Build chunk-specific prompt
                     chunk_lecture_prompt = f"""
 You are an expert academic note-taker. Convert the following {lang_name} transcription segment into comprehensive, well-structured lecture notes.
@@ -1550,6 +1609,15 @@ Important: Return pure JSON, no markdown code blocks.
                     else:
                         chunk_result = await self._convert_to_lecture_notes_gemini(chunk, language, chunk_lecture_prompt, lang_name)
                     
+                    return chunk_result
+                
+                chunk_results = await self._process_chunks(
+                    chunks, convert_chunk, label="lecture notes chunk", progress_callback=progress_callback
+                )
+                
+                lecture_notes_chunks = []
+                all_key_concepts = []
+                for chunk_result in chunk_results:
                     lecture_notes_chunks.append(chunk_result["lecture_notes"])
                     all_key_concepts.extend(chunk_result.get("key_concepts", []))
                 
@@ -2017,7 +2085,8 @@ Important: Return pure JSON, no markdown code blocks.
         self,
         text: str,
         custom_prompt: str,
-        language: str = "tr"
+        language: str = "tr",
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> Dict[str, Any]:
         """
         Process text with user-provided custom prompt (Router)
@@ -2028,6 +2097,8 @@ Important: Return pure JSON, no markdown code blocks.
             text: Raw transcription text
             custom_prompt: User's custom instructions
             language: Language code
+            progress_callback: Called as (completed, total) while long texts
+                are processed chunk by chunk
             
         Returns:
             Dict with processed_text and metadata
@@ -2043,38 +2114,17 @@ Important: Return pure JSON, no markdown code blocks.
         
         logger.info(f"🎨 Processing with custom prompt using {self.provider} (text: {len(text)} chars, prompt: {len(custom_prompt)} chars)")
         
-        # 🔧 CHUNKING STRATEGY: Split long texts to prevent token overflow
-        # v2.5.2: Reduced from 6000 to 4000 to prevent token overflow
-        MAX_CHARS_PER_CHUNK = 4000  # Ultra-safe limit (custom prompts can be verbose)
+        # 🔧 CHUNKING STRATEGY: Split only when the text doesn't fit one call
+        chunks = self._plan_chunks(
+            text, "custom_prompt", extra_prompt_tokens=count_tokens(custom_prompt, language)
+        )
         
-        if len(text) > MAX_CHARS_PER_CHUNK:
-            logger.warning(f"⚠️  Text too long ({len(text)} chars > {MAX_CHARS_PER_CHUNK})")
-            logger.warning(f"   🔧 Splitting into chunks for processing...")
-            
-            # Split text into chunks at sentence boundaries
-            chunks = []
-            current_chunk = ""
-            sentences = text.split(". ")
-            
-            for sentence in sentences:
-                if len(current_chunk) + len(sentence) + 2 < MAX_CHARS_PER_CHUNK:
-                    current_chunk += sentence + ". "
-                else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + ". "
-            
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            
+        if len(chunks) > 1:
+            logger.warning(f"⚠️  Text too long for a single call ({len(text)} chars)")
             logger.info(f"   📦 Split into {len(chunks)} chunks")
             
-            # Process each chunk with custom prompt
-            processed_chunks = []
-            
-            for i, chunk in enumerate(chunks):
-                logger.info(f"   📝 Processing chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
-                
+            # Process chunks concurrently with custom prompt (order is preserved)
+            async def process_chunk(i: int, chunk: str) -> str:
                 # Route to appropriate service for each chunk
                 if self.preferred_provider == "together":
                     chunk_result = await self._enhance_with_custom_prompt_together(chunk, custom_prompt, language)
@@ -2085,7 +2135,11 @@ Important: Return pure JSON, no markdown code blocks.
                 else:
                     chunk_result = await self._enhance_with_custom_prompt_gemini(chunk, custom_prompt, language)
                 
-                processed_chunks.append(chunk_result["processed_text"])
+                return chunk_result["processed_text"]
+            
+            processed_chunks = await self._process_chunks(
+                chunks, process_chunk, label="chunk", progress_callback=progress_callback
+            )
             
             # Combine processed chunks
             combined_text = "\n\n".join(processed_chunks)
@@ -2684,6 +2738,9 @@ Follow the instructions using the SOURCE TRANSCRIPTION as your base material. Pr
         
         try:
             # Prepare prompt for exam question generation
+            # Whole transcript unless it exceeds the model's context window
+            exam_text = self._fit_to_context(text, prompt_tokens=800, output_tokens=num_questions * 250)
+            
             prompt = f"""Sen bir eğitim uzmanısın. Aşağıdaki transkripsiyon metninden {num_questions} adet sınav sorusu oluştur.
 
 KURALLARA DİKKAT ET:
@@ -2716,7 +2773,7 @@ JSON formatında şu yapıda döndür:
 }}
 
 TRANSKRİPSİYON METNİ:
-{text[:8000]}
+{exam_text}
 """
             
             # Route to appropriate provider based on preferred_provider
@@ -3109,7 +3166,8 @@ TRANSKRİPSİYON METNİ:
         self,
         text: str,
         target_language: str,
-        source_language: str = "auto"
+        source_language: str = "auto",
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> Dict[str, Any]:
         """
         Translate text to target language using OpenAI or Gemini AI
@@ -3118,6 +3176,8 @@ TRANSKRİPSİYON METNİ:
             text: Source text to translate
             target_language: Target language code or name (e.g., 'en', 'English', 'tr', 'Turkish')
             source_language: Source language (default: 'auto' for auto-detection)
+            progress_callback: Called as (completed, total) while long texts
+                are translated chunk by chunk
             
         Returns:
             Dict with translated text and metadata
@@ -3147,66 +3207,27 @@ TRANSKRİPSİYON METNİ:
         logger.info(f"🤖 Using: {'OpenAI ' + self.model_name if self.use_openai else 'Gemini ' + self.model_name}")
         
         try:
-            # Prepare translation prompt
-            prompt = f"""Translate the following text to {target_lang_name}.
-
-RULES:
-1. Maintain the original meaning and tone
-2. Keep formatting (line breaks, paragraphs, bullet points)
-3. Preserve technical terms when appropriate
-4. Use natural, fluent language in the target language
-5. Do NOT add explanations or notes - only provide the translation
-
-SOURCE TEXT:
-{text[:8000]}
-
-Provide ONLY the translated text, nothing else."""
-
-            # GPT-5 series models only support temperature=1.0
-            temperature = 1.0 if "gpt-5" in self.model_name.lower() else 0.3
-            
-            if self.use_openai:
-                # OpenAI translation
-                logger.info("📡 Calling OpenAI for translation...")
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": "You are a professional translator. Provide only the translation, no explanations."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=temperature
-                )
-                translated_text = response.choices[0].message.content.strip()
-                logger.info(f"✅ OpenAI translation completed ({len(translated_text)} chars)")
+            # 🔧 CHUNKING STRATEGY: Long texts are translated in parallel chunks
+            # instead of being cut off at the per-request limit
+            chunks = self._plan_chunks(text, "translate")
+            chunks_processed = 1
+            if len(chunks) > 1:
+                logger.info(f"   📦 Split into {len(chunks)} chunks")
                 
-                return {
-                    "translated_text": translated_text,
-                    "target_language": target_language,
-                    "source_language": source_language,
-                    "model_used": self.model_name,
-                    "provider": self._get_provider_name(),
-                    "original_length": len(text),
-                    "translated_length": len(translated_text)
-                }
-            
-            else:
-                # Gemini translation via OpenAI-compatible endpoint
-                logger.info("📡 Calling Gemini for translation (OpenAI-compatible)...")
+                async def translate_chunk(i: int, chunk: str) -> str:
+                    translated = await self._translate_single_text(chunk, target_lang_name)
+                    if translated is None:
+                        raise Exception("API boş yanıt döndü")
+                    return translated
                 
-                # Generate translation
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": "You are an expert translator. Return only the translated text, no explanations."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=temperature,
-                    max_tokens=8192
+                translated_chunks = await self._process_chunks(
+                    chunks, translate_chunk, label="translation chunk", progress_callback=progress_callback
                 )
-                
-                # Check if response is valid
-                if not response.choices or not response.choices[0].message.content:
-                    logger.error("❌ Gemini translation returned empty response")
+                translated_text = "\n\n".join(translated_chunks)
+                chunks_processed = len(chunks)
+            else:
+                translated_text = await self._translate_single_text(text, target_lang_name)
+                if translated_text is None:
                     return {
                         "translated_text": text,
                         "target_language": target_language,
@@ -3214,26 +3235,25 @@ Provide ONLY the translated text, nothing else."""
                         "provider": self._get_provider_name(),
                         "error": "API boş yanıt döndü"
                     }
-                
-                translated_text = response.choices[0].message.content.strip()
-                logger.info(f"✅ Gemini translation completed ({len(translated_text)} chars)")
-                
-                # Build result
-                result = {
-                    "translated_text": translated_text,
-                    "target_language": target_language,
-                    "target_language_name": target_lang_name,
-                    "source_language": source_language,
-                    "original_length": len(text),
-                    "translated_length": len(translated_text),
-                    "model_used": self.model_name,
-                    "provider": self._get_provider_name()
-                }
-                
-                logger.info(f"✅ Translation completed to {target_lang_name}")
-                logger.info(f"   Original: {len(text)} chars → Translated: {len(translated_text)} chars")
-                
-                return result
+            
+            # Build result
+            result = {
+                "translated_text": translated_text,
+                "target_language": target_language,
+                "target_language_name": target_lang_name,
+                "source_language": source_language,
+                "original_length": len(text),
+                "translated_length": len(translated_text),
+                "model_used": self.model_name,
+                "provider": self._get_provider_name()
+            }
+            if chunks_processed > 1:
+                result["chunks_processed"] = chunks_processed
+            
+            logger.info(f"✅ Translation completed to {target_lang_name}")
+            logger.info(f"   Original: {len(text)} chars → Translated: {len(translated_text)} chars")
+            
+            return result
             
         except Exception as e:
             logger.error(f"❌ Translation failed: {e}")
@@ -3247,6 +3267,69 @@ Provide ONLY the translated text, nothing else."""
                 "translated_length": len(text)
             }
     
+    async def _translate_single_text(self, text: str, target_lang_name: str) -> Optional[str]:
+        """
+        Translate a single text chunk (used by chunking logic)
+        
+        Returns:
+            Translated text, or None if the API returned an empty response
+        """
+        # Prepare translation prompt
+        prompt = f"""Translate the following text to {target_lang_name}.
+
+RULES:
+1. Maintain the original meaning and tone
+2. Keep formatting (line breaks, paragraphs, bullet points)
+3. Preserve technical terms when appropriate
+4. Use natural, fluent language in the target language
+5. Do NOT add explanations or notes - only provide the translation
+
+SOURCE TEXT:
+{text}
+
+Provide ONLY the translated text, nothing else."""
+
+        # GPT-5 series models only support temperature=1.0
+        temperature = 1.0 if "gpt-5" in self.model_name.lower() else 0.3
+        
+        if self.use_openai:
+            # OpenAI translation
+            logger.info("📡 Calling OpenAI for translation...")
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "You are a professional translator. Provide only the translation, no explanations."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature
+            )
+            translated_text = response.choices[0].message.content.strip()
+            logger.info(f"✅ OpenAI translation completed ({len(translated_text)} chars)")
+            return translated_text
+        
+        # Gemini translation via OpenAI-compatible endpoint
+        logger.info("📡 Calling Gemini for translation (OpenAI-compatible)...")
+        
+        # Generate translation
+        response = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": "You are an expert translator. Return only the translated text, no explanations."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=8192
+        )
+        
+        # Check if response is valid
+        if not response.choices or not response.choices[0].message.content:
+            logger.error("❌ Gemini translation returned empty response")
+            return None
+        
+        translated_text = response.choices[0].message.content.strip()
+        logger.info(f"✅ Gemini translation completed ({len(translated_text)} chars)")
+        return translated_text
+    
     async def generate_search_query(
         self,
         text: str,
@@ -3466,6 +3549,73 @@ Return ONLY the formatted synthesis, nothing else."""
             return web_results.get("context", "Web search results available but synthesis failed.")
 
 
+    # ========================================================================
+    # STREAMING
+    # ========================================================================
+    
+    def stream_messages(
+        self,
+        operation: str,
+        text: str,
+        language: str = "tr",
+        custom_prompt: Optional[str] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Prompt messages for a streamed operation, one list per chunk
+        
+        Chunks are planned like the non-streaming operations; the streaming
+        endpoints send them one after another so output starts with the
+        first chunk.
+        
+        Args:
+            operation: "enhance", "lecture_notes" or "custom_prompt"
+            text: Source text
+            language: Language code ("auto": same language as the text)
+            custom_prompt: User instructions (custom_prompt only)
+            
+        Returns:
+            [[system message, user message], ...]
+        """
+        language_name = STREAM_LANGUAGE_NAMES.get(language, "the same language as the text")
+        system_prompt = STREAM_SYSTEM_PROMPTS[operation].format(language=language_name)
+        extra_tokens = count_tokens(custom_prompt, language) if custom_prompt else 0
+        chunks = self._plan_chunks(text, operation, extra_prompt_tokens=extra_tokens)
+        
+        messages = []
+        for i, chunk in enumerate(chunks):
+            part = f"(Part {i+1} of {len(chunks)} - continue seamlessly, don't repeat earlier parts)\n\n" if len(chunks) > 1 else ""
+            if custom_prompt:
+                user_prompt = f"**INSTRUCTIONS:**\n{custom_prompt}\n\n{part}**TEXT:**\n{chunk}"
+            else:
+                user_prompt = f"{part}{chunk}"
+            messages.append([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ])
+        return messages
+    
+    def stream_completion(self, messages: List[Dict[str, str]]) -> TokenStream:
+        """
+        Start a streaming completion with the selected provider
+        
+        All providers are called through OpenAI-compatible clients (Groq's SDK
+        has the same interface), so one code path streams every provider.
+        
+        Returns:
+            TokenStream of text deltas
+        """
+        if not self.enabled:
+            raise Exception("AI service is not enabled")
+        logger.info(f"📡 Streaming from {self._get_provider_name()} ({self.model_name})")
+        return stream_chat_completion(
+            self.client,
+            self.model_name,
+            messages,
+            temperature=self._get_temperature(),
+            max_tokens=self.max_output_tokens
+        )
+
+
 # Global service instance
 _gemini_service: Optional[GeminiService] = None
 
@@ -0,0 +1,341 @@
+"""
+Hybrid PKB retrieval
+Local BM25 index over a source's chunks, reciprocal-rank fusion with the Qdrant
+vector results and an optional CPU cross-encoder rerank
+"""
+
+import re
+import math
+import time
+import heapq
+import logging
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import replace
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.models.rag import PKBChunk
+from app.services.rag_service import PKBLocation, SearchResult
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Turkish casing: "I" -> "ı", "İ" -> "i" (str.lower() would turn "İ" into "i̇")
+TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+WORD_PATTERN = re.compile(r"\w+")
+
+# Terms are cut to their first 5 characters: a cheap stemmer that works well
+# for agglutinative Turkish ("istanbul'daki" / "istanbul" -> "istan")
+STEM_LENGTH = 5
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into BM25 terms
+
+    Returns:
+        Lowercased, prefix-stemmed terms (single letters dropped)
+    """
+    words = WORD_PATTERN.findall(text.translate(TURKISH_LOWER).lower())
+    return [word[:STEM_LENGTH] for word in words if len(word) > 1 or word.isdigit()]
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 inverted index over one source's chunks
+    """
+
+    def __init__(self, documents: List[SearchResult], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: Chunks (chunk_id must be the Qdrant point ID)
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+
+        for doc_index, document in enumerate(documents):
+            terms = Counter(tokenize(document.content))
+            self.lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings[term].append((doc_index, frequency))
+
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def idf(self, term: str) -> float:
+        matches = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.documents) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query: str, top_k: int = 20) -> List[SearchResult]:
+        """
+        Rank chunks for a query
+
+        Returns:
+            Best chunks first, score = BM25 score
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_index, frequency in postings:
+                length_norm = 1 - self.b + self.b * self.lengths[doc_index] / (self.avg_length or 1)
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [replace(self.documents[doc_index], score=score) for doc_index, score in best]
+
+
+def reciprocal_rank_fusion(rankings: List[List[SearchResult]], k: int = 60) -> List[SearchResult]:
+    """
+    Merge rankings with reciprocal-rank fusion (score = sum of 1 / (k + rank))
+
+    The first ranking's result object wins when a chunk appears in several
+    rankings. Scores are normalized so a chunk ranked first everywhere gets 1.0.
+
+    Returns:
+        Fused results, best first
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    results: Dict[str, SearchResult] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            fused[result.chunk_id] += 1.0 / (k + rank)
+            results.setdefault(result.chunk_id, result)
+
+    best_possible = len(rankings) / (k + 1)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [
+        replace(results[chunk_id], score=score / best_possible)
+        for chunk_id, score in ordered
+    ]
+
+
+class CrossEncoderReranker:
+    """
+    Optional CPU cross-encoder (sentence-transformers) for the final ordering
+
+    The model is loaded on first use; if sentence-transformers is not
+    installed the reranker is disabled and results keep their fused order.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None and not self._failed:
+            with self._lock:
+                if self._model is None and not self._failed:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        self._model = CrossEncoder(self.model_name, device="cpu")
+                        logger.info(f"✅ Reranker loaded: {self.model_name}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Reranker not available ({self.model_name}): {e}")
+                        self._failed = True
+        return self._model
+
+    def rerank(self, query: str, results: List[SearchResult], top_k: int) -> List[SearchResult]:
+        """
+        Reorder results by cross-encoder relevance
+
+        Returns:
+            Top top_k results, score = sigmoid of the cross-encoder logit
+        """
+        model = self._load()
+        if model is None or not results:
+            return results[:top_k]
+
+        logits = model.predict([(query, result.content) for result in results])
+        scored = sorted(zip(results, logits), key=lambda item: float(item[1]), reverse=True)[:top_k]
+        return [replace(result, score=1 / (1 + math.exp(-float(logit)))) for result, logit in scored]
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Get the reranker singleton
+
+    Returns:
+        CrossEncoderReranker, or None when RAG_RERANK_ENABLED is off
+    """
+    global _reranker
+    if not settings.RAG_RERANK_ENABLED:
+        return None
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(settings.RAG_RERANK_MODEL)
+    return _reranker
+
+
+def hybrid_rank(
+    query: str,
+    vector_results: List[SearchResult],
+    index: Optional[BM25Index],
+    top_k: int
+) -> List[SearchResult]:
+    """
+    Fuse vector and BM25 results (and rerank if enabled)
+
+    Args:
+        query: User question
+        vector_results: Qdrant results, best first
+        index: BM25 index of the same source (None: vector results only)
+        top_k: Number of chunks to return
+
+    Returns:
+        Best top_k chunks
+    """
+    rankings = [vector_results]
+    if index is not None and len(index):
+        rankings.append(index.search(query, top_k=settings.RAG_HYBRID_CANDIDATES))
+
+    fused = reciprocal_rank_fusion(rankings, k=settings.RAG_RRF_K)
+    reranker = get_reranker()
+    if reranker is not None:
+        return reranker.rerank(query, fused[:settings.RAG_HYBRID_CANDIDATES], top_k)
+    return fused[:top_k]
+
+
+# =========================================================================
+# INDEX CACHE
+# =========================================================================
+
+# key -> (signature, built_at, index); least recently used first
+_index_cache: "OrderedDict[Hashable, Tuple[Any, float, BM25Index]]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def _lookup(key: Hashable, signature: Any) -> Optional[BM25Index]:
+    """
+    Get a cached index if it is still current
+
+    A signature of None means "unknown": the entry is reused until
+    RAG_BM25_CACHE_TTL expires.
+    """
+    with _index_cache_lock:
+        entry = _index_cache.get(key)
+        if entry is None:
+            return None
+        cached_signature, built_at, index = entry
+        if signature is None:
+            fresh = time.monotonic() - built_at < settings.RAG_BM25_CACHE_TTL
+        else:
+            fresh = cached_signature == signature
+        if not fresh:
+            return None
+        _index_cache.move_to_end(key)
+        return index
+
+
+def _store(key: Hashable, signature: Any, documents: List[SearchResult]) -> BM25Index:
+    """Build an index and cache it (LRU, RAG_BM25_CACHE_SIZE entries)"""
+    index = BM25Index(documents)
+    with _index_cache_lock:
+        _index_cache[key] = (signature, time.monotonic(), index)
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > settings.RAG_BM25_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    logger.info(f"📚 BM25 index built for {key}: {len(index)} chunks")
+    return index
+
+
+def invalidate_source_index(source_id: int) -> None:
+    """Drop this process's cached indexes of a source (after re-indexing)"""
+    with _index_cache_lock:
+        for key in [k for k in _index_cache if k[-1] == source_id]:
+            del _index_cache[key]
+
+
+def points_to_documents(points: List[Dict[str, Any]]) -> List[SearchResult]:
+    """get_all_points() output -> BM25 documents"""
+    return [
+        SearchResult(chunk_id=point["id"], content=point["content"], score=0.0, metadata=point["metadata"])
+        for point in points
+        if point.get("content")
+    ]
+
+
+def _chunk_index(db, source_id: int) -> Optional[BM25Index]:
+    """Index built from PKBChunk rows, or None if the source has none"""
+    count, last_id = db.query(func.count(PKBChunk.id), func.max(PKBChunk.id)).filter(
+        PKBChunk.source_id == source_id
+    ).one()
+    if not count:
+        return None
+
+    def load() -> List[SearchResult]:
+        rows = db.query(
+            PKBChunk.vector_point_id, PKBChunk.content, PKBChunk.chunk_index
+        ).filter(PKBChunk.source_id == source_id).all()
+        return [
+            SearchResult(
+                chunk_id=point_id,
+                content=content,
+                score=0.0,
+                metadata={"text": content, "source_id": source_id, "chunk_idx": chunk_index}
+            )
+            for point_id, content, chunk_index in rows
+        ]
+
+    key, signature = ("chunks", source_id), (count, last_id)
+    index = _lookup(key, signature)
+    return index if index is not None else _store(key, signature, load())
+
+
+async def get_source_index(db, source_id: int, location: PKBLocation, vector_store) -> BM25Index:
+    """
+    BM25 index of a source for the async API
+
+    Built from PKBChunk rows; sources indexed before chunks were tracked fall
+    back to the payload text stored in Qdrant.
+
+    Args:
+        db: SQLAlchemy session
+        source_id: Source ID
+        location: PKB location of the source
+        vector_store: AsyncVectorStore
+    """
+    index = _chunk_index(db, source_id)
+    if index is not None:
+        return index
+
+    key = ("points", location.collection_name, source_id)
+    index = _lookup(key, None)
+    if index is None:
+        points = await vector_store.get_all_points(
+            location.collection_name, limit=settings.RAG_BM25_MAX_POINTS,
+            filter_conditions=location.filter_conditions
+        )
+        index = _store(key, None, points_to_documents(points))
+    return index
+
+
+def get_source_index_sync(source_id: int, location: PKBLocation, vector_store) -> BM25Index:
+    """
+    BM25 index of a source from its Qdrant payloads (sync facade, no DB session)
+    """
+    key = ("points", location.collection_name, source_id)
+    index = _lookup(key, None)
+    if index is None:
+        points = vector_store.get_all_points(
+            location.collection_name, limit=settings.RAG_BM25_MAX_POINTS,
+            filter_conditions=location.filter_conditions
+        )
+        index = _store(key, None, points_to_documents(points))
+    return index
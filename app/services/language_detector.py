@@ -6,12 +6,13 @@ AssemblyAI entegrasyonu için optimize edilmiş
 
 import torch
 import whisper
+import numpy as np
 import logging
 import time
 import os
 import tempfile
 import requests
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -82,12 +83,13 @@ class WhisperLanguageDetector:
             logger.error(f"❌ Language detection error: {e}")
             raise ValueError(f"Language detection failed: {e}")
     
-    def detect_language_from_file(self, audio_path: str) -> Dict[str, Any]:
+    def detect_language_from_file(self, audio_path: Union[str, np.ndarray]) -> Dict[str, Any]:
         """
         Detect language from audio file (very fast - ~1-3 seconds)
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
+                (e.g. AudioBuffer.slice(0, 30), no second decode)
             
         Returns:
             Dict with language code, name, and confidence
@@ -95,10 +97,14 @@ class WhisperLanguageDetector:
         start_time = time.time()
         
         try:
-            logger.info(f"🔍 Detecting language from file: {audio_path}")
+            if isinstance(audio_path, np.ndarray):
+                logger.info(f"🔍 Detecting language from decoded audio ({len(audio_path) / whisper.audio.SAMPLE_RATE:.1f}s)")
+                audio = np.asarray(audio_path[:whisper.audio.N_SAMPLES], dtype=np.float32)
+            else:
+                logger.info(f"🔍 Detecting language from file: {audio_path}")
+                audio = whisper.load_audio(audio_path)
             
-            # Load and process audio (first 30 seconds only)
-            audio = whisper.load_audio(audio_path)
+            # Process audio (first 30 seconds only)
             audio = whisper.pad_or_trim(audio)
             
             # Create mel-spectrogram
@@ -107,86 +113,114 @@ class WhisperLanguageDetector:
             # Detect language
             _, probs = self.model.detect_language(mel)
             
-            # Get top language
-            detected_lang = max(probs, key=probs.get)
-            confidence = probs[detected_lang]
-            
-            elapsed = time.time() - start_time
-            
-            # Map AssemblyAI language codes
-            assemblyai_lang_map = {
-                'en': 'en',      # English
-                'tr': 'tr',      # Turkish
-                'es': 'es',      # Spanish
-                'fr': 'fr',      # French
-                'de': 'de',      # German
-                'it': 'it',      # Italian
-                'pt': 'pt',      # Portuguese
-                'nl': 'nl',      # Dutch
-                'pl': 'pl',      # Polish
-                'ru': 'ru',      # Russian
-                'uk': 'uk',      # Ukrainian
-                'vi': 'vi',      # Vietnamese
-                'hi': 'hi',      # Hindi
-                'ja': 'ja',      # Japanese
-                'zh': 'zh',      # Chinese
-                'ko': 'ko',      # Korean
-                'ar': 'ar',      # Arabic
-            }
-            
-            # Language names
-            lang_names = {
-                'en': 'English',
-                'tr': 'Turkish (Türkçe)',
-                'es': 'Spanish',
-                'fr': 'French',
-                'de': 'German',
-                'it': 'Italian',
-                'pt': 'Portuguese',
-                'nl': 'Dutch',
-                'pl': 'Polish',
-                'ru': 'Russian',
-                'uk': 'Ukrainian',
-                'vi': 'Vietnamese',
-                'hi': 'Hindi',
-                'ja': 'Japanese',
-                'zh': 'Chinese',
-                'ko': 'Korean',
-                'ar': 'Arabic',
-            }
-            
-            # Get top 5 languages
-            top_languages = dict(
-                sorted(probs.items(), key=lambda x: x[1], reverse=True)[:5]
-            )
-            
-            result = {
-                'language_code': detected_lang,
-                'language_name': lang_names.get(detected_lang, detected_lang.upper()),
-                'confidence': float(confidence),
-                'detection_time': elapsed,
-                'assemblyai_code': assemblyai_lang_map.get(detected_lang, detected_lang),
-                'top_languages': {
-                    lang: {
-                        'code': lang,
-                        'name': lang_names.get(lang, lang.upper()),
-                        'probability': float(prob)
-                    }
-                    for lang, prob in top_languages.items()
-                }
-            }
-            
-            logger.info(f"✅ Language detected: {result['language_name']} ({detected_lang})")
-            logger.info(f"   Confidence: {confidence:.2%}")
-            logger.info(f"   Detection time: {elapsed:.2f}s")
-            logger.info(f"   Top 3: {', '.join([f'{lang}({prob:.1%})' for lang, prob in list(top_languages.items())[:3]])}")
-            
-            return result
+            return self.build_result(probs, time.time() - start_time)
             
         except Exception as e:
             logger.error(f"❌ Language detection error: {e}")
             raise ValueError(f"Language detection failed: {e}")
     
+    def language_probabilities(self, windows: List[np.ndarray]) -> List[Dict[str, float]]:
+        """
+        Birden fazla ses penceresi için dil olasılıkları (tek forward pass)
+
+        Args:
+            windows: 16 kHz mono float32 pencereler (her biri en fazla 30 sn)
+
+        Returns:
+            Pencere başına dil kodu -> olasılık
+        """
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(np.asarray(window, dtype=np.float32)))
+            for window in windows
+        ]).to(self.model.device)
+        _, probs = self.model.detect_language(mels)
+        return probs
+
+    def build_result(self, probs: Dict[str, float], elapsed: float) -> Dict[str, Any]:
+        """
+        Whisper dil olasılıklarından sonuç sözlüğünü oluştur
+        
+        Args:
+            probs: Dil kodu -> olasılık
+            elapsed: Tespit süresi (saniye)
+            
+        Returns:
+            Dict with language code, name, and confidence
+        """
+        # Get top language
+        detected_lang = max(probs, key=probs.get)
+        confidence = probs[detected_lang]
+        
+        # Map AssemblyAI language codes
+        assemblyai_lang_map = {
+            'en': 'en',      # English
+            'tr': 'tr',      # Turkish
+            'es': 'es',      # Spanish
+            'fr': 'fr',      # French
+            'de': 'de',      # German
+            'it': 'it',      # Italian
+            'pt': 'pt',      # Portuguese
+            'nl': 'nl',      # Dutch
+            'pl': 'pl',      # Polish
+            'ru': 'ru',      # Russian
+            'uk': 'uk',      # Ukrainian
+            'vi': 'vi',      # Vietnamese
+            'hi': 'hi',      # Hindi
+            'ja': 'ja',      # Japanese
+            'zh': 'zh',      # Chinese
+            'ko': 'ko',      # Korean
+            'ar': 'ar',      # Arabic
+        }
+        
+        # Language names
+        lang_names = {
+            'en': 'English',
+            'tr': 'Turkish (Türkçe)',
+            'es': 'Spanish',
+            'fr': 'French',
+            'de': 'German',
+            'it': 'Italian',
+            'pt': 'Portuguese',
+            'nl': 'Dutch',
+            'pl': 'Polish',
+            'ru': 'Russian',
+            'uk': 'Ukrainian',
+            'vi': 'Vietnamese',
+            'hi': 'Hindi',
+            'ja': 'Japanese',
+            'zh': 'Chinese',
+            'ko': 'Korean',
+            'ar': 'Arabic',
+        }
+        
+        # Get top 5 languages
+        top_languages = dict(
+            sorted(probs.items(), key=lambda x: x[1], reverse=True)[:5]
+        )
+        
+        result = {
+            'language_code': detected_lang,
+            'language_name': lang_names.get(detected_lang, detected_lang.upper()),
+            'confidence': float(confidence),
+            'detection_time': elapsed,
+            'assemblyai_code': assemblyai_lang_map.get(detected_lang, detected_lang),
+            'top_languages': {
+                lang: {
+                    'code': lang,
+                    'name': lang_names.get(lang, lang.upper()),
+                    'probability': float(prob)
+                }
+                for lang, prob in top_languages.items()
+            }
+        }
+        
+        logger.info(f"✅ Language detected: {result['language_name']} ({detected_lang})")
+        logger.info(f"   Confidence: {confidence:.2%}")
+        logger.info(f"   Detection time: {elapsed:.2f}s")
+        logger.info(f"   Top 3: {', '.join([f'{lang}({prob:.1%})' for lang, prob in list(top_languages.items())[:3]])}")
+        
+        return result
+    
     def is_supported_by_assemblyai(self, language_code: str) -> bool:
         """Check if language is supported by AssemblyAI"""
         # AssemblyAI supported languages (as of 2024)
@@ -214,12 +248,12 @@ LanguageDetector = WhisperLanguageDetector
 get_language_detector = get_whisper_detector
 
 
-def detect_audio_language(audio_path: str, confidence_threshold: float = 0.7) -> str:
+def detect_audio_language(audio_path: Union[str, np.ndarray], confidence_threshold: float = 0.7) -> str:
     """
     Convenience function: Audio dilini tespit et ve dil kodunu döndür
     
     Args:
-        audio_path: Ses dosyası yolu
+        audio_path: Ses dosyası yolu veya 16kHz mono örnekler
         confidence_threshold: Minimum güven skoru
     
     Returns:
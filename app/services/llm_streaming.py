@@ -0,0 +1,222 @@
+"""
+LLM streaming helpers
+Token streams over the providers' streaming APIs and Server-Sent Events
+framing for the streaming endpoints
+"""
+
+import json
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.services.chunk_planner import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Keep reverse proxies (nginx) from buffering the event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+class TokenStream:
+    """
+    Iterator of text deltas from a provider stream
+
+    Token usage is read from the stream's final usage chunk when the provider
+    sends one and estimated with count_tokens() otherwise; both are available
+    after the stream is exhausted.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[Any],
+        get_delta: Callable[[Any], Optional[str]],
+        messages: List[Dict[str, str]],
+        get_usage: Optional[Callable[[Any], Optional[Any]]] = None
+    ):
+        """
+        Args:
+            chunks: Provider stream (blocking iterator)
+            get_delta: chunk -> text delta (None/"" for chunks without text)
+            messages: Prompt messages (for the input token estimate)
+            get_usage: chunk -> usage with prompt_tokens/completion_tokens, or None
+        """
+        self._chunks = chunks
+        self._get_delta = get_delta
+        self._get_usage = get_usage
+        self.messages = messages
+        self.parts: List[str] = []
+        self.usage: Optional[Dict[str, int]] = None
+        self.started_at = time.monotonic()
+        self.first_token_seconds: Optional[float] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            if self._get_usage is not None:
+                usage = _usage_dict(self._get_usage(chunk))
+                if usage:
+                    self.usage = usage
+            delta = self._get_delta(chunk)
+            if delta:
+                if self.first_token_seconds is None:
+                    self.first_token_seconds = time.monotonic() - self.started_at
+                self.parts.append(delta)
+                yield delta
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def input_tokens(self) -> int:
+        if self.usage:
+            return self.usage["prompt_tokens"]
+        return sum(count_tokens(m.get("content", "")) for m in self.messages)
+
+    @property
+    def output_tokens(self) -> int:
+        if self.usage:
+            return self.usage["completion_tokens"]
+        return count_tokens(self.text)
+
+
+def _usage_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """Usage object or dict (older SDKs keep unknown fields as dicts) -> dict"""
+    if not usage:
+        return None
+    if not isinstance(usage, dict):
+        usage = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        }
+    if usage.get("prompt_tokens") is None or usage.get("completion_tokens") is None:
+        return None
+    return {"prompt_tokens": int(usage["prompt_tokens"]), "completion_tokens": int(usage["completion_tokens"])}
+
+
+def _chat_delta(chunk: Any) -> Optional[str]:
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return None
+    return getattr(choices[0].delta, "content", None)
+
+
+def _chat_usage(chunk: Any) -> Optional[Any]:
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        # Groq reports usage on the last chunk under x_groq
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = x_groq.get("usage") if isinstance(x_groq, dict) else getattr(x_groq, "usage", None)
+    return usage
+
+
+def gemini_delta(chunk: Any) -> Optional[str]:
+    """Text of a google-generativeai stream chunk (chunks without text parts raise on .text)"""
+    try:
+        return chunk.text
+    except (ValueError, AttributeError):
+        return None
+
+
+def stream_chat_completion(
+    client,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: Optional[int] = None
+) -> TokenStream:
+    """
+    Start a streaming chat completion on an OpenAI-compatible client
+
+    Works for OpenAI, Together, Groq and Gemini's OpenAI endpoint. Usage is
+    requested through extra_body so older SDK versions accept it too.
+
+    Returns:
+        TokenStream (the request is sent before this returns)
+    """
+    params: Dict[str, Any] = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": True,
+        "extra_body": {"stream_options": {"include_usage": True}},
+    }
+    if max_tokens:
+        params["max_tokens"] = max_tokens
+    chunks = client.chat.completions.create(**params)
+    return TokenStream(chunks, _chat_delta, messages, _chat_usage)
+
+
+async def iterate_in_thread(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator (provider SDK stream) without blocking the event loop
+    """
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            break
+        yield item
+
+
+class StreamCharge:
+    """
+    Charges a streamed response exactly once
+
+    The endpoint records every delta it sends with delivered() and calls
+    settle() after the last token. If the client disconnects first, close()
+    (from the generator's finally block) charges for the output already
+    delivered, since the provider tokens are paid either way. Streams that
+    failed on the provider side are not charged.
+    """
+
+    def __init__(self, charge: Callable[[str, bool], Any]):
+        """
+        Args:
+            charge: (delivered text, completed) -> result; runs synchronously so
+                it also works while the generator is being cancelled
+        """
+        self._charge = charge
+        self.parts: List[str] = []
+        self.charged = False
+        self.failed = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def delivered(self, delta: str) -> None:
+        self.parts.append(delta)
+
+    def settle(self, completed: bool = True) -> Any:
+        """Charge for the delivered output (no-op after the first call)"""
+        if self.charged:
+            return None
+        self.charged = True
+        return self._charge(self.text, completed)
+
+    def close(self) -> None:
+        """Charge a stream the client abandoned after receiving output"""
+        if self.charged or self.failed or not self.parts:
+            return
+        logger.info(f"✂️ Stream closed by client after {len(self.text)} chars, charging delivered output")
+        try:
+            self.settle(completed=False)
+        except Exception as e:
+            logger.error(f"❌ Charging abandoned stream failed: {e}")
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event
+
+    Args:
+        event: Event name (start, token, done, error, ...)
+        data: JSON-serializable payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
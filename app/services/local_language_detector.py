@@ -0,0 +1,216 @@
+"""
+Local-first language detection
+Detects the spoken language from the local upload instead of downloading it
+back from R2: ffmpeg decodes only a few bounded windows spread over the file,
+Whisper scores them in one batch and the averaged result is cached per
+content hash
+"""
+
+import json
+import time
+import logging
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.settings import get_settings
+from app.services.audio_buffer import SAMPLE_RATE, AudioDecodeError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Windows quieter than this (RMS) carry no language information
+SILENCE_RMS = 1e-3
+
+
+def probe_duration(path: Union[str, Path]) -> Optional[float]:
+    """Container duration in seconds via ffprobe (None if unknown)"""
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        str(path)
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        return float(result.stdout.strip())
+    except Exception:
+        return None
+
+
+def plan_windows(
+    duration: Optional[float],
+    windows: int,
+    window_seconds: float
+) -> List[Tuple[float, float]]:
+    """
+    Spread detection windows evenly over a file
+
+    Window i is centred at (i + 0.5) / n of the duration, so intros and
+    outros (music, silence) do not dominate long files. Short files get as
+    many windows as fit without overlapping.
+
+    Args:
+        duration: File length in seconds (None = unknown, first window only)
+        windows: Maximum number of windows
+        window_seconds: Length of each window
+
+    Returns:
+        (start, length) seconds per window
+    """
+    if not duration or duration <= window_seconds:
+        return [(0.0, window_seconds if not duration else duration)]
+
+    count = max(1, min(windows, int(duration // window_seconds)))
+    plan = []
+    for i in range(count):
+        centre = (i + 0.5) / count * duration
+        start = min(max(centre - window_seconds / 2, 0.0), duration - window_seconds)
+        plan.append((round(start, 3), window_seconds))
+    return plan
+
+
+def decode_window(path: Union[str, Path], start: float, length: float) -> np.ndarray:
+    """
+    Decode [start, start + length) of a file to 16 kHz mono float32
+
+    -ss before -i seeks in the container, so only the window is decoded.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+        "-i", str(path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le", "-"
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").strip()
+        raise AudioDecodeError(f"ffmpeg failed ({result.returncode}): {stderr[-500:]}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def average_probabilities(probs: Sequence[Dict[str, float]]) -> Dict[str, float]:
+    """Mean language distribution of several windows"""
+    total: Dict[str, float] = {}
+    for window in probs:
+        for code, prob in window.items():
+            total[code] = total.get(code, 0.0) + float(prob)
+    return {code: value / len(probs) for code, value in total.items()}
+
+
+class LanguageDetectionCache:
+    """
+    Redis cache of language detection results per content hash
+
+    If Redis is not reachable the cache simply misses.
+    """
+
+    KEY_PREFIX = "language_detection"
+
+    def __init__(self, redis_client=None, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.LANGUAGE_DETECTION_CACHE_TTL_HOURS * 3600
+        self._redis = redis_client
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _key(self, content_hash: str) -> str:
+        return f"{self.KEY_PREFIX}:{content_hash}"
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached detection result of a file, or None"""
+        try:
+            raw = self.redis.get(self._key(content_hash))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Language detection cache read failed: {e}")
+            return None
+
+    def set(self, content_hash: str, result: Dict[str, Any]) -> None:
+        """Store the detection result of a file"""
+        try:
+            self.redis.setex(self._key(content_hash), self.ttl_seconds, json.dumps(result))
+        except Exception as e:
+            logger.warning(f"⚠️ Language detection cache write failed: {e}")
+
+
+def detect_language_local(
+    path: Union[str, Path],
+    content_hash: Optional[str] = None,
+    detector=None,
+    cache: Optional[LanguageDetectionCache] = None,
+    windows: Optional[int] = None,
+    window_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Detect the language of a local file from a few sampled windows
+
+    Args:
+        path: Local audio/video file
+        content_hash: File hash; results are cached under it when given
+        detector: WhisperLanguageDetector (default: singleton)
+        cache: Result cache (default: singleton)
+        windows: Windows to sample (default: LANGUAGE_DETECTION_WINDOWS)
+        window_seconds: Window length (default: LANGUAGE_DETECTION_WINDOW_SECONDS)
+
+    Returns:
+        Same dict as WhisperLanguageDetector.detect_language_from_file(),
+        plus 'windows' (number of windows scored)
+    """
+    if content_hash:
+        cache = cache or get_language_detection_cache()
+        cached = cache.get(content_hash)
+        if cached is not None:
+            logger.info(f"♻️ Language detection cache hit ({content_hash[:12]}): {cached['language_code']}")
+            return cached
+
+    if detector is None:
+        from app.services.language_detector import get_whisper_detector
+        detector = get_whisper_detector()
+
+    windows = windows or settings.LANGUAGE_DETECTION_WINDOWS
+    window_seconds = window_seconds or settings.LANGUAGE_DETECTION_WINDOW_SECONDS
+    start_time = time.time()
+
+    plan = plan_windows(probe_duration(path), windows, window_seconds)
+    samples = [decode_window(path, start, length) for start, length in plan]
+    voiced = [s for s in samples if len(s) and float(np.sqrt(np.mean(np.square(s)))) >= SILENCE_RMS]
+    if not voiced:
+        # All windows silent: score them anyway rather than failing
+        voiced = [s for s in samples if len(s)] or samples[:1]
+
+    probs = average_probabilities(detector.language_probabilities(voiced))
+    result = detector.build_result(probs, time.time() - start_time)
+    result['windows'] = len(voiced)
+    logger.info(
+        f"🔍 Local language detection: {result['language_code']} from {len(voiced)}/{len(plan)} "
+        f"windows in {result['detection_time']:.2f}s"
+    )
+
+    if content_hash:
+        cache.set(content_hash, result)
+    return result
+
+
+# Singleton instance
+_language_detection_cache: Optional[LanguageDetectionCache] = None
+
+
+def get_language_detection_cache() -> LanguageDetectionCache:
+    """
+    Get language detection cache singleton
+
+    Returns:
+        LanguageDetectionCache instance
+    """
+    global _language_detection_cache
+    if _language_detection_cache is None:
+        _language_detection_cache = LanguageDetectionCache()
+    return _language_detection_cache
@@ -5,7 +5,8 @@ Uses Modal Client to invoke deployed functions
 
 import logging
 import time
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
 import modal
 from app.settings import get_settings
 
@@ -74,6 +75,34 @@ class ModalService:
             logger.error(f"❌ Modal transcription error: {e}")
             raise ValueError(f"Modal transcription failed: {e}")
     
+    def map_chunks(self, chunks: Sequence, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Transcribe audio chunks in parallel Modal containers
+        
+        Backend of parallel_transcription.transcribe_parallel(): chunks are
+        encoded locally and fanned out with .map(), so each chunk can run on
+        its own T4 container.
+        
+        Args:
+            chunks: parallel_transcription.AudioChunk list
+            language: Language code (None = auto-detect per chunk)
+            
+        Returns:
+            Per-chunk results (chunk-relative timestamps), in chunk order
+        """
+        from app.services.parallel_transcription import encode_chunk
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            payloads = list(executor.map(lambda chunk: encode_chunk(chunk.samples), chunks))
+        logger.info(f"🚀 Modal fan-out: {len(payloads)} chunks, {sum(map(len, payloads)) / (1024 * 1024):.1f}MB")
+        
+        try:
+            instance = self._get_whisper_class()()
+            return list(instance.transcribe_chunk.map(payloads, kwargs={"language": language}))
+        except Exception as e:
+            logger.error(f"❌ Modal chunk transcription error: {e}")
+            raise ValueError(f"Modal chunk transcription failed: {e}")
+    
     def health_check(self) -> Dict[str, Any]:
         """Check Modal app availability"""
         try:
@@ -0,0 +1,301 @@
+"""
+Parallel (split/map/merge) transcription
+Cuts long recordings at silences, transcribes the chunks in parallel on a
+backend (Modal containers or a local stand-in) and stitches the segments back
+together with corrected timestamps and de-duplicated boundary text
+"""
+
+import re
+import time
+import logging
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.settings import get_settings
+from app.services.audio_buffer import SAMPLE_RATE, AudioDecodeError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Energy frames for silence search, and smoothing so cuts land inside pauses
+FRAME_SECONDS = 0.03
+SMOOTH_SECONDS = 0.3
+
+# Boundary text de-duplication looks at most this many words back
+MAX_REPEAT_WORDS = 8
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    """
+    One chunk of a recording
+
+    start/end include the overlap with the neighbours; own_start/own_end is
+    the part of the timeline whose segments this chunk is responsible for.
+    """
+    index: int
+    start: float
+    end: float
+    own_start: float
+    own_end: float
+    samples: np.ndarray
+
+
+def _frame_energy(samples: np.ndarray, sr: int) -> np.ndarray:
+    """Smoothed RMS energy per FRAME_SECONDS frame"""
+    frame = max(int(FRAME_SECONDS * sr), 1)
+    n_frames = len(samples) // frame
+    frames = np.asarray(samples[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame)
+    width = max(int(SMOOTH_SECONDS / FRAME_SECONDS), 1)
+    return np.convolve(energy, np.ones(width) / width, mode="same")
+
+
+def find_split_points(
+    samples: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: Optional[float] = None,
+    sr: int = SAMPLE_RATE
+) -> List[float]:
+    """
+    Cut points at the quietest moment near every chunk_seconds
+
+    Each cut is searched within ±search_seconds of its target, so no chunk
+    is longer than chunk_seconds + search_seconds.
+
+    Args:
+        samples: Mono waveform
+        chunk_seconds: Target chunk length
+        search_seconds: How far a cut may move to find a silence
+            (default: a quarter of the chunk, at most 30s)
+        sr: Sample rate of samples
+
+    Returns:
+        Cut times in seconds (ascending, without 0 and the end)
+    """
+    if search_seconds is None:
+        search_seconds = min(chunk_seconds / 4, 30.0)
+    duration = len(samples) / sr
+    if duration <= chunk_seconds + search_seconds:
+        return []
+
+    energy = _frame_energy(samples, sr)
+    points: List[float] = []
+    last = 0.0
+    while duration - last > chunk_seconds + search_seconds:
+        target = last + chunk_seconds
+        lo = int(max(target - search_seconds, last + search_seconds) / FRAME_SECONDS)
+        hi = int(min(target + search_seconds, duration - search_seconds) / FRAME_SECONDS)
+        hi = min(max(hi, lo + 1), len(energy))
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        last = round((quietest + 0.5) * FRAME_SECONDS, 3)
+        points.append(last)
+    return points
+
+
+def split_audio(
+    samples: np.ndarray,
+    chunk_seconds: float,
+    overlap_seconds: float = 1.0,
+    sr: int = SAMPLE_RATE
+) -> List[AudioChunk]:
+    """
+    Split a waveform into overlapping chunks cut at silences
+
+    Chunk samples are views of the input (no copy for memory-mapped buffers).
+    """
+    duration = len(samples) / sr
+    bounds = [0.0] + find_split_points(samples, chunk_seconds, sr=sr) + [duration]
+    chunks = []
+    for i, (own_start, own_end) in enumerate(zip(bounds, bounds[1:])):
+        start = max(own_start - overlap_seconds, 0.0)
+        end = min(own_end + overlap_seconds, duration)
+        chunks.append(AudioChunk(
+            index=i,
+            start=start,
+            end=end,
+            own_start=own_start,
+            own_end=own_end,
+            samples=samples[int(start * sr):int(end * sr)]
+        ))
+    return chunks
+
+
+def encode_chunk(samples: np.ndarray, sr: int = SAMPLE_RATE) -> bytes:
+    """
+    Encode a chunk as Ogg/Opus for shipping to a remote worker
+
+    32 kbit/s mono keeps a 10 minute chunk around 2.5 MB.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-f", "f32le", "-ar", str(sr), "-ac", "1", "-i", "-",
+        "-c:a", "libopus", "-b:a", "32k", "-f", "ogg", "-"
+    ]
+    result = subprocess.run(command, input=np.asarray(samples, dtype=np.float32).tobytes(), capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").strip()
+        raise AudioDecodeError(f"ffmpeg failed ({result.returncode}): {stderr[-500:]}")
+    return result.stdout
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.sub(r"[^\w\s']", " ", text.lower()).split() if w]
+
+
+def strip_repeated_prefix(previous: str, text: str, max_words: int = MAX_REPEAT_WORDS) -> str:
+    """
+    Remove the words at the start of text that repeat the end of previous
+
+    Both sides of a chunk boundary may transcribe the same words from the
+    overlap; runs of at least two words are treated as repeats.
+    """
+    tail = _words(previous)[-max_words:]
+    tokens = text.split()
+    normalized = [_words(token) for token in tokens]
+    for k in range(min(len(tail), len(tokens)), 1, -1):
+        head = [w for token in normalized[:k] for w in token]
+        if head and head == tail[-len(head):]:
+            return " ".join(tokens[k:])
+    return text
+
+
+def merge_chunk_results(chunks: Sequence[AudioChunk], results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stitch per-chunk transcripts into one
+
+    Segment (and word) timestamps are shifted by the chunk start, each chunk
+    only keeps segments whose midpoint is in its own part of the timeline,
+    and words repeated across a boundary are dropped.
+
+    Returns:
+        Transcription dict in the Modal result format
+    """
+    segments: List[Dict[str, Any]] = []
+    language_seconds: Counter = Counter()
+
+    for chunk, result in zip(chunks, results):
+        if result.get("language"):
+            language_seconds[result["language"]] += chunk.own_end - chunk.own_start
+        boundary = True
+        for segment in result.get("segments", []):
+            start = segment["start"] + chunk.start
+            end = segment["end"] + chunk.start
+            if not chunk.own_start <= (start + end) / 2 < chunk.own_end:
+                continue
+
+            text = segment.get("text", "").strip()
+            if boundary and segments:
+                text = strip_repeated_prefix(segments[-1]["text"], text)
+            boundary = False
+            if not text:
+                continue
+
+            merged = dict(segment, start=start, end=end, text=text)
+            if segment.get("words"):
+                merged["words"] = [
+                    dict(word, start=word["start"] + chunk.start, end=word["end"] + chunk.start)
+                    for word in segment["words"]
+                ]
+            segments.append(merged)
+
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+
+    return {
+        "segments": segments,
+        "text": " ".join(segment["text"] for segment in segments),
+        "language": language_seconds.most_common(1)[0][0] if language_seconds else None,
+        "duration": chunks[-1].own_end if chunks else 0,
+        "segments_count": len(segments),
+        "chunks": len(chunks),
+        "speaker_count": 0
+    }
+
+
+class LocalChunkBackend:
+    """
+    In-process stand-in for the Modal fan-out
+
+    Transcribes chunks on a thread pool with a local transcribe function, so
+    the split/map/merge pipeline can run without Modal.
+    """
+
+    def __init__(
+        self,
+        transcribe_fn: Optional[Callable[[np.ndarray, Optional[str]], Dict[str, Any]]] = None,
+        max_workers: int = 2
+    ):
+        self.transcribe_fn = transcribe_fn
+        self.max_workers = max_workers
+
+    def _transcribe(self, samples: np.ndarray, language: Optional[str]) -> Dict[str, Any]:
+        if self.transcribe_fn is not None:
+            return self.transcribe_fn(samples, language)
+        from app.services.whisper_service import get_whisper_service
+        return get_whisper_service().transcribe(samples, language)
+
+    def map_chunks(self, chunks: Sequence[AudioChunk], language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Transcribe chunks in parallel, results in chunk order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda chunk: self._transcribe(chunk.samples, language), chunks))
+
+
+def transcribe_parallel(
+    samples: np.ndarray,
+    backend,
+    language: Optional[str] = None,
+    chunk_seconds: Optional[float] = None,
+    overlap_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Split, transcribe in parallel and merge
+
+    With language=None every chunk detects its own language and the result
+    reports the one covering most of the recording.
+
+    Args:
+        samples: 16 kHz mono waveform (e.g. AudioBuffer.samples)
+        backend: Object with map_chunks(chunks, language) (ModalService, LocalChunkBackend)
+        language: Language code (None = auto-detect)
+        chunk_seconds: Target chunk length (default: PARALLEL_CHUNK_SECONDS)
+        overlap_seconds: Overlap between chunks (default: PARALLEL_CHUNK_OVERLAP_SECONDS)
+
+    Returns:
+        Transcription dict in the Modal result format, plus 'chunks'
+    """
+    start_time = time.time()
+    chunks = split_audio(
+        samples,
+        chunk_seconds or settings.PARALLEL_CHUNK_SECONDS,
+        settings.PARALLEL_CHUNK_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    )
+    logger.info(
+        f"✂️ Split {len(samples) / SAMPLE_RATE:.0f}s into {len(chunks)} chunks: "
+        f"{', '.join(f'{c.own_end - c.own_start:.0f}s' for c in chunks)}"
+    )
+
+    results = backend.map_chunks(chunks, language)
+    merged = merge_chunk_results(chunks, results)
+    merged["processing_time"] = time.time() - start_time
+
+    logger.info(
+        f"✅ Parallel transcription: {merged['segments_count']} segments from {len(chunks)} chunks "
+        f"in {merged['processing_time']:.1f}s"
+    )
+    return merged
+
+
+def get_chunk_backend():
+    """
+    Backend configured by PARALLEL_TRANSCRIPTION_BACKEND ("modal" or "local")
+    """
+    if settings.PARALLEL_TRANSCRIPTION_BACKEND == "local":
+        return LocalChunkBackend()
+    from app.services.modal_service import get_modal_service
+    return get_modal_service()
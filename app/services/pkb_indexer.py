@@ -0,0 +1,346 @@
+"""
+Incremental PKB indexer
+Keeps a source's Qdrant points and PKBChunk rows in sync with Source.content by
+embedding only new chunks, patching moved ones and deleting vanished ones
+"""
+
+import re
+import uuid
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.rag import PKBChunk
+from app.services.answer_cache import get_answer_cache
+from app.services.embedding_cache import content_hash
+from app.services.rag_service import (
+    ChunkResult,
+    EmbeddingModel,
+    EmbeddingService,
+    TextChunker,
+    VectorStoreService,
+    EMBEDDING_CONFIGS,
+    SHARED_PAYLOAD_INDEXES,
+    pkb_location,
+)
+
+logger = logging.getLogger(__name__)
+
+# Source items are stored as "### <item title>" sections (see create_source)
+SECTION_PATTERN = re.compile(r"\n\n(?=### )")
+
+# Namespace of content-defined point IDs
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "gistify/pkb-chunk")
+
+
+class PKBIndexError(Exception):
+    """PKB indexing failed"""
+    pass
+
+
+def chunk_point_id(user_id: int, source_id: int, text_hash: str, occurrence: int = 0) -> str:
+    """
+    Content-defined Qdrant point ID of a chunk
+
+    Args:
+        user_id: Owner of the source
+        source_id: Source ID
+        text_hash: content_hash() of the chunk text
+        occurrence: 0 for the first chunk with this text, 1 for the next, ...
+
+    Returns:
+        UUID string (also used as PKBChunk.chunk_id)
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{user_id}:{source_id}:{text_hash}:{occurrence}"))
+
+
+def chunk_sections(chunker: TextChunker, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[ChunkResult]:
+    """
+    Chunk each source item section on its own
+
+    Chunk boundaries never cross a "### " section, so editing one item only
+    changes that item's chunks.
+
+    Returns:
+        ChunkResult list with source-wide index and character offsets
+    """
+    chunks: List[ChunkResult] = []
+    offset = 0
+    for section in SECTION_PATTERN.split(text):
+        for chunk in chunker.chunk_text(section, metadata=metadata):
+            chunk.index = len(chunks)
+            chunk.start_char += offset
+            chunk.end_char += offset
+            chunks.append(chunk)
+        offset += len(section) + 2
+    return chunks
+
+
+@dataclass
+class IndexedChunk:
+    """Chunk with its content-defined point ID"""
+    point_id: str
+    text_hash: str
+    chunk: ChunkResult
+
+
+@dataclass
+class PKBIndexDiff:
+    """Changes needed to bring the index in line with the chunks"""
+    added: List[IndexedChunk] = field(default_factory=list)
+    moved: List[IndexedChunk] = field(default_factory=list)  # same text, new position
+    removed: List[PKBChunk] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def diff_chunks(indexed: List[IndexedChunk], existing: List[PKBChunk], collection_name: str, embedding_model: str) -> PKBIndexDiff:
+    """
+    Compare new chunks with the stored PKBChunk rows
+
+    Rows stored in another collection or with another embedding model are
+    re-embedded.
+    """
+    diff = PKBIndexDiff()
+    current = {
+        row.vector_point_id: row for row in existing
+        if row.vector_collection == collection_name and row.embedding_model == embedding_model
+    }
+    wanted = {item.point_id for item in indexed}
+
+    for item in indexed:
+        row = current.get(item.point_id)
+        if row is None:
+            diff.added.append(item)
+        elif (row.chunk_index, row.start_char, row.end_char) != (item.chunk.index, item.chunk.start_char, item.chunk.end_char):
+            diff.moved.append(item)
+        else:
+            diff.unchanged += 1
+
+    diff.removed = [
+        row for row in existing
+        if row.vector_point_id not in wanted or row.vector_point_id not in current
+    ]
+    return diff
+
+
+def requeue_missing_points(diff: PKBIndexDiff, indexed: List[IndexedChunk], existing: List[PKBChunk], present: set) -> int:
+    """
+    Re-add tracked chunks whose points are gone from the vector store
+
+    PKBChunk rows are only trusted while their points exist (the collection
+    or the source's points may have been deleted without the rows). Their
+    stale rows are replaced.
+
+    Returns:
+        Number of chunks requeued
+    """
+    added_ids = {item.point_id for item in diff.added}
+    missing = [item for item in indexed if item.point_id not in added_ids and item.point_id not in present]
+    if not missing:
+        return 0
+
+    missing_ids = {item.point_id for item in missing}
+    moved_ids = {item.point_id for item in diff.moved}
+    diff.moved = [item for item in diff.moved if item.point_id not in missing_ids]
+    diff.unchanged -= len(missing_ids - moved_ids)
+    diff.added.extend(missing)
+    removed = {id(row) for row in diff.removed}
+    diff.removed.extend(row for row in existing if row.vector_point_id in missing_ids and id(row) not in removed)
+    return len(missing)
+
+
+class PKBIndexer:
+    """
+    Incremental indexer for one source's PKB
+
+    Works for the first build too: a source without PKBChunk rows has all of
+    its chunks added (after clearing any untracked vectors of older builds).
+    """
+
+    def __init__(
+        self,
+        db,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStoreService] = None
+    ):
+        self.db = db
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store = vector_store or VectorStoreService()
+
+    def sync(
+        self,
+        source_id: int,
+        user_id: int,
+        content: str,
+        collection_name: str,
+        title: Optional[str] = None,
+        embedding_model: str = EmbeddingModel.OPENAI_SMALL.value,
+        chunk_size: int = 512,
+        chunk_overlap: int = 50,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Index a source's content
+
+        Args:
+            source_id: Source ID
+            user_id: Owner of the source
+            content: Source.content
+            collection_name: Qdrant collection of the PKB
+            title: Source title (stored in the payload)
+            embedding_model: Embedding model name
+            chunk_size: Chunk size in tokens
+            chunk_overlap: Overlap in tokens
+            progress_callback: callback(embedded texts, total texts)
+
+        Returns:
+            {"chunk_count", "added", "moved", "removed", "unchanged", "tokens"}
+        """
+        model = EmbeddingModel(embedding_model)
+        location = pkb_location(user_id, source_id, collection_name)
+
+        chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        indexed = []
+        occurrences: Dict[str, int] = {}
+        for chunk in chunk_sections(chunker, content or ""):
+            text_hash = content_hash(chunk.content)
+            occurrence = occurrences.get(text_hash, 0)
+            occurrences[text_hash] = occurrence + 1
+            indexed.append(IndexedChunk(chunk_point_id(user_id, source_id, text_hash, occurrence), text_hash, chunk))
+
+        if not indexed:
+            raise PKBIndexError("No chunks created")
+
+        existing = self.db.query(PKBChunk).filter(PKBChunk.source_id == source_id).all()
+        diff = diff_chunks(indexed, existing, collection_name, model.value)
+
+        if not self.vector_store.client:
+            raise PKBIndexError("Vector store is not reachable")
+
+        added_ids = {item.point_id for item in diff.added}
+        tracked = [item.point_id for item in indexed if item.point_id not in added_ids]
+        if tracked:
+            present = self.vector_store.existing_point_ids(collection_name, tracked)
+            requeued = requeue_missing_points(diff, indexed, existing, present)
+            if requeued:
+                logger.warning(f"⚠️ {requeued} indexed chunks of source {source_id} have no vector, re-embedding")
+
+        logger.info(
+            f"🔄 PKB diff for source {source_id}: +{len(diff.added)} ~{len(diff.moved)} "
+            f"-{len(diff.removed)} ={diff.unchanged}"
+        )
+
+        if not existing:
+            # Untracked vectors of an older build
+            if location.shared:
+                self.vector_store.delete_points_by_filter(collection_name, location.filter_conditions)
+            else:
+                self.vector_store.delete_collection(collection_name)
+
+        self.vector_store.create_collection(
+            collection_name,
+            dimensions=EMBEDDING_CONFIGS[model]["dimensions"],
+            payload_indexes=SHARED_PAYLOAD_INDEXES if location.shared else None
+        )
+
+        # 1. Embed and upsert new chunks
+        tokens = 0
+        if diff.added:
+            embeddings = self.embedding_service.get_embeddings_batch(
+                texts=[item.chunk.content for item in diff.added],
+                model=model,
+                token_counts=[item.chunk.token_count for item in diff.added],
+                progress_callback=progress_callback
+            )
+            tokens = sum(e.token_count for e in embeddings)
+            self.vector_store.upsert_vectors(collection_name, [
+                {
+                    "id": item.point_id,
+                    "vector": emb.embedding,
+                    "payload": {
+                        "text": item.chunk.content,
+                        "user_id": user_id,
+                        "source_id": source_id,
+                        "title": title,
+                        "token_count": item.chunk.token_count,
+                        **self._position(item.chunk)
+                    }
+                }
+                for item, emb in zip(diff.added, embeddings)
+            ])
+
+        # 2. Patch positions of chunks that only moved
+        self.vector_store.set_payloads(collection_name, {
+            item.point_id: self._position(item.chunk) for item in diff.moved
+        })
+
+        # 3. Delete vanished chunks
+        removed_by_collection: Dict[str, List[str]] = {}
+        for row in diff.removed:
+            if row.vector_collection and row.vector_point_id:
+                removed_by_collection.setdefault(row.vector_collection, []).append(row.vector_point_id)
+        for removed_collection, point_ids in removed_by_collection.items():
+            # Point IDs are content-defined: keep the ones re-added above
+            if removed_collection == collection_name:
+                added_ids = {item.point_id for item in diff.added}
+                point_ids = [point_id for point_id in point_ids if point_id not in added_ids]
+            if point_ids:
+                self.vector_store.delete_points(removed_collection, point_ids)
+
+        self._sync_rows(source_id, user_id, collection_name, model, diff)
+
+        # Cached answers were built from the old chunks
+        if diff.added or diff.removed:
+            get_answer_cache().invalidate_source(source_id)
+
+        return {
+            "chunk_count": len(indexed),
+            "added": len(diff.added),
+            "moved": len(diff.moved),
+            "removed": len(diff.removed),
+            "unchanged": diff.unchanged,
+            "tokens": tokens
+        }
+
+    @staticmethod
+    def _position(chunk: ChunkResult) -> Dict[str, Any]:
+        return {"chunk_idx": chunk.index, "start_char": chunk.start_char, "end_char": chunk.end_char}
+
+    def _sync_rows(self, source_id: int, user_id: int, collection_name: str, model: EmbeddingModel, diff: PKBIndexDiff) -> None:
+        """Mirror the diff onto PKBChunk rows"""
+        for row in diff.removed:
+            self.db.delete(row)
+        self.db.flush()
+
+        rows = {
+            row.vector_point_id: row
+            for row in self.db.query(PKBChunk).filter(PKBChunk.source_id == source_id)
+        }
+        for item in diff.moved:
+            row = rows[item.point_id]
+            row.chunk_index = item.chunk.index
+            row.start_char = item.chunk.start_char
+            row.end_char = item.chunk.end_char
+
+        now = datetime.utcnow()
+        for item in diff.added:
+            self.db.add(PKBChunk(
+                source_id=source_id,
+                user_id=user_id,
+                chunk_id=item.point_id,
+                chunk_index=item.chunk.index,
+                content=item.chunk.content,
+                content_hash=item.text_hash,
+                token_count=item.chunk.token_count,
+                start_char=item.chunk.start_char,
+                end_char=item.chunk.end_char,
+                embedding_model=model.value,
+                embedding_dimensions=EMBEDDING_CONFIGS[model]["dimensions"],
+                is_embedded=True,
+                embedded_at=now,
+                vector_collection=collection_name,
+                vector_point_id=item.point_id,
+                chunk_metadata=item.chunk.metadata
+            ))
+        self.db.commit()
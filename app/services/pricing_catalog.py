@@ -0,0 +1,224 @@
+"""
+Pricing catalogue
+In-process snapshot of CreditPricingConfig and AIModelPricing so credit cost
+lookups are dict reads instead of database queries
+"""
+
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Pricing of one AI model (AIModelPricing row)"""
+    model_key: str
+    provider: str
+    credit_multiplier: float
+    cost_per_1k_chars: Optional[float]
+    is_active: bool
+    is_default: bool
+
+
+@dataclass(frozen=True)
+class PricingCatalog:
+    """
+    Immutable pricing snapshot
+
+    operation_prices holds active CreditPricingConfig rows only (empty if the
+    table is empty; CreditPricing falls back to its defaults per key). Both
+    mappings are read-only copies, so callers can hold on to them safely.
+    """
+    operation_prices: Mapping[str, float] = field(default_factory=dict)
+    models: Mapping[Tuple[str, str], ModelPrice] = field(default_factory=dict)
+    default_model: Optional[ModelPrice] = None
+    version: Optional[int] = None
+    loaded_at: float = 0.0
+
+    def __post_init__(self):
+        object.__setattr__(self, "operation_prices", MappingProxyType(dict(self.operation_prices)))
+        object.__setattr__(self, "models", MappingProxyType(dict(self.models)))
+
+    def model(self, model_key: str, provider: str, active_only: bool = True) -> Optional[ModelPrice]:
+        """Pricing of a model for a provider (None if unknown or inactive)"""
+        price = self.models.get((model_key, provider))
+        if price is None or (active_only and not price.is_active):
+            return None
+        return price
+
+
+def load_catalog(db, version: Optional[int] = None) -> PricingCatalog:
+    """
+    Read the pricing tables into a catalogue
+
+    Args:
+        db: SQLAlchemy session
+        version: Redis version stamp the snapshot corresponds to
+    """
+    from app.models.credit_pricing import CreditPricingConfig
+    from app.models.ai_model_pricing import AIModelPricing
+
+    operation_prices = {
+        config.operation_key: float(config.cost_per_unit)
+        for config in db.query(CreditPricingConfig).filter_by(is_active=True).all()
+    }
+
+    models = {}
+    default_model = None
+    for row in db.query(AIModelPricing).order_by(AIModelPricing.id).all():
+        price = ModelPrice(
+            model_key=row.model_key,
+            provider=row.provider,
+            credit_multiplier=float(row.credit_multiplier if row.credit_multiplier is not None else 1.0),
+            cost_per_1k_chars=row.cost_per_1k_chars,
+            is_active=bool(row.is_active),
+            is_default=bool(row.is_default)
+        )
+        models[(row.model_key, row.provider)] = price
+        if price.is_default and default_model is None:
+            default_model = price
+
+    return PricingCatalog(
+        operation_prices=operation_prices,
+        models=models,
+        default_model=default_model,
+        version=version,
+        loaded_at=time.monotonic()
+    )
+
+
+class PricingCatalogCache:
+    """
+    Per-process pricing catalogue kept in sync through a Redis version stamp
+
+    Admin edits bump the stamp (invalidate()); every process compares its
+    snapshot's version with the stamp at most every
+    PRICING_VERSION_CHECK_SECONDS and reloads when it changed. If Redis is not
+    reachable snapshots are reloaded after PRICING_CATALOG_TTL instead.
+    """
+
+    VERSION_KEY = "pricing_catalog:version"
+
+    def __init__(self, redis_client=None, check_interval: Optional[float] = None, ttl_seconds: Optional[float] = None):
+        self.check_interval = check_interval if check_interval is not None else settings.PRICING_VERSION_CHECK_SECONDS
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.PRICING_CATALOG_TTL
+        self._redis = redis_client
+        self._catalog: Optional[PricingCatalog] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._redis
+
+    def _remote_version(self) -> Optional[int]:
+        try:
+            raw = self.redis.get(self.VERSION_KEY)
+            return int(raw) if raw is not None else 0
+        except Exception as e:
+            logger.warning(f"⚠️ Pricing version check failed: {e}")
+            return None
+
+    def _is_current(self, catalog: PricingCatalog, version: Optional[int], now: float) -> bool:
+        if version is None or catalog.version is None:
+            return now - catalog.loaded_at < self.ttl_seconds
+        return catalog.version == version
+
+    def get(self, db=None) -> PricingCatalog:
+        """
+        Get the current catalogue, reloading it if an admin changed pricing
+
+        Args:
+            db: Session to load with (a short-lived session is opened if None)
+
+        Returns:
+            PricingCatalog (an empty one if the database is unavailable and
+            nothing was loaded yet)
+        """
+        now = time.monotonic()
+        catalog = self._catalog
+        if catalog is not None and now - self._checked_at < self.check_interval:
+            return catalog
+
+        with self._lock:
+            catalog = self._catalog
+            if catalog is not None and now - self._checked_at < self.check_interval:
+                return catalog
+
+            # Read the stamp before the tables: an edit during the load bumps it again
+            version = self._remote_version()
+            self._checked_at = now
+            if catalog is not None and self._is_current(catalog, version, now):
+                return catalog
+
+            try:
+                self._catalog = self._load(db, version)
+                logger.info(
+                    f"✅ Pricing catalogue loaded (version {version}): {len(self._catalog.operation_prices)} "
+                    f"operations, {len(self._catalog.models)} models"
+                )
+            except Exception as e:
+                logger.error(f"❌ Failed to load pricing catalogue: {e}")
+                if self._catalog is None:
+                    return PricingCatalog()
+            return self._catalog
+
+    @staticmethod
+    def _load(db, version: Optional[int]) -> PricingCatalog:
+        if db is not None:
+            return load_catalog(db, version)
+
+        from app.database import SessionLocal
+        session = SessionLocal()
+        try:
+            return load_catalog(session, version)
+        finally:
+            session.close()
+
+    def invalidate(self) -> None:
+        """Bump the version stamp so every process reloads (call after editing pricing)"""
+        with self._lock:
+            self._catalog = None
+        try:
+            version = self.redis.incr(self.VERSION_KEY)
+            logger.info(f"🔄 Pricing catalogue invalidated (version {version})")
+        except Exception as e:
+            logger.warning(f"⚠️ Pricing version bump failed, other processes refresh after {self.ttl_seconds}s: {e}")
+
+
+# Singleton instance
+_pricing_catalog_cache: Optional[PricingCatalogCache] = None
+
+
+def get_pricing_catalog_cache() -> PricingCatalogCache:
+    """
+    Get pricing catalogue cache singleton
+
+    Returns:
+        PricingCatalogCache instance
+    """
+    global _pricing_catalog_cache
+    if _pricing_catalog_cache is None:
+        _pricing_catalog_cache = PricingCatalogCache()
+    return _pricing_catalog_cache
+
+
+def get_pricing_catalog(db=None) -> PricingCatalog:
+    """Current pricing catalogue (see PricingCatalogCache.get)"""
+    return get_pricing_catalog_cache().get(db)
+
+
+def invalidate_pricing_catalog() -> None:
+    """Reload pricing in every process (call after editing CreditPricingConfig / AIModelPricing)"""
+    get_pricing_catalog_cache().invalidate()
@@ -0,0 +1,154 @@
+"""
+Progress reporter for background tasks
+Keeps live progress in Redis, pushes every step to WebSocket subscribers and
+coalesces the writes to the database row
+"""
+
+import json
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+KEY_PREFIX = "progress"
+
+# Shared Redis client (lazy)
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def _progress_key(kind: str, record_id: int) -> str:
+    return f"{KEY_PREFIX}:{kind}:{record_id}"
+
+
+def get_live_progress(kind: str, record_id: int, redis_client=None) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest progress reported by a running task
+
+    Args:
+        kind: Record type (transcription, video)
+        record_id: Database ID of the record
+        redis_client: Optional Redis client (defaults to the shared one)
+
+    Returns:
+        {"progress": int, "status": str, "updated_at": float} or None
+    """
+    try:
+        raw = (redis_client or _get_redis()).get(_progress_key(kind, record_id))
+    except Exception as e:
+        logger.debug(f"Live progress lookup failed for {kind} {record_id}: {e}")
+        return None
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressReporter:
+    """
+    Report progress of a Transcription / GeneratedVideo row
+
+    Every report() updates Redis and the Celery task state (which ProgressTask
+    mirrors to WebSocket clients). The row's progress column is updated in
+    memory and only committed when PROGRESS_DB_MIN_INTERVAL has passed since
+    the last write; anything in between stays on the row and rides along
+    with the task's next commit (its final one included).
+    """
+
+    def __init__(
+        self,
+        db,
+        record,
+        kind: str = "transcription",
+        task=None,
+        redis_client=None,
+        min_interval: Optional[float] = None
+    ):
+        """
+        Args:
+            db: SQLAlchemy session owning the record
+            record: Transcription or GeneratedVideo row (has .id and .progress)
+            kind: Record type used in the Redis key
+            task: Bound Celery task (for update_state), optional
+            redis_client: Optional Redis client (defaults to the shared one)
+            min_interval: Seconds between progress commits
+        """
+        self.db = db
+        self.record = record
+        self.kind = kind
+        self.task = task
+        self._redis = redis_client
+        self.min_interval = settings.PROGRESS_DB_MIN_INTERVAL if min_interval is None else min_interval
+        self.progress = record.progress or 0
+        self.status = ""
+        self._last_commit = 0.0
+        self._committed_progress = self.progress
+        self.commits = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = _get_redis()
+        return self._redis
+
+    @property
+    def key(self) -> str:
+        return _progress_key(self.kind, self.record.id)
+
+    def report(self, progress: int, status: str, commit: bool = False) -> None:
+        """
+        Report a progress step
+
+        Args:
+            progress: Percentage (0-100)
+            status: Human readable step description
+            commit: Force a database commit for this step
+        """
+        progress = max(0, min(100, int(progress)))
+        self.progress = progress
+        self.status = status
+
+        try:
+            payload = json.dumps({"progress": progress, "status": status, "updated_at": time.time()})
+            self.redis.setex(self.key, settings.PROGRESS_REDIS_TTL, payload)
+        except Exception as e:
+            logger.debug(f"Live progress write failed for {self.key}: {e}")
+
+        if self.task is not None:
+            self.task.update_state(
+                state='PROGRESS',
+                meta={'current': progress, 'total': 100, 'status': status}
+            )
+
+        self.record.progress = progress
+        now = time.monotonic()
+        if commit or now - self._last_commit >= self.min_interval:
+            self._commit(now)
+
+    def finish(self) -> None:
+        """Drop the live progress entry once the row holds the final state"""
+        try:
+            self.redis.delete(self.key)
+        except Exception as e:
+            logger.debug(f"Live progress cleanup failed for {self.key}: {e}")
+
+    def _commit(self, now: float) -> None:
+        if self.progress == self._committed_progress and self._last_commit:
+            return
+        self.db.commit()
+        self.commits += 1
+        self._last_commit = now
+        self._committed_progress = self.progress
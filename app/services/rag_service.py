@@ -6,11 +6,18 @@ Embedding, vector search ve LLM entegrasyonu.
 """
 
 import os
+import re
 import json
+import bisect
+import time
 import hashlib
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import weakref
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
@@ -162,6 +169,12 @@ LLM_CONFIGS = {
 # TEXT CHUNKING SERVICE
 # =========================================================================
 
+# Chunk boundaries: blank line (paragraph) and whitespace after a sentence end
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+")
+# Fallback pseudo-tokens when tiktoken is unavailable (~4 chars, never across words)
+FALLBACK_TOKEN = re.compile(r"\s*\S{1,4}|\s+")
+
 class TextChunker:
     """Metin parçalama servisi"""
     
@@ -199,6 +212,10 @@ class TextChunker:
         """
         Metni semantic-aware chunks'lara böl
         
+        Metin bir kez tokenize edilir; chunk'lar token ofsetlerinden kesilir ve
+        mümkünse paragraf, değilse cümle sınırına çekilir. start_char/end_char
+        kesindir: text[start_char:end_char] == chunk.content
+        
         Args:
             text: Bölünecek metin
             metadata: Chunk'lara eklenecek metadata
@@ -209,138 +226,82 @@ class TextChunker:
         if not text or not text.strip():
             return []
         
-        # Paragraf bazlı bölme
-        paragraphs = self._split_into_paragraphs(text)
+        token_starts = self._token_offsets(text)
+        token_total = len(token_starts)
+        paragraph_breaks = self._boundary_tokens(token_starts, PARAGRAPH_BREAK, text)
+        sentence_breaks = self._boundary_tokens(token_starts, SENTENCE_BREAK, text)
         
         chunks = []
-        current_chunk = ""
-        current_tokens = 0
-        chunk_index = 0
-        start_char = 0
-        
-        for para in paragraphs:
-            para_tokens = self.count_tokens(para)
-            
-            # Paragraf tek başına çok büyükse, cümlelere böl
-            if para_tokens > self.chunk_size:
-                # Mevcut chunk'ı kaydet
-                if current_chunk:
-                    chunks.append(self._create_chunk(
-                        current_chunk, chunk_index, start_char, metadata
-                    ))
-                    chunk_index += 1
-                
-                # Büyük paragrafı cümlelere böl
-                sentence_chunks = self._chunk_long_paragraph(para, start_char, chunk_index, metadata)
-                chunks.extend(sentence_chunks)
-                chunk_index += len(sentence_chunks)
-                start_char += len(para) + 1
-                current_chunk = ""
-                current_tokens = 0
-                continue
+        start = 0
+        while start < token_total:
+            end = min(start + self.chunk_size, token_total)
+            if end < token_total:
+                # Overlap'in ötesinde yeni içerik kalacak şekilde en son sınırı seç
+                lowest = start + min(self.chunk_overlap, self.chunk_size - 1) + 1
+                end = (
+                    self._last_boundary(paragraph_breaks, lowest, end)
+                    or self._last_boundary(sentence_breaks, lowest, end)
+                    or end
+                )
             
-            # Chunk'a eklenebilir mi kontrol et
-            if current_tokens + para_tokens <= self.chunk_size:
-                if current_chunk:
-                    current_chunk += "\n\n" + para
-                else:
-                    current_chunk = para
-                current_tokens += para_tokens
-            else:
-                # Mevcut chunk'ı kaydet
-                if current_chunk:
-                    chunks.append(self._create_chunk(
-                        current_chunk, chunk_index, start_char, metadata
-                    ))
-                    chunk_index += 1
-                    start_char += len(current_chunk) + 2
-                
-                # Overlap ile yeni chunk başlat
-                overlap_text = self._get_overlap_text(current_chunk)
-                current_chunk = overlap_text + para if overlap_text else para
-                current_tokens = self.count_tokens(current_chunk)
-        
-        # Son chunk'ı kaydet
-        if current_chunk:
-            chunks.append(self._create_chunk(
-                current_chunk, chunk_index, start_char, metadata
-            ))
+            chunk = self._create_chunk(text, token_starts, start, end, len(chunks), metadata)
+            if chunk:
+                chunks.append(chunk)
+            if end >= token_total:
+                break
+            start = max(end - self.chunk_overlap, start + 1)
         
         return chunks
     
-    def _split_into_paragraphs(self, text: str) -> List[str]:
-        """Metni paragraflara böl"""
-        paragraphs = text.split("\n\n")
-        return [p.strip() for p in paragraphs if p.strip()]
+    def _token_offsets(self, text: str) -> List[int]:
+        """Her token'ın metindeki başlangıç karakteri (tek encode)"""
+        if self.tokenizer is None:
+            return [match.start() for match in FALLBACK_TOKEN.finditer(text)]
+        tokens = self.tokenizer.encode(text, disallowed_special=())
+        return self.tokenizer.decode_with_offsets(tokens)[1]
     
-    def _chunk_long_paragraph(
-        self,
-        text: str,
-        start_char: int,
-        start_index: int,
-        metadata: Optional[Dict[str, Any]]
-    ) -> List[ChunkResult]:
-        """Uzun paragrafı cümlelere bölerek chunk'la"""
-        import re
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        chunks = []
-        current_chunk = ""
-        current_tokens = 0
-        chunk_index = start_index
-        current_start = start_char
-        
-        for sentence in sentences:
-            sentence_tokens = self.count_tokens(sentence)
-            
-            if current_tokens + sentence_tokens <= self.chunk_size:
-                current_chunk += (" " if current_chunk else "") + sentence
-                current_tokens += sentence_tokens
-            else:
-                if current_chunk:
-                    chunks.append(self._create_chunk(
-                        current_chunk, chunk_index, current_start, metadata
-                    ))
-                    chunk_index += 1
-                    current_start += len(current_chunk) + 1
-                
-                current_chunk = sentence
-                current_tokens = sentence_tokens
-        
-        if current_chunk:
-            chunks.append(self._create_chunk(
-                current_chunk, chunk_index, current_start, metadata
-            ))
-        
-        return chunks
+    @staticmethod
+    def _boundary_tokens(token_starts: List[int], pattern: "re.Pattern", text: str) -> List[int]:
+        """Sınır karakterlerini, sınırdan sonra başlayan ilk token'ın indeksine çevir"""
+        boundaries = []
+        for match in pattern.finditer(text):
+            index = bisect.bisect_left(token_starts, match.start())
+            if index < len(token_starts) and (not boundaries or boundaries[-1] != index):
+                boundaries.append(index)
+        return boundaries
     
-    def _get_overlap_text(self, text: str) -> str:
-        """Overlap için son kısmı al"""
-        if not text or self.chunk_overlap <= 0:
-            return ""
-        
-        tokens = self.tokenizer.encode(text)
-        if len(tokens) <= self.chunk_overlap:
-            return text
-        
-        overlap_tokens = tokens[-self.chunk_overlap:]
-        return self.tokenizer.decode(overlap_tokens)
+    @staticmethod
+    def _last_boundary(boundaries: List[int], lowest: int, highest: int) -> Optional[int]:
+        """[lowest, highest] aralığındaki son sınır"""
+        index = bisect.bisect_right(boundaries, highest) - 1
+        if index >= 0 and boundaries[index] >= lowest:
+            return boundaries[index]
+        return None
     
     def _create_chunk(
         self,
-        content: str,
+        text: str,
+        token_starts: List[int],
+        start: int,
+        end: int,
         index: int,
-        start_char: int,
         metadata: Optional[Dict[str, Any]]
-    ) -> ChunkResult:
-        """ChunkResult oluştur"""
+    ) -> Optional[ChunkResult]:
+        """Token aralığından ChunkResult oluştur (boşluklar kırpılır)"""
+        start_char = token_starts[start]
+        end_char = token_starts[end] if end < len(token_starts) else len(text)
+        content = text[start_char:end_char]
+        stripped = content.strip()
+        if not stripped:
+            return None
+        start_char += len(content) - len(content.lstrip())
         return ChunkResult(
-            content=content.strip(),
+            content=stripped,
             index=index,
-            token_count=self.count_tokens(content),
+            token_count=end - start,
             start_char=start_char,
-            end_char=start_char + len(content),
-            metadata=metadata or {}
+            end_char=start_char + len(stripped),
+            metadata=dict(metadata or {})
         )
 
 
@@ -348,15 +309,124 @@ class TextChunker:
 # EMBEDDING SERVICE
 # =========================================================================
 
+class EmbeddingRateLimiter:
+    """
+    Token/istek dakika sınırlayıcısı (token bucket)
+    
+    Aynı süreçteki tüm embedding istekleri paylaşır; acquire() kapasite
+    dolana kadar bekletir.
+    """
+    
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._requests = float(requests_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+    
+    def acquire(self, tokens: int) -> float:
+        """
+        Bir istek ve `tokens` token için kapasite ayır
+        
+        Returns:
+            Beklenen süre (saniye)
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens and self._requests >= 1:
+                    self._tokens -= tokens
+                    self._requests -= 1
+                    return waited
+                wait = max(
+                    (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                    (1 - self._requests) * 60 / self.requests_per_minute
+                )
+            time.sleep(wait)
+            waited += wait
+
+
+_embedding_rate_limiter: Optional[EmbeddingRateLimiter] = None
+_embedding_rate_limiter_lock = threading.Lock()
+
+
+def get_embedding_rate_limiter() -> EmbeddingRateLimiter:
+    """Süreç genelinde paylaşılan embedding rate limiter"""
+    global _embedding_rate_limiter
+    with _embedding_rate_limiter_lock:
+        if _embedding_rate_limiter is None:
+            settings = _get_settings()
+            _embedding_rate_limiter = EmbeddingRateLimiter(
+                settings.EMBEDDING_TPM_LIMIT,
+                settings.EMBEDDING_RPM_LIMIT
+            )
+        return _embedding_rate_limiter
+
+
+def pack_batches(token_counts: List[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    İndeksleri token bütçesine göre paketle (sıra korunur)
+    
+    Args:
+        token_counts: Her öğenin token sayısı
+        max_tokens: Bir paketteki en fazla toplam token
+        max_items: Bir paketteki en fazla öğe
+    
+    Returns:
+        İndeks listeleri
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for i, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+_embedding_tokenizer = None
+
+
+def _count_embedding_tokens(text: str) -> int:
+    """text-embedding-3 modellerinin tokenizer'ı (cl100k_base) ile token say"""
+    global _embedding_tokenizer
+    if _embedding_tokenizer is None:
+        try:
+            _embedding_tokenizer = _ensure_tiktoken().get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"⚠️ tiktoken not available, estimating embedding tokens: {e}")
+            _embedding_tokenizer = False
+    if _embedding_tokenizer is False:
+        return len(text) // 4
+    return len(_embedding_tokenizer.encode(text))
+
+
 class EmbeddingService:
-    """Embedding servisi - OpenAI desteği"""
+    """Embedding servisi - OpenAI desteği, içerik hash'ine göre önbellekli"""
     
-    def __init__(self):
+    def __init__(self, cache=None):
         self.openai_client = None
         settings = _get_settings()
         if settings.OPENAI_API_KEY:
             _ensure_openai()
             self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        if cache is None:
+            from app.services.embedding_cache import get_embedding_cache
+            cache = get_embedding_cache()
+        self.cache = cache
     
     def get_embedding(
         self,
@@ -366,62 +436,115 @@ class EmbeddingService:
         """
         Tek metin için embedding oluştur
         """
-        if not self.openai_client:
-            raise ValueError("OpenAI API key not configured")
-        
-        config = EMBEDDING_CONFIGS[model]
-        return self._openai_embedding(text, model.value, config)
+        return self.get_embeddings_batch([text], model=model)[0]
     
     def get_embeddings_batch(
         self,
         texts: List[str],
         model: EmbeddingModel = EmbeddingModel.OPENAI_SMALL,
-        batch_size: int = 100
+        batch_size: int = 100,
+        token_counts: Optional[List[int]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> List[EmbeddingResult]:
         """
         Toplu embedding oluştur
+        
+        Önbellekte olan metinler (model + içerik hash'i) OpenAI'a gönderilmez;
+        bunların token_count değeri 0'dır. Kalanlar token bütçesine göre
+        paketlenir ve rate limiter'dan geçerek paralel gönderilir.
+        
+        Args:
+            texts: Metinler
+            model: Embedding modeli
+            batch_size: Bir istekteki en fazla metin
+            token_counts: Metinlerin token sayıları (chunker'dan), yoksa hesaplanır
+            progress_callback: callback(tamamlanan metin, toplam metin)
         """
-        if not self.openai_client:
-            raise ValueError("OpenAI API key not configured")
+        from app.services.embedding_cache import content_hash
         
+        settings = _get_settings()
         config = EMBEDDING_CONFIGS[model]
-        results = []
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(model.value, hashes)
+        
+        # Aynı metin bir kez gönderilir
+        missing_texts: Dict[str, str] = {}
+        missing_tokens: Dict[str, int] = {}
+        for i, (text, text_hash) in enumerate(zip(texts, hashes)):
+            if text_hash in vectors or text_hash in missing_texts:
+                continue
+            missing_texts[text_hash] = text
+            missing_tokens[text_hash] = token_counts[i] if token_counts else _count_embedding_tokens(text)
+        missing = list(missing_texts)
+        billed_tokens: Dict[str, int] = {}
+        
+        occurrences = Counter(hashes)
+        done = len(texts) - sum(occurrences[h] for h in missing)
+        if progress_callback:
+            progress_callback(done, len(texts))
+        
+        if missing:
+            if not self.openai_client:
+                raise ValueError("OpenAI API key not configured")
+            
+            batches = [
+                [missing[i] for i in batch]
+                for batch in pack_batches(
+                    [missing_tokens[h] for h in missing],
+                    max_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+                    max_items=batch_size
+                )
+            ]
+            logger.info(
+                f"🔢 Embedding {len(missing)}/{len(texts)} texts in {len(batches)} batches "
+                f"({len(texts) - len(missing)} cached)"
+            )
+            
+            limiter = get_embedding_rate_limiter()
+            
+            def embed(batch: List[str]) -> List[EmbeddingResult]:
+                limiter.acquire(sum(missing_tokens[h] for h in batch))
+                return self._openai_embeddings_batch(
+                    [missing_texts[h] for h in batch],
+                    model.value,
+                    config,
+                    [missing_tokens[h] for h in batch]
+                )
+            
+            workers = max(1, min(settings.EMBEDDING_MAX_CONCURRENCY, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embeddings") as executor:
+                futures = {executor.submit(embed, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    fresh = {}
+                    for text_hash, result in zip(batch, future.result()):
+                        fresh[text_hash] = result.embedding
+                        billed_tokens[text_hash] = result.token_count
+                    self.cache.set_many(model.value, fresh)
+                    vectors.update(fresh)
+                    
+                    done += sum(occurrences[h] for h in batch)
+                    if progress_callback:
+                        progress_callback(done, len(texts))
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_results = self._openai_embeddings_batch(batch, model.value, config)
-            results.extend(batch_results)
+        results = []
+        for text, text_hash in zip(texts, hashes):
+            results.append(EmbeddingResult(
+                text=text,
+                embedding=vectors[text_hash],
+                model=model.value,
+                token_count=billed_tokens.pop(text_hash, 0),
+                dimensions=config["dimensions"]
+            ))
         
         return results
     
-    def _openai_embedding(
-        self,
-        text: str,
-        model: str,
-        config: Dict
-    ) -> EmbeddingResult:
-        """OpenAI embedding"""
-        response = self.openai_client.embeddings.create(
-            input=text,
-            model=model
-        )
-        
-        embedding = response.data[0].embedding
-        token_count = response.usage.total_tokens
-        
-        return EmbeddingResult(
-            text=text,
-            embedding=embedding,
-            model=model,
-            token_count=token_count,
-            dimensions=config["dimensions"]
-        )
-    
     def _openai_embeddings_batch(
         self,
         texts: List[str],
         model: str,
-        config: Dict
+        config: Dict,
+        token_counts: List[int]
     ) -> List[EmbeddingResult]:
         """OpenAI batch embedding"""
         response = self.openai_client.embeddings.create(
@@ -429,13 +552,18 @@ class EmbeddingService:
             model=model
         )
         
+        if response.usage.total_tokens != sum(token_counts):
+            logger.debug(
+                f"Embedding token estimate {sum(token_counts)} != billed {response.usage.total_tokens}"
+            )
+        
         results = []
         for i, data in enumerate(response.data):
             results.append(EmbeddingResult(
                 text=texts[i],
                 embedding=data.embedding,
                 model=model,
-                token_count=response.usage.total_tokens // len(texts),
+                token_count=token_counts[i],
                 dimensions=config["dimensions"]
             ))
         
@@ -446,116 +574,253 @@ class EmbeddingService:
 # VECTOR STORE SERVICE (QDRANT)
 # =========================================================================
 
-class VectorStoreService:
-    """Qdrant vector store servisi"""
+class QdrantError(Exception):
+    """Qdrant API hatası"""
     
-    def __init__(self):
-        self.client = None
-        self._init_client()
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        super().__init__(f"Qdrant API error: {status_code} - {message}")
+
+
+# Payload fields indexed in the shared PKB collection (tenant filters)
+SHARED_PAYLOAD_INDEXES = {"user_id": "integer", "source_id": "integer"}
+
+# Vector size of the shared PKB collection (text-embedding-3-small)
+SHARED_COLLECTION_DIMENSIONS = 1536
+
+
+@dataclass
+class PKBLocation:
+    """Bir kaynağın PKB vektörlerinin Qdrant'taki yeri"""
+    collection_name: str
+    filter_conditions: Optional[Dict[str, Any]] = None  # None: kaynağa ait ayrı koleksiyon
     
-    def _init_client(self):
-        """Qdrant client'ı başlat - REST API kullan"""
-        try:
-            settings = _get_settings()
-            self.qdrant_url = settings.QDRANT_URL
-            self.qdrant_api_key = settings.QDRANT_API_KEY
-            
-            # Test connection with httpx
-            import httpx
-            response = httpx.get(
-                f"{self.qdrant_url}/collections",
-                headers={"api-key": self.qdrant_api_key} if self.qdrant_api_key else {},
-                timeout=30.0
-            )
-            if response.status_code == 200:
-                self.client = True  # Mark as connected
-                logger.info(f"✅ Qdrant connected via REST: {self.qdrant_url}")
-            else:
-                logger.error(f"❌ Qdrant connection failed: {response.status_code}")
-                self.client = None
-        except Exception as e:
-            logger.error(f"❌ Qdrant connection failed: {e}")
-            self.client = None
+    @property
+    def shared(self) -> bool:
+        return self.filter_conditions is not None
+
+
+def shared_collection_name() -> str:
+    """Name of the multi-tenant PKB collection"""
+    return _get_settings().QDRANT_SHARED_COLLECTION
+
+
+def fits_shared_collection(embedding_model: EmbeddingModel) -> bool:
+    """Whether the model's vectors have the shared collection's size"""
+    return EMBEDDING_CONFIGS[embedding_model]["dimensions"] == SHARED_COLLECTION_DIMENSIONS
+
+
+def new_pkb_collection(dedicated_name: str, embedding_model: EmbeddingModel = EmbeddingModel.OPENAI_SMALL) -> str:
+    """
+    Collection for a new PKB
+    
+    Args:
+        dedicated_name: Per-source collection name used when shared mode is off,
+            or when the model's vectors don't fit the shared collection
+        embedding_model: Embedding model of the PKB
+    
+    Returns:
+        Value to store in Source.pkb_collection_name
+    """
+    if _get_settings().QDRANT_SHARED_COLLECTION_ENABLED and fits_shared_collection(embedding_model):
+        return shared_collection_name()
+    return dedicated_name
+
+
+def pkb_location(user_id: int, source_id: int, collection_name: str) -> PKBLocation:
+    """
+    Resolve where a source's PKB lives
+    
+    Sources whose pkb_collection_name is the shared collection are filtered
+    by user_id/source_id; older sources keep their own collection until
+    migrate_qdrant_shared_collection.py moves them.
+    """
+    if collection_name == shared_collection_name():
+        return PKBLocation(collection_name, {"user_id": user_id, "source_id": source_id})
+    return PKBLocation(collection_name)
+
+
+def build_filter(filter_conditions: Dict[str, Any]) -> Dict[str, Any]:
+    """Qdrant 'must' filter; list values match any of the values"""
+    must = []
+    for key, value in filter_conditions.items():
+        if isinstance(value, (list, tuple, set)):
+            must.append({"key": key, "match": {"any": list(value)}})
+        else:
+            must.append({"key": key, "match": {"value": value}})
+    return {"must": must}
+
+
+class AsyncVectorStore:
+    """
+    Qdrant vector store - async REST client
+    
+    Tek bir keep-alive httpx.AsyncClient üzerinden çalışır (bağlantı havuzu,
+    retry/backoff). Bağlantı durumu her çağrıda değil, QDRANT_HEALTH_TTL
+    saniyede bir kontrol edilir. Bir event loop'a bağlıdır; get_vector_store()
+    ile alınmalı.
+    """
+    
+    RETRY_STATUS_CODES = {429, 502, 503, 504}
     
-    def _make_request(self, method: str, endpoint: str, json_data: dict = None) -> dict:
-        """Make HTTP request to Qdrant"""
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        transport=None
+    ):
         import httpx
-        url = f"{self.qdrant_url}{endpoint}"
+        
+        settings = _get_settings()
+        self.qdrant_url = (url or settings.QDRANT_URL).rstrip("/")
+        self.qdrant_api_key = api_key if api_key is not None else settings.QDRANT_API_KEY
+        self.max_retries = settings.QDRANT_MAX_RETRIES
+        self.health_ttl = settings.QDRANT_HEALTH_TTL
+        
         headers = {"Content-Type": "application/json"}
         if self.qdrant_api_key:
             headers["api-key"] = self.qdrant_api_key
         
-        with httpx.Client(timeout=60.0) as client:
-            if method == "GET":
-                response = client.get(url, headers=headers)
-            elif method == "PUT":
-                response = client.put(url, headers=headers, json=json_data)
-            elif method == "POST":
-                response = client.post(url, headers=headers, json=json_data)
-            elif method == "DELETE":
-                response = client.delete(url, headers=headers)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-        
-        if response.status_code >= 400:
-            raise Exception(f"Qdrant API error: {response.status_code} - {response.text}")
+        self.http = httpx.AsyncClient(
+            base_url=self.qdrant_url,
+            headers=headers,
+            timeout=httpx.Timeout(settings.QDRANT_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.QDRANT_MAX_CONNECTIONS,
+                keepalive_expiry=60.0
+            ),
+            transport=transport
+        )
+        self._healthy: Optional[bool] = None
+        self._health_checked_at = 0.0
+        self._health_lock = asyncio.Lock()
+        self._ready_collections: set = set()
+    
+    async def _make_request(self, method: str, endpoint: str, json_data: dict = None) -> dict:
+        """Qdrant'a HTTP isteği at (bağlantı hatası, 429 ve 5xx için retry)"""
+        import httpx
         
-        return response.json() if response.text else {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.http.request(method, endpoint, json=json_data)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    self._mark_health(False)
+                    raise
+                logger.warning(f"⚠️ Qdrant request failed ({method} {endpoint}), retrying: {e}")
+            else:
+                if response.status_code in self.RETRY_STATUS_CODES and attempt < self.max_retries:
+                    logger.warning(f"⚠️ Qdrant returned {response.status_code} ({method} {endpoint}), retrying")
+                elif response.status_code >= 400:
+                    raise QdrantError(response.status_code, response.text)
+                else:
+                    self._mark_health(True)
+                    return response.json() if response.content else {}
+            await asyncio.sleep(min(0.25 * 2 ** attempt, 4.0))
+        raise QdrantError(503, "retries exhausted")
     
-    def create_collection(
+    def _mark_health(self, healthy: bool) -> None:
+        self._healthy = healthy
+        self._health_checked_at = time.monotonic()
+    
+    async def is_available(self, force: bool = False) -> bool:
+        """Qdrant erişilebilir mi (sonuç QDRANT_HEALTH_TTL saniye önbellekte)"""
+        if not force and self._healthy is not None and time.monotonic() - self._health_checked_at < self.health_ttl:
+            return self._healthy
+        
+        async with self._health_lock:
+            if not force and self._healthy is not None and time.monotonic() - self._health_checked_at < self.health_ttl:
+                return self._healthy
+            try:
+                response = await self.http.get("/collections", timeout=10.0)
+                healthy = response.status_code == 200
+                if not healthy:
+                    logger.error(f"❌ Qdrant health check failed: {response.status_code}")
+            except Exception as e:
+                logger.error(f"❌ Qdrant connection failed: {e}")
+                healthy = False
+            if healthy and self._healthy is not True:
+                logger.info(f"✅ Qdrant connected via REST: {self.qdrant_url}")
+            self._mark_health(healthy)
+            return healthy
+    
+    async def create_collection(
         self,
         collection_name: str,
         dimensions: int = 1536,
-        distance: str = "Cosine"
+        distance: str = "Cosine",
+        payload_indexes: Optional[Dict[str, str]] = None
     ) -> bool:
-        """Yeni koleksiyon oluştur - REST API"""
-        if not self.client:
+        """
+        Yeni koleksiyon oluştur - REST API
+        
+        payload_indexes ({alan: tip}) verilirse koleksiyon çok kiracılı
+        kurulur: filtre alanları indekslenir ve HNSW grafiği kiracı başına
+        (payload_m) oluşturulur.
+        """
+        if not await self.is_available():
             return False
+        if collection_name in self._ready_collections:
+            return True
         
         try:
             # Check if collection already exists
+            exists = False
             try:
-                self._make_request("GET", f"/collections/{collection_name}")
+                await self._make_request("GET", f"/collections/{collection_name}")
                 logger.info(f"ℹ️ Collection already exists: {collection_name}")
-                return True
-            except:
+                exists = True
+            except QdrantError:
                 pass  # Collection doesn't exist, create it
             
-            self._make_request("PUT", f"/collections/{collection_name}", {
-                "vectors": {
-                    "size": dimensions,
-                    "distance": distance
+            if not exists:
+                body = {
+                    "vectors": {
+                        "size": dimensions,
+                        "distance": distance
+                    }
                 }
-            })
-            logger.info(f"✅ Collection created: {collection_name}")
-            return True
+                if payload_indexes:
+                    # Every query filters by tenant: skip the global graph
+                    body["hnsw_config"] = {"m": 0, "payload_m": 16}
+                await self._make_request("PUT", f"/collections/{collection_name}", body)
+                logger.info(f"✅ Collection created: {collection_name}")
         except Exception as e:
-            if "already exists" in str(e).lower():
-                logger.info(f"ℹ️ Collection already exists: {collection_name}")
-                return True
-            logger.error(f"❌ Collection creation failed: {e}")
-            raise e
+            if "already exists" not in str(e).lower():
+                logger.error(f"❌ Collection creation failed: {e}")
+                raise e
+            logger.info(f"ℹ️ Collection already exists: {collection_name}")
+        
+        for field_name, field_schema in (payload_indexes or {}).items():
+            await self._make_request("PUT", f"/collections/{collection_name}/index?wait=true", {
+                "field_name": field_name,
+                "field_schema": field_schema
+            })
+        self._ready_collections.add(collection_name)
+        return True
     
-    def delete_collection(self, collection_name: str) -> bool:
+    async def delete_collection(self, collection_name: str) -> bool:
         """Koleksiyon sil - REST API"""
-        if not self.client:
+        if not await self.is_available():
             return False
         
         try:
-            self._make_request("DELETE", f"/collections/{collection_name}")
+            await self._make_request("DELETE", f"/collections/{collection_name}")
+            self._ready_collections.discard(collection_name)
             logger.info(f"✅ Collection deleted: {collection_name}")
             return True
         except Exception as e:
             logger.error(f"❌ Collection deletion failed: {e}")
             return False
     
-    def upsert_vectors(
+    async def upsert_vectors(
         self,
         collection_name: str,
         points: List[Dict[str, Any]]
     ) -> bool:
         """Vektörleri ekle/güncelle - REST API"""
-        if not self.client:
+        if not await self.is_available():
             return False
         
         try:
@@ -569,7 +834,7 @@ class VectorStoreService:
                 for p in points
             ]
             
-            self._make_request("PUT", f"/collections/{collection_name}/points", {
+            await self._make_request("PUT", f"/collections/{collection_name}/points", {
                 "points": qdrant_points
             })
             logger.info(f"✅ Upserted {len(points)} vectors to {collection_name}")
@@ -578,7 +843,28 @@ class VectorStoreService:
             logger.error(f"❌ Vector upsert failed: {e}")
             raise e
     
-    def search(
+    async def set_payloads(
+        self,
+        collection_name: str,
+        payloads: Dict[str, Dict[str, Any]]
+    ) -> bool:
+        """Point payload'larını vektöre dokunmadan kısmen güncelle - REST API"""
+        if not payloads:
+            return True
+        if not await self.is_available():
+            return False
+        
+        operations = [
+            {"set_payload": {"payload": payload, "points": [point_id]}}
+            for point_id, payload in payloads.items()
+        ]
+        await self._make_request("POST", f"/collections/{collection_name}/points/batch?wait=true", {
+            "operations": operations
+        })
+        logger.info(f"✅ Updated {len(payloads)} payloads in {collection_name}")
+        return True
+    
+    async def search(
         self,
         collection_name: str,
         query_vector: List[float],
@@ -587,7 +873,7 @@ class VectorStoreService:
         filter_conditions: Optional[Dict] = None
     ) -> List[SearchResult]:
         """Vektör araması yap - REST API"""
-        if not self.client:
+        if not await self.is_available():
             return []
         
         try:
@@ -599,14 +885,9 @@ class VectorStoreService:
             }
             
             if filter_conditions:
-                search_body["filter"] = {
-                    "must": [
-                        {"key": key, "match": {"value": value}}
-                        for key, value in filter_conditions.items()
-                    ]
-                }
+                search_body["filter"] = build_filter(filter_conditions)
             
-            response = self._make_request("POST", f"/collections/{collection_name}/points/search", search_body)
+            response = await self._make_request("POST", f"/collections/{collection_name}/points/search", search_body)
             
             results = response.get("result", [])
             return [
@@ -622,17 +903,17 @@ class VectorStoreService:
             logger.error(f"❌ Vector search failed: {e}")
             return []
     
-    def delete_points(
+    async def delete_points(
         self,
         collection_name: str,
         point_ids: List[str]
     ) -> bool:
         """Point'leri sil - REST API"""
-        if not self.client:
+        if not await self.is_available():
             return False
         
         try:
-            self._make_request("POST", f"/collections/{collection_name}/points/delete", {
+            await self._make_request("POST", f"/collections/{collection_name}/points/delete", {
                 "points": point_ids
             })
             return True
@@ -640,13 +921,85 @@ class VectorStoreService:
             logger.error(f"❌ Points deletion failed: {e}")
             return False
     
-    def get_collection_info(self, collection_name: str) -> Optional[Dict[str, Any]]:
+    async def existing_point_ids(
+        self,
+        collection_name: str,
+        point_ids: List[str],
+        batch_size: int = 1000
+    ) -> Set[str]:
+        """
+        Verilen ID'lerden koleksiyonda gerçekten bulunanlar - REST API
+        
+        Koleksiyon yoksa boş küme döner.
+        """
+        found: Set[str] = set()
+        for i in range(0, len(point_ids), batch_size):
+            try:
+                response = await self._make_request("POST", f"/collections/{collection_name}/points", {
+                    "ids": point_ids[i:i + batch_size],
+                    "with_payload": False,
+                    "with_vector": False
+                })
+            except QdrantError as e:
+                if e.status_code == 404:
+                    return set()
+                raise
+            found.update(str(point["id"]) for point in response.get("result", []))
+        return found
+    
+    async def delete_points_by_filter(
+        self,
+        collection_name: str,
+        filter_conditions: Dict[str, Any]
+    ) -> bool:
+        """Filtreye uyan point'leri sil - REST API (paylaşılan koleksiyon)"""
+        if not await self.is_available():
+            return False
+        
+        try:
+            await self._make_request("POST", f"/collections/{collection_name}/points/delete?wait=true", {
+                "filter": build_filter(filter_conditions)
+            })
+            return True
+        except Exception as e:
+            logger.error(f"❌ Points deletion failed: {e}")
+            return False
+    
+    async def scroll_points(
+        self,
+        collection_name: str,
+        limit: int = 256,
+        offset: Any = None,
+        with_vector: bool = True,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        Point'leri sayfa sayfa oku (ham Qdrant formatı)
+        
+        Returns:
+            (points, next_page_offset) - son sayfada offset None
+        """
+        body = {
+            "limit": limit,
+            "with_payload": True,
+            "with_vector": with_vector
+        }
+        if offset is not None:
+            body["offset"] = offset
+        if filter_conditions:
+            body["filter"] = build_filter(filter_conditions)
+        
+        response = await self._make_request("POST", f"/collections/{collection_name}/points/scroll", body)
+        result = response.get("result", {})
+        return result.get("points", []), result.get("next_page_offset")
+    
+    async def get_collection_info(self, collection_name: str) -> Optional[Dict[str, Any]]:
         """Koleksiyon bilgilerini al - REST API"""
-        if not self.client:
+        if not await self.is_available():
             return None
         
         try:
-            response = self._make_request("GET", f"/collections/{collection_name}")
+            response = await self._make_request("GET", f"/collections/{collection_name}")
             result = response.get("result", {})
             return {
                 "name": collection_name,
@@ -657,28 +1010,32 @@ class VectorStoreService:
         except Exception as e:
             logger.error(f"❌ Get collection info failed: {e}")
             return None
-
-    def get_all_points(
+    
+    async def get_all_points(
         self,
         collection_name: str,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        filter_conditions: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Koleksiyondaki tüm point'leri al - REST API
         Summarization ve question generation için kullanılır
         """
-        if not self.client:
+        if not await self.is_available():
             return []
         
         try:
             # Qdrant scroll API - get all points without vector search
-            response = self._make_request("POST", f"/collections/{collection_name}/points/scroll", {
+            body = {
                 "limit": limit,
                 "offset": offset,
                 "with_payload": True,
                 "with_vector": False  # Don't need vectors, just payload
-            })
+            }
+            if filter_conditions:
+                body["filter"] = build_filter(filter_conditions)
+            response = await self._make_request("POST", f"/collections/{collection_name}/points/scroll", body)
             
             points = response.get("result", {}).get("points", [])
             
@@ -697,6 +1054,150 @@ class VectorStoreService:
         except Exception as e:
             logger.error(f"❌ Get all points failed: {e}")
             return []
+    
+    async def aclose(self) -> None:
+        """Bağlantı havuzunu kapat"""
+        await self.http.aclose()
+
+
+# One AsyncVectorStore per event loop (httpx.AsyncClient is bound to its loop)
+_vector_stores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncVectorStore]" = weakref.WeakKeyDictionary()
+_vector_stores_lock = threading.Lock()
+
+
+def get_vector_store() -> AsyncVectorStore:
+    """
+    Get the shared async vector store of the running event loop
+    
+    Returns:
+        AsyncVectorStore instance (created on first use)
+    """
+    loop = asyncio.get_running_loop()
+    with _vector_stores_lock:
+        store = _vector_stores.get(loop)
+        if store is None:
+            store = AsyncVectorStore()
+            _vector_stores[loop] = store
+    return store
+
+
+async def close_vector_store() -> None:
+    """Close the running event loop's vector store (app shutdown)"""
+    with _vector_stores_lock:
+        store = _vector_stores.pop(asyncio.get_running_loop(), None)
+    if store is not None:
+        await store.aclose()
+
+
+class _VectorStoreLoop:
+    """Background event loop thread that runs the sync facade's requests"""
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # Threads don't survive fork (Celery prefork): start a new loop per process
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="qdrant-loop", daemon=True)
+                    thread.start()
+                    self._loop = loop
+                    self._pid = os.getpid()
+        return self._loop
+    
+    def run(self, coro_factory):
+        """Run coro_factory(store) on the background loop and wait for the result"""
+        async def _call():
+            return await coro_factory(get_vector_store())
+        return asyncio.run_coroutine_threadsafe(_call(), self._ensure_loop()).result()
+
+
+_vector_store_loop = _VectorStoreLoop()
+
+
+class VectorStoreService:
+    """
+    Qdrant vector store servisi - senkron arayüz (Celery worker'ları için)
+    
+    İstekler arka plandaki tek bir event loop'ta, paylaşılan AsyncVectorStore
+    ile çalışır; async kod doğrudan get_vector_store() kullanmalı.
+    """
+    
+    @property
+    def client(self) -> bool:
+        """Qdrant erişilebilir mi (önbellekli sağlık durumu)"""
+        return _vector_store_loop.run(lambda store: store.is_available())
+    
+    def create_collection(
+        self,
+        collection_name: str,
+        dimensions: int = 1536,
+        distance: str = "Cosine",
+        payload_indexes: Optional[Dict[str, str]] = None
+    ) -> bool:
+        return _vector_store_loop.run(lambda store: store.create_collection(
+            collection_name, dimensions, distance, payload_indexes
+        ))
+    
+    def delete_collection(self, collection_name: str) -> bool:
+        return _vector_store_loop.run(lambda store: store.delete_collection(collection_name))
+    
+    def upsert_vectors(self, collection_name: str, points: List[Dict[str, Any]]) -> bool:
+        return _vector_store_loop.run(lambda store: store.upsert_vectors(collection_name, points))
+    
+    def set_payloads(self, collection_name: str, payloads: Dict[str, Dict[str, Any]]) -> bool:
+        return _vector_store_loop.run(lambda store: store.set_payloads(collection_name, payloads))
+    
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        score_threshold: float = 0.7,
+        filter_conditions: Optional[Dict] = None
+    ) -> List[SearchResult]:
+        return _vector_store_loop.run(lambda store: store.search(
+            collection_name, query_vector, top_k, score_threshold, filter_conditions
+        ))
+    
+    def delete_points(self, collection_name: str, point_ids: List[str]) -> bool:
+        return _vector_store_loop.run(lambda store: store.delete_points(collection_name, point_ids))
+    
+    def delete_points_by_filter(self, collection_name: str, filter_conditions: Dict[str, Any]) -> bool:
+        return _vector_store_loop.run(lambda store: store.delete_points_by_filter(collection_name, filter_conditions))
+    
+    def existing_point_ids(self, collection_name: str, point_ids: List[str]) -> Set[str]:
+        return _vector_store_loop.run(lambda store: store.existing_point_ids(collection_name, point_ids))
+    
+    def scroll_points(
+        self,
+        collection_name: str,
+        limit: int = 256,
+        offset: Any = None,
+        with_vector: bool = True,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        return _vector_store_loop.run(lambda store: store.scroll_points(
+            collection_name, limit, offset, with_vector, filter_conditions
+        ))
+    
+    def get_collection_info(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        return _vector_store_loop.run(lambda store: store.get_collection_info(collection_name))
+    
+    def get_all_points(
+        self,
+        collection_name: str,
+        limit: int = 100,
+        offset: int = 0,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return _vector_store_loop.run(lambda store: store.get_all_points(
+            collection_name, limit, offset, filter_conditions
+        ))
 
 
 # =========================================================================
@@ -732,6 +1233,35 @@ class LLMService:
         else:
             raise ValueError(f"Desteklenmeyen provider: {config['provider']}")
     
+    def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        model: LLMModel = LLMModel.GPT4O_MINI,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ):
+        """
+        LLM yanıtını token token üret (streaming)
+        
+        Returns:
+            TokenStream - metin parçaları üzerinde iterator; bittikten sonra
+            input_tokens / output_tokens değerleri okunabilir
+        """
+        from app.services.llm_streaming import TokenStream, gemini_delta, stream_chat_completion
+        
+        config = LLM_CONFIGS[model]
+        
+        if config["provider"] == "openai":
+            if not self.openai_client:
+                raise ValueError("OpenAI API key not configured")
+            return stream_chat_completion(self.openai_client, model.value, messages, temperature, max_tokens)
+        elif config["provider"] == "google":
+            chat, last_message, generation_config = self._gemini_chat(messages, model.value, temperature, max_tokens)
+            chunks = chat.send_message(last_message, generation_config=generation_config, stream=True)
+            return TokenStream(chunks, gemini_delta, messages)
+        else:
+            raise ValueError(f"Desteklenmeyen provider: {config['provider']}")
+    
     def _openai_generate(
         self,
         messages: List[Dict[str, str]],
@@ -756,68 +1286,83 @@ class LLMService:
             response.usage.completion_tokens
         )
     
-    def _gemini_generate(
+    def _gemini_chat(
         self,
         messages: List[Dict[str, str]],
         model: str,
         temperature: float,
         max_tokens: int
-    ) -> Tuple[str, int, int]:
-        """Gemini ile yanıt oluştur"""
+    ):
+        """
+        Gemini chat oturumu hazırla
+        
+        Returns:
+            (chat, son mesaj, generation_config)
+        """
         try:
             import google.generativeai as genai
-            
-            settings = _get_settings()
-            if not settings.GEMINI_API_KEY:
-                raise ValueError("Gemini API key not configured")
-            
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            gemini_model = genai.GenerativeModel(model)
-            
-            # Mesajları Gemini formatına dönüştür
-            system_content = ""
-            chat_messages = []
-            
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_content = msg["content"]
-                else:
-                    chat_messages.append({
-                        "role": "user" if msg["role"] == "user" else "model",
-                        "parts": [msg["content"]]
-                    })
-            
-            # Chat oluştur
-            chat = gemini_model.start_chat(history=chat_messages[:-1] if len(chat_messages) > 1 else [])
-            
-            # Son mesajı gönder
-            last_message = chat_messages[-1]["parts"][0] if chat_messages else ""
-            if system_content:
-                last_message = f"{system_content}\n\n{last_message}"
-            
-            response = chat.send_message(
-                last_message,
-                generation_config=genai.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens
-                )
-            )
-            
-            # Token sayısını tahmin et (tiktoken optional)
-            try:
-                tk = _ensure_tiktoken()
-                tokenizer = tk.get_encoding("cl100k_base")
-                input_tokens = sum(len(tokenizer.encode(m.get("content", ""))) for m in messages)
-                output_tokens = len(tokenizer.encode(response.text))
-            except Exception:
-                # Fallback: estimate tokens
-                input_tokens = sum(len(m.get("content", "")) // 4 for m in messages)
-                output_tokens = len(response.text) // 4
-            
-            return response.text, input_tokens, output_tokens
-        
         except ImportError:
             raise ValueError("google-generativeai package not installed")
+        
+        settings = _get_settings()
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("Gemini API key not configured")
+        
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        gemini_model = genai.GenerativeModel(model)
+        
+        # Mesajları Gemini formatına dönüştür
+        system_content = ""
+        chat_messages = []
+        
+        for msg in messages:
+            if msg["role"] == "system":
+                system_content = msg["content"]
+            else:
+                chat_messages.append({
+                    "role": "user" if msg["role"] == "user" else "model",
+                    "parts": [msg["content"]]
+                })
+        
+        # Chat oluştur
+        chat = gemini_model.start_chat(history=chat_messages[:-1] if len(chat_messages) > 1 else [])
+        
+        # Son mesaj
+        last_message = chat_messages[-1]["parts"][0] if chat_messages else ""
+        if system_content:
+            last_message = f"{system_content}\n\n{last_message}"
+        
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens
+        )
+        return chat, last_message, generation_config
+    
+    def _gemini_generate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[str, int, int]:
+        """Gemini ile yanıt oluştur"""
+        chat, last_message, generation_config = self._gemini_chat(messages, model, temperature, max_tokens)
+        
+        # Son mesajı gönder
+        response = chat.send_message(last_message, generation_config=generation_config)
+        
+        # Token sayısını tahmin et (tiktoken optional)
+        try:
+            tk = _ensure_tiktoken()
+            tokenizer = tk.get_encoding("cl100k_base")
+            input_tokens = sum(len(tokenizer.encode(m.get("content", ""))) for m in messages)
+            output_tokens = len(tokenizer.encode(response.text))
+        except Exception:
+            # Fallback: estimate tokens
+            input_tokens = sum(len(m.get("content", "")) // 4 for m in messages)
+            output_tokens = len(response.text) // 4
+        
+        return response.text, input_tokens, output_tokens
 
 
 # =========================================================================
@@ -851,18 +1396,22 @@ class RAGService:
         """
         Bilgi tabanı oluştur
         """
-        collection_name = f"gistify_user_{user_id}_source_{source_id}"
+        collection_name = new_pkb_collection(f"gistify_user_{user_id}_source_{source_id}", embedding_model)
+        location = pkb_location(user_id, source_id, collection_name)
         config = EMBEDDING_CONFIGS[embedding_model]
         
         # Chunker'ı yapılandır
         self.chunker.chunk_size = chunk_size
         self.chunker.chunk_overlap = chunk_overlap
         
-        # 1. Koleksiyonu oluştur
+        # 1. Koleksiyonu oluştur (paylaşılan koleksiyonda kaynağın eski point'lerini temizle)
         self.vector_store.create_collection(
             collection_name=collection_name,
-            dimensions=config["dimensions"]
+            dimensions=config["dimensions"],
+            payload_indexes=SHARED_PAYLOAD_INDEXES if location.shared else None
         )
+        if location.shared:
+            self.vector_store.delete_points_by_filter(collection_name, location.filter_conditions)
         
         # 2. Tüm metinleri chunk'la
         all_chunks = []
@@ -885,17 +1434,20 @@ class RAGService:
         chunk_texts = [c.content for c in all_chunks]
         embeddings = self.embedding_service.get_embeddings_batch(
             texts=chunk_texts,
-            model=embedding_model
+            model=embedding_model,
+            token_counts=[c.token_count for c in all_chunks]
         )
         
         # 4. Vektörleri kaydet
         points = []
         for i, (chunk, emb) in enumerate(zip(all_chunks, embeddings)):
-            point_id = hashlib.md5(f"{collection_name}_{i}".encode()).hexdigest()
+            point_id = hashlib.md5(f"gistify_user_{user_id}_source_{source_id}_{i}".encode()).hexdigest()
             points.append({
                 "id": point_id,
                 "vector": emb.embedding,
                 "payload": {
+                    "user_id": user_id,
+                    "source_id": source_id,
                     "content": chunk.content,
                     "chunk_index": chunk.index,
                     "token_count": chunk.token_count,
@@ -933,15 +1485,18 @@ class RAGService:
         llm_model: LLMModel = LLMModel.GPT4O_MINI,
         top_k: int = 5,
         temperature: float = 0.7,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        collection_name: Optional[str] = None
     ) -> RAGResponse:
         """
         RAG sorgusu yap
+        
+        collection_name verilmezse kaynağın kayıtlı koleksiyonu kullanılır.
         """
         import time
         start_time = time.time()
         
-        collection_name = f"gistify_user_{user_id}_source_{source_id}"
+        location = self._location(user_id, source_id, collection_name)
         
         # 1. Soru için embedding oluştur
         query_embedding = self.embedding_service.get_embedding(
@@ -949,12 +1504,19 @@ class RAGService:
             model=embedding_model
         )
         
-        # 2. Benzer chunk'ları bul
+        # 2. Benzer chunk'ları bul (vektör + BM25, reciprocal-rank fusion)
+        settings = _get_settings()
         search_results = self.vector_store.search(
-            collection_name=collection_name,
+            collection_name=location.collection_name,
             query_vector=query_embedding.embedding,
-            top_k=top_k
+            top_k=max(top_k, settings.RAG_HYBRID_CANDIDATES) if settings.RAG_HYBRID_ENABLED else top_k,
+            score_threshold=settings.RAG_VECTOR_SCORE_THRESHOLD,
+            filter_conditions=location.filter_conditions
         )
+        if settings.RAG_HYBRID_ENABLED:
+            from app.services.hybrid_search import hybrid_rank, get_source_index_sync
+            index = get_source_index_sync(source_id, location, self.vector_store)
+            search_results = hybrid_rank(question, search_results, index, top_k)
         
         if not search_results:
             return RAGResponse(
@@ -1029,11 +1591,39 @@ Lütfen yukarıdaki bağlama dayanarak soruyu yanıtla ve hangi kaynaklardan ([1
     def delete_knowledge_base(
         self,
         user_id: int,
-        source_id: int
+        source_id: int,
+        collection_name: Optional[str] = None
     ) -> bool:
-        """Bilgi tabanını sil"""
-        collection_name = f"gistify_user_{user_id}_source_{source_id}"
-        return self.vector_store.delete_collection(collection_name)
+        """Bilgi tabanını sil (collection_name verilmezse kayıtlı koleksiyon)"""
+        location = self._location(user_id, source_id, collection_name)
+        if location.shared:
+            return self.vector_store.delete_points_by_filter(location.collection_name, location.filter_conditions)
+        return self.vector_store.delete_collection(location.collection_name)
+    
+    def _location(self, user_id: int, source_id: int, collection_name: Optional[str] = None) -> PKBLocation:
+        """
+        Kaynağın PKB'si, Source.pkb_collection_name üzerinden çözülür
+        
+        Henüz taşınmamış kaynaklar kendi koleksiyonlarında kalır; kayıtlı
+        koleksiyonu olmayan kaynak yeni PKB'lerin koleksiyonuna düşer.
+        """
+        if collection_name is None:
+            collection_name = self._stored_collection(source_id)
+        if not collection_name:
+            collection_name = new_pkb_collection(f"gistify_user_{user_id}_source_{source_id}")
+        return pkb_location(user_id, source_id, collection_name)
+    
+    def _stored_collection(self, source_id: int) -> Optional[str]:
+        """Source.pkb_collection_name (kaynak yoksa None)"""
+        from app.database import SessionLocal
+        from app.models.source import Source
+        
+        db = SessionLocal()
+        try:
+            row = db.query(Source.pkb_collection_name).filter(Source.id == source_id).first()
+        finally:
+            db.close()
+        return row[0] if row else None
 
 
 # =========================================================================
@@ -0,0 +1,262 @@
+"""
+Speaker alignment
+Assigns diarization speakers to transcript segments and words
+
+Turns are merged per speaker into sorted, disjoint blocks with a running
+coverage total, so the overlap of any interval with a speaker is two
+binary searches (np.searchsorted) instead of a scan over all turns:
+O((N + M) log M) for N intervals and M turns.
+
+Only depends on NumPy; it is also shipped into the Modal diarization image
+(see modal_whisper_function.py), so it must not import app modules.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Speaker runs of words shorter than this (seconds) between two runs of the
+# same speaker are treated as diarization flicker
+WORD_SMOOTHING_SECONDS = 0.5
+
+
+class SpeakerTurns:
+    """
+    Diarization turns prepared for interval queries
+
+    Args:
+        speakers: Diarization data [{speaker, start, end}, ...] in any order
+    """
+
+    def __init__(self, speakers: Sequence[Dict[str, Any]]):
+        # Speaker order of first appearance decides ties, like the old linear scan
+        self.labels: List[Any] = list(dict.fromkeys(s["speaker"] for s in speakers))
+        index = {label: i for i, label in enumerate(self.labels)}
+
+        self.starts = np.array([float(s["start"]) for s in speakers], dtype=np.float64)
+        self.ends = np.maximum(np.array([float(s["end"]) for s in speakers], dtype=np.float64), self.starts)
+        self.label_ids = np.array([index[s["speaker"]] for s in speakers], dtype=np.int64)
+
+        self._blocks = [
+            _merge_blocks(self.starts[self.label_ids == i], self.ends[self.label_ids == i])
+            for i in range(len(self.labels))
+        ]
+
+        self._by_start = np.argsort(self.starts, kind="stable")
+        self._by_end = np.argsort(self.ends, kind="stable")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def assign(self, starts: np.ndarray, ends: np.ndarray, nearest: bool = False) -> np.ndarray:
+        """
+        Speaker index with the largest total overlap for every interval
+
+        Args:
+            starts: Interval start times
+            ends: Interval end times
+            nearest: Use the closest turn for intervals no turn overlaps
+
+        Returns:
+            Index into self.labels per interval, -1 where no speaker was found
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.maximum(np.asarray(ends, dtype=np.float64), starts)
+        best = np.full(len(starts), -1, dtype=np.int64)
+        if len(starts) == 0 or len(self) == 0:
+            return best
+
+        best_overlap = np.zeros(len(starts), dtype=np.float64)
+        point = ends == starts
+        for label_id, blocks in enumerate(self._blocks):
+            covered_end, _ = _coverage(blocks, ends)
+            covered_start, inside = _coverage(blocks, starts)
+            # Microsecond resolution so running-sum rounding doesn't break ties
+            overlap = np.round(covered_end - covered_start, 6)
+            # Zero-length intervals (single-instant words) count if a turn contains them
+            overlap[point & inside] = 1e-6
+            better = overlap > best_overlap
+            best[better] = label_id
+            best_overlap[better] = overlap[better]
+
+        if nearest:
+            missing = np.flatnonzero(best < 0)
+            if len(missing):
+                best[missing] = self._nearest(starts[missing], ends[missing])
+        return best
+
+    def _nearest(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Label of the closest turn for intervals that overlap no turn"""
+        # Every turn either ends before the interval or starts after it
+        sorted_ends = self.ends[self._by_end]
+        sorted_starts = self.starts[self._by_start]
+        before = np.searchsorted(sorted_ends, starts, side="right") - 1
+        after = np.searchsorted(sorted_starts, ends, side="left")
+
+        gap_before = np.where(before >= 0, starts - sorted_ends[np.maximum(before, 0)], np.inf)
+        has_after = after < len(self)
+        gap_after = np.where(has_after, sorted_starts[np.minimum(after, len(self) - 1)] - ends, np.inf)
+
+        turn = np.where(
+            gap_before <= gap_after,
+            self._by_end[np.maximum(before, 0)],
+            self._by_start[np.minimum(after, len(self) - 1)]
+        )
+        return self.label_ids[turn]
+
+    def speakers(self, ids: np.ndarray) -> List[Optional[Any]]:
+        """Speaker labels of assign() results (None for -1)"""
+        return [self.labels[i] if i >= 0 else None for i in ids.tolist()]
+
+
+def _merge_blocks(starts: np.ndarray, ends: np.ndarray):
+    """Union of turns as sorted disjoint blocks plus coverage before each block"""
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    new_block = np.ones(len(starts), dtype=bool)
+    new_block[1:] = starts[1:] > reach[:-1]
+    first = np.flatnonzero(new_block)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+
+    block_starts = starts[first]
+    lengths = reach[last] - block_starts
+    covered_before = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    return block_starts, lengths, covered_before
+
+
+def _coverage(blocks, times: np.ndarray):
+    """
+    Speaker time before each instant, and whether the instant is inside a block
+    """
+    block_starts, lengths, covered_before = blocks
+    i = np.searchsorted(block_starts, times, side="right") - 1
+    valid = i >= 0
+    i = np.maximum(i, 0)
+    into = times - block_starts[i]
+    covered = np.where(valid, covered_before[i] + np.clip(into, 0.0, lengths[i]), 0.0)
+    inside = valid & (into <= lengths[i])
+    return covered, inside
+
+
+def assign_speakers(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    speakers: Sequence[Dict[str, Any]],
+    nearest: bool = False
+) -> List[Optional[Any]]:
+    """
+    Speaker with the largest overlap for every [start, end] interval
+
+    Args:
+        starts: Interval start times
+        ends: Interval end times
+        speakers: Diarization data [{speaker, start, end}, ...]
+        nearest: Use the closest turn for intervals no turn overlaps
+
+    Returns:
+        Speaker label per interval (None where no speaker overlaps)
+    """
+    turns = SpeakerTurns(speakers)
+    return turns.speakers(turns.assign(starts, ends, nearest=nearest))
+
+
+def smooth_speakers(
+    labels: List[Optional[Any]],
+    starts: Sequence[float],
+    ends: Sequence[float],
+    min_duration: float
+) -> List[Optional[Any]]:
+    """
+    Remove short speaker switches (A, B, A -> A, A, A)
+
+    A run of the same speaker shorter than min_duration seconds that has the
+    same speaker on both sides is relabelled to that speaker.
+
+    Returns:
+        Smoothed copy of labels
+    """
+    labels = list(labels)
+    if min_duration <= 0 or len(labels) < 3:
+        return labels
+
+    runs = []  # [first, last] index of each run of equal labels
+    for i, label in enumerate(labels):
+        if runs and labels[runs[-1][1]] == label:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+
+    for k in range(1, len(runs) - 1):
+        first, last = runs[k]
+        outer = labels[runs[k - 1][1]]
+        if outer is None or outer != labels[runs[k + 1][0]]:
+            continue
+        if ends[last] - starts[first] < min_duration:
+            labels[first:last + 1] = [outer] * (last - first + 1)
+    return labels
+
+
+def align_segments(
+    segments: List[Dict[str, Any]],
+    speakers: Sequence[Dict[str, Any]],
+    words: bool = True,
+    nearest: bool = False,
+    word_smoothing: float = WORD_SMOOTHING_SECONDS,
+    segment_smoothing: float = 0.0
+) -> List[Dict[str, Any]]:
+    """
+    Add a 'speaker' to every segment (and to its words)
+
+    Args:
+        segments: Whisper segments [{start, end, text, words?}, ...]
+        speakers: Diarization data [{speaker, start, end}, ...]
+        words: Also label the segments' word timestamps
+        nearest: Use the closest turn when nothing overlaps (else None)
+        word_smoothing: min_duration for smooth_speakers() over the words
+        segment_smoothing: min_duration for smooth_speakers() over the segments
+
+    Returns:
+        Copies of the segments with speaker info
+    """
+    if not speakers or not segments:
+        return segments
+
+    turns = SpeakerTurns(speakers)
+    seg_starts = np.array([float(s.get("start", 0) or 0) for s in segments])
+    seg_ends = np.array([float(s.get("end", 0) or 0) for s in segments])
+    seg_speakers = turns.speakers(turns.assign(seg_starts, seg_ends, nearest=nearest))
+    seg_speakers = smooth_speakers(seg_speakers, seg_starts, seg_ends, segment_smoothing)
+
+    updated = []
+    for segment, speaker in zip(segments, seg_speakers):
+        segment_copy = segment.copy()
+        segment_copy["speaker"] = speaker
+        updated.append(segment_copy)
+
+    if not words:
+        return updated
+
+    # Words of all segments in one pass, so smoothing also works across segment boundaries
+    timed = []  # (segment index, word index)
+    word_starts, word_ends = [], []
+    for i, segment in enumerate(updated):
+        if not segment.get("words"):
+            continue
+        segment["words"] = [dict(word) for word in segment["words"]]
+        for j, word in enumerate(segment["words"]):
+            if word.get("start") is None or word.get("end") is None:
+                # Untimed words (e.g. numbers in WhisperX) take the segment's speaker
+                word["speaker"] = segment["speaker"]
+                continue
+            timed.append((i, j))
+            word_starts.append(float(word["start"]))
+            word_ends.append(float(word["end"]))
+
+    if timed:
+        word_speakers = turns.speakers(turns.assign(np.array(word_starts), np.array(word_ends), nearest=nearest))
+        word_speakers = smooth_speakers(word_speakers, word_starts, word_ends, word_smoothing)
+        for (i, j), speaker in zip(timed, word_speakers):
+            updated[i]["words"][j]["speaker"] = speaker
+
+    return updated
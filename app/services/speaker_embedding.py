@@ -0,0 +1,118 @@
+"""
+Batched Resemblyzer speaker embeddings
+Embeds many segments of one decoded waveform with a few encoder passes
+instead of one embed_utterance() call per segment
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Resemblyzer's sampling rate
+
+# Partial windows (1.6s mel slices) per encoder forward pass
+EMBED_BATCH_PARTIALS = 256
+
+
+def pool_partials(partial_embeds: np.ndarray, counts: Sequence[int]) -> np.ndarray:
+    """
+    Average each segment's partial embeddings and L2-normalize (as embed_utterance)
+
+    Args:
+        partial_embeds: (sum(counts), dim) encoder outputs in segment order
+        counts: Number of partial windows of each segment
+
+    Returns:
+        (len(counts), dim) utterance embeddings
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.add.reduceat(partial_embeds, offsets, axis=0)
+    means = sums / counts[:, None]
+    return means / np.linalg.norm(means, axis=1, keepdims=True)
+
+
+def _partial_mels(encoder, wav: np.ndarray, rate: float, min_coverage: float) -> np.ndarray:
+    """Mel slices embed_utterance() would feed the encoder for one utterance"""
+    from resemblyzer import audio
+
+    wav_slices, mel_slices = encoder.compute_partial_slices(len(wav), rate, min_coverage)
+    max_wave_length = wav_slices[-1].stop
+    if max_wave_length >= len(wav):
+        wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+    mel = audio.wav_to_mel_spectrogram(wav)
+    return np.array([mel[s] for s in mel_slices])
+
+
+def embed_spans(
+    encoder,
+    wav: np.ndarray,
+    spans: Sequence[Tuple[float, float]],
+    sr: int = SAMPLE_RATE,
+    min_seconds: float = 0.0,
+    batch_partials: int = EMBED_BATCH_PARTIALS,
+    rate: float = 1.3,
+    min_coverage: float = 0.75
+) -> List[Optional[np.ndarray]]:
+    """
+    Resemblyzer embeddings of time spans of one waveform
+
+    Every span is preprocessed (volume normalization, silence trimming) and
+    split into partial windows like embed_utterance(); the windows of all
+    spans are stacked and run through the encoder in batches.
+
+    Args:
+        encoder: resemblyzer.VoiceEncoder
+        wav: Mono waveform (decoded once by the caller)
+        spans: (start, end) seconds per segment
+        sr: Sample rate of wav (resampled to 16 kHz once if different)
+        min_seconds: Spans shorter than this get no embedding
+        batch_partials: Partial windows per forward pass
+
+    Returns:
+        256-dim embedding per span, None for spans that were too short or failed
+    """
+    import torch
+    from resemblyzer import preprocess_wav
+
+    if sr != SAMPLE_RATE:
+        import librosa
+        wav = librosa.resample(wav, orig_sr=sr, target_sr=SAMPLE_RATE)
+
+    mels, counts, owners = [], [], []
+    for i, (start, end) in enumerate(spans):
+        segment = wav[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        if len(segment) == 0 or len(segment) < min_seconds * SAMPLE_RATE:
+            continue
+        try:
+            processed = preprocess_wav(segment)
+            if len(processed) == 0:
+                continue
+            partials = _partial_mels(encoder, processed, rate, min_coverage)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to prepare segment {start:.1f}s-{end:.1f}s for embedding: {e}")
+            continue
+        mels.append(partials)
+        counts.append(len(partials))
+        owners.append(i)
+
+    embeddings: List[Optional[np.ndarray]] = [None] * len(spans)
+    if not mels:
+        return embeddings
+
+    stacked = np.concatenate(mels).astype(np.float32)
+    outputs = []
+    with torch.no_grad():
+        for offset in range(0, len(stacked), batch_partials):
+            batch = torch.from_numpy(stacked[offset:offset + batch_partials]).to(encoder.device)
+            outputs.append(encoder(batch).cpu().numpy())
+
+    pooled = pool_partials(np.concatenate(outputs), counts)
+    for owner, embedding in zip(owners, pooled):
+        embeddings[owner] = embedding
+
+    logger.info(f"🎙️ Embedded {len(owners)}/{len(spans)} segments ({len(stacked)} windows)")
+    return embeddings
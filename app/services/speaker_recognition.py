@@ -108,7 +108,8 @@ class SpeakerRecognizer:
     def recognize_speakers(
         self,
         audio_path: str,
-        segments: List[Dict[str, Any]]
+        segments: List[Dict[str, Any]],
+        audio: Optional[np.ndarray] = None
     ) -> Tuple[int, List[str], List[Dict[str, Any]]]:
         """
         Perform speaker diarization on transcription segments
@@ -116,6 +117,8 @@ class SpeakerRecognizer:
         Args:
             audio_path: Path to audio file
             segments: Transcription segments from Whisper
+            audio: Already decoded 16 kHz mono samples (e.g. AudioBuffer.samples);
+                the file is loaded if None
         
         Returns:
             Tuple of (speaker_count, speaker_names, enhanced_segments)
@@ -126,9 +129,9 @@ class SpeakerRecognizer:
         
         try:
             if self.model_type == "silero":
-                return self._recognize_with_silero(audio_path, segments)
+                return self._recognize_with_silero(audio_path, segments, audio)
             elif self.model_type == "resemblyzer":
-                return self._recognize_with_resemblyzer(audio_path, segments)
+                return self._recognize_with_resemblyzer(audio_path, segments, audio)
             elif self.model_type == "custom":
                 return self._recognize_with_custom_model(audio_path, segments)
             else:
@@ -141,7 +144,8 @@ class SpeakerRecognizer:
     def _recognize_with_silero(
         self,
         audio_path: str,
-        segments: List[Dict[str, Any]]
+        segments: List[Dict[str, Any]],
+        audio: Optional[np.ndarray] = None
     ) -> Tuple[int, List[str], List[Dict[str, Any]]]:
         """
         Perform speaker diarization using Silero VAD
@@ -150,19 +154,23 @@ class SpeakerRecognizer:
         consider integrating with pyannote.audio or similar libraries.
         """
         try:
-            import torchaudio
-            
-            # Load audio
-            wav, sr = torchaudio.load(audio_path)
-            
-            # Resample to 16kHz if needed
-            if sr != 16000:
-                resampler = torchaudio.transforms.Resample(sr, 16000)
-                wav = resampler(wav)
-            
-            # Convert to mono if stereo
-            if wav.shape[0] > 1:
-                wav = wav.mean(dim=0, keepdim=True)
+            if audio is not None:
+                # Decoded buffer is already 16kHz mono
+                wav = torch.from_numpy(np.asarray(audio, dtype=np.float32))
+            else:
+                import torchaudio
+                
+                # Load audio
+                wav, sr = torchaudio.load(audio_path)
+                
+                # Resample to 16kHz if needed
+                if sr != 16000:
+                    resampler = torchaudio.transforms.Resample(sr, 16000)
+                    wav = resampler(wav)
+                
+                # Convert to mono if stereo
+                if wav.shape[0] > 1:
+                    wav = wav.mean(dim=0, keepdim=True)
             
             # Get speech timestamps
             speech_timestamps = self.get_speech_timestamps(
@@ -189,7 +197,8 @@ class SpeakerRecognizer:
     def _recognize_with_resemblyzer(
         self,
         audio_path: str,
-        segments: List[Dict[str, Any]]
+        segments: List[Dict[str, Any]],
+        audio: Optional[np.ndarray] = None
     ) -> Tuple[int, List[str], List[Dict[str, Any]]]:
         """
         Perform speaker diarization using Resemblyzer (no FFmpeg dependency)
@@ -198,46 +207,34 @@ class SpeakerRecognizer:
         More lightweight than Silero but requires librosa for audio loading.
         """
         try:
-            from resemblyzer import preprocess_wav
             from sklearn.cluster import AgglomerativeClustering
             import librosa
+            from app.services.speaker_embedding import embed_spans
             
             if not self.resemblyzer_encoder:
                 logger.error("Resemblyzer encoder not loaded")
                 return 0, [], segments
             
-            # Load audio with librosa (no FFmpeg dependency)
-            audio, sr = librosa.load(audio_path, sr=16000, mono=True)
+            # Load audio with librosa (no FFmpeg dependency) unless already decoded
+            if audio is not None:
+                sr = 16000
+            else:
+                audio, sr = librosa.load(audio_path, sr=16000, mono=True)
             
-            # Preprocess for Resemblyzer
-            wav = preprocess_wav(audio, source_sr=sr)
+            # Extract embeddings for all segments in batched encoder passes
+            # (segments shorter than 0.3 seconds are skipped)
+            spans = []
+            for segment in segments:
+                start = segment.get('start', 0)
+                spans.append((start, segment.get('end', start + 1)))
+            segment_embeddings = embed_spans(self.resemblyzer_encoder, audio, spans, sr=sr, min_seconds=0.3)
             
-            # Extract embeddings for each segment
             embeddings = []
             valid_segments = []
-            
-            for segment in segments:
-                start = segment.get('start', 0)
-                end = segment.get('end', start + 1)
-                
-                # Extract segment audio
-                start_sample = int(start * sr)
-                end_sample = int(end * sr)
-                segment_audio = audio[start_sample:end_sample]
-                
-                # Skip very short segments (< 0.3 seconds)
-                if len(segment_audio) < sr * 0.3:
-                    continue
-                
-                # Preprocess and encode
-                try:
-                    segment_wav = preprocess_wav(segment_audio, source_sr=sr)
-                    embedding = self.resemblyzer_encoder.embed_utterance(segment_wav)
+            for segment, embedding in zip(segments, segment_embeddings):
+                if embedding is not None:
                     embeddings.append(embedding)
                     valid_segments.append(segment)
-                except Exception as e:
-                    logger.warning(f"Failed to embed segment at {start}s-{end}s: {e}")
-                    continue
             
             if not embeddings:
                 logger.warning("No valid embeddings extracted")
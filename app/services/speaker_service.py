@@ -8,9 +8,11 @@ import numpy as np
 import json
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 import librosa
 
+from app.services.speaker_embedding import embed_spans
+
 logger = logging.getLogger(__name__)
 
 # Try to import resemblyzer
@@ -194,30 +196,80 @@ class SpeakerRecognitionService:
             return None, 0.0
         
         try:
-            # Convert to tensor
-            embedding_tensor = torch.FloatTensor(embedding).unsqueeze(0).to(self.device)
+            return self._classify(np.stack([embedding]))[0]
+        except Exception as e:
+            logger.error(f"❌ Speaker identification failed: {e}")
+            return None, 0.0
+    
+    def identify_speakers(
+        self,
+        audio_array: np.ndarray,
+        spans: Sequence[Tuple[float, float]],
+        sr: int = 16000
+    ) -> List[Tuple[Optional[str], float]]:
+        """
+        Identify the speaker of many segments of one recording
+        
+        All segments are embedded in batched encoder passes and classified
+        with a single forward pass of the global model.
+        
+        Args:
+            audio_array: Audio samples of the whole recording
+            spans: (start, end) seconds per segment
+            sr: Sample rate
             
-            # Predict
-            with torch.no_grad():
-                logits = self.model(embedding_tensor)
-                probabilities = torch.softmax(logits, dim=1)
-                confidence, predicted_idx = torch.max(probabilities, dim=1)
+        Returns:
+            (speaker_name, confidence) per span, (None, 0.0) where it failed
+        """
+        results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(spans)
+        if not spans:
+            return results
+        
+        # Check if model is loaded
+        if self.model is None:
+            loaded = self.load_model()
+            if not loaded:
+                return results
+        
+        if not RESEMBLYZER_AVAILABLE or self.voice_encoder is None:
+            return results
+        
+        try:
+            embeddings = embed_spans(self.voice_encoder, audio_array, spans, sr=sr)
+            embedded = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+            if not embedded:
+                return results
             
-            confidence = confidence.item()
-            predicted_idx = predicted_idx.item()
+            predictions = self._classify(np.stack([embeddings[i] for i in embedded]))
+            for i, prediction in zip(embedded, predictions):
+                results[i] = prediction
+            return results
             
+        except Exception as e:
+            logger.error(f"❌ Batched speaker identification failed: {e}")
+            return results
+    
+    def _classify(self, embeddings: np.ndarray) -> List[Tuple[str, float]]:
+        """Run the global model over (n, 256) embeddings"""
+        embedding_tensor = torch.from_numpy(embeddings.astype(np.float32)).to(self.device)
+        
+        # Predict
+        with torch.no_grad():
+            logits = self.model(embedding_tensor)
+            probabilities = torch.softmax(logits, dim=1)
+            confidences, predicted = torch.max(probabilities, dim=1)
+        
+        results = []
+        for confidence, predicted_idx in zip(confidences.tolist(), predicted.tolist()):
             # Get speaker name
             speaker_name = self.speaker_mapping.get(str(predicted_idx), f"Speaker_{predicted_idx}")
             
             # Check threshold
             if confidence < self.threshold:
-                return "Unknown", confidence
-            
-            return speaker_name, confidence
-            
-        except Exception as e:
-            logger.error(f"❌ Speaker identification failed: {e}")
-            return None, 0.0
+                results.append(("Unknown", confidence))
+            else:
+                results.append((speaker_name, confidence))
+        return results
     
     def is_available(self) -> bool:
         """Check if speaker recognition is available"""
@@ -4,12 +4,20 @@ Supports both MinIO and Cloudflare R2
 """
 
 import os
+import json
+import time
 import uuid
+import hashlib
 import logging
-from typing import Optional, BinaryIO
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, BinaryIO, Dict, Any, Iterator
 from pathlib import Path
 from datetime import timedelta
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
@@ -18,6 +26,136 @@ from app.settings import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Block size used when streaming uploads to disk (keeps per-request memory flat)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# R2 multipart settings for streamed uploads (R2 minimum part size is 5 MB)
+R2_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+R2_MULTIPART_CONCURRENCY = 2
+UPLOAD_SESSION_LOCK_WAIT_SECONDS = 10
+UPLOAD_SESSION_LOCK_STALE_SECONDS = 300
+UPLOAD_SESSION_CLEANUP_INTERVAL = 600  # Seconds between expired-session sweeps
+
+
+class StorageMetrics:
+    """
+    Per-operation latency and connection reuse counters for the R2 client
+    
+    Fed by botocore before-call/after-call events, so every S3 API call made
+    through the shared client (including managed multipart transfers) is counted.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, float]] = {}
+    
+    def record(self, operation: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._operations.setdefault(
+                operation, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            ms = seconds * 1000
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+    
+    def on_before_call(self, context=None, **kwargs) -> None:
+        if context is not None:
+            context["storage_started_at"] = time.perf_counter()
+    
+    def on_after_call(self, model=None, context=None, **kwargs) -> None:
+        self._record_event(model, context, error=False)
+    
+    def on_after_call_error(self, model=None, context=None, **kwargs) -> None:
+        self._record_event(model, context, error=True)
+    
+    def _record_event(self, model, context, error: bool) -> None:
+        started_at = (context or {}).get("storage_started_at")
+        if model is not None and started_at is not None:
+            self.record(model.name, time.perf_counter() - started_at, error=error)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    "count": int(stats["count"]),
+                    "errors": int(stats["errors"]),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1) if stats["count"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for name, stats in self._operations.items()
+            }
+
+
+class FileIndex:
+    """
+    Persistent file_id → path index (SQLite sidecar in the uploads folder)
+    
+    Paths are stored relative to the uploads folder. The index is a lookup
+    hint: callers verify the path still exists and fall back to the shard
+    directory, so a stale or unavailable index never loses a file.
+    """
+    
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS files (file_id TEXT PRIMARY KEY, path TEXT NOT NULL)"
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process, after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def get(self, file_id: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT path FROM files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, file_id: str, path: str) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO files (file_id, path) VALUES (?, ?)", (file_id, path)
+        )
+    
+    def remove(self, file_id: str) -> None:
+        self._connect().execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+    
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+class UploadSessionError(Exception):
+    """Raised when a resumable upload request doesn't match the session state"""
+    def __init__(self, message: str, offset: Optional[int] = None):
+        self.offset = offset
+        super().__init__(message)
+
+
+class FileTooLargeError(Exception):
+    """Raised when a streamed upload exceeds the allowed size"""
+    def __init__(self, size: int, max_size: int):
+        self.size = size
+        self.max_size = max_size
+        super().__init__(f"File too large: {size} bytes read, max {max_size} bytes")
+
+
+@dataclass
+class StoredFile:
+    """Result of a streamed file save"""
+    file_id: str
+    file_path: str
+    file_size: int
+    sha256: str
+
 
 class FileStorageService:
     """
@@ -25,6 +163,8 @@ class FileStorageService:
     """
     
     def __init__(self, base_path: str = "./uploads"):
+        self.metrics = StorageMetrics()
+        
         # Local filesystem for temporary files
         if not os.path.isabs(base_path):
             project_root = Path(__file__).parent.parent.parent
@@ -35,6 +175,25 @@ class FileStorageService:
         self.base_path.mkdir(parents=True, exist_ok=True)
         logger.info(f"✅ File storage initialized: {self.base_path.absolute()}")
         
+        # Resumable upload sessions (metadata + partial data) live next to uploads
+        # so API replicas and workers sharing the volume see the same state
+        self.sessions_path = self.base_path / ".resumable"
+        self.sessions_path.mkdir(parents=True, exist_ok=True)
+        self._last_session_cleanup = 0.0
+        
+        # Content-addressed blobs (hardlinks keyed by SHA-256) for upload dedup
+        self.content_path = self.base_path / ".content"
+        self.content_path.mkdir(parents=True, exist_ok=True)
+        
+        # Stored files live in sharded dirs (ab/cd/<file_id>.ext) and are
+        # looked up through a file_id index instead of scanning the folder
+        try:
+            self.file_index: Optional[FileIndex] = FileIndex(self.base_path / ".index.sqlite3")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ File index unavailable, using shard lookups: {e}")
+            self.file_index = None
+        self._has_legacy_files = self._scan_legacy_files()
+        
         # Cloudflare R2 client (S3-compatible)
         try:
             self.bucket_name = settings.STORAGE_BUCKET
@@ -44,7 +203,8 @@ class FileStorageService:
             # R2 endpoint format: https://<account_id>.r2.cloudflarestorage.com
             endpoint_url = f"https://{self.account_id}.r2.cloudflarestorage.com"
             
-            # Configure boto3 for R2
+            # Configure boto3 for R2 - one client per process, shared by all
+            # threads, with a keep-alive connection pool sized for concurrency
             self.s3_client = boto3.client(
                 's3',
                 endpoint_url=endpoint_url,
@@ -52,23 +212,19 @@ class FileStorageService:
                 aws_secret_access_key=settings.STORAGE_SECRET_KEY,
                 config=Config(
                     signature_version='s3v4',
-                    retries={'max_attempts': 3, 'mode': 'adaptive'}
+                    retries={'max_attempts': 3, 'mode': 'adaptive'},
+                    max_pool_connections=settings.STORAGE_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True
                 ),
                 region_name='auto'  # R2 uses 'auto' region
             )
             
-            # Verify bucket exists
-            try:
-                self.s3_client.head_bucket(Bucket=self.bucket_name)
-                logger.info(f"✅ R2 bucket verified: {self.bucket_name}")
-            except ClientError as e:
-                error_code = e.response.get('Error', {}).get('Code', '')
-                if error_code == '404':
-                    # Create bucket if not exists
-                    self.s3_client.create_bucket(Bucket=self.bucket_name)
-                    logger.info(f"📦 Created R2 bucket: {self.bucket_name}")
-                else:
-                    raise
+            events = self.s3_client.meta.events
+            events.register('before-call.s3', self.metrics.on_before_call)
+            events.register('after-call.s3', self.metrics.on_after_call)
+            events.register('after-call-error.s3', self.metrics.on_after_call_error)
+            
+            self._verify_bucket()
             
             logger.info(f"✅ Cloudflare R2 client initialized: {endpoint_url}/{self.bucket_name}")
             self.r2_enabled = True
@@ -79,6 +235,50 @@ class FileStorageService:
             self.r2_enabled = False
             self.minio_enabled = False
     
+    def _verify_bucket(self) -> None:
+        """Verify the bucket exists (create it if missing)"""
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            logger.info(f"✅ R2 bucket verified: {self.bucket_name}")
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            if error_code == '404':
+                # Create bucket if not exists
+                self.s3_client.create_bucket(Bucket=self.bucket_name)
+                logger.info(f"📦 Created R2 bucket: {self.bucket_name}")
+            else:
+                raise
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get R2 client metrics
+        
+        Returns:
+            Dict with per-operation latency and connection pool reuse stats
+        """
+        connections = {"opened": 0, "requests": 0, "reuse_ratio": None}
+        if self.r2_enabled:
+            try:
+                # botocore keeps a urllib3 PoolManager per client endpoint
+                manager = self.s3_client._endpoint.http_session._manager
+                for pool_key in manager.pools.keys():
+                    pool = manager.pools[pool_key]
+                    connections["opened"] += pool.num_connections
+                    connections["requests"] += pool.num_requests
+                if connections["requests"]:
+                    connections["reuse_ratio"] = round(
+                        1 - connections["opened"] / connections["requests"], 3
+                    )
+            except Exception as e:
+                logger.debug(f"Connection pool stats unavailable: {e}")
+        
+        return {
+            "r2_enabled": self.r2_enabled,
+            "max_pool_connections": settings.STORAGE_MAX_POOL_CONNECTIONS,
+            "connections": connections,
+            "operations": self.metrics.snapshot(),
+        }
+    
     def save_file(self, file: BinaryIO, filename: str) -> tuple[str, str]:
         """
         Save uploaded file to storage
@@ -90,58 +290,612 @@ class FileStorageService:
         Returns:
             tuple: (file_id, file_path)
         """
+        stored = self.save_file_stream(file, filename)
+        return stored.file_id, stored.file_path
+    
+    def save_file_stream(
+        self,
+        file: BinaryIO,
+        filename: str,
+        max_size: Optional[int] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE
+    ) -> StoredFile:
+        """
+        Stream a file object to storage in fixed-size blocks
+        
+        Size limit is enforced while reading and the content is hashed
+        on the fly, so memory use stays at roughly one block per upload.
+        Data is written to a ``.part`` file and renamed once complete.
+        
+        Args:
+            file: Readable binary file object (positioned at the start)
+            filename: Original filename (used for the extension)
+            max_size: Maximum allowed size in bytes (None = unlimited)
+            chunk_size: Read/write block size in bytes
+            
+        Returns:
+            StoredFile with file_id, file_path, file_size and sha256
+            
+        Raises:
+            FileTooLargeError: If more than max_size bytes are read
+        """
         # Generate unique file ID
         file_id = str(uuid.uuid4())
-        ext = Path(filename).suffix
-        stored_filename = f"{file_id}{ext}"
         
         # Create file path
-        file_path = self.base_path / stored_filename
+        file_path = self._new_file_path(file_id, Path(filename).suffix)
+        part_path = file_path.with_name(f"{file_path.name}.part")
+        
+        hasher = hashlib.sha256()
+        file_size = 0
         
-        # Save file
         try:
-            with open(file_path, "wb") as f:
-                content = file.read()
-                f.write(content)
+            with open(part_path, "wb") as f:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if max_size is not None and file_size > max_size:
+                        raise FileTooLargeError(file_size, max_size)
+                    hasher.update(chunk)
+                    f.write(chunk)
             
-            logger.info(f"✅ File saved: {file_id} ({filename})")
-            return file_id, str(file_path)
+            os.replace(part_path, file_path)
+            self._index_file(file_id, file_path)
             
+            logger.info(f"✅ File saved: {file_id} ({filename}, {file_size / 1024 / 1024:.1f}MB)")
+            return StoredFile(
+                file_id=file_id,
+                file_path=str(file_path),
+                file_size=file_size,
+                sha256=hasher.hexdigest()
+            )
+            
+        except FileTooLargeError:
+            part_path.unlink(missing_ok=True)
+            logger.warning(f"⚠️ Upload rejected, exceeds {max_size} bytes: {filename}")
+            raise
         except Exception as e:
+            part_path.unlink(missing_ok=True)
             logger.error(f"❌ File save failed: {e}")
             raise
     
+    # =========================================================================
+    # CONTENT-ADDRESSED STORE
+    # =========================================================================
+    
+    def _content_blob_path(self, sha256: str) -> Path:
+        return self.content_path / sha256[:2] / sha256
+    
+    def register_content(self, file_id: str, sha256: str) -> bool:
+        """
+        Deduplicate a stored file against the content-addressed store
+        
+        If identical bytes were stored before, the new file is replaced by a
+        hardlink to the existing blob so the content is kept on disk once.
+        Otherwise the file becomes the blob for its hash.
+        
+        Args:
+            file_id: File ID of a saved file
+            sha256: SHA-256 of its content
+            
+        Returns:
+            True if the file was deduplicated against an existing blob
+        """
+        file_path = self.get_file_path(file_id)
+        if not file_path:
+            return False
+        
+        blob_path = self._content_blob_path(sha256)
+        try:
+            if blob_path.exists():
+                if os.path.samefile(blob_path, file_path):
+                    return True
+                tmp_path = file_path.with_name(f"{file_path.name}.dedup")
+                os.link(blob_path, tmp_path)
+                os.replace(tmp_path, file_path)
+                logger.info(f"♻️ Duplicate upload deduplicated: {file_id} ({sha256[:12]})")
+                return True
+            
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            os.link(file_path, blob_path)
+        except OSError as e:
+            # Filesystem without hardlink support - keep the plain copy
+            logger.debug(f"Content dedup skipped for {file_id}: {e}")
+        return False
+    
+    def get_content_path(self, sha256: str) -> Optional[Path]:
+        """
+        Get the content-addressed blob for a hash, if stored
+        
+        Args:
+            sha256: SHA-256 of the content
+            
+        Returns:
+            Path or None if not found
+        """
+        blob_path = self._content_blob_path(sha256)
+        return blob_path if blob_path.exists() else None
+    
+    def link_file(self, source_path: Path, filename: str) -> Optional[StoredFile]:
+        """
+        Store an existing file under a new file_id without copying bytes
+        
+        Args:
+            source_path: Path of an already stored file
+            filename: Filename for the new entry (used for the extension)
+            
+        Returns:
+            StoredFile for the new file_id, or None if linking failed
+        """
+        file_id = str(uuid.uuid4())
+        file_path = self._new_file_path(file_id, Path(filename).suffix)
+        try:
+            os.link(source_path, file_path)
+        except OSError as e:
+            logger.debug(f"Hardlink failed for {source_path}: {e}")
+            return None
+        self._index_file(file_id, file_path)
+        
+        return StoredFile(
+            file_id=file_id,
+            file_path=str(file_path),
+            file_size=file_path.stat().st_size,
+            sha256=""
+        )
+    
+    def upload_content_to_r2(self, file_path: str, sha256: str) -> Optional[str]:
+        """
+        Upload a file to R2 under its content hash, skipping the upload
+        when an object with the same content is already there
+        
+        Args:
+            file_path: Local file path
+            sha256: SHA-256 of the file content
+            
+        Returns:
+            Public URL or None if upload failed
+        """
+        if not self.r2_enabled:
+            logger.warning("⚠️ R2 not enabled, cannot upload")
+            return None
+        
+        object_name = f"content/{sha256}{Path(file_path).suffix.lower()}"
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=object_name)
+            logger.info(f"♻️ Content already in R2, skipping upload: {object_name}")
+            return self.get_public_url(object_name)
+        except ClientError:
+            return self.upload_to_r2(file_path, object_name)
+    
+    # =========================================================================
+    # RESUMABLE UPLOADS
+    # =========================================================================
+    
+    def _session_meta_path(self, upload_id: str) -> Path:
+        return self.sessions_path / f"{upload_id}.json"
+    
+    def _session_data_path(self, upload_id: str) -> Path:
+        return self.sessions_path / f"{upload_id}.part"
+    
+    def _session_lock_path(self, upload_id: str) -> Path:
+        return self.sessions_path / f"{upload_id}.lock"
+    
+    @contextmanager
+    def _session_lock(self, upload_id: str, wait: Optional[float] = None) -> Iterator[None]:
+        """
+        Exclusive lock on an upload session (shared across processes/pods)
+        
+        The lock file is created with O_EXCL, so exactly one request holds it;
+        a lock left behind by a crashed process is broken after
+        UPLOAD_SESSION_LOCK_STALE_SECONDS. Blocks while waiting, so async
+        callers go through a thread pool.
+        
+        Args:
+            upload_id: Upload session ID
+            wait: Seconds to wait for the lock (default: UPLOAD_SESSION_LOCK_WAIT_SECONDS)
+        
+        Raises:
+            UploadSessionError: Session still locked after the wait
+        """
+        lock_path = self._session_lock_path(upload_id)
+        deadline = time.monotonic() + (UPLOAD_SESSION_LOCK_WAIT_SECONDS if wait is None else wait)
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > UPLOAD_SESSION_LOCK_STALE_SECONDS:
+                        logger.warning(f"⚠️ Breaking stale upload lock: {upload_id}")
+                        lock_path.unlink(missing_ok=True)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise UploadSessionError(f"Upload session busy: {upload_id}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+    
+    def _write_session(self, session: Dict[str, Any]) -> None:
+        meta_path = self._session_meta_path(session["upload_id"])
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(session))
+        os.replace(tmp_path, meta_path)
+    
+    def create_upload_session(
+        self,
+        filename: str,
+        total_size: int,
+        content_type: str,
+        user_id: int
+    ) -> Dict[str, Any]:
+        """
+        Start a resumable upload
+        
+        The upload_id doubles as the final file_id, so a completed session
+        can be passed straight to transcription creation.
+        
+        Args:
+            filename: Original filename
+            total_size: Declared upload size in bytes
+            content_type: MIME type
+            user_id: Owner of the upload
+            
+        Returns:
+            Session dict (upload_id, offset, total_size, ...)
+        """
+        # Sweep expired sessions now and then (not on every new session)
+        if time.monotonic() - self._last_session_cleanup >= UPLOAD_SESSION_CLEANUP_INTERVAL:
+            self._last_session_cleanup = time.monotonic()
+            self.cleanup_expired_upload_sessions()
+        
+        upload_id = str(uuid.uuid4())
+        now = time.time()
+        session = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "filename": filename,
+            "content_type": content_type,
+            "total_size": total_size,
+            "status": "uploading",
+            "created_at": now,
+            "expires_at": now + settings.RESUMABLE_UPLOAD_TTL_HOURS * 3600,
+        }
+        self._session_data_path(upload_id).touch()
+        self._write_session(session)
+        
+        logger.info(f"📤 Resumable upload started: {upload_id} ({filename}, {total_size / 1024 / 1024:.1f}MB)")
+        return {**session, "offset": 0}
+    
+    def get_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get resumable upload state
+        
+        The offset is taken from the size of the partial file on disk, so it
+        is always what was actually persisted, even after a crash mid-write.
+        
+        Args:
+            upload_id: Upload session ID
+            
+        Returns:
+            Session dict with current offset, or None if not found/expired
+        """
+        session = self._load_session(upload_id)
+        if session is not None and self._session_expired(session):
+            # Remove it under the lock (a chunk may be in flight); if the
+            # lock is busy the periodic sweep removes it later
+            try:
+                with self._session_lock(upload_id, wait=0):
+                    session = self._load_session(upload_id)
+                    if session is not None and self._session_expired(session):
+                        self._remove_session(upload_id)
+            except UploadSessionError:
+                pass
+            return None
+        return session
+    
+    @staticmethod
+    def _session_expired(session: Dict[str, Any]) -> bool:
+        # Completed sessions are the record of the stored file and don't expire
+        return session["expires_at"] is not None and session["expires_at"] < time.time()
+    
+    def _load_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Session dict with current offset, expired or not (None if missing)"""
+        meta_path = self._session_meta_path(upload_id)
+        try:
+            session = json.loads(meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        if session["status"] == "completed":
+            session["offset"] = session["total_size"]
+        else:
+            data_path = self._session_data_path(upload_id)
+            session["offset"] = data_path.stat().st_size if data_path.exists() else 0
+        return session
+    
+    def write_upload_chunk(self, upload_id: str, offset: int, data: bytes) -> int:
+        """
+        Append bytes to a resumable upload at the given offset
+        
+        Args:
+            upload_id: Upload session ID
+            offset: Byte offset the client is writing at
+            data: Chunk content
+            
+        Returns:
+            New offset after the write
+            
+        Raises:
+            UploadSessionError: Unknown session, offset mismatch or overflow
+        """
+        # Check and append under the session lock, so concurrent requests for
+        # the same session can't both pass the offset check and interleave
+        with self._session_lock(upload_id):
+            session = self._load_session(upload_id)
+            if session is None or self._session_expired(session) or session["status"] != "uploading":
+                raise UploadSessionError(f"Upload session not found: {upload_id}")
+            
+            current = session["offset"]
+            if offset != current:
+                raise UploadSessionError(
+                    f"Offset mismatch: expected {current}, got {offset}",
+                    offset=current
+                )
+            if current + len(data) > session["total_size"]:
+                raise UploadSessionError(
+                    f"Chunk exceeds declared size of {session['total_size']} bytes",
+                    offset=current
+                )
+            
+            with open(self._session_data_path(upload_id), "ab") as f:
+                f.write(data)
+            return current + len(data)
+    
+    def complete_upload_session(self, upload_id: str) -> StoredFile:
+        """
+        Assemble a fully uploaded session into a stored file
+        
+        Safe to call again after success (returns the same file).
+        
+        Args:
+            upload_id: Upload session ID
+            
+        Returns:
+            StoredFile whose file_id equals upload_id
+            
+        Raises:
+            UploadSessionError: Unknown session or upload not complete
+        """
+        with self._session_lock(upload_id):
+            session = self._load_session(upload_id)
+            if session is None or self._session_expired(session):
+                raise UploadSessionError(f"Upload session not found: {upload_id}")
+            
+            file_path = self._new_file_path(upload_id, Path(session['filename']).suffix)
+            
+            if session["status"] != "completed":
+                if session["offset"] != session["total_size"]:
+                    raise UploadSessionError(
+                        f"Upload incomplete: {session['offset']}/{session['total_size']} bytes",
+                        offset=session["offset"]
+                    )
+                os.replace(self._session_data_path(upload_id), file_path)
+                self._index_file(upload_id, file_path)
+                session["status"] = "completed"
+                session["sha256"] = self.hash_file(file_path)
+                # Keep the record (owner, name, hash) until the file is deleted
+                session["expires_at"] = None
+                self._write_session({k: v for k, v in session.items() if k != "offset"})
+                logger.info(f"✅ Resumable upload completed: {upload_id} ({session['filename']})")
+        
+        return StoredFile(
+            file_id=upload_id,
+            file_path=str(file_path),
+            file_size=session["total_size"],
+            sha256=session["sha256"]
+        )
+    
+    def abort_upload_session(self, upload_id: str) -> bool:
+        """
+        Discard a resumable upload and its partial data
+        
+        Args:
+            upload_id: Upload session ID
+            
+        Returns:
+            True if a session was removed
+        """
+        with self._session_lock(upload_id):
+            return self._remove_session(upload_id)
+    
+    def _remove_session(self, upload_id: str) -> bool:
+        """Delete session files (caller holds the session lock)"""
+        removed = False
+        for path in (self._session_data_path(upload_id), self._session_meta_path(upload_id)):
+            if path.exists():
+                path.unlink(missing_ok=True)
+                removed = True
+        if removed:
+            logger.info(f"🗑️  Resumable upload removed: {upload_id}")
+        return removed
+    
+    def cleanup_expired_upload_sessions(self) -> int:
+        """
+        Remove expired resumable upload sessions
+        
+        Returns:
+            Number of sessions removed
+        """
+        removed = 0
+        now = time.time()
+        for meta_path in self.sessions_path.glob("*.json"):
+            try:
+                expires_at = json.loads(meta_path.read_text())["expires_at"]
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+            if expires_at is None or expires_at >= now:
+                continue
+            try:
+                if self.abort_upload_session(meta_path.stem):
+                    removed += 1
+            except UploadSessionError:
+                continue  # being written right now
+        return removed
+    
+    def hash_file(self, file_path: Path, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+        """SHA-256 of a file, read in blocks"""
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+    
+    # =========================================================================
+    # FILE LAYOUT & INDEX
+    # =========================================================================
+    
+    def _shard_dir(self, file_id: str) -> Path:
+        """Shard directory for a file ID (ab/cd/ from its first 4 characters)"""
+        return self.base_path / file_id[:2] / file_id[2:4]
+    
+    def _new_file_path(self, file_id: str, ext: str) -> Path:
+        shard_dir = self._shard_dir(file_id)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        return shard_dir / f"{file_id}{ext}"
+    
+    def _index_file(self, file_id: str, file_path: Path) -> None:
+        if self.file_index is None:
+            return
+        try:
+            self.file_index.put(file_id, str(file_path.relative_to(self.base_path)))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ File index write failed for {file_id}: {e}")
+    
+    def _unindex_file(self, file_id: str) -> None:
+        if self.file_index is None:
+            return
+        try:
+            self.file_index.remove(file_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ File index delete failed for {file_id}: {e}")
+    
+    def _is_legacy_file(self, entry: os.DirEntry) -> bool:
+        return (
+            not entry.name.startswith(".")
+            and not entry.name.endswith((".part", ".dedup"))
+            and entry.is_file(follow_symlinks=False)
+        )
+    
+    def _scan_legacy_files(self) -> bool:
+        """Whether files from the flat (pre-shard) layout are still present"""
+        with os.scandir(self.base_path) as entries:
+            return any(self._is_legacy_file(entry) for entry in entries)
+    
     def get_file_path(self, file_id: str) -> Optional[Path]:
         """
         Get file path by file ID
         
+        Looks up the file index first, then the file's shard directory and
+        finally the legacy flat layout (files not yet re-sharded).
+        
         Args:
             file_id: File ID
             
         Returns:
             Path or None if not found
         """
-        # Find file with this ID (any extension)
-        for file_path in self.base_path.glob(f"{file_id}.*"):
-            return file_path
+        if self.file_index is not None:
+            try:
+                relative_path = self.file_index.get(file_id)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ File index read failed for {file_id}: {e}")
+                relative_path = None
+            if relative_path:
+                file_path = self.base_path / relative_path
+                if file_path.exists():
+                    return file_path
+        
+        # Index miss: the shard dir only holds a handful of files; the flat
+        # folder is only searched until legacy files have been re-sharded
+        directories = [self._shard_dir(file_id)]
+        if self._has_legacy_files:
+            directories.append(self.base_path)
+        for directory in directories:
+            for file_path in directory.glob(f"{file_id}.*"):
+                if file_path.suffix in (".part", ".dedup"):
+                    continue
+                self._index_file(file_id, file_path)
+                return file_path
         return None
     
-    def delete_file(self, file_id: str) -> bool:
+    def reshard_legacy_files(self, dry_run: bool = False) -> int:
+        """
+        Move files from the legacy flat uploads folder into shard directories
+        
+        Files are renamed (not copied), so content-store hardlinks are kept.
+        
+        Args:
+            dry_run: Only count the files that would be moved
+            
+        Returns:
+            Number of files moved (or to be moved)
+        """
+        moved = 0
+        with os.scandir(self.base_path) as entries:
+            for entry in entries:
+                if not self._is_legacy_file(entry):
+                    continue
+                
+                file_id, _, ext = entry.name.partition(".")
+                target = self._shard_dir(file_id) / entry.name
+                if dry_run:
+                    logger.info(f"Would move {entry.name} → {target.relative_to(self.base_path)}")
+                else:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(entry.path, target)
+                    self._index_file(file_id, target)
+                moved += 1
+        
+        if not dry_run:
+            self._has_legacy_files = False
+        logger.info(f"📦 Re-sharded {moved} files{' (dry run)' if dry_run else ''}")
+        return moved
+    
+    def delete_file(self, file_id: str, content_hash: Optional[str] = None) -> bool:
         """
         Delete file by file ID
         
         Args:
             file_id: File ID
+            content_hash: SHA-256 of the file, to release the content blob
+                when no other file shares it
             
         Returns:
             True if deleted, False if not found
         """
         file_path = self.get_file_path(file_id)
-        if file_path and file_path.exists():
+        deleted = bool(file_path and file_path.exists())
+        if deleted:
             file_path.unlink()
             logger.info(f"🗑️  File deleted: {file_id}")
-            return True
-        return False
+        self._unindex_file(file_id)
+        # Completed resumable upload record (kept for as long as the file)
+        self._session_meta_path(file_id).unlink(missing_ok=True)
+        
+        # Release the blob even if the file itself was already removed;
+        # the blob's own link is the last reference once no upload shares it
+        if content_hash:
+            blob_path = self._content_blob_path(content_hash)
+            if blob_path.exists() and blob_path.stat().st_nlink == 1:
+                blob_path.unlink()
+                logger.info(f"🗑️  Content blob released: {content_hash[:12]}")
+        return deleted
     
     def get_file_size(self, file_id: str) -> Optional[int]:
         """
@@ -240,24 +994,14 @@ class FileStorageService:
             object_name = object_name or file_path.name
             file_size_mb = file_path.stat().st_size / (1024 * 1024)
             
-            # Determine content type
-            content_type = self._get_content_type(object_name)
-            
             logger.info(f"📦 Uploading {file_size_mb:.1f}MB to R2: {object_name}")
             
-            # Upload file
-            self.s3_client.upload_file(
-                str(file_path),
-                self.bucket_name,
-                object_name,
-                ExtraArgs={'ContentType': content_type}
-            )
-            
-            # Get public URL (no expiration for public buckets!)
-            public_url = self.get_public_url(object_name)
+            # Multipart upload in fixed-size parts (bounded memory)
+            with open(file_path, "rb") as file:
+                public_url = self.upload_stream_to_r2(file, object_name)
             
-            logger.info(f"✅ Uploaded to R2: {object_name}")
-            logger.info(f"🌐 Public URL: {public_url}")
+            if public_url:
+                logger.info(f"🌐 Public URL: {public_url}")
             return public_url
             
         except Exception as e:
@@ -304,6 +1048,55 @@ class FileStorageService:
             logger.error(f"❌ R2 bytes upload failed: {e}")
             return None
     
+    def upload_stream_to_r2(
+        self,
+        file: BinaryIO,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Stream a file object straight to R2 using multipart upload
+        
+        Parts are read and sent one block at a time, so the whole object
+        never has to sit in memory or on local disk.
+        
+        Args:
+            file: Readable binary file object
+            object_name: Object name in R2
+            content_type: MIME type (guessed from object_name if omitted)
+            
+        Returns:
+            Public URL or None if upload failed
+        """
+        if not self.r2_enabled:
+            logger.warning("⚠️ R2 not enabled, cannot upload")
+            return None
+        
+        try:
+            transfer_config = TransferConfig(
+                multipart_threshold=R2_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=R2_MULTIPART_CHUNK_SIZE,
+                max_concurrency=R2_MULTIPART_CONCURRENCY
+            )
+            
+            logger.info(f"📦 Streaming upload to R2: {object_name}")
+            
+            self.s3_client.upload_fileobj(
+                file,
+                self.bucket_name,
+                object_name,
+                ExtraArgs={'ContentType': content_type or self._get_content_type(object_name)},
+                Config=transfer_config
+            )
+            
+            public_url = self.get_public_url(object_name)
+            logger.info(f"✅ Streamed to R2: {object_name}")
+            return public_url
+            
+        except Exception as e:
+            logger.error(f"❌ R2 streaming upload failed: {e}")
+            return None
+    
     def delete_from_r2(self, filename: str) -> bool:
         """
         Delete file from R2
@@ -346,18 +1139,28 @@ class FileStorageService:
         return content_types.get(ext, 'application/octet-stream')
 
 
-# Singleton instance
+# Singleton instance (one per process; rebuilt after fork since boto3
+# clients and their sockets must not be shared across processes)
 _storage_service: Optional[FileStorageService] = None
+_storage_service_pid: Optional[int] = None
+_storage_service_lock = threading.Lock()
 
 
 def get_storage_service() -> FileStorageService:
     """
     Get storage service singleton
     
+    Thread-safe and lazily initialized; the R2 client and bucket check
+    happen once per process.
+    
     Returns:
         FileStorageService instance
     """
-    global _storage_service
-    if _storage_service is None:
-        _storage_service = FileStorageService()
+    global _storage_service, _storage_service_pid
+    pid = os.getpid()
+    if _storage_service is None or _storage_service_pid != pid:
+        with _storage_service_lock:
+            if _storage_service is None or _storage_service_pid != pid:
+                _storage_service = FileStorageService()
+                _storage_service_pid = pid
     return _storage_service
@@ -0,0 +1,178 @@
+"""
+Transcription result cache
+Lets the worker skip the provider call (AssemblyAI, Modal, ...) when the same
+content was already transcribed with the same options
+"""
+
+import json
+import time
+import zlib
+import hashlib
+import logging
+from typing import Optional, Dict, Any
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class TranscriptionResultCache:
+    """
+    Redis-backed cache of provider transcription results
+
+    Entries are keyed by (content hash, provider, model, language, diarization
+    options, provider features), expire after a TTL and are evicted least
+    recently used first once the entry limit is reached. If Redis is not
+    reachable the cache simply misses.
+    """
+
+    KEY_PREFIX = "transcription_cache"
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.enabled = settings.TRANSCRIPTION_CACHE_ENABLED
+        self.ttl_seconds = ttl_seconds or settings.TRANSCRIPTION_CACHE_TTL_HOURS * 3600
+        self.max_entries = max_entries or settings.TRANSCRIPTION_CACHE_MAX_ENTRIES
+        self._redis = redis_client
+        self.lru_key = f"{self.KEY_PREFIX}:lru"
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        provider: str,
+        model: Optional[str] = None,
+        language: Optional[str] = None,
+        enable_diarization: bool = False,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        features: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Build a cache key from everything that changes the provider output
+
+        Returns:
+            Hex digest identifying the (content, options) combination
+        """
+        payload = {
+            "content": content_hash,
+            "provider": provider,
+            "model": model,
+            "language": language or None,
+            "diarization": bool(enable_diarization),
+            "min_speakers": min_speakers,
+            "max_speakers": max_speakers,
+            "features": features or {},
+        }
+        canonical = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _result_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:result:{key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached provider result
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Result dict or None on miss
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            raw = self.redis.get(self._result_key(key))
+            if raw is None:
+                self.redis.zrem(self.lru_key, key)
+                return None
+            self.redis.zadd(self.lru_key, {key: time.time()})
+            return json.loads(zlib.decompress(raw))
+        except Exception as e:
+            logger.warning(f"⚠️ Transcription cache read failed: {e}")
+            return None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a provider result and evict least recently used entries
+
+        Args:
+            key: Key from make_key()
+            result: Provider result (JSON-serializable)
+        """
+        if not self.enabled:
+            return
+
+        try:
+            raw = zlib.compress(json.dumps(result, default=str).encode("utf-8"))
+            pipe = self.redis.pipeline()
+            pipe.setex(self._result_key(key), self.ttl_seconds, raw)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [k.decode() if isinstance(k, bytes) else k
+                           for k, _ in self.redis.zpopmin(self.lru_key, overflow)]
+                if evicted:
+                    self.redis.delete(*[self._result_key(k) for k in evicted])
+                    logger.info(f"🧹 Transcription cache evicted {len(evicted)} entries")
+        except Exception as e:
+            logger.warning(f"⚠️ Transcription cache write failed: {e}")
+
+    def remember_alias(self, alias: str, content_hash: str) -> None:
+        """
+        Map an external identifier (e.g. youtube:<video_id>) to a content hash
+        """
+        if not self.enabled:
+            return
+        try:
+            self.redis.setex(f"{self.KEY_PREFIX}:alias:{alias}", self.ttl_seconds, content_hash)
+        except Exception as e:
+            logger.warning(f"⚠️ Transcription cache alias write failed: {e}")
+
+    def resolve_alias(self, alias: str) -> Optional[str]:
+        """
+        Get the content hash previously stored for an external identifier
+        """
+        if not self.enabled:
+            return None
+        try:
+            value = self.redis.get(f"{self.KEY_PREFIX}:alias:{alias}")
+        except Exception as e:
+            logger.warning(f"⚠️ Transcription cache alias read failed: {e}")
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+
+# Singleton instance
+_transcription_cache: Optional[TranscriptionResultCache] = None
+
+
+def get_transcription_cache() -> TranscriptionResultCache:
+    """
+    Get transcription result cache singleton
+
+    Returns:
+        TranscriptionResultCache instance
+    """
+    global _transcription_cache
+    if _transcription_cache is None:
+        _transcription_cache = TranscriptionResultCache()
+    return _transcription_cache
@@ -7,7 +7,7 @@ import torch
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 import librosa
 import numpy as np
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
 import logging
 from pathlib import Path
 from app.settings import get_settings
@@ -78,7 +78,7 @@ class Wav2Vec2Service:
     
     def transcribe(
         self, 
-        audio_path: str, 
+        audio_path: Union[str, np.ndarray], 
         chunk_length_s: int = 30,
         return_timestamps: bool = False
     ) -> Dict:
@@ -86,7 +86,7 @@ class Wav2Vec2Service:
         Ses dosyasını metne çevir
         
         Args:
-            audio_path: Ses dosyası yolu
+            audio_path: Ses dosyası yolu veya 16kHz mono örnekler (AudioBuffer.samples)
             chunk_length_s: Chunk uzunluğu (saniye)
             return_timestamps: Timestamp döndür mü? (şimdilik desteklenmiyor)
         
@@ -102,8 +102,11 @@ class Wav2Vec2Service:
             raise RuntimeError("wav2vec2 model yüklü değil!")
         
         try:
-            # Ses yükle (16kHz - wav2vec2 standardı)
-            audio, sr = librosa.load(audio_path, sr=16000, mono=True)
+            # Ses yükle (16kHz - wav2vec2 standardı), decode edilmişse tekrar yükleme
+            if isinstance(audio_path, np.ndarray):
+                audio, sr = audio_path, 16000
+            else:
+                audio, sr = librosa.load(audio_path, sr=16000, mono=True)
             duration = len(audio) / sr
             
             logger.info(f"🎵 Audio yüklendi: {duration:.2f}s")
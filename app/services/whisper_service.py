@@ -7,7 +7,9 @@ Whisper transcription service with Faster-Whisper backend
 
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -76,7 +78,7 @@ class WhisperService:
     
     def transcribe(
         self,
-        audio_path: str,
+        audio_path: Union[str, np.ndarray],
         language: Optional[str] = None,
         task: str = "transcribe"
     ) -> Dict[str, Any]:
@@ -84,7 +86,8 @@ class WhisperService:
         Transcribe audio file using Faster-Whisper Large-v3 (all languages)
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
+                (e.g. AudioBuffer.samples)
             language: Language code (auto-detect if None)
             task: "transcribe" or "translate" (to English)
             
@@ -94,12 +97,18 @@ class WhisperService:
         # Load model if not loaded
         self.load_model()
         
-        # Verify file exists
-        audio_file = Path(audio_path)
-        if not audio_file.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        # Verify file exists (decoded samples are passed through as is)
+        if isinstance(audio_path, np.ndarray):
+            audio = np.asarray(audio_path, dtype=np.float32)
+            audio_name = f"<{len(audio) / 16000:.1f}s decoded audio>"
+        else:
+            audio_file = Path(audio_path)
+            if not audio_file.exists():
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+            audio = str(audio_path)
+            audio_name = audio_file.name
         
-        logger.info(f"🎙️  Transcribing: {audio_file.name}")
+        logger.info(f"🎙️  Transcribing: {audio_name}")
         logger.info(f"   Language: {language or 'auto-detect'}")
         logger.info(f"   Task: {task}")
         logger.info(f"   Backend: {'Faster-Whisper Large-v3' if self.use_faster_whisper else 'OpenAI Whisper'}")
@@ -109,7 +118,7 @@ class WhisperService:
             if self.use_faster_whisper:
                 # Faster-Whisper (CTranslate2) - ALL LANGUAGES including Turkish
                 result = self.model.transcribe(
-                    audio_path=str(audio_path),
+                    audio_path=audio,
                     language=language,
                     task=task,
                     beam_size=5,
@@ -136,7 +145,7 @@ class WhisperService:
             else:
                 # OpenAI Whisper (original) - fallback only
                 result = self.model.transcribe(
-                    str(audio_path),
+                    audio,
                     language=language,
                     task=task,
                     fp16=False,  # Windows CPU compatibility
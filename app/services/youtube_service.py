@@ -4,6 +4,7 @@ Downloads audio from YouTube videos using yt-dlp
 """
 
 import os
+import re
 import logging
 import yt_dlp
 from pathlib import Path
@@ -13,6 +14,28 @@ from app.settings import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# watch?v=ID, youtu.be/ID, /shorts/ID, /embed/ID, /live/ID (IDs are 11 chars)
+_VIDEO_ID_PATTERN = re.compile(
+    r'(?:v=|youtu\.be/|/shorts/|/embed/|/live/|/v/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])'
+)
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Extract the canonical 11-character video ID from a YouTube URL
+    
+    Different URL forms (short links, shorts, embeds, extra query params)
+    map to the same ID, so it can be used as a cache key.
+    
+    Args:
+        url: YouTube video URL
+        
+    Returns:
+        Video ID or None if the URL isn't recognised
+    """
+    match = _VIDEO_ID_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
 
 class YouTubeService:
     """Service for downloading YouTube videos"""
@@ -44,6 +67,7 @@ class YouTubeService:
                 info = ydl.extract_info(url, download=False)
                 
                 return {
+                    'id': info.get('id'),
                     'title': info.get('title', 'Unknown'),
                     'duration': info.get('duration', 0),
                     'thumbnail': info.get('thumbnail'),
@@ -44,6 +44,12 @@ class Settings(BaseSettings):
     REDIS_URL: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     REDIS_PASSWORD: Optional[str] = Field(default=None, env="REDIS_PASSWORD")
     
+    # Socket.IO message queue: lets Celery workers and every API replica share
+    # WebSocket rooms (progress events published from workers reach all clients)
+    SOCKETIO_REDIS_ENABLED: bool = Field(default=True, env="SOCKETIO_REDIS_ENABLED")
+    SOCKETIO_REDIS_URL: Optional[str] = Field(default=None, env="SOCKETIO_REDIS_URL")  # Defaults to REDIS_URL
+    SOCKETIO_CHANNEL: str = Field(default="mp4totext-socketio", env="SOCKETIO_CHANNEL")
+    
     # =============================================================================
     # GOOGLE OAUTH
     # =============================================================================
@@ -76,6 +82,7 @@ class Settings(BaseSettings):
     STORAGE_PUBLIC_URL: str = Field(default="", env="STORAGE_PUBLIC_URL")  # Public URL base (e.g., https://pub-xxx.r2.dev)
     STORAGE_REGION: str = Field(default="auto", env="STORAGE_REGION")
     STORAGE_SECURE: bool = Field(default=True, env="STORAGE_SECURE")
+    STORAGE_MAX_POOL_CONNECTIONS: int = Field(default=50, env="STORAGE_MAX_POOL_CONNECTIONS")  # Shared S3 connection pool size
     
     # =============================================================================
     # AI SERVICES
@@ -109,6 +116,13 @@ class Settings(BaseSettings):
     MODAL_FUNCTION_NAME: str = Field(default="transcribe", env="MODAL_FUNCTION_NAME")
     MODAL_TIMEOUT: int = Field(default=600, env="MODAL_TIMEOUT")  # 10 minutes
     
+    # Parallel transcription (split at silences, transcribe chunks on separate containers, merge)
+    PARALLEL_TRANSCRIPTION_ENABLED: bool = Field(default=False, env="PARALLEL_TRANSCRIPTION_ENABLED")
+    PARALLEL_TRANSCRIPTION_MIN_SECONDS: int = Field(default=1200, env="PARALLEL_TRANSCRIPTION_MIN_SECONDS")  # 20 minutes
+    PARALLEL_TRANSCRIPTION_BACKEND: str = Field(default="modal", env="PARALLEL_TRANSCRIPTION_BACKEND")  # modal | local
+    PARALLEL_CHUNK_SECONDS: int = Field(default=600, env="PARALLEL_CHUNK_SECONDS")
+    PARALLEL_CHUNK_OVERLAP_SECONDS: float = Field(default=1.0, env="PARALLEL_CHUNK_OVERLAP_SECONDS")
+    
     # AssemblyAI (Cloud transcription with built-in speaker diarization)
     USE_ASSEMBLYAI: bool = Field(default=False, env="USE_ASSEMBLYAI")
     ASSEMBLYAI_API_KEY: Optional[str] = Field(default=None, env="ASSEMBLYAI_API_KEY")
@@ -140,6 +154,13 @@ class Settings(BaseSettings):
     TOGETHER_TEMPERATURE: float = Field(default=0.2, env="TOGETHER_TEMPERATURE")
     TOGETHER_MAX_TOKENS: int = Field(default=4000, env="TOGETHER_MAX_TOKENS")
     
+    # Long-text chunk processing (parallel LLM calls per provider, per request)
+    GROQ_CHUNK_CONCURRENCY: int = Field(default=3, env="GROQ_CHUNK_CONCURRENCY")
+    TOGETHER_CHUNK_CONCURRENCY: int = Field(default=4, env="TOGETHER_CHUNK_CONCURRENCY")
+    OPENAI_CHUNK_CONCURRENCY: int = Field(default=6, env="OPENAI_CHUNK_CONCURRENCY")
+    GEMINI_CHUNK_CONCURRENCY: int = Field(default=4, env="GEMINI_CHUNK_CONCURRENCY")
+    AI_CHUNK_MAX_RETRIES: int = Field(default=2, env="AI_CHUNK_MAX_RETRIES")
+    
     # Tavily Web Search API (for AI context enrichment)
     TAVILY_API_KEY: Optional[str] = Field(default=None, env="TAVILY_API_KEY")
     ENABLE_WEB_SEARCH: bool = Field(default=True, env="ENABLE_WEB_SEARCH")
@@ -159,6 +180,9 @@ class Settings(BaseSettings):
     )
     GLOBAL_MODEL_THRESHOLD: float = Field(default=0.70, env="GLOBAL_MODEL_THRESHOLD")
     
+    # Decode-once PCM buffers of the local pipeline (empty = system temp dir)
+    AUDIO_BUFFER_DIR: str = Field(default="", env="AUDIO_BUFFER_DIR")
+    
     # =============================================================================
     # JWT AUTHENTICATION
     # =============================================================================
@@ -188,6 +212,14 @@ class Settings(BaseSettings):
         env="CELERY_TASK_SOFT_TIME_LIMIT"
     )
     
+    # Pricing catalogue: in-process copy of the pricing tables, Redis version stamp
+    PRICING_VERSION_CHECK_SECONDS: float = Field(default=2.0, env="PRICING_VERSION_CHECK_SECONDS")
+    PRICING_CATALOG_TTL: int = Field(default=60, env="PRICING_CATALOG_TTL")  # Reload interval when Redis is down
+    
+    # Task progress: live value in Redis, row updates coalesced
+    PROGRESS_DB_MIN_INTERVAL: float = Field(default=5.0, env="PROGRESS_DB_MIN_INTERVAL")  # Seconds between progress commits
+    PROGRESS_REDIS_TTL: int = Field(default=3600, env="PROGRESS_REDIS_TTL")
+    
     # =============================================================================
     # FILE UPLOAD
     # =============================================================================
@@ -203,6 +235,28 @@ class Settings(BaseSettings):
         default=["mp4", "avi", "mkv", "mov", "wmv", "flv"],
         env="ALLOWED_VIDEO_FORMATS"
     )
+    RESUMABLE_UPLOAD_TTL_HOURS: int = Field(default=24, env="RESUMABLE_UPLOAD_TTL_HOURS")
+    
+    # Transcription result cache (skip provider calls for identical content + options)
+    TRANSCRIPTION_CACHE_ENABLED: bool = Field(default=True, env="TRANSCRIPTION_CACHE_ENABLED")
+    TRANSCRIPTION_CACHE_TTL_HOURS: int = Field(default=720, env="TRANSCRIPTION_CACHE_TTL_HOURS")  # 30 days
+    TRANSCRIPTION_CACHE_MAX_ENTRIES: int = Field(default=10000, env="TRANSCRIPTION_CACHE_MAX_ENTRIES")
+    
+    # Local language detection (sampled windows of the local upload, cached per content hash)
+    LANGUAGE_DETECTION_WINDOWS: int = Field(default=3, env="LANGUAGE_DETECTION_WINDOWS")
+    LANGUAGE_DETECTION_WINDOW_SECONDS: float = Field(default=30.0, env="LANGUAGE_DETECTION_WINDOW_SECONDS")
+    LANGUAGE_DETECTION_CACHE_TTL_HOURS: int = Field(default=720, env="LANGUAGE_DETECTION_CACHE_TTL_HOURS")  # 30 days
+    
+    # Embedding cache (skip OpenAI embedding calls for already embedded text)
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True, env="EMBEDDING_CACHE_ENABLED")
+    EMBEDDING_CACHE_TTL_HOURS: int = Field(default=2160, env="EMBEDDING_CACHE_TTL_HOURS")  # 90 days
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=200000, env="EMBEDDING_CACHE_MAX_ENTRIES")  # ~600 MB at 1536 dims
+    
+    # Embedding requests (parallel batches, shared per-process rate limit)
+    EMBEDDING_MAX_CONCURRENCY: int = Field(default=4, env="EMBEDDING_MAX_CONCURRENCY")
+    EMBEDDING_BATCH_MAX_TOKENS: int = Field(default=100000, env="EMBEDDING_BATCH_MAX_TOKENS")  # OpenAI cap: 300k/request
+    EMBEDDING_TPM_LIMIT: int = Field(default=1000000, env="EMBEDDING_TPM_LIMIT")
+    EMBEDDING_RPM_LIMIT: int = Field(default=3000, env="EMBEDDING_RPM_LIMIT")
     
     # =============================================================================
     # RATE LIMITING
@@ -223,6 +277,14 @@ class Settings(BaseSettings):
     QDRANT_URL: str = Field(default="http://localhost:6333", env="QDRANT_URL")
     QDRANT_API_KEY: Optional[str] = Field(default=None, env="QDRANT_API_KEY")
     QDRANT_COLLECTION_PREFIX: str = Field(default="gistify", env="QDRANT_COLLECTION_PREFIX")
+    QDRANT_MAX_CONNECTIONS: int = Field(default=20, env="QDRANT_MAX_CONNECTIONS")  # Keep-alive pool size per process
+    QDRANT_TIMEOUT: float = Field(default=60.0, env="QDRANT_TIMEOUT")
+    QDRANT_MAX_RETRIES: int = Field(default=2, env="QDRANT_MAX_RETRIES")  # Connection errors, 429, 502-504
+    QDRANT_HEALTH_TTL: int = Field(default=30, env="QDRANT_HEALTH_TTL")  # Seconds to cache the health check
+    # Multi-tenant layout: new PKBs go to one collection filtered by user_id/source_id
+    # (existing per-source collections: migrate_qdrant_shared_collection.py)
+    QDRANT_SHARED_COLLECTION_ENABLED: bool = Field(default=True, env="QDRANT_SHARED_COLLECTION_ENABLED")
+    QDRANT_SHARED_COLLECTION: str = Field(default="gistify_pkb", env="QDRANT_SHARED_COLLECTION")
     
     # RAG Settings
     RAG_DEFAULT_EMBEDDING_MODEL: str = Field(default="text-embedding-3-small", env="RAG_DEFAULT_EMBEDDING_MODEL")
@@ -231,6 +293,24 @@ class Settings(BaseSettings):
     RAG_DEFAULT_CHUNK_OVERLAP: int = Field(default=50, env="RAG_DEFAULT_CHUNK_OVERLAP")
     RAG_DEFAULT_TOP_K: int = Field(default=5, env="RAG_DEFAULT_TOP_K")
     
+    # Hybrid retrieval (BM25 + vector, reciprocal-rank fusion, optional rerank)
+    RAG_HYBRID_ENABLED: bool = Field(default=True, env="RAG_HYBRID_ENABLED")
+    RAG_HYBRID_CANDIDATES: int = Field(default=20, env="RAG_HYBRID_CANDIDATES")  # Per ranking, before fusion
+    RAG_HYBRID_TOP_K: int = Field(default=6, env="RAG_HYBRID_TOP_K")  # Chunks sent to the LLM in PKB chat
+    RAG_VECTOR_SCORE_THRESHOLD: float = Field(default=0.2, env="RAG_VECTOR_SCORE_THRESHOLD")
+    RAG_RRF_K: int = Field(default=60, env="RAG_RRF_K")
+    RAG_BM25_CACHE_SIZE: int = Field(default=64, env="RAG_BM25_CACHE_SIZE")  # Sources kept in memory
+    RAG_BM25_CACHE_TTL: int = Field(default=300, env="RAG_BM25_CACHE_TTL")  # Seconds, for Qdrant-loaded indexes
+    RAG_BM25_MAX_POINTS: int = Field(default=5000, env="RAG_BM25_MAX_POINTS")
+    RAG_RERANK_ENABLED: bool = Field(default=False, env="RAG_RERANK_ENABLED")  # Needs sentence-transformers
+    RAG_RERANK_MODEL: str = Field(default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1", env="RAG_RERANK_MODEL")
+    
+    # Answer cache (PKB chat / summarize / questions, invalidated on reindex)
+    RAG_ANSWER_CACHE_ENABLED: bool = Field(default=True, env="RAG_ANSWER_CACHE_ENABLED")
+    RAG_ANSWER_CACHE_TTL_HOURS: int = Field(default=168, env="RAG_ANSWER_CACHE_TTL_HOURS")  # 7 days
+    RAG_ANSWER_CACHE_SIMILARITY: float = Field(default=0.95, env="RAG_ANSWER_CACHE_SIMILARITY")  # Min cosine for a chat hit
+    RAG_ANSWER_CACHE_MAX_QUESTIONS: int = Field(default=500, env="RAG_ANSWER_CACHE_MAX_QUESTIONS")  # Per source/version/model
+    
     # =============================================================================
     # MONITORING
     # =============================================================================
@@ -1,13 +1,75 @@
 """
 WebSocket manager for real-time progress updates
+
+Rooms are shared through a Redis message queue, so events emitted by any API
+replica or by a Celery worker (ProgressPublisher) reach every connected client.
 """
 
 import logging
-from typing import Dict, Set, Optional
+import threading
+from typing import Any, Dict, Set, Optional
 import socketio
 from fastapi import FastAPI
 
+from app.settings import get_settings
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _message_queue_url() -> Optional[str]:
+    """Redis URL of the Socket.IO message queue (None if disabled)"""
+    if not settings.SOCKETIO_REDIS_ENABLED:
+        return None
+    return settings.SOCKETIO_REDIS_URL or settings.REDIS_URL
+
+
+def transcription_room(transcription_id: int) -> str:
+    return f"transcription_{transcription_id}"
+
+
+def user_room(user_id: int) -> str:
+    return f"user_{user_id}"
+
+
+def progress_payload(
+    transcription_id: int,
+    progress: int,
+    status: str,
+    message: Optional[str] = None,
+    **extra: Any
+) -> Dict[str, Any]:
+    """Build a 'progress' event payload"""
+    data = {
+        'transcription_id': transcription_id,
+        'progress': progress,
+        'status': status,
+        'message': message
+    }
+    data.update({k: v for k, v in extra.items() if v is not None})
+    return data
+
+
+def completed_payload(transcription_id: int, result: Dict, **extra: Any) -> Dict[str, Any]:
+    """Build a 'completed' event payload"""
+    data = {
+        'transcription_id': transcription_id,
+        'status': 'completed',
+        'result': result
+    }
+    data.update({k: v for k, v in extra.items() if v is not None})
+    return data
+
+
+def error_payload(transcription_id: int, error: str, **extra: Any) -> Dict[str, Any]:
+    """Build an 'error' event payload"""
+    data = {
+        'transcription_id': transcription_id,
+        'status': 'failed',
+        'error': error
+    }
+    data.update({k: v for k, v in extra.items() if v is not None})
+    return data
 
 
 class WebSocketManager:
@@ -17,9 +79,20 @@ class WebSocketManager:
     """
     
     def __init__(self):
+        # Share rooms with other API replicas and Celery workers through Redis
+        client_manager = None
+        queue_url = _message_queue_url()
+        if queue_url:
+            try:
+                client_manager = socketio.AsyncRedisManager(queue_url, channel=settings.SOCKETIO_CHANNEL)
+                logger.info(f"✅ WebSocket message queue: Redis channel '{settings.SOCKETIO_CHANNEL}'")
+            except Exception as e:
+                logger.warning(f"⚠️ WebSocket Redis message queue unavailable, using in-process rooms: {e}")
+        
         # Create Socket.IO server
         self.sio = socketio.AsyncServer(
             async_mode='asgi',
+            client_manager=client_manager,
             cors_allowed_origins='*',  # Configure for production
             logger=False,
             engineio_logger=False
@@ -47,6 +120,7 @@ class WebSocketManager:
                 if user_id not in self.user_connections:
                     self.user_connections[user_id] = set()
                 self.user_connections[user_id].add(sid)
+                await self.sio.enter_room(sid, user_room(user_id))
                 logger.info(f"👤 User {user_id} connected via {sid}")
             
             await self.sio.emit('connected', {'message': 'Connected to MP4toText'}, room=sid)
@@ -68,7 +142,7 @@ class WebSocketManager:
             """Subscribe to transcription updates"""
             transcription_id = data.get('transcription_id')
             if transcription_id:
-                room = f"transcription_{transcription_id}"
+                room = transcription_room(transcription_id)
                 await self.sio.enter_room(sid, room)
                 logger.info(f"📡 Client {sid} subscribed to transcription {transcription_id}")
                 await self.sio.emit('subscribed', {'transcription_id': transcription_id}, room=sid)
@@ -78,7 +152,7 @@ class WebSocketManager:
             """Unsubscribe from transcription updates"""
             transcription_id = data.get('transcription_id')
             if transcription_id:
-                room = f"transcription_{transcription_id}"
+                room = transcription_room(transcription_id)
                 await self.sio.leave_room(sid, room)
                 logger.info(f"📡 Client {sid} unsubscribed from transcription {transcription_id}")
     
@@ -98,16 +172,8 @@ class WebSocketManager:
             status: Status message
             message: Optional additional message
         """
-        room = f"transcription_{transcription_id}"
-        
-        data = {
-            'transcription_id': transcription_id,
-            'progress': progress,
-            'status': status,
-            'message': message
-        }
-        
-        await self.sio.emit('progress', data, room=room)
+        data = progress_payload(transcription_id, progress, status, message)
+        await self.sio.emit('progress', data, room=transcription_room(transcription_id))
         logger.debug(f"📡 Progress update sent: {transcription_id} - {progress}%")
     
     async def emit_completed(
@@ -122,15 +188,8 @@ class WebSocketManager:
             transcription_id: ID of transcription
             result: Result data
         """
-        room = f"transcription_{transcription_id}"
-        
-        data = {
-            'transcription_id': transcription_id,
-            'status': 'completed',
-            'result': result
-        }
-        
-        await self.sio.emit('completed', data, room=room)
+        data = completed_payload(transcription_id, result)
+        await self.sio.emit('completed', data, room=transcription_room(transcription_id))
         logger.info(f"✅ Completion notification sent: {transcription_id}")
     
     async def emit_error(
@@ -145,15 +204,8 @@ class WebSocketManager:
             transcription_id: ID of transcription
             error: Error message
         """
-        room = f"transcription_{transcription_id}"
-        
-        data = {
-            'transcription_id': transcription_id,
-            'status': 'failed',
-            'error': error
-        }
-        
-        await self.sio.emit('error', data, room=room)
+        data = error_payload(transcription_id, error)
+        await self.sio.emit('error', data, room=transcription_room(transcription_id))
         logger.error(f"❌ Error notification sent: {transcription_id}")
     
     async def emit_to_user(
@@ -165,15 +217,16 @@ class WebSocketManager:
         """
         Emit event to all connections of a specific user
         
+        Goes through the user's room, so connections on other replicas
+        receive it too.
+        
         Args:
             user_id: User ID
             event: Event name
             data: Event data
         """
-        if user_id in self.user_connections:
-            for sid in self.user_connections[user_id]:
-                await self.sio.emit(event, data, room=sid)
-            logger.debug(f"📡 Event '{event}' sent to user {user_id}")
+        await self.sio.emit(event, data, room=user_room(user_id))
+        logger.debug(f"📡 Event '{event}' sent to user {user_id}")
     
     def get_asgi_app(self):
         """Get ASGI app for mounting"""
@@ -192,6 +245,91 @@ def get_ws_manager() -> WebSocketManager:
     return _ws_manager
 
 
+class ProgressPublisher:
+    """
+    Write-only Socket.IO emitter for processes without a WebSocket server
+    
+    Celery workers publish progress/completed/error events to the Redis
+    message queue; every API replica delivers them to its subscribed clients.
+    Publishing is best-effort: failures are logged and never break a task.
+    """
+    
+    def __init__(self, url: Optional[str] = None, channel: Optional[str] = None):
+        self.url = url or _message_queue_url()
+        self.channel = channel or settings.SOCKETIO_CHANNEL
+        self._manager = None
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+    
+    @property
+    def manager(self):
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    self._manager = socketio.RedisManager(
+                        self.url,
+                        channel=self.channel,
+                        write_only=True
+                    )
+        return self._manager
+    
+    def emit(self, event: str, data: Dict[str, Any], room: str) -> bool:
+        """
+        Publish an event to a room
+        
+        Returns:
+            True if the event was handed to Redis
+        """
+        if not self.enabled:
+            return False
+        try:
+            self.manager.emit(event, data, namespace='/', room=room)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ WebSocket publish failed ({event} → {room}): {e}")
+            return False
+    
+    def emit_progress(
+        self,
+        transcription_id: int,
+        progress: int,
+        status: str,
+        message: Optional[str] = None,
+        **extra: Any
+    ) -> bool:
+        """Publish a progress update to subscribers of a transcription"""
+        data = progress_payload(transcription_id, progress, status, message, **extra)
+        return self.emit('progress', data, transcription_room(transcription_id))
+    
+    def emit_completed(self, transcription_id: int, result: Dict, **extra: Any) -> bool:
+        """Publish a completion notification"""
+        data = completed_payload(transcription_id, result, **extra)
+        return self.emit('completed', data, transcription_room(transcription_id))
+    
+    def emit_error(self, transcription_id: int, error: str, **extra: Any) -> bool:
+        """Publish an error notification"""
+        data = error_payload(transcription_id, error, **extra)
+        return self.emit('error', data, transcription_room(transcription_id))
+    
+    def emit_to_user(self, user_id: int, event: str, data: Dict[str, Any]) -> bool:
+        """Publish an event to all connections of a user"""
+        return self.emit(event, data, user_room(user_id))
+
+
+_progress_publisher: Optional[ProgressPublisher] = None
+
+
+def get_progress_publisher() -> ProgressPublisher:
+    """Get progress publisher singleton (for Celery workers)"""
+    global _progress_publisher
+    if _progress_publisher is None:
+        _progress_publisher = ProgressPublisher()
+    return _progress_publisher
+
+
 def setup_websocket(app: FastAPI):
     """
     Setup WebSocket with FastAPI app
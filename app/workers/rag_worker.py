@@ -7,8 +7,6 @@ NOT: Bu worker Source modeli ile çalışır.
 Source.content alanındaki metni chunk'lara ayırır, embedding oluşturur ve Qdrant'a kaydeder.
 """
 
-import hashlib
-import uuid
 from typing import Dict, Any
 from datetime import datetime
 from celery.utils.log import get_task_logger
@@ -21,8 +19,11 @@ from app.models.user import User
 from app.services.credit_service import get_credit_service
 from app.models.credit_transaction import OperationType
 from app.services.rag_service import (
-    RAGService, TextChunker, EmbeddingModel
+    RAGService, EmbeddingModel, VectorStoreService, fits_shared_collection,
+    new_pkb_collection, pkb_location, shared_collection_name
 )
+from app.services.answer_cache import get_answer_cache
+from app.services.pkb_indexer import PKBIndexer, PKBIndexError
 from app.settings import get_settings
 
 logger = get_task_logger(__name__)
@@ -116,172 +117,105 @@ def create_pkb_task(
             'progress': 20
         })
         
-        # Create RAG service
-        rag_service = create_rag_service()
-        
         # Determine embedding model
         emb_model = EmbeddingModel.OPENAI_SMALL
-        emb_dimensions = 1536
         if embedding_model == "text-embedding-3-large":
             emb_model = EmbeddingModel.OPENAI_LARGE
-            emb_dimensions = 3072
-        
-        # Chunk the content
-        chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        chunks = chunker.chunk_text(source.content, metadata={
-            "source_id": source_id,
-            "title": source.title
-        })
-        
-        if not chunks:
-            logger.warning(f"⚠️ No chunks created: {source_id}")
-            source.pkb_status = "error"
-            source.pkb_error_message = "Chunk oluşturulamadı"
-            db.commit()
-            return {"success": False, "error": "No chunks created"}
-        
-        logger.info(f"📊 Created {len(chunks)} chunks")
         
         self.update_state(state='PROGRESS', meta={
             'status': 'Embedding oluşturuluyor',
             'progress': 40
         })
         
-        # Create embeddings in batches
-        chunk_texts = [c.content for c in chunks]
-        batch_size = 100
-        all_embeddings = []
-        
-        for i in range(0, len(chunk_texts), batch_size):
-            batch = chunk_texts[i:i + batch_size]
-            embeddings = rag_service.embedding_service.get_embeddings_batch(
-                texts=batch,
-                model=emb_model
-            )
-            all_embeddings.extend(embeddings)
-            
-            progress = 40 + int((i / len(chunk_texts)) * 30)
+        def report_embedding_progress(done: int, total: int):
             self.update_state(state='PROGRESS', meta={
-                'status': f'Embedding oluşturuluyor ({i + len(batch)}/{len(chunk_texts)})',
-                'progress': progress
+                'status': f'Embedding oluşturuluyor ({done}/{total})',
+                'progress': 40 + int((done / total) * 40)
             })
         
-        logger.info(f"✅ Created {len(all_embeddings)} embeddings")
-        
-        self.update_state(state='PROGRESS', meta={
-            'status': 'Qdrant\'a kaydediliyor',
-            'progress': 75
-        })
-        
-        # Create collection name
-        collection_name = f"gistify_source_{source_id}"
-        
-        # Create collection
-        rag_service.vector_store.create_collection(
-            collection_name=collection_name,
-            vector_size=emb_dimensions
-        )
-        
-        # Delete old chunks from database
-        db.query(PKBChunk).filter(PKBChunk.source_id == source_id).delete()
-        db.commit()
-        
-        # Prepare points for Qdrant and save to database
-        points = []
-        total_tokens = 0
+        # Keep the existing collection so unchanged chunks are reused, unless
+        # the model's vectors don't fit the shared collection (own collection)
+        collection_name = source.pkb_collection_name
+        if not collection_name or (collection_name == shared_collection_name() and not fits_shared_collection(emb_model)):
+            collection_name = new_pkb_collection(f"gistify_source_{source_id}", emb_model)
         
-        for i, (chunk, emb) in enumerate(zip(chunks, all_embeddings)):
-            point_id = str(uuid.uuid4())
-            chunk_id = f"source_{source_id}_chunk_{i}"
-            
-            points.append({
-                "id": point_id,
-                "vector": emb,
-                "payload": {
-                    "source_id": source_id,
-                    "user_id": user_id,
-                    "chunk_index": i,
-                    "content": chunk.content,
-                    "title": source.title,
-                    "metadata": chunk.metadata
-                }
-            })
-            
-            # Save chunk to database
-            db_chunk = PKBChunk(
+        # Chunk, diff against PKBChunk rows, embed and store only what changed
+        try:
+            result = PKBIndexer(db).sync(
                 source_id=source_id,
                 user_id=user_id,
-                chunk_id=chunk_id,
-                chunk_index=i,
-                content=chunk.content,
-                content_hash=hashlib.md5(chunk.content.encode()).hexdigest(),
-                token_count=chunk.token_count,
-                start_char=chunk.start_char,
-                end_char=chunk.end_char,
-                embedding_model=embedding_model,
-                embedding_dimensions=emb_dimensions,
-                is_embedded=True,
-                embedded_at=datetime.utcnow(),
-                vector_collection=collection_name,
-                vector_point_id=point_id,
-                chunk_metadata=chunk.metadata
+                content=source.content,
+                collection_name=collection_name,
+                title=source.title,
+                embedding_model=emb_model.value,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                progress_callback=report_embedding_progress
             )
-            db.add(db_chunk)
-            total_tokens += chunk.token_count
-        
-        db.commit()
+        except PKBIndexError as e:
+            logger.warning(f"⚠️ PKB indexing failed: {source_id}: {e}")
+            source.pkb_status = "error"
+            source.pkb_error_message = str(e)
+            db.commit()
+            return {"success": False, "error": str(e)}
         
-        # Upsert to Qdrant
-        rag_service.vector_store.upsert_vectors(
-            collection_name=collection_name,
-            points=points
+        chunk_count = result["chunk_count"]
+        total_tokens = result["tokens"]
+        logger.info(
+            f"✅ Indexed {chunk_count} chunks: {result['added']} embedded, "
+            f"{result['moved']} moved, {result['removed']} removed"
         )
         
-        logger.info(f"✅ Saved {len(points)} vectors to Qdrant")
-        
         self.update_state(state='PROGRESS', meta={
             'status': 'Tamamlanıyor',
             'progress': 90
         })
         
         # Calculate credits
-        # 1 credit per 1000 tokens for embedding
+        # 1 credit per 1000 tokens for embedding (newly embedded chunks only)
         credits_used = round(total_tokens / 1000, 2)
+        is_update = source.pkb_created_at is not None
         
         # Deduct credits
-        credit_service = get_credit_service(db)
-        credit_service.deduct_credits(
-            user_id=user_id,
-            amount=credits_used,
-            operation_type=OperationType.RAG_PKB_CREATION,
-            description=f"PKB oluşturma: {source.title[:50]}",
-            metadata={
-                "source_id": source_id,
-                "chunks": len(chunks),
-                "tokens": total_tokens,
-                "embedding_model": embedding_model
-            }
-        )
+        if credits_used > 0:
+            credit_service = get_credit_service(db)
+            credit_service.deduct_credits(
+                user_id=user_id,
+                amount=credits_used,
+                operation_type=OperationType.RAG_PKB_CREATION,
+                description=f"PKB {'güncelleme' if is_update else 'oluşturma'}: {source.title[:50]}",
+                metadata={
+                    "source_id": source_id,
+                    "chunks": chunk_count,
+                    "embedded_chunks": result["added"],
+                    "tokens": total_tokens,
+                    "embedding_model": embedding_model
+                }
+            )
         
         # Update source
         source.pkb_enabled = True
         source.pkb_status = "ready"
         source.pkb_collection_name = collection_name
-        source.pkb_chunk_count = len(chunks)
+        source.pkb_chunk_count = chunk_count
         source.pkb_embedding_model = embedding_model
         source.pkb_chunk_size = chunk_size
         source.pkb_chunk_overlap = chunk_overlap
-        source.pkb_created_at = datetime.utcnow()
-        source.pkb_credits_used = credits_used
+        if is_update:
+            source.pkb_credits_used = (source.pkb_credits_used or 0) + credits_used
+        else:
+            source.pkb_created_at = datetime.utcnow()
+            source.pkb_credits_used = credits_used
         source.pkb_error_message = None
         db.commit()
         
-        logger.info(f"✅ PKB creation completed: source_id={source_id}, chunks={len(chunks)}, credits={credits_used}")
+        logger.info(f"✅ PKB creation completed: source_id={source_id}, chunks={chunk_count}, credits={credits_used}")
         
         return {
             "success": True,
             "source_id": source_id,
-            "chunks": len(chunks),
+            "chunks": chunk_count,
+            "embedded_chunks": result["added"],
             "tokens": total_tokens,
             "credits_used": credits_used,
             "collection_name": collection_name
@@ -319,7 +253,7 @@ def delete_pkb_task(self, source_id: int, user_id: int):
     """
     PKB silme task'ı
     
-    1. Qdrant collection'ı siler
+    1. Qdrant vektörlerini siler (paylaşılan koleksiyonda sadece bu kaynağınkileri)
     2. Database'den chunk'ları siler
     3. Source'u günceller
     """
@@ -333,12 +267,16 @@ def delete_pkb_task(self, source_id: int, user_id: int):
             logger.warning(f"⚠️ Source not found: {source_id}")
             return {"success": False, "error": "Source not found"}
         
-        # Delete from Qdrant
+        # Delete from Qdrant (only this source's points if the collection is shared)
         if source.pkb_collection_name:
             try:
-                rag_service = create_rag_service()
-                rag_service.vector_store.delete_collection(source.pkb_collection_name)
-                logger.info(f"✅ Deleted Qdrant collection: {source.pkb_collection_name}")
+                vector_store = VectorStoreService()
+                location = pkb_location(source.user_id, source_id, source.pkb_collection_name)
+                if location.shared:
+                    vector_store.delete_points_by_filter(location.collection_name, location.filter_conditions)
+                else:
+                    vector_store.delete_collection(location.collection_name)
+                logger.info(f"✅ Deleted Qdrant vectors: {source.pkb_collection_name}")
             except Exception as e:
                 logger.warning(f"⚠️ Could not delete Qdrant collection: {e}")
         
@@ -357,6 +295,7 @@ def delete_pkb_task(self, source_id: int, user_id: int):
         source.pkb_created_at = None
         source.pkb_error_message = None
         db.commit()
+        get_answer_cache().invalidate_source(source_id)
         
         logger.info(f"✅ PKB deletion completed: source_id={source_id}")
         
@@ -383,15 +322,9 @@ def reindex_pkb_task(self, source_id: int, user_id: int, options: Dict[str, Any]
     """
     PKB yeniden indexleme task'ı
     
-    Mevcut PKB'yi silip yeniden oluşturur.
+    PKB'yi silmeden günceller: yalnızca değişen chunk'lar embed edilir,
+    kaybolanlar silinir (bkz. PKBIndexer).
     """
     logger.info(f"🔄 PKB reindex started: source_id={source_id}")
     
-    # First delete
-    delete_result = delete_pkb_task(source_id, user_id)
-    if not delete_result.get("success"):
-        return {"success": False, "error": "Delete failed"}
-    
-    # Then recreate
-    create_result = create_pkb_task(source_id, user_id, options)
-    return create_result
+    return create_pkb_task(source_id, user_id, options)
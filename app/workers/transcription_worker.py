@@ -5,15 +5,18 @@ Processes audio files with Whisper + Speaker Recognition
 
 import os
 import sys
+import inspect
 import logging
 import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any
 
 # Celery imports
 from celery import Task
 from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_process_init
 from app.celery_config import celery_app
 
 # Export app for celery CLI: celery -A app.workers.transcription_worker worker
@@ -26,8 +29,10 @@ from app.settings import get_settings
 from app.models.transcription import Transcription, TranscriptionStatus
 
 # Services - lazy imports for heavy dependencies
-from app.services.storage import FileStorageService
+from app.services.storage import get_storage_service
 from app.services.gemini_service import get_gemini_service
+from app.services.progress_reporter import ProgressReporter
+from app.services.speaker_alignment import align_segments
 from app.services.credit_service import get_credit_service, CreditPricing
 from app.models.credit_transaction import OperationType
 
@@ -41,9 +46,9 @@ def create_speaker_recognizer_lazy(*args, **kwargs):
     from app.services.speaker_recognition import create_speaker_recognizer
     return create_speaker_recognizer(*args, **kwargs)
 
-# WebSocket (optional)
+# WebSocket (optional) - workers publish through the Redis message queue
 try:
-    from app.websocket import get_ws_manager
+    from app.websocket import get_progress_publisher
     WS_AVAILABLE = True
 except ImportError:
     WS_AVAILABLE = False
@@ -56,10 +61,22 @@ engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@worker_process_init.connect
+def init_worker_storage(**kwargs):
+    """Build the shared R2 client (and verify the bucket) once per worker process"""
+    try:
+        get_storage_service()
+    except Exception as e:
+        logger.warning(f"⚠️ Storage warm-up failed, will retry on first task: {e}")
+
+
 def merge_speaker_info_with_segments(segments: list, speakers: list) -> list:
     """
     Merge speaker diarization info with Whisper segments
     
+    Each segment (and each of its timestamped words) gets the speaker with
+    the largest overlap; see app.services.speaker_alignment.
+    
     Args:
         segments: Whisper segments with timestamps
         speakers: Speaker diarization data [{speaker, start, end}, ...]
@@ -67,43 +84,127 @@ def merge_speaker_info_with_segments(segments: list, speakers: list) -> list:
     Returns:
         Updated segments with speaker info
     """
-    if not speakers or not segments:
-        return segments
+    return align_segments(segments, speakers)
+
+
+def release_uploaded_file(storage_service, file_id: str, content_hash: str = None) -> None:
+    """
+    Delete a processed upload and release its content-addressed blob
+    
+    Goes through storage.delete_file() so the file index entry is dropped
+    and the .content blob is unlinked once no other upload shares it.
+    """
+    if not content_hash:
+        file_path = storage_service.get_file_path(file_id)
+        if file_path and file_path.exists():
+            content_hash = storage_service.hash_file(file_path)
+    
+    logger.info(f"🗑️ Deleting uploaded file: {file_id}")
+    storage_service.delete_file(file_id, content_hash)
+    logger.info("✅ File deleted successfully")
+
+
+def is_long_enough_for_parallel(file_path: Path, duration: float = None) -> bool:
+    """
+    Whether a recording reaches PARALLEL_TRANSCRIPTION_MIN_SECONDS
+    
+    Uses the stored duration, else the container duration from ffprobe, so
+    short files are never fully decoded just to find out. An unknown
+    duration counts as short.
+    """
+    if not duration:
+        from app.services.local_language_detector import probe_duration
+        duration = probe_duration(file_path)
+    return bool(duration) and duration >= settings.PARALLEL_TRANSCRIPTION_MIN_SECONDS
+
+
+def upload_for_provider(storage_service, file_path: Path, content_hash: str = None) -> str:
+    """
+    Upload a local file to R2 so a cloud provider can fetch it
     
-    # Create a copy to avoid modifying original
-    updated_segments = []
+    With a content hash the object is stored content-addressed, so the same
+    file is only uploaded once no matter how often it is transcribed.
+    """
+    file_size_mb = file_path.stat().st_size / (1024 * 1024)
+    logger.info(f"📦 File size: {file_size_mb:.1f}MB, uploading to MinIO...")
+    
+    if content_hash:
+        audio_url = storage_service.upload_content_to_r2(str(file_path), content_hash)
+    else:
+        audio_url = storage_service.upload_to_minio(str(file_path))
+    
+    if not audio_url:
+        raise ValueError(
+            f"Failed to upload file to MinIO. "
+            f"Make sure ngrok tunnel is running! See NGROK_SETUP.md"
+        )
+    return audio_url
+
+
+class ProgressTask(Task):
+    """
+    Base task that pushes its progress to WebSocket clients
+    
+    PROGRESS states reported with update_state() are mirrored to the
+    transcription's Socket.IO room, and the task outcome is published as a
+    'completed' or 'error' event, so clients don't need to poll.
+    """
+    
+    progress_kind = "transcription"  # Sent as 'task' in event payloads
     
-    for segment in segments:
-        segment_copy = segment.copy()
-        segment_start = segment.get('start', 0)
-        segment_end = segment.get('end', 0)
-        segment_mid = (segment_start + segment_end) / 2
-        
-        # Find speaker with most overlap with this segment
-        best_speaker = None
-        max_overlap = 0
-        
-        for speaker_info in speakers:
-            speaker_start = speaker_info['start']
-            speaker_end = speaker_info['end']
-            
-            # Calculate overlap
-            overlap_start = max(segment_start, speaker_start)
-            overlap_end = min(segment_end, speaker_end)
-            overlap = max(0, overlap_end - overlap_start)
-            
-            if overlap > max_overlap:
-                max_overlap = overlap
-                best_speaker = speaker_info['speaker']
-        
-        # Add speaker to segment
-        segment_copy['speaker'] = best_speaker
-        updated_segments.append(segment_copy)
+    def _progress_ids(self) -> Dict[str, Any]:
+        """transcription_id (and video_id) from the running task's arguments"""
+        try:
+            bound = inspect.signature(self.run).bind_partial(
+                *(self.request.args or ()), **(self.request.kwargs or {})
+            )
+        except TypeError:
+            return {}
+        return {
+            key: bound.arguments[key]
+            for key in ("transcription_id", "video_id")
+            if bound.arguments.get(key) is not None
+        }
+    
+    def publish_progress(self, progress: int, status: str, message: str = None) -> None:
+        """Send a progress event for the running task"""
+        ids = self._progress_ids()
+        if not WS_AVAILABLE or "transcription_id" not in ids:
+            return
+        get_progress_publisher().emit_progress(
+            ids["transcription_id"], progress, status, message,
+            task=self.progress_kind, video_id=ids.get("video_id")
+        )
+    
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        if state == 'PROGRESS' and meta and (task_id is None or task_id == self.request.id):
+            self.publish_progress(meta.get('current', 0), meta.get('status', ''))
+    
+    def on_success(self, retval, task_id, args, kwargs):
+        ids = self._progress_ids()
+        if WS_AVAILABLE and "transcription_id" in ids:
+            publisher = get_progress_publisher()
+            extra = {"task": self.progress_kind, "video_id": ids.get("video_id")}
+            result = retval if isinstance(retval, dict) else {}
+            if result.get("status", "success") == "success":
+                publisher.emit_completed(ids["transcription_id"], result, **extra)
+            else:
+                error = result.get("error") or result.get("message") or "Processing failed"
+                publisher.emit_error(ids["transcription_id"], error, **extra)
+        super().on_success(retval, task_id, args, kwargs)
     
-    return updated_segments
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        ids = self._progress_ids()
+        if WS_AVAILABLE and "transcription_id" in ids:
+            get_progress_publisher().emit_error(
+                ids["transcription_id"], str(exc),
+                task=self.progress_kind, video_id=ids.get("video_id")
+            )
+        super().on_failure(exc, task_id, args, kwargs, einfo)
 
 
-class TranscriptionTask(Task):
+class TranscriptionTask(ProgressTask):
     """Base task for transcription with automatic retry"""
     
     autoretry_for = (Exception,)
@@ -159,16 +260,15 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         transcription.started_at = datetime.utcnow()
         db.commit()
         
+        # Progress goes to Redis/WebSocket on every step, to the row at most
+        # every PROGRESS_DB_MIN_INTERVAL seconds
+        reporter = ProgressReporter(db, transcription, task=self)
+        
         # Update progress: 10%
-        transcription.progress = 10
-        db.commit()
-        self.update_state(
-            state='PROGRESS',
-            meta={'current': 10, 'total': 100, 'status': 'Loading file...'}
-        )
+        reporter.report(10, 'Loading file...')
         
         # Get file path from storage
-        storage = FileStorageService()
+        storage = get_storage_service()
         file_path = storage.get_file_path(transcription.file_id)
         
         if not file_path or not file_path.exists():
@@ -177,12 +277,10 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         logger.info(f"📁 Processing file: {file_path}")
         
         # Update progress: 20%
-        transcription.progress = 20
-        db.commit()
-        self.update_state(
-            state='PROGRESS',
-            meta={'current': 20, 'total': 100, 'status': 'Loading models...'}
-        )
+        reporter.report(20, 'Loading models...')
+        
+        # Decoded PCM of the file (local pipeline only)
+        audio_buffer = None
         
         # =========================================================================
         # TRANSCRIPTION PROVIDER SELECTION
@@ -198,15 +296,45 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         use_replicate = settings.USE_REPLICATE
         use_runpod = settings.USE_RUNPOD
         
+        # =========================================================================
+        # RESULT CACHE - same content already transcribed with the same options?
+        # =========================================================================
+        from app.services.transcription_cache import get_transcription_cache
+        transcription_cache = get_transcription_cache()
+        
+        if not transcription.content_hash:
+            transcription.content_hash = storage.hash_file(file_path)
+        content_hash = transcription.content_hash
+        
+        if use_assemblyai:
+            provider_key = "assemblyai"
+        elif use_modal:
+            provider_key = "modal"
+        elif use_replicate:
+            provider_key = "replicate"
+        elif use_runpod:
+            provider_key = "runpod"
+        else:
+            provider_key = "local"
+        
+        cache_key = transcription_cache.make_key(
+            content_hash,
+            provider=provider_key,
+            model=transcription.whisper_model,
+            language=transcription.language,
+            enable_diarization=transcription.enable_diarization,
+            min_speakers=transcription.min_speakers,
+            max_speakers=transcription.max_speakers,
+            features=transcription.assemblyai_features_enabled if use_assemblyai else None
+        )
+        cached_result = transcription_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"♻️ Transcription cache hit ({provider_key}, {content_hash[:12]}), skipping provider call")
+        
         if use_assemblyai:
             # Use AssemblyAI for transcription with speaker diarization
             logger.info("☁️ Using AssemblyAI for transcription (with diarization)")
-            transcription.progress = 30
-            db.commit()
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 30, 'total': 100, 'status': 'Transcribing with AssemblyAI...'}
-            )
+            reporter.report(30, 'Transcribing with AssemblyAI...')
             
             from app.services.assemblyai_service import get_assemblyai_service
             from app.services.storage import get_storage_service
@@ -223,19 +351,29 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
             else:
                 logger.info(f"🌍 Using specified language: {language_param}")
             
-            # Upload to MinIO
-            file_size_mb = file_path.stat().st_size / (1024 * 1024)
-            logger.info(f"📦 File size: {file_size_mb:.1f}MB, uploading to MinIO...")
-            
-            audio_url = storage_service.upload_to_minio(str(file_path))
-            
-            if not audio_url:
-                raise ValueError(
-                    f"Failed to upload file to MinIO. "
-                    f"Make sure ngrok tunnel is running! See NGROK_SETUP.md"
-                )
-            
-            logger.info(f"✅ File uploaded, using URL for AssemblyAI")
+            # Upload to MinIO (not needed when the result is cached). An unknown
+            # language is detected from the local file while the upload runs,
+            # instead of downloading the upload back afterwards.
+            language_result = None
+            if cached_result is None:
+                executor = ThreadPoolExecutor(max_workers=1)
+                language_future = None
+                try:
+                    if language_param is None and assemblyai_service.language_detector:
+                        from app.services.local_language_detector import detect_language_local
+                        language_future = executor.submit(detect_language_local, file_path, content_hash)
+                    audio_url = upload_for_provider(storage_service, file_path, content_hash)
+                except Exception:
+                    # Fail the task right away instead of waiting for Whisper
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                logger.info(f"✅ File uploaded, using URL for AssemblyAI")
+                if language_future is not None:
+                    try:
+                        language_result = language_future.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Local language detection failed, AssemblyAI will detect from URL: {e}")
+                executor.shutdown()
             
             start_time = time.time()
             
@@ -309,14 +447,18 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                 logger.info("📝 Basic transcription with diarization only")
             
             try:
-                # Call AssemblyAI with full Speech Understanding + LeMUR features
-                result = assemblyai_service.transcribe_audio(
-                    audio_url=audio_url,
-                    language=language_param,
-                    enable_diarization=True,
-                    auto_detect_language=True,  # 🔥 Enable Whisper language detection
-                    features=features           # 🎯 NEW: Speech Understanding + LeMUR
-                )
+                if cached_result is not None:
+                    result = cached_result
+                else:
+                    # Call AssemblyAI with full Speech Understanding + LeMUR features
+                    result = assemblyai_service.transcribe_audio(
+                        audio_url=audio_url,
+                        language=language_param,
+                        enable_diarization=True,
+                        auto_detect_language=True,  # 🔥 Enable Whisper language detection
+                        features=features,          # 🎯 NEW: Speech Understanding + LeMUR
+                        language_result=language_result
+                    )
             except Exception as assemblyai_error:
                 processing_time = time.time() - start_time
                 logger.error(f"❌ AssemblyAI transcription failed after {processing_time:.1f}s")
@@ -370,12 +512,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         elif use_modal:
             # Use Modal for transcription (best for large files, serverless GPU)
             logger.info("☁️ Using Modal for transcription")
-            transcription.progress = 30
-            db.commit()
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 30, 'total': 100, 'status': 'Transcribing with Modal...'}
-            )
+            reporter.report(30, 'Transcribing with Modal...')
             
             from app.services.modal_service import get_modal_service
             from app.services.storage import get_storage_service
@@ -389,37 +526,53 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
             if language_param in ['unknown', None, '']:
                 language_param = None
             
-            # Check file size - always upload to MinIO for Modal
-            file_size_mb = file_path.stat().st_size / (1024 * 1024)
-            logger.info(f"📦 File size: {file_size_mb:.1f}MB, uploading to MinIO...")
-            
-            audio_url = storage_service.upload_to_minio(str(file_path))
-            
-            if not audio_url:
-                raise ValueError(
-                    f"Failed to upload file to MinIO. "
-                    f"Make sure ngrok tunnel is running! See NGROK_SETUP.md"
-                )
+            # Long recordings are split at silences and fanned out over several
+            # containers (decoded once; chunks are sent directly, no upload).
+            # The length check probes the container, only long files are decoded.
+            use_parallel = (
+                cached_result is None
+                and settings.PARALLEL_TRANSCRIPTION_ENABLED
+                and is_long_enough_for_parallel(file_path, transcription.duration)
+            )
+            if use_parallel:
+                from app.services.audio_buffer import get_audio_buffer
+                audio_buffer = get_audio_buffer(transcription.file_id, file_path)
+                use_parallel = audio_buffer.duration >= settings.PARALLEL_TRANSCRIPTION_MIN_SECONDS
             
-            logger.info(f"✅ File uploaded, using URL for Modal")
+            # Otherwise upload to MinIO for Modal (not needed when the result is cached)
+            if cached_result is None and not use_parallel:
+                audio_url = upload_for_provider(storage_service, file_path, content_hash)
+                logger.info(f"✅ File uploaded, using URL for Modal")
             
             start_time = time.time()
             
             # Calculate expected processing time (T4 GPU with batching optimization)
             estimated_duration = transcription.duration or 60  # Use transcription duration or fallback to 1 min
+            if use_parallel:
+                estimated_duration = min(audio_buffer.duration, settings.PARALLEL_CHUNK_SECONDS * 1.5)
             expected_time = max(estimated_duration * 0.08, 15)  # T4: ~0.05-0.08x ratio
             
             logger.info(f"⏱️ Expected processing time: {expected_time:.0f}s (audio: {estimated_duration:.1f}s)")
-            logger.info(f"📝 Mode: Transcription-only (no diarization)")
+            logger.info(f"📝 Mode: Transcription-only (no diarization){', parallel chunks' if use_parallel else ''}")
             logger.info(f"💰 T4 GPU: $0.36/hour with dynamic batching")
             logger.info(f"🚀 New Modal app: mp4totext-whisper-t4")
             
             try:
-                # Call Modal with optimized T4 Whisper transcription (GPU only)
-                result = modal_service.transcribe_audio(
-                    audio_url=audio_url,
-                    language=language_param
-                )
+                if cached_result is not None:
+                    result = cached_result
+                elif use_parallel:
+                    from app.services.parallel_transcription import transcribe_parallel, get_chunk_backend
+                    result = transcribe_parallel(
+                        audio_buffer.samples,
+                        get_chunk_backend(),
+                        language=language_param
+                    )
+                else:
+                    # Call Modal with optimized T4 Whisper transcription (GPU only)
+                    result = modal_service.transcribe_audio(
+                        audio_url=audio_url,
+                        language=language_param
+                    )
             except Exception as modal_error:
                 processing_time = time.time() - start_time
                 logger.error(f"❌ Modal transcription failed after {processing_time:.1f}s")
@@ -469,12 +622,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         elif use_replicate:
             # Use Replicate for transcription (native URL support)
             logger.info("☁️ Using Replicate for transcription")
-            transcription.progress = 30
-            db.commit()
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 30, 'total': 100, 'status': 'Transcribing with Replicate...'}
-            )
+            reporter.report(30, 'Transcribing with Replicate...')
             
             from app.services.replicate_service import get_replicate_service
             from app.services.storage import get_storage_service
@@ -488,27 +636,20 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
             if language_param in ['unknown', None, '']:
                 language_param = None
             
-            # Check file size - always upload to MinIO for Replicate
-            file_size_mb = file_path.stat().st_size / (1024 * 1024)
-            logger.info(f"📦 File size: {file_size_mb:.1f}MB, uploading to MinIO...")
-            
-            audio_url = storage_service.upload_to_minio(str(file_path))
-            
-            if not audio_url:
-                raise ValueError(
-                    f"Failed to upload file to MinIO. "
-                    f"Make sure ngrok tunnel is running! See NGROK_SETUP.md"
-                )
-            
-            logger.info(f"✅ File uploaded, using URL for Replicate")
-            
             start_time = time.time()
-            result = replicate_service.transcribe_audio(
-                audio_url=audio_url,
-                language=language_param,
-                model=whisper_model,
-                task="transcribe"
-            )
+            if cached_result is not None:
+                result = cached_result
+            else:
+                # Always upload to MinIO for Replicate
+                audio_url = upload_for_provider(storage_service, file_path, content_hash)
+                logger.info(f"✅ File uploaded, using URL for Replicate")
+                
+                result = replicate_service.transcribe_audio(
+                    audio_url=audio_url,
+                    language=language_param,
+                    model=whisper_model,
+                    task="transcribe"
+                )
             processing_time = time.time() - start_time
             
             # Update transcription with results
@@ -531,12 +672,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         elif use_runpod:
             # Use RunPod Serverless for transcription
             logger.info("☁️ Using RunPod Serverless for transcription")
-            transcription.progress = 30
-            db.commit()
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 30, 'total': 100, 'status': 'Transcribing with RunPod...'}
-            )
+            reporter.report(30, 'Transcribing with RunPod...')
             
             from app.services.runpod_service import get_runpod_service
             
@@ -591,18 +727,20 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                 use_faster_whisper=use_faster_whisper
             )
             
-            transcription.progress = 30
-            db.commit()
-            self.update_state(
-                state='PROGRESS',
-                meta={'current': 30, 'total': 100, 'status': 'Transcribing audio...'}
-            )
+            reporter.report(30, 'Transcribing audio...')
             
             start_time = time.time()
-            result = processor.process_file(
-                str(file_path),
-                language=transcription.language
-            )
+            if cached_result is not None:
+                result = cached_result
+            else:
+                # Decode once; Whisper, speaker recognition and duration read the buffer
+                from app.services.audio_buffer import get_audio_buffer
+                audio_buffer = get_audio_buffer(transcription.file_id, file_path)
+                result = processor.process_file(
+                    str(file_path),
+                    language=transcription.language,
+                    audio_buffer=audio_buffer
+                )
             processing_time = time.time() - start_time
         
         # =========================================================================
@@ -611,13 +749,12 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         # Old Resemblyzer/Silero fallback removed - diarization now done on GPU
         # If Modal/Replicate doesn't return speakers, we accept 0 count (no fallback)
         
+        # Remember provider output for identical future requests
+        if cached_result is None:
+            transcription_cache.set(cache_key, result)
+        
         # Update progress: 70%
-        transcription.progress = 70
-        db.commit()
-        self.update_state(
-            state='PROGRESS',
-            meta={'current': 70, 'total': 100, 'status': 'Saving results...'}
-        )
+        reporter.report(70, 'Saving results...')
         
         # Update transcription with results (if not already set by Modal)
         if not transcription.text:
@@ -645,6 +782,9 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
             last_segment = result["segments"][-1]
             transcription.duration = int(last_segment.get("end", 0))
             logger.info(f"⏱️ Audio duration calculated from segments: {transcription.duration} seconds ({transcription.duration/60:.1f} minutes)")
+        elif audio_buffer is not None:
+            transcription.duration = int(audio_buffer.duration)
+            logger.info(f"⏱️ Audio duration from decoded buffer: {transcription.duration} seconds")
         else:
             # Fallback: try to get duration from audio file metadata
             try:
@@ -668,12 +808,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         # Removes filler words, fixes grammar without changing meaning
         # =========================================================================
         logger.info("🧹 Starting transcript cleaning...")
-        transcription.progress = 75
-        db.commit()
-        self.update_state(
-            state='PROGRESS',
-            meta={'current': 75, 'total': 100, 'status': 'Cleaning transcript...'}
-        )
+        reporter.report(75, 'Cleaning transcript...')
         
         # Try Together AI first (cheaper, faster)
         from app.services.together_service import get_together_service
@@ -726,12 +861,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                 logger.info(f"🤖 User selected provider: {ai_provider}, model: {ai_model}")
                 logger.info(f"🤖 Starting AI enhancement (STANDARD mode) using {ai_provider.upper()}...")
                 
-                transcription.progress = 80
-                db.commit()
-                self.update_state(
-                    state='PROGRESS',
-                    meta={'current': 80, 'total': 100, 'status': f'Enhancing with {ai_provider.upper()}...'}
-                )
+                reporter.report(80, f'Enhancing with {ai_provider.upper()}...')
                 
                 # 🔧 FIX 2: Validate model exists and is active in database
                 if ai_model:
@@ -772,12 +902,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                 
                 if gemini and gemini.is_enabled():
                     transcription.gemini_status = "processing"
-                    transcription.progress = 82
-                    db.commit()
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={'current': 82, 'total': 100, 'status': 'Metin AI ile işleniyor...'}
-                    )
+                    reporter.report(82, 'Metin AI ile işleniyor...')
                     
                     language = result.get("language", "tr")
                     
@@ -811,12 +936,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                     if transcription.enable_web_search:
                         try:
                             logger.info("🔍 Step 1: AI generating optimized search query...")
-                            transcription.progress = 85
-                            db.commit()
-                            self.update_state(
-                                state='PROGRESS',
-                                meta={'current': 85, 'total': 100, 'status': 'Web araması için sorgu oluşturuluyor...'}
-                            )
+                            reporter.report(85, 'Web araması için sorgu oluşturuluyor...')
                             
                             ai_search_query = loop.run_until_complete(
                                 gemini.generate_search_query(text_for_ai, language)
@@ -825,12 +945,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                             logger.info(f"   📝 Full query: {ai_search_query}")
                             
                             logger.info("🌐 Step 2: Searching web with Tavily...")
-                            transcription.progress = 88
-                            db.commit()
-                            self.update_state(
-                                state='PROGRESS',
-                                meta={'current': 88, 'total': 100, 'status': 'Web araması yapılıyor...'}
-                            )
+                            reporter.report(88, 'Web araması yapılıyor...')
                             
                             from app.services.web_search_service import get_web_search_service
                             web_service = get_web_search_service()
@@ -842,12 +957,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                                 logger.info(f"✅ Tavily found {web_results.get('num_results', 0)} results")
                                 
                                 logger.info("🔗 Step 3: AI synthesizing web context with CLEANED transcript...")
-                                transcription.progress = 92
-                                db.commit()
-                                self.update_state(
-                                    state='PROGRESS',
-                                    meta={'current': 92, 'total': 100, 'status': 'Web sonuçları birleştiriliyor...'}
-                                )
+                                reporter.report(92, 'Web sonuçları birleştiriliyor...')
                                 
                                 web_context_enrichment = loop.run_until_complete(
                                     gemini.synthesize_web_context(text_for_ai, web_results, language)
@@ -870,15 +980,16 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                         logger.info("ℹ️ Web search disabled by user, skipping Tavily lookup")
                     
                     # Run standard text enhancement using CLEANED TEXT (not raw Whisper output)
-                    transcription.progress = 90
-                    db.commit()
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={'current': 90, 'total': 100, 'status': 'AI işlemleri tamamlanıyor...'}
-                    )
+                    reporter.report(90, 'AI işlemleri tamamlanıyor...')
+                    
+                    def report_chunk_progress(completed: int, total: int):
+                        reporter.report(90, f'AI işlemleri tamamlanıyor... ({completed}/{total})')
                     
                     enhancement_result = loop.run_until_complete(
-                        gemini.enhance_text(text_for_ai, language, include_summary=True, enable_web_search=False)
+                        gemini.enhance_text(
+                            text_for_ai, language, include_summary=True, enable_web_search=False,
+                            progress_callback=report_chunk_progress
+                        )
                     )
                     
                     # 🔧 FIX: Check if enhancement actually failed (error in result)
@@ -901,8 +1012,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
                         "model_used": enhancement_result.get("model_used", ""),
                         **web_metadata  # Include web search metadata
                     }
-                    transcription.progress = 95
-                    db.commit()
+                    reporter.report(95, 'AI işlemleri tamamlandı', commit=True)
                     logger.info(f"✅ Standard text enhancement completed using {enhancement_result.get('provider', 'unknown').upper()}")
                     
                 else:
@@ -1157,6 +1267,7 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
         
         db.commit()
         db.refresh(transcription)
+        reporter.finish()
         
         logger.info(f"✅ Transcription {transcription_id} completed in {processing_time:.2f}s")
         
@@ -1304,10 +1415,10 @@ def process_transcription_task(self, transcription_id: int) -> Dict[str, Any]:
             if task_state >= max_retries:
                 should_delete = True
             
-            if should_delete and 'file_path' in locals() and file_path and file_path.exists():
-                logger.info(f"🗑️ Deleting uploaded file: {file_path}")
-                os.remove(file_path)
-                logger.info("✅ File deleted successfully")
+            if should_delete and 'transcription' in locals() and transcription:
+                from app.services.audio_buffer import release_audio_buffer
+                release_audio_buffer(transcription.file_id)
+                release_uploaded_file(get_storage_service(), transcription.file_id, transcription.content_hash)
             elif 'file_path' in locals() and file_path and file_path.exists():
                 logger.info(f"⏸️ Keeping file for potential retry (attempt {task_state + 1}/{max_retries + 1})")
         except Exception as cleanup_error:
@@ -1568,7 +1679,7 @@ def generate_transcript_images(
         db.close()
 
 
-@celery_app.task(bind=True, max_retries=1, default_retry_delay=120, queue='high')
+@celery_app.task(bind=True, base=ProgressTask, progress_kind="video", max_retries=1, default_retry_delay=120, queue='high')
 def generate_video_task(
     self,
     video_id: int,
@@ -1679,8 +1790,8 @@ def generate_video_task(
         # 3. Segment transcript or use custom prompt
         logger.info("📝 Segmenting transcript or processing custom prompt...")
         video.status = "processing"
-        video.progress = 5
-        db.commit()
+        reporter = ProgressReporter(db, video, kind="video", task=self)
+        reporter.report(5, 'Segmenting transcript...', commit=True)
         
         # If custom_prompt provided, use it instead of transcript
         if custom_prompt and len(custom_prompt.strip()) > 0:
@@ -1721,8 +1832,7 @@ def generate_video_task(
             )
         
         logger.info(f"✅ Created {len(segments)} segments")
-        video.progress = 15
-        db.commit()
+        reporter.report(15, 'Generating images...')
         
         # 4. BATCH IMAGE GENERATION - Use Modal batch API for speed + quality!
         model_name = model_type.upper()
@@ -1772,15 +1882,6 @@ def generate_video_task(
                     )
                 
                 logger.info(f"✅ Batch generation complete! {len(segment_images)} images generated")
-                
-                # Update progress incrementally as if images came in one by one (for UX)
-                for i in range(len(segment_images)):
-                    image_progress = 15 + int(((i + 1) / len(segments)) * 40)
-                    video.progress = image_progress
-                    db.commit()
-                    if i < len(segment_images) - 1:
-                        time_module.sleep(0.5)  # Small delay for progress animation
-                
                 break  # Success!
                 
             except Exception as e:
@@ -1797,8 +1898,7 @@ def generate_video_task(
             raise ValueError(f"Batch generation returned {len(segment_images) if segment_images else 0} images, expected {len(segments)}")
         
         logger.info(f"✅ All {len(segments)} HIGH QUALITY images generated!")
-        video.progress = 55
-        db.commit()
+        reporter.report(55, 'Images ready')
         
         # 5. PARALLEL TTS GENERATION (OPTIMIZATION)
         logger.info(f"🎤 Generating {len(segments)} speech files in parallel...")
@@ -1808,8 +1908,7 @@ def generate_video_task(
             first_text = segments[0].get("text", "")
             logger.info(f"🔍 TTS will process first segment text (first 200 chars): {first_text[:200]}...")
         
-        video.progress = 60
-        db.commit()
+        reporter.report(60, 'Generating speech...')
         
         audio_bytes_list = video_gen.generate_speech_batch(
             segments=segments,
@@ -1819,8 +1918,7 @@ def generate_video_task(
         )
         
         logger.info(f"✅ All {len(audio_bytes_list)} speech files generated!")
-        video.progress = 70
-        db.commit()
+        reporter.report(70, 'Assembling video segments...')
         
         # 6. PARALLEL VIDEO SEGMENT CREATION (OPTIMIZATION)
         logger.info(f"🎬 Creating {len(segments)} video segments in parallel...")
@@ -1850,8 +1948,7 @@ def generate_video_task(
         )
         
         logger.info(f"✅ All video segments created!")
-        video.progress = 85
-        db.commit()
+        reporter.report(85, 'Video segments ready')
         
         # Collect successful segments
         segment_data = []
@@ -1876,8 +1973,7 @@ def generate_video_task(
         
         # 7. Concatenate all video segments
         logger.info(f"🎬 Concatenating {len(temp_video_segments)} video segments...")
-        video.progress = 90
-        db.commit()
+        reporter.report(90, 'Concatenating video...')
         
         if not temp_video_segments:
             raise RuntimeError("No video segments were created")
@@ -1893,8 +1989,7 @@ def generate_video_task(
         
         # 6. Upload to MinIO
         logger.info("📤 Uploading video to storage...")
-        video.progress = 90
-        db.commit()
+        reporter.report(90, 'Uploading video...')
         
         with open(final_video_path, "rb") as f:
             video_bytes = f.read()
@@ -1915,6 +2010,7 @@ def generate_video_task(
         video.segments = segment_data
         video.completed_at = datetime.utcnow()
         db.commit()
+        reporter.finish()
         
         # 8. Deduct credits (actual cost based on real segment count)
         logger.info("💰 Deducting credits based on actual segments used...")
@@ -2013,6 +2109,7 @@ def generate_video_task(
 @celery_app.task(
     bind=True,
     base=TranscriptionTask,
+    progress_kind="vision",
     name="app.workers.process_vision",
     time_limit=600,  # 10 minutes hard timeout
     soft_time_limit=540,  # 9 minutes soft timeout
@@ -2064,7 +2161,7 @@ def process_vision_task(self, transcription_id: int) -> Dict[str, Any]:
         )
         
         # Get document file
-        storage = FileStorageService()
+        storage = get_storage_service()
         doc_path = storage.get_file_path(transcription.document_file_id)
         
         if not doc_path or not doc_path.exists():
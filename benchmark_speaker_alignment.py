@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: speaker alignment vs the previous per-segment scans
+
+The previous implementations compared every Whisper segment with every
+diarization turn (merge_speaker_info_with_segments in the worker,
+_find_speaker_at_time in the Modal function). Generates a synthetic meeting
+with the requested number of turns and segments and reports wall time and
+label agreement.
+
+The legacy scans are quadratic, so by default they are timed on a sample of
+segments and extrapolated linearly (pass --legacy-sample 0 to run them fully).
+
+Usage:
+    python benchmark_speaker_alignment.py [--segments 10000] [--turns 10000] [--speakers 8] [--legacy-sample 1000]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.speaker_alignment import align_segments, assign_speakers
+
+
+def legacy_merge(segments: List[Dict[str, Any]], speakers: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """merge_speaker_info_with_segments as it was (largest single-turn overlap)"""
+    labels = []
+    for segment in segments:
+        best_speaker = None
+        max_overlap = 0
+        for speaker_info in speakers:
+            overlap = max(0, min(segment["end"], speaker_info["end"]) - max(segment["start"], speaker_info["start"]))
+            if overlap > max_overlap:
+                max_overlap = overlap
+                best_speaker = speaker_info["speaker"]
+        labels.append(best_speaker)
+    return labels
+
+
+def legacy_modal(segments: List[Dict[str, Any]], speakers: List[Dict[str, Any]]) -> List[str]:
+    """_find_speaker_at_time at each segment midpoint as it was"""
+    labels = []
+    for segment in segments:
+        time_ = (segment["start"] + segment["end"]) / 2
+        for seg in speakers:
+            if seg["start"] <= time_ <= seg["end"]:
+                labels.append(seg["speaker"])
+                break
+        else:
+            closest = min(speakers, key=lambda s: min(abs(s["start"] - time_), abs(s["end"] - time_)))
+            labels.append(closest["speaker"])
+    return labels
+
+
+def make_meeting(n_segments: int, n_turns: int, n_speakers: int, seed: int = 42) -> Tuple[list, list]:
+    """Back-to-back turns with small gaps, and Whisper-like segments over the same span"""
+    rng = random.Random(seed)
+    speakers, t = [], 0.0
+    for _ in range(n_turns):
+        length = rng.uniform(0.5, 3.0)
+        speakers.append({"speaker": f"SPEAKER_{rng.randrange(n_speakers):02d}", "start": t, "end": t + length})
+        t += length + rng.uniform(0.0, 0.4)
+
+    span = t / n_segments
+    segments = []
+    for i in range(n_segments):
+        start = i * span
+        segments.append({
+            "start": start,
+            "end": start + span * rng.uniform(0.8, 1.0),
+            "text": "lorem ipsum",
+            "words": [
+                {"word": "lorem", "start": start, "end": start + span * 0.4},
+                {"word": "ipsum", "start": start + span * 0.4, "end": start + span * 0.8},
+            ],
+        })
+    return segments, speakers
+
+
+def timed(fn, *args) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def agreement(a: list, b: list) -> float:
+    """Share of equal labels over the common prefix"""
+    return sum(1 for x, y in zip(a, b) if x == y) / max(min(len(a), len(b)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speaker alignment against the previous implementations")
+    parser.add_argument("--segments", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=10000)
+    parser.add_argument("--speakers", type=int, default=8)
+    parser.add_argument("--legacy-sample", type=int, default=1000,
+                        help="Segments the legacy scans are timed on (0 = all)")
+    args = parser.parse_args()
+
+    segments, speakers = make_meeting(args.segments, args.turns, args.speakers)
+    starts = [s["start"] for s in segments]
+    ends = [s["end"] for s in segments]
+    print(f"\n🎙️ {len(segments):,} segments × {len(speakers):,} turns, {args.speakers} speakers "
+          f"({speakers[-1]['end'] / 3600:.1f}h)")
+
+    seconds, labels = timed(assign_speakers, starts, ends, speakers)
+    print(f"  ⚡ assign_speakers:           {seconds * 1000:.1f}ms")
+    seconds, labels_nearest = timed(lambda: assign_speakers(starts, ends, speakers, nearest=True))
+    print(f"  ⚡ assign_speakers (nearest): {seconds * 1000:.1f}ms")
+    seconds, _ = timed(align_segments, segments, speakers)
+    print(f"  ⚡ align_segments (+words):   {seconds * 1000:.1f}ms")
+
+    sample = segments[:args.legacy_sample] if args.legacy_sample else segments
+    scale = len(segments) / len(sample)
+    note = f" (extrapolated from {len(sample):,} segments)" if scale > 1 else ""
+
+    old_seconds, old_labels = timed(legacy_merge, sample, speakers)
+    print(f"  🐢 legacy worker merge:       {old_seconds * scale:.2f}s{note}, "
+          f"agreement {agreement(labels, old_labels):.1%}")
+    old_seconds, old_labels = timed(legacy_modal, sample, speakers)
+    print(f"  🐢 legacy Modal midpoint:     {old_seconds * scale:.2f}s{note}, "
+          f"agreement {agreement(labels_nearest, old_labels):.1%}")
+
+
+if __name__ == "__main__":
+    main()
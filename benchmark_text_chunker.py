@@ -0,0 +1,243 @@
+"""
+Micro-benchmark: TextChunker vs the previous paragraph-by-paragraph chunker
+
+The previous implementation re-encoded every paragraph, every chunk after
+overlap and every finished chunk; the current one tokenizes the document once.
+Generates synthetic Turkish/English prose of the requested sizes and reports
+wall time, chunk counts and offset accuracy for both.
+
+Usage:
+    python benchmark_text_chunker.py [--sizes 1,10] [--chunk-size 512] [--chunk-overlap 50] [--repeat 1]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services.rag_service import ChunkResult, TextChunker
+
+WORDS = (
+    "ve bir bu da için ile gibi çok daha sonra model veri sistem kullanıcı metin "
+    "the of and to in is that for with as on data model system user text source "
+    "öğrenme transkripsiyon konuşma bilgi tabanı arama chunk embedding vektör"
+).split()
+
+
+class LegacyTextChunker(TextChunker):
+    """TextChunker.chunk_text as it was before single-pass tokenization"""
+
+    def chunk_text(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[ChunkResult]:
+        """
+        Metni semantic-aware chunks'lara böl
+        
+        Args:
+            text: Bölünecek metin
+            metadata: Chunk'lara eklenecek metadata
+            
+        Returns:
+            ChunkResult listesi
+        """
+        if not text or not text.strip():
+            return []
+        
+        # Paragraf bazlı bölme
+        paragraphs = self._split_into_paragraphs(text)
+        
+        chunks = []
+        current_chunk = ""
+        current_tokens = 0
+        chunk_index = 0
+        start_char = 0
+        
+        for para in paragraphs:
+            para_tokens = self.count_tokens(para)
+            
+            # Paragraf tek başına çok büyükse, cümlelere böl
+            if para_tokens > self.chunk_size:
+                # Mevcut chunk'ı kaydet
+                if current_chunk:
+                    chunks.append(self._create_chunk(
+                        current_chunk, chunk_index, start_char, metadata
+                    ))
+                    chunk_index += 1
+                
+                # Büyük paragrafı cümlelere böl
+                sentence_chunks = self._chunk_long_paragraph(para, start_char, chunk_index, metadata)
+                chunks.extend(sentence_chunks)
+                chunk_index += len(sentence_chunks)
+                start_char += len(para) + 1
+                current_chunk = ""
+                current_tokens = 0
+                continue
+            
+            # Chunk'a eklenebilir mi kontrol et
+            if current_tokens + para_tokens <= self.chunk_size:
+                if current_chunk:
+                    current_chunk += "\n\n" + para
+                else:
+                    current_chunk = para
+                current_tokens += para_tokens
+            else:
+                # Mevcut chunk'ı kaydet
+                if current_chunk:
+                    chunks.append(self._create_chunk(
+                        current_chunk, chunk_index, start_char, metadata
+                    ))
+                    chunk_index += 1
+                    start_char += len(current_chunk) + 2
+                
+                # Overlap ile yeni chunk başlat
+                overlap_text = self._get_overlap_text(current_chunk)
+                current_chunk = overlap_text + para if overlap_text else para
+                current_tokens = self.count_tokens(current_chunk)
+        
+        # Son chunk'ı kaydet
+        if current_chunk:
+            chunks.append(self._create_chunk(
+                current_chunk, chunk_index, start_char, metadata
+            ))
+        
+        return chunks
+    
+    def _split_into_paragraphs(self, text: str) -> List[str]:
+        """Metni paragraflara böl"""
+        paragraphs = text.split("\n\n")
+        return [p.strip() for p in paragraphs if p.strip()]
+    
+    def _chunk_long_paragraph(
+        self,
+        text: str,
+        start_char: int,
+        start_index: int,
+        metadata: Optional[Dict[str, Any]]
+    ) -> List[ChunkResult]:
+        """Uzun paragrafı cümlelere bölerek chunk'la"""
+        import re
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+        
+        chunks = []
+        current_chunk = ""
+        current_tokens = 0
+        chunk_index = start_index
+        current_start = start_char
+        
+        for sentence in sentences:
+            sentence_tokens = self.count_tokens(sentence)
+            
+            if current_tokens + sentence_tokens <= self.chunk_size:
+                current_chunk += (" " if current_chunk else "") + sentence
+                current_tokens += sentence_tokens
+            else:
+                if current_chunk:
+                    chunks.append(self._create_chunk(
+                        current_chunk, chunk_index, current_start, metadata
+                    ))
+                    chunk_index += 1
+                    current_start += len(current_chunk) + 1
+                
+                current_chunk = sentence
+                current_tokens = sentence_tokens
+        
+        if current_chunk:
+            chunks.append(self._create_chunk(
+                current_chunk, chunk_index, current_start, metadata
+            ))
+        
+        return chunks
+    
+    def _get_overlap_text(self, text: str) -> str:
+        """Overlap için son kısmı al"""
+        if not text or self.chunk_overlap <= 0:
+            return ""
+        
+        tokens = self.tokenizer.encode(text)
+        if len(tokens) <= self.chunk_overlap:
+            return text
+        
+        overlap_tokens = tokens[-self.chunk_overlap:]
+        return self.tokenizer.decode(overlap_tokens)
+    
+    def _create_chunk(
+        self,
+        content: str,
+        index: int,
+        start_char: int,
+        metadata: Optional[Dict[str, Any]]
+    ) -> ChunkResult:
+        """ChunkResult oluştur"""
+        return ChunkResult(
+            content=content.strip(),
+            index=index,
+            token_count=self.count_tokens(content),
+            start_char=start_char,
+            end_char=start_char + len(content),
+            metadata=metadata or {}
+        )
+
+
+def make_text(size_mb: float, seed: int = 42) -> str:
+    """Random prose: sentences of 5-25 words, paragraphs of 1-8 sentences"""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    paragraphs: List[str] = []
+    length = 0
+    while length < target:
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            words = rng.choices(WORDS, k=rng.randint(5, 25))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def run(chunker: TextChunker, text: str, repeat: int) -> Dict[str, Any]:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunker.chunk_text(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    exact = sum(1 for c in chunks if text[c.start_char:c.end_char] == c.content)
+    return {"seconds": best, "chunks": len(chunks), "exact_offsets": exact}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TextChunker against the previous implementation")
+    parser.add_argument("--sizes", default="1,10", help="Comma separated input sizes in MB")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size (best time is reported)")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the current chunker")
+    args = parser.parse_args()
+
+    current = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    legacy = LegacyTextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    if current.tokenizer is None:
+        print("❌ tiktoken encoding could not be loaded - the comparison needs the real tokenizer")
+        return
+
+    for size in [float(s) for s in args.sizes.split(",")]:
+        text = make_text(size)
+        print(f"\n📄 {size:g} MB ({len(text):,} chars)")
+
+        new = run(current, text, args.repeat)
+        print(f"  ⚡ current: {new['seconds']:.2f}s, {new['chunks']} chunks, "
+              f"{new['exact_offsets']}/{new['chunks']} exact offsets")
+
+        if args.skip_legacy:
+            continue
+        old = run(legacy, text, args.repeat)
+        print(f"  🐢 legacy:  {old['seconds']:.2f}s, {old['chunks']} chunks, "
+              f"{old['exact_offsets']}/{old['chunks']} exact offsets")
+        print(f"  📊 speedup: {old['seconds'] / new['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
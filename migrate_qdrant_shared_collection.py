@@ -0,0 +1,145 @@
+"""
+Migration script: Move per-source PKB collections into the shared collection
+Copies every point (vector + payload) of each source's own Qdrant collection
+into QDRANT_SHARED_COLLECTION with user_id/source_id in the payload, then
+points Source.pkb_collection_name (and PKBChunk rows) at the shared collection
+
+Sources whose embedding model doesn't match the shared collection's vector
+size (text-embedding-3-large) keep their own collection.
+
+Safe to re-run: point IDs in the shared collection are derived from the old
+collection name and point ID, so a second run overwrites instead of duplicating.
+
+Usage:
+    python migrate_qdrant_shared_collection.py [--dry-run] [--delete-old] [--source-id 12]
+"""
+
+import argparse
+import logging
+import uuid
+from typing import Dict, Tuple
+
+from app.database import SessionLocal
+from app.models.source import Source
+from app.models.rag import PKBChunk
+from app.services.rag_service import (
+    VectorStoreService, SHARED_COLLECTION_DIMENSIONS, SHARED_PAYLOAD_INDEXES, shared_collection_name
+)
+
+logging.basicConfig(level=logging.INFO)
+
+PAGE_SIZE = 256
+
+
+def shared_point_id(collection_name: str, point_id) -> str:
+    """Stable ID of a migrated point in the shared collection"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"qdrant://{collection_name}/{point_id}"))
+
+
+def migrate_source(vector_store: VectorStoreService, source: Source, shared: str, dry_run: bool) -> Tuple[int, Dict[str, str]]:
+    """
+    Copy one source's collection into the shared collection
+
+    Returns:
+        (points copied, old point ID -> shared point ID)
+    """
+    old_collection = source.pkb_collection_name
+    moved = 0
+    offset = None
+    id_map = {}
+
+    while True:
+        points, offset = vector_store.scroll_points(
+            old_collection, limit=PAGE_SIZE, offset=offset, with_vector=not dry_run
+        )
+        if not points:
+            break
+        moved += len(points)
+
+        if not dry_run:
+            if len(points[0]["vector"]) != SHARED_COLLECTION_DIMENSIONS:
+                raise ValueError(
+                    f"{len(points[0]['vector'])}-dimensional vectors don't fit the shared collection"
+                )
+            batch = []
+            for point in points:
+                new_id = shared_point_id(old_collection, point["id"])
+                id_map[str(point["id"])] = new_id
+                batch.append({
+                    "id": new_id,
+                    "vector": point["vector"],
+                    "payload": {
+                        **(point.get("payload") or {}),
+                        "user_id": source.user_id,
+                        "source_id": source.id
+                    }
+                })
+            vector_store.create_collection(
+                shared,
+                dimensions=len(batch[0]["vector"]),
+                payload_indexes=SHARED_PAYLOAD_INDEXES
+            )
+            vector_store.upsert_vectors(shared, batch)
+
+        if offset is None:
+            break
+
+    return moved, id_map
+
+
+def migrate(dry_run: bool = False, delete_old: bool = False, source_id: int = None):
+    """Move every per-source PKB collection into the shared collection"""
+    shared = shared_collection_name()
+    vector_store = VectorStoreService()
+    if not vector_store.client:
+        print("❌ Qdrant is not reachable")
+        return
+
+    db = SessionLocal()
+    try:
+        query = db.query(Source).filter(
+            Source.pkb_collection_name.isnot(None),
+            Source.pkb_collection_name != shared
+        )
+        if source_id:
+            query = query.filter(Source.id == source_id)
+        sources = query.all()
+        print(f"📦 {len(sources)} sources with their own collection")
+
+        total = 0
+        for source in sources:
+            old_collection = source.pkb_collection_name
+            try:
+                moved, id_map = migrate_source(vector_store, source, shared, dry_run)
+            except Exception as e:
+                print(f"❌ Source {source.id} ({old_collection}): {e}")
+                continue
+            total += moved
+
+            if dry_run:
+                print(f"ℹ️  Source {source.id}: {moved} points would be moved from {old_collection}")
+                continue
+
+            source.pkb_collection_name = shared
+            for chunk in db.query(PKBChunk).filter(PKBChunk.source_id == source.id):
+                chunk.vector_collection = shared
+                if chunk.vector_point_id in id_map:
+                    chunk.vector_point_id = id_map[chunk.vector_point_id]
+            db.commit()
+            print(f"✅ Source {source.id}: {moved} points moved from {old_collection}")
+
+            if delete_old:
+                vector_store.delete_collection(old_collection)
+
+        print(f"{'ℹ️  Would move' if dry_run else '✅ Moved'} {total} points into {shared}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move per-source PKB collections into the shared collection")
+    parser.add_argument("--dry-run", action="store_true", help="Only count points to move")
+    parser.add_argument("--delete-old", action="store_true", help="Delete each old collection after moving it")
+    parser.add_argument("--source-id", type=int, help="Migrate a single source")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run, delete_old=args.delete_old, source_id=args.source_id)
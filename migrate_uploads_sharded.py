@@ -0,0 +1,39 @@
+"""
+Migration script: Re-shard the uploads folder
+Moves files from the flat uploads/<file_id>.ext layout into
+uploads/ab/cd/<file_id>.ext and records them in the file_id index
+
+Usage:
+    python migrate_uploads_sharded.py [--dry-run] [--path ./uploads]
+"""
+
+import argparse
+import logging
+
+from app.services.storage import FileStorageService
+
+logging.basicConfig(level=logging.INFO)
+
+
+def migrate(base_path: str, dry_run: bool = False):
+    """Move legacy flat uploads into shard directories"""
+    storage = FileStorageService(base_path=base_path)
+    try:
+        moved = storage.reshard_legacy_files(dry_run=dry_run)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    
+    if dry_run:
+        print(f"ℹ️  {moved} files would be moved")
+    else:
+        indexed = storage.file_index.count() if storage.file_index else 0
+        print(f"✅ {moved} files moved ({indexed} files indexed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-shard the uploads folder")
+    parser.add_argument("--path", default="./uploads", help="Uploads folder")
+    parser.add_argument("--dry-run", action="store_true", help="Only list files to move")
+    args = parser.parse_args()
+    migrate(args.path, dry_run=args.dry_run)
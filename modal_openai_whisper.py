@@ -3,6 +3,8 @@ Modal OpenAI Whisper - cuDNN SORUNSUZ
 OpenAI'ın resmi Whisper'ı - PyTorch ile direkt çalışır
 """
 
+import os
+
 import modal
 
 app = modal.App("mp4totext-openai-whisper")
@@ -49,7 +51,6 @@ class OpenAIWhisperTranscriber:
         """
         import requests
         import tempfile
-        import time
         
         print(f"📥 Downloading audio: {audio_url[:80]}...")
         
@@ -62,6 +63,38 @@ class OpenAIWhisperTranscriber:
             tmp.write(response.content)
             tmp_path = tmp.name
         
+        try:
+            return self._transcribe_file(tmp_path, language)
+        finally:
+            os.unlink(tmp_path)
+    
+    @modal.method()
+    def transcribe_chunk(self, audio: bytes, language: str = None):
+        """
+        Transcribe one chunk of a longer recording (parallel fan-out)
+        
+        Args:
+            audio: Encoded audio of the chunk (Ogg/Opus)
+            language: Dil kodu (None = auto-detect)
+        
+        Returns:
+            Dict: same as transcribe(), timestamps relative to the chunk
+        """
+        import tempfile
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".ogg") as tmp:
+            tmp.write(audio)
+            tmp_path = tmp.name
+        
+        try:
+            return self._transcribe_file(tmp_path, language)
+        finally:
+            os.unlink(tmp_path)
+    
+    def _transcribe_file(self, tmp_path: str, language: str = None):
+        """Local dosyayı transcribe et ve backend formatına çevir"""
+        import time
+        
         print(f"🎙️ Transcribing (language={language or 'auto'})...")
         start_time = time.time()
         
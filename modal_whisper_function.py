@@ -81,7 +81,14 @@ whisper_diarization_image_v6 = (
 
 # Keep old name for compatibility
 whisper_diarization_image_v5 = whisper_diarization_image_v6  # Point to v6
-whisper_diarization_image = whisper_diarization_image_v6  # ACTIVE: v6 with std() fix
+whisper_diarization_image = (
+    whisper_diarization_image_v6  # ACTIVE: v6 with std() fix
+    # Shared speaker/segment alignment (NumPy only), imported as `speaker_alignment`
+    .add_local_file(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "services", "speaker_alignment.py"),
+        "/root/speaker_alignment.py",
+    )
+)
 
 # Create persistent volume for model cache (Whisper + pyannote models)
 volume = modal.Volume.from_name("whisper-diarization-models", create_if_missing=True)
@@ -547,17 +554,20 @@ class WhisperDiarizationModel:
         if not speaker_segments:
             return " ".join([seg["text"] for seg in whisper_segments])
         
+        from speaker_alignment import assign_speakers
+        
+        # Speaker with the most overlap per segment (closest turn if none overlaps)
+        speakers = assign_speakers(
+            [seg["start"] for seg in whisper_segments],
+            [seg["end"] for seg in whisper_segments],
+            speaker_segments,
+            nearest=True
+        )
+        
         merged_text = []
         current_speaker = None
         
-        for seg in whisper_segments:
-            seg_start = seg["start"]
-            seg_end = seg["end"]
-            seg_mid = (seg_start + seg_end) / 2
-            
-            # Find speaker at this timestamp
-            speaker = self._find_speaker_at_time(seg_mid, speaker_segments)
-            
+        for seg, speaker in zip(whisper_segments, speakers):
             # Add speaker label when speaker changes
             if speaker != current_speaker:
                 if current_speaker is not None:
@@ -568,20 +578,6 @@ class WhisperDiarizationModel:
             merged_text.append(seg["text"].strip() + " ")
         
         return "".join(merged_text)
-    
-    def _find_speaker_at_time(self, time: float, speaker_segments: list) -> str:
-        """Find which speaker is speaking at given timestamp"""
-        # Find exact match
-        for seg in speaker_segments:
-            if seg["start"] <= time <= seg["end"]:
-                return seg["speaker"]
-        
-        # If no exact match, find closest speaker
-        closest_speaker = min(
-            speaker_segments,
-            key=lambda s: min(abs(s["start"] - time), abs(s["end"] - time))
-        )
-        return closest_speaker["speaker"]
 
 
 # ==========================================
@@ -0,0 +1,134 @@
+"""
+Unit tests for the PKB answer cache
+"""
+
+import pytest
+
+from app.services.answer_cache import AnswerCache, best_match, normalize_question
+from app.services.embedding_cache import pack_vector
+from tests.fakes import FakeRedis as _FakeRedis
+
+
+class FakeRedis(_FakeRedis):
+    """Adds the counter and hash commands the answer cache uses"""
+
+    def __init__(self):
+        super().__init__()
+        self.hashes = {}
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def expire(self, key, ttl):
+        pass
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = int(fields.get(field, 0)) + amount
+
+
+@pytest.fixture
+def cache():
+    return AnswerCache(redis_client=FakeRedis(), ttl_seconds=60, similarity=0.95, max_questions=2)
+
+
+@pytest.mark.unit
+class TestAnswerCache:
+    """Tests for AnswerCache"""
+
+    def test_reindex_changes_keys(self, cache):
+        """Test invalidate_source() bumps the version so old answers are unreachable"""
+        key = AnswerCache.make_key("summary", 7, cache.source_version(7), style="paragraph", model="gpt-4o-mini")
+        cache.set(key, {"summary": "old"})
+        assert cache.get("summary", key) == {"summary": "old"}
+
+        cache.invalidate_source(7)
+        new_key = AnswerCache.make_key("summary", 7, cache.source_version(7), style="paragraph", model="gpt-4o-mini")
+
+        assert cache.source_version(7) == 1
+        assert new_key != key
+        assert cache.get("summary", new_key) is None
+
+    def test_key_depends_on_model_and_temperature(self):
+        """Test answers of other models or temperatures are not shared"""
+        base = AnswerCache.make_key("chat", 1, 0, model="gpt-4o-mini", temperature=0.7)
+
+        assert base == AnswerCache.make_key("chat", 1, 0, temperature=0.7, model="gpt-4o-mini")
+        assert base != AnswerCache.make_key("chat", 1, 0, model="gpt-4o", temperature=0.7)
+        assert base != AnswerCache.make_key("chat", 1, 0, model="gpt-4o-mini", temperature=0.2)
+
+    def test_rephrased_question_hits_within_radius(self, cache):
+        """Test exact (normalized) and similar questions hit, distant ones miss"""
+        scope = AnswerCache.make_key("chat", 1, 0, model="gpt-4o-mini", temperature=0.7)
+        cache.set_similar(scope, "What is RAG?", [1.0, 0.0, 0.0], {"response": "retrieval"})
+
+        assert normalize_question("  what is  RAG ? ") == normalize_question("What is RAG?")
+        assert cache.get_similar(scope, "what is rag", [0.0, 1.0, 0.0]) == {"response": "retrieval"}
+        assert cache.get_similar(scope, "Explain RAG", [0.99, 0.05, 0.0]) == {"response": "retrieval"}
+        assert cache.get_similar(scope, "Who wrote it?", [0.5, 0.8, 0.0]) is None
+
+    def test_best_match_scores_all_vectors_at_once(self):
+        """Test the closest stored vector wins and zero vectors score 0"""
+        packed = [pack_vector(v) for v in ([0.0, 0.0], [1.0, 0.0], [0.6, 0.8])]
+
+        assert best_match([0.5, 0.7], packed) == (2, pytest.approx(0.9995, abs=1e-3))
+        assert best_match([0.0, 0.0], packed)[1] == 0.0
+        assert best_match([1.0, 0.0], []) == (None, 0.0)
+
+    def test_non_numeric_temperature_is_unprocessable(self):
+        """Test a bad temperature is a 422, not a server error"""
+        from fastapi import HTTPException
+        from app.api.sources import _request_temperature
+
+        assert _request_temperature({}) == 0.7
+        with pytest.raises(HTTPException) as exc_info:
+            _request_temperature({"temperature": "hot"})
+        assert exc_info.value.status_code == 422
+
+    def test_scope_is_bounded(self, cache):
+        """Test a scope stops accepting questions at max_questions"""
+        scope = AnswerCache.make_key("chat", 1, 0, model="gpt-4o-mini", temperature=0.7)
+        for i, vector in enumerate([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]]):
+            cache.set_similar(scope, f"question {i}", vector, {"response": str(i)})
+
+        assert cache.get_similar(scope, "question 1", [0.0, 1.0]) == {"response": "1"}
+        assert cache.get_similar(scope, "question 2", [-1.0, 0.0]) is None
+
+    def test_stats_count_hits_and_misses(self, cache):
+        """Test hits and misses are counted per kind"""
+        cache.set("k", {"questions": []})
+        cache.get("questions", "k")
+        cache.get("questions", "missing")
+        cache.get("summary", "missing")
+
+        stats = cache.stats()
+
+        assert stats["questions"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+        assert stats["summary"] == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+        assert stats["chat"]["hits"] == 0
+
+    def test_unreachable_redis_disables_caching(self):
+        """Test Redis errors make the cache miss instead of failing the request"""
+        class BrokenRedis:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("redis down")
+                return fail
+
+        cache = AnswerCache(redis_client=BrokenRedis())
+
+        assert cache.source_version(1) is None
+        assert cache.get("summary", "k") is None
+        cache.set("k", {"summary": "x"})
+        cache.invalidate_source(1)
+        assert cache.stats()["chat"] == {"hits": 0, "misses": 0, "hit_rate": 0.0}
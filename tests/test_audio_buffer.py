@@ -0,0 +1,99 @@
+"""
+Unit tests for the decode-once audio buffer
+"""
+
+import shutil
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.services import audio_buffer
+from app.services.audio_buffer import (
+    AudioBuffer,
+    AudioDecodeError,
+    buffer_path,
+    get_audio_buffer,
+    release_audio_buffer,
+)
+
+
+@pytest.fixture
+def buffer_dir(tmp_path):
+    with patch.object(audio_buffer.settings, "AUDIO_BUFFER_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def write_pcm(path, seconds=2.0):
+    samples = np.sin(np.arange(int(16000 * seconds)) / 10).astype(np.float32)
+    samples.tofile(path)
+    return samples
+
+
+@pytest.mark.unit
+class TestAudioBuffer:
+    """Tests for AudioBuffer and the per-file cache"""
+
+    def test_slices_are_views_of_the_mapping(self, tmp_path):
+        """Test duration and that slice() returns zero-copy views"""
+        path = tmp_path / "a.f32"
+        samples = write_pcm(path, seconds=2.0)
+
+        buffer = AudioBuffer(path)
+        part = buffer.slice(0.5, 1.0)
+
+        assert buffer.duration == 2.0
+        assert len(part) == 8000
+        np.testing.assert_array_equal(part, samples[8000:16000])
+        assert np.shares_memory(part, buffer.samples)
+        assert len(buffer.slice(1.5)) == 8000
+
+    def test_empty_file(self, tmp_path):
+        """Test silent/empty decodes give an empty buffer instead of failing"""
+        path = tmp_path / "empty.f32"
+        path.touch()
+
+        assert AudioBuffer(path).duration == 0.0
+
+    def test_existing_buffer_is_reused_and_released(self, buffer_dir, tmp_path):
+        """Test a retry reuses the decoded buffer and release deletes it"""
+        write_pcm(buffer_path("abc/../file.mp3"))
+
+        with patch.object(audio_buffer, "decode_to_pcm") as decode:
+            buffer = get_audio_buffer("abc/../file.mp3", tmp_path / "missing.mp3")
+
+        decode.assert_not_called()
+        assert buffer.path.parent == buffer_dir
+        assert buffer.duration == 2.0
+
+        release_audio_buffer("abc/../file.mp3")
+        assert not buffer_path("abc/../file.mp3").exists()
+
+    def test_failed_decode_leaves_no_buffer(self, buffer_dir, tmp_path):
+        """Test a decode error raises and leaves no partial file behind"""
+        def fail(source, output):
+            output.write_bytes(b"\0" * 8)
+            raise AudioDecodeError("bad input")
+
+        with patch.object(audio_buffer, "decode_to_pcm", side_effect=fail):
+            with pytest.raises(AudioDecodeError):
+                get_audio_buffer("broken", tmp_path / "broken.mp3")
+
+        assert list(buffer_dir.iterdir()) == []
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_decode_wav(self, buffer_dir, tmp_path):
+        """Test a 44.1 kHz stereo WAV is decoded to 16 kHz mono once"""
+        import wave
+
+        source = tmp_path / "tone.wav"
+        frames = (np.sin(np.arange(44100) / 20) * 20000).astype(np.int16)
+        with wave.open(str(source), "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(44100)
+            f.writeframes(np.repeat(frames, 2).tobytes())
+
+        buffer = get_audio_buffer("tone", source)
+
+        assert buffer.duration == pytest.approx(1.0, abs=0.01)
+        assert buffer.samples.dtype == np.float32
@@ -0,0 +1,91 @@
+"""
+Unit tests for the token-aware chunk planner
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app.services.chunk_planner import ChunkPlanner, ModelLimits, get_model_limits, invalidate_model_limits
+
+
+def word_counter(text):
+    """One token per word keeps the expected numbers readable"""
+    return len(text.split())
+
+
+def make_text(paragraphs=10, sentences=10, words=10):
+    return "\n\n".join(
+        " ".join(
+            " ".join(f"w{p}_{s}_{w}" for w in range(words)) + "."
+            for s in range(sentences)
+        )
+        for p in range(paragraphs)
+    )
+
+
+@pytest.mark.unit
+class TestChunkPlanner:
+    """Tests for ChunkPlanner"""
+
+    def test_text_that_fits_is_one_call(self):
+        """Test text within budget is not split"""
+        planner = ChunkPlanner(ModelLimits(context_window=100000, max_output_tokens=8000), word_counter)
+        text = make_text()
+
+        assert planner.plan(text, prompt_tokens=500, output_ratio=1.0) == [text]
+
+    def test_output_budget_limits_chunk_size(self):
+        """Test chunks respect the output budget and use the fewest calls"""
+        planner = ChunkPlanner(ModelLimits(context_window=100000, max_output_tokens=400), word_counter)
+        text = make_text()  # 1000 words, budget 360 → 3 calls
+
+        chunks = planner.plan(text, prompt_tokens=500, output_ratio=1.0)
+
+        assert len(chunks) == 3
+        assert all(word_counter(c) <= planner.input_budget(500, 1.0) for c in chunks)
+        # Balanced sizes and nothing lost or duplicated
+        assert max(word_counter(c) for c in chunks) - min(word_counter(c) for c in chunks) <= 100
+        assert " ".join(" ".join(chunks).split()) == " ".join(text.split())
+
+    def test_long_paragraph_split_at_sentences(self):
+        """Test a paragraph larger than the budget is cut at sentence boundaries"""
+        planner = ChunkPlanner(ModelLimits(context_window=100000, max_output_tokens=300), word_counter)
+        text = make_text(paragraphs=1, sentences=60, words=10)
+
+        chunks = planner.plan(text, output_ratio=1.0)
+
+        assert len(chunks) > 1
+        assert all(c.endswith(".") for c in chunks)
+
+    def test_context_window_limits_single_call(self):
+        """Test fit() trims only when the context window is exceeded"""
+        planner = ChunkPlanner(ModelLimits(context_window=1000, max_output_tokens=500), word_counter)
+        text = make_text()
+
+        fitted = planner.fit(text, prompt_tokens=100, output_tokens=200)
+
+        assert word_counter(fitted) <= 1000
+        assert text.startswith(fitted)
+        assert planner.fit("short text.", 100, 200) == "short text."
+
+
+@pytest.mark.unit
+class TestModelLimits:
+    """Tests for model limit lookup"""
+
+    def test_database_values_override_defaults(self):
+        """Test AIModelPricing values win over built-in defaults"""
+        invalidate_model_limits()
+        db_limits = ModelLimits(context_window=32000, max_output_tokens=0)
+        with patch('app.services.chunk_planner._load_db_limits', return_value=db_limits):
+            limits = get_model_limits("meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo", "together")
+
+        assert limits == ModelLimits(context_window=32000, max_output_tokens=800)
+
+    def test_defaults_when_database_unavailable(self):
+        """Test provider defaults are used if the lookup fails"""
+        invalidate_model_limits()
+        with patch('app.services.chunk_planner._load_db_limits', side_effect=Exception("no db")):
+            limits = get_model_limits("gemini-2.5-flash", "gemini")
+
+        assert limits.max_output_tokens == 8192
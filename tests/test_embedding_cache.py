@@ -0,0 +1,122 @@
+"""
+Unit tests for the embedding cache and the batched embedding pipeline
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services import rag_service
+from app.services.rag_service import EmbeddingModel, EmbeddingRateLimiter, EmbeddingService, pack_batches
+from tests.fakes import FakeRedis as _FakeRedis
+
+
+class FakeRedis(_FakeRedis):
+    """Adds the multi-get the embedding cache uses"""
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+def make_service(cache):
+    """EmbeddingService with a fake OpenAI client that returns [len(text), 0.5]"""
+    service = EmbeddingService(cache=cache)
+    client = MagicMock()
+    client.embeddings.create.side_effect = lambda input, model: SimpleNamespace(
+        data=[SimpleNamespace(embedding=[float(len(text)), 0.5]) for text in input],
+        usage=SimpleNamespace(total_tokens=10 * len(input))
+    )
+    service.openai_client = client
+    return service
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache and the cached EmbeddingService"""
+
+    def test_vectors_round_trip_as_float16(self):
+        """Test vectors are stored packed (2 bytes per dimension)"""
+        redis = FakeRedis()
+        cache = EmbeddingCache(redis_client=redis)
+
+        cache.set_many("m", {"h": [0.25, -1.5, 3.0]})
+
+        assert cache.get_many("m", ["h", "other"]) == {"h": [0.25, -1.5, 3.0]}
+        assert len(redis.values["embedding_cache:vec:m:h"]) == 6
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test the entry limit drops the oldest vectors"""
+        redis = FakeRedis()
+        cache = EmbeddingCache(redis_client=redis, max_entries=2)
+
+        for name in ("a", "b", "c"):
+            cache.set_many("m", {name: [1.0]})
+            redis.zsets[cache.lru_key][f"m:{name}"] = ord(name)
+
+        assert set(cache.get_many("m", ["a", "b", "c"])) == {"b", "c"}
+
+    def test_only_new_texts_are_embedded(self):
+        """Test a second batch only sends texts that are not cached yet"""
+        service = make_service(EmbeddingCache(redis_client=FakeRedis()))
+
+        service.get_embeddings_batch(["alpha", "beta"])
+        results = service.get_embeddings_batch(["alpha", "beta", "gamma", "gamma"], token_counts=[1, 1, 10, 10])
+
+        sent = [call.kwargs["input"] for call in service.openai_client.embeddings.create.call_args_list]
+        assert sent == [["alpha", "beta"], ["gamma"]]
+        assert [r.embedding[0] for r in results] == [5.0, 4.0, 5.0, 5.0]
+        assert [r.token_count for r in results] == [0, 0, 10, 0]
+        assert results[0].model == EmbeddingModel.OPENAI_SMALL.value
+
+    def test_query_embedding_uses_cache(self):
+        """Test repeated chat questions hit the cache"""
+        service = make_service(EmbeddingCache(redis_client=FakeRedis()))
+
+        first = service.get_embedding("what is RAG?")
+        second = service.get_embedding("what is RAG?")
+
+        assert service.openai_client.embeddings.create.call_count == 1
+        assert first.embedding == second.embedding
+
+
+@pytest.mark.unit
+class TestEmbeddingBatches:
+    """Tests for token-packed, rate-limited embedding batches"""
+
+    def test_batches_are_packed_by_tokens(self):
+        """Test a batch closes when the token budget or item limit is reached"""
+        assert pack_batches([40, 40, 40, 10, 200], max_tokens=100, max_items=10) == [[0, 1], [2, 3], [4]]
+        assert pack_batches([1, 1, 1], max_tokens=100, max_items=2) == [[0, 1], [2]]
+
+    def test_rate_limiter_waits_for_tokens(self):
+        """Test acquire() sleeps until the token bucket refills"""
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with patch.object(rag_service.time, "monotonic", lambda: clock[0]), \
+                patch.object(rag_service.time, "sleep", sleep):
+            limiter = EmbeddingRateLimiter(tokens_per_minute=600, requests_per_minute=1000)
+            assert limiter.acquire(500) == 0
+            waited = limiter.acquire(200)
+
+        assert waited == pytest.approx(10.0)  # 100 missing tokens at 10 tokens/s
+
+    def test_parallel_batches_report_progress_and_chunk_tokens(self):
+        """Test every batch is sent, progress reaches the total and token counts are per chunk"""
+        service = make_service(EmbeddingCache(redis_client=FakeRedis()))
+        texts = [f"chunk {i}" for i in range(7)]
+        progress = []
+
+        with patch.object(rag_service, "get_embedding_rate_limiter", return_value=MagicMock()):
+            results = service.get_embeddings_batch(
+                texts, batch_size=3, token_counts=[5, 6, 7, 8, 9, 10, 11],
+                progress_callback=lambda done, total: progress.append((done, total))
+            )
+
+        assert service.openai_client.embeddings.create.call_count == 3
+        assert [r.text for r in results] == texts
+        assert [r.token_count for r in results] == [5, 6, 7, 8, 9, 10, 11]
+        assert progress[0] == (0, 7) and progress[-1] == (7, 7)
@@ -166,3 +166,69 @@ class TestGeminiService:
         service2 = get_gemini_service()
         
         assert service1 is service2
+
+
+@pytest.mark.unit
+class TestChunkedProcessing:
+    """Test concurrent chunk processing for long texts"""
+
+    @staticmethod
+    def _service(provider="groq"):
+        service = GeminiService.__new__(GeminiService)
+        service.use_groq = provider == "groq"
+        service.use_together = provider == "together"
+        service.use_openai = provider == "openai"
+        return service
+
+    @pytest.mark.asyncio
+    async def test_chunks_run_concurrently_and_keep_order(self):
+        """Test chunks run in parallel up to the provider limit, results in order"""
+        import threading
+        import time
+
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0}
+        progress = []
+
+        async def process(i, chunk):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            time.sleep(0.05 * (5 - i))  # blocking call, later chunks finish first
+            with lock:
+                state["in_flight"] -= 1
+            return chunk.upper()
+
+        service = self._service("groq")
+        with patch('app.services.gemini_service.get_settings') as mock_settings:
+            mock_settings.return_value.GROQ_CHUNK_CONCURRENCY = 2
+            mock_settings.return_value.AI_CHUNK_MAX_RETRIES = 0
+            results = await service._process_chunks(
+                ["a", "b", "c", "d", "e"], process,
+                progress_callback=lambda done, total: progress.append((done, total))
+            )
+
+        assert results == ["A", "B", "C", "D", "E"]
+        assert state["peak"] == 2
+        assert progress[-1] == (5, 5)
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_is_retried(self):
+        """Test a failing chunk is retried without redoing the others"""
+        calls = {"a": 0, "b": 0}
+
+        async def process(i, chunk):
+            calls[chunk] += 1
+            if chunk == "b" and calls["b"] == 1:
+                raise RuntimeError("rate limited")
+            return chunk
+
+        service = self._service("openai")
+        with patch('app.services.gemini_service.get_settings') as mock_settings, \
+             patch('app.services.gemini_service.asyncio.sleep', new=AsyncMock()):
+            mock_settings.return_value.OPENAI_CHUNK_CONCURRENCY = 4
+            mock_settings.return_value.AI_CHUNK_MAX_RETRIES = 2
+            results = await service._process_chunks(["a", "b"], process)
+
+        assert results == ["a", "b"]
+        assert calls == {"a": 1, "b": 2}
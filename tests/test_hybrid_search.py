@@ -0,0 +1,97 @@
+"""
+Unit tests for hybrid (BM25 + vector) PKB retrieval
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - register related mappers
+from app.models.rag import PKBChunk
+from app.services import hybrid_search
+from app.services.hybrid_search import (
+    BM25Index, CrossEncoderReranker, hybrid_rank, reciprocal_rank_fusion, tokenize
+)
+from app.services.rag_service import SearchResult
+
+
+def doc(chunk_id, content, score=0.0):
+    return SearchResult(chunk_id=chunk_id, content=content, score=score, metadata={})
+
+
+DOCS = [
+    doc("a", "Toplantıda bütçe ve yeni işe alımlar konuşuldu."),
+    doc("b", "Kubernetes kümesi İstanbul'daki veri merkezine taşınacak."),
+    doc("c", "Proje takvimi iki hafta ertelendi, bütçe aynı kaldı."),
+]
+
+
+@pytest.mark.unit
+class TestHybridSearch:
+    """Tests for BM25, rank fusion and reranking"""
+
+    def test_tokenize_handles_turkish_casing_and_suffixes(self):
+        """Test İ/I casing and suffixes map to the same prefix term"""
+        assert tokenize("İstanbul'daki") == ["istan", "daki"]
+        assert tokenize("istanbul")[0] == tokenize("İSTANBUL")[0]
+
+    def test_bm25_finds_rare_terms(self):
+        """Test a proper noun query ranks the chunk that contains it first"""
+        results = BM25Index(DOCS).search("Kubernetes İstanbul", top_k=2)
+
+        assert [r.chunk_id for r in results] == ["b"]
+        assert results[0].score > 0
+
+    def test_rank_fusion_rewards_agreement(self):
+        """Test a chunk ranked by both lists beats chunks ranked by one"""
+        fused = reciprocal_rank_fusion([
+            [doc("x", "", 0.9), doc("y", "", 0.8)],
+            [doc("y", ""), doc("z", "")],
+        ])
+
+        assert [r.chunk_id for r in fused] == ["y", "x", "z"]
+        assert 0 < fused[-1].score < fused[0].score <= 1.0
+
+    def test_keyword_hit_missing_from_vectors_is_returned(self):
+        """Test BM25 rescues a chunk the vector search did not return"""
+        vector_results = [doc("a", DOCS[0].content, 0.31), doc("c", DOCS[2].content, 0.29)]
+
+        results = hybrid_rank("Kubernetes nereye taşınacak?", vector_results, BM25Index(DOCS), top_k=2)
+
+        assert "b" in [r.chunk_id for r in results]
+
+    def test_reranker_reorders_by_model_score(self):
+        """Test the cross-encoder decides the final order when enabled"""
+        class FakeModel:
+            def predict(self, pairs):
+                return [3.0 if "Kubernetes" in content else -1.0 for _, content in pairs]
+
+        reranker = CrossEncoderReranker("fake")
+        reranker._model = FakeModel()
+
+        results = reranker.rerank("küme nerede?", DOCS, top_k=2)
+
+        assert results[0].chunk_id == "b" and results[0].score > 0.9
+        assert len(results) == 2
+
+    def test_chunk_index_is_rebuilt_when_rows_change(self):
+        """Test the cached index follows PKBChunk inserts"""
+        engine = create_engine("sqlite://")
+        PKBChunk.__table__.create(engine)
+        db = sessionmaker(bind=engine)()
+
+        def add(chunk_id, content):
+            db.add(PKBChunk(source_id=9, user_id=1, chunk_id=chunk_id, chunk_index=0,
+                            content=content, vector_point_id=chunk_id))
+            db.commit()
+
+        add("p1", "Bütçe toplantısı")
+        first = hybrid_search._chunk_index(db, 9)
+        assert hybrid_search._chunk_index(db, 9) is first
+
+        add("p2", "Kubernetes göçü")
+        second = hybrid_search._chunk_index(db, 9)
+        assert second is not first
+        assert [r.chunk_id for r in second.search("kubernetes")] == ["p2"]
+        assert hybrid_search._chunk_index(db, 10) is None
+        db.close()
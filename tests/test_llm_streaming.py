@@ -0,0 +1,224 @@
+"""
+Unit tests for LLM token streaming helpers
+"""
+
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.llm_streaming import StreamCharge, TokenStream, iterate_in_thread, sse_event, stream_chat_completion
+from app.services.rag_service import LLMModel, LLMService
+
+
+def chat_chunk(text=None, usage=None):
+    """OpenAI-style stream chunk (the usage chunk has no choices)"""
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def fake_client(chunks):
+    client = MagicMock()
+    client.chat.completions.create.return_value = iter(chunks)
+    return client
+
+
+@pytest.mark.unit
+class TestTokenStream:
+    """Tests for TokenStream and the OpenAI-compatible stream"""
+
+    def test_deltas_and_reported_usage(self):
+        """Test text deltas are yielded in order and the final usage chunk is used"""
+        client = fake_client([
+            chat_chunk("Mer"),
+            chat_chunk("haba"),
+            chat_chunk(""),
+            chat_chunk(usage=SimpleNamespace(prompt_tokens=12, completion_tokens=3)),
+        ])
+        messages = [{"role": "user", "content": "selam"}]
+
+        stream = stream_chat_completion(client, "gpt-4o-mini", messages, temperature=0.3, max_tokens=100)
+
+        assert list(stream) == ["Mer", "haba"]
+        assert stream.text == "Merhaba"
+        assert (stream.input_tokens, stream.output_tokens) == (12, 3)
+        assert stream.first_token_seconds is not None
+        params = client.chat.completions.create.call_args.kwargs
+        assert params["stream"] is True
+        assert params["extra_body"] == {"stream_options": {"include_usage": True}}
+        assert params["max_tokens"] == 100
+
+    def test_groq_usage(self):
+        """Test usage reported under x_groq (Groq SDK) is read"""
+        groq_last = SimpleNamespace(choices=[], usage=None, x_groq={"usage": {"prompt_tokens": 7, "completion_tokens": 2}})
+        client = fake_client([chat_chunk("a"), groq_last])
+
+        stream = stream_chat_completion(client, "llama-3.3-70b-versatile", [], temperature=0.3)
+
+        assert list(stream) == ["a"]
+        assert (stream.input_tokens, stream.output_tokens) == (7, 2)
+        assert "max_tokens" not in client.chat.completions.create.call_args.kwargs
+
+    def test_usage_is_estimated_without_usage_chunk(self):
+        """Test token counts fall back to count_tokens() when the provider sends no usage"""
+        messages = [{"role": "user", "content": "word " * 40}]
+        stream = TokenStream(iter(["one ", "two ", "three"]), lambda c: c, messages)
+
+        assert "".join(stream) == "one two three"
+        assert stream.usage is None
+        assert stream.input_tokens > 0 and stream.output_tokens > 0
+
+    def test_llm_service_streams_openai_models(self):
+        """Test LLMService.stream_response uses the OpenAI client's streaming API"""
+        service = LLMService.__new__(LLMService)
+        service.openai_client = fake_client([chat_chunk("ok"), chat_chunk(usage={"prompt_tokens": 5, "completion_tokens": 1})])
+
+        stream = service.stream_response([{"role": "user", "content": "hi"}], model=LLMModel.GPT4O_MINI)
+
+        assert list(stream) == ["ok"]
+        assert stream.output_tokens == 1
+        assert service.openai_client.chat.completions.create.call_args.kwargs["model"] == "gpt-4o-mini"
+
+
+@pytest.mark.unit
+class TestServerSentEvents:
+    """Tests for SSE framing"""
+
+    def test_event_format(self):
+        """Test events are framed as 'event/data' lines ending with a blank line"""
+        event = sse_event("token", {"text": "çalış\nma"})
+
+        name, data, *rest = event.split("\n")
+        assert name == "event: token"
+        assert json.loads(data[len("data: "):]) == {"text": "çalış\nma"}
+        assert event.endswith("\n\n")
+
+    def test_iterate_in_thread(self):
+        """Test a blocking iterator is consumed from async code in order"""
+        async def collect():
+            return [item async for item in iterate_in_thread(iter([1, 2, 3]))]
+
+        assert asyncio.run(collect()) == [1, 2, 3]
+
+
+def read_events(response, count):
+    """Read `count` SSE events from a StreamingResponse, then disconnect"""
+    async def consume():
+        body = response.body_iterator
+        events = [await body.__anext__() for _ in range(count)]
+        await body.aclose()
+        return events
+
+    return asyncio.run(consume())
+
+
+@pytest.mark.unit
+class TestStreamCharge:
+    """Tests for charging streamed responses exactly once"""
+
+    def test_completed_stream_is_charged_once(self):
+        """Test settle() charges the full text once and close() does nothing after it"""
+        charge = MagicMock(return_value="body")
+        billing = StreamCharge(charge)
+        billing.delivered("a")
+        billing.delivered("b")
+
+        assert billing.settle() == "body"
+        billing.close()
+
+        charge.assert_called_once_with("ab", True)
+
+    def test_abandoned_and_failed_streams(self):
+        """Test close() charges delivered output, but not failed or empty streams"""
+        charge = MagicMock()
+        billing = StreamCharge(charge)
+        billing.delivered("partial")
+        billing.close()
+        charge.assert_called_once_with("partial", False)
+
+        failed = StreamCharge(charge)
+        failed.delivered("x")
+        failed.failed = True
+        failed.close()
+        StreamCharge(charge).close()
+        assert charge.call_count == 1
+
+
+@pytest.mark.unit
+class TestAbandonedStreamsAreCharged:
+    """Tests that a client who stops reading mid-stream is still charged"""
+
+    def test_post_processing_stream(self):
+        """Test _stream_ai_response charges the delivered text when the client disconnects"""
+        from app.api.transcription import _stream_ai_response
+
+        gemini = MagicMock(model_name="gemini-2.5-flash")
+        gemini._get_provider_name.return_value = "gemini"
+        gemini.stream_completion.side_effect = lambda messages: TokenStream(iter(["Bir ", "iki ", "üç"]), lambda c: c, messages)
+        settle = AsyncMock()
+        charge = MagicMock()
+
+        response = _stream_ai_response(1, gemini, [[{"role": "user", "content": "x"}]], settle, charge)
+        events = read_events(response, 3)  # start + 2 tokens
+
+        assert events[0].startswith("event: start")
+        settle.assert_not_called()
+        charge.assert_called_once_with("Bir iki ", False)
+
+    def test_abandoned_lecture_notes_are_saved_as_partial(self):
+        """Test the lecture notes charge saves the partial notes when the stream was abandoned"""
+        from app.api import transcription as api
+
+        record = SimpleNamespace(lecture_notes=None, gemini_metadata={})
+        session = MagicMock()
+        session.query.return_value.filter.return_value.first.return_value = record
+        credit_service = MagicMock()
+
+        with patch.object(api, "get_credit_service", return_value=credit_service), \
+             patch.object(api, "_check_stream_credits", return_value=5), \
+             patch.object(api, "_load_for_stream", return_value=MagicMock(original_filename="ders.mp4", language="tr")), \
+             patch.object(api, "_post_processing_source_text", return_value=("metin", "transcript")), \
+             patch.object(api, "_stream_gemini_service"), \
+             patch.object(api, "_stream_ai_response") as stream, \
+             patch("app.database.SessionLocal", return_value=session):
+            asyncio.run(api.generate_lecture_notes_stream(1, "gemini", None, db=MagicMock(), current_user=MagicMock(id=7)))
+            charge = stream.call_args[0][4]
+            charge("# Not", False)
+
+        assert record.lecture_notes == "# Not"
+        assert record.gemini_metadata["lecture_notes_partial"] is True
+        credit_service.deduct_credits.assert_called_once()
+        assert credit_service.deduct_credits.call_args.kwargs["metadata"]["completed"] is False
+
+    def test_pkb_chat_stream(self):
+        """Test PKB chat charges the tokens sent before the client disconnects"""
+        from app.api import sources
+
+        chat = {
+            "cached": None,
+            "results": [],
+            "messages": [{"role": "user", "content": "soru"}],
+            "llm_model_enum": None,
+            "llm_model": "gpt-4o-mini",
+            "temperature": 0.3,
+            "message": "soru",
+        }
+        llm_service = MagicMock()
+        llm_service.stream_response.side_effect = lambda messages, model, temperature: TokenStream(
+            iter(["Cevap ", "burada ", "bitti"]), lambda c: c, messages
+        )
+
+        with patch.object(sources, "_prepare_pkb_chat", AsyncMock(return_value=chat)), \
+             patch("app.services.rag_service.LLMService", return_value=llm_service), \
+             patch("app.database.SessionLocal"), \
+             patch.object(sources, "_charge_pkb_chat") as charge, \
+             patch.object(sources, "_settle_pkb_chat") as settle:
+            response = asyncio.run(sources.chat_with_pkb_stream(1, {}, db=None, current_user=MagicMock(id=7)))
+            read_events(response, 2)  # start + 1 token
+
+        settle.assert_not_called()
+        charge.assert_called_once()
+        args, kwargs = charge.call_args
+        assert args[5] > 0  # output tokens of "Cevap "
+        assert kwargs["completed"] is False
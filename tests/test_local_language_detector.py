@@ -0,0 +1,122 @@
+"""
+Unit tests for local-first language detection
+"""
+
+import shutil
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services import local_language_detector
+from app.services.local_language_detector import (
+    LanguageDetectionCache,
+    average_probabilities,
+    decode_window,
+    detect_language_local,
+    plan_windows,
+)
+from tests.fakes import FakeRedis
+
+
+class FakeDetector:
+    """Stands in for WhisperLanguageDetector (no model)"""
+
+    def __init__(self, probs):
+        self.probs = probs
+        self.calls = []
+
+    def language_probabilities(self, windows):
+        self.calls.append(windows)
+        return self.probs[:len(windows)]
+
+    def build_result(self, probs, elapsed):
+        code = max(probs, key=probs.get)
+        return {"language_code": code, "confidence": probs[code], "detection_time": elapsed}
+
+
+def voiced(seconds=1.0):
+    return (0.1 * np.sin(np.arange(int(16000 * seconds)) / 10)).astype(np.float32)
+
+
+@pytest.mark.unit
+class TestPlanWindows:
+    """Tests for spreading detection windows over a file"""
+
+    def test_long_file_windows_are_spread(self):
+        """Test windows are centred over the file and never leave it"""
+        plan = plan_windows(3600.0, 3, 30.0)
+
+        assert [start for start, _ in plan] == [585.0, 1785.0, 2985.0]
+        assert all(length == 30.0 for _, length in plan)
+
+    def test_short_and_unknown_durations(self):
+        """Test short files get one bounded window and overlapping windows are dropped"""
+        assert plan_windows(12.0, 3, 30.0) == [(0.0, 12.0)]
+        assert plan_windows(None, 3, 30.0) == [(0.0, 30.0)]
+        assert len(plan_windows(70.0, 3, 30.0)) == 2
+
+
+@pytest.mark.unit
+class TestDetectLanguageLocal:
+    """Tests for detect_language_local()"""
+
+    def test_averages_windows_and_caches(self):
+        """Test the averaged distribution decides and the result is cached per hash"""
+        detector = FakeDetector([{"tr": 0.4, "en": 0.6}, {"tr": 0.9, "en": 0.1}, {"tr": 0.8, "en": 0.2}])
+        cache = LanguageDetectionCache(redis_client=FakeRedis(), ttl_seconds=60)
+
+        with patch.object(local_language_detector, "probe_duration", return_value=600.0), \
+             patch.object(local_language_detector, "decode_window", return_value=voiced()) as decode:
+            result = detect_language_local("a.mp4", "hash", detector=detector, cache=cache, windows=3)
+            again = detect_language_local("a.mp4", "hash", detector=detector, cache=cache, windows=3)
+
+        assert result["language_code"] == "tr"
+        assert result["confidence"] == pytest.approx(0.7)
+        assert result["windows"] == 3
+        assert again == result
+        assert decode.call_count == 3
+        assert len(detector.calls) == 1
+
+    def test_silent_windows_are_skipped(self):
+        """Test silent windows are not scored"""
+        detector = FakeDetector([{"en": 1.0}])
+        samples = [np.zeros(16000, dtype=np.float32), voiced()]
+
+        with patch.object(local_language_detector, "probe_duration", return_value=120.0), \
+             patch.object(local_language_detector, "decode_window", side_effect=samples):
+            result = detect_language_local("a.mp3", detector=detector, windows=2, window_seconds=30.0)
+
+        assert result["windows"] == 1
+        assert len(detector.calls[0]) == 1
+
+    def test_average_probabilities(self):
+        """Test languages missing from a window count as zero"""
+        assert average_probabilities([{"en": 1.0}, {"de": 0.5, "en": 0.5}]) == {"en": 0.75, "de": 0.25}
+
+    def test_cache_failure_misses(self):
+        """Test an unreachable Redis does not break detection"""
+        redis_client = MagicMock()
+        redis_client.get.side_effect = ConnectionError("down")
+        cache = LanguageDetectionCache(redis_client=redis_client, ttl_seconds=60)
+
+        assert cache.get("hash") is None
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+class TestDecodeWindow:
+    """Tests for bounded ffmpeg decoding"""
+
+    def test_decodes_only_the_window(self, tmp_path):
+        """Test a window of a 10s WAV decodes to exactly its length"""
+        import wave
+
+        source = tmp_path / "tone.wav"
+        frames = (np.sin(np.arange(16000 * 10) / 20) * 20000).astype(np.int16)
+        with wave.open(str(source), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(frames.tobytes())
+
+        assert len(decode_window(source, 4.0, 2.0)) == 32000
@@ -0,0 +1,188 @@
+"""
+Unit tests for split/map/merge parallel transcription
+"""
+
+import shutil
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.services.parallel_transcription import (
+    LocalChunkBackend,
+    find_split_points,
+    merge_chunk_results,
+    split_audio,
+    strip_repeated_prefix,
+    transcribe_parallel,
+)
+
+SR = 16000
+
+
+def speech_with_pauses(seconds, pauses):
+    """Noise ("speech") with silent gaps at the given (start, end) seconds"""
+    rng = np.random.default_rng(0)
+    samples = (0.2 * rng.standard_normal(int(seconds * SR))).astype(np.float32)
+    for start, end in pauses:
+        samples[int(start * SR):int(end * SR)] = 0.0
+    return samples
+
+
+class UtteranceBackend:
+    """
+    Stands in for Modal: "transcribes" a fixed script of timed utterances
+
+    Each chunk returns every utterance it overlaps, with chunk-relative
+    timestamps, like a real model would around the chunk edges.
+    """
+
+    def __init__(self, utterances):
+        self.utterances = utterances
+
+    def map_chunks(self, chunks, language=None):
+        results = []
+        for chunk in chunks:
+            segments = [
+                {"start": max(start, chunk.start) - chunk.start, "end": min(end, chunk.end) - chunk.start, "text": text}
+                for start, end, text in self.utterances
+                if start < chunk.end and end > chunk.start
+            ]
+            results.append({"segments": segments, "language": "en" if chunk.index else "tr"})
+        return results
+
+
+@pytest.mark.unit
+class TestSplitAudio:
+    """Tests for silence-aligned chunking"""
+
+    def test_cuts_land_in_pauses(self):
+        """Test each cut moves to the pause nearest its target"""
+        samples = speech_with_pauses(100, [(18.0, 19.0), (43.0, 44.0), (61.0, 62.0), (83.0, 84.0)])
+
+        points = find_split_points(samples, chunk_seconds=20, search_seconds=5, sr=SR)
+
+        assert len(points) == 4
+        for point, (start, end) in zip(points, [(18, 19), (43, 44), (61, 62), (83, 84)]):
+            assert start <= point <= end
+
+    def test_short_audio_is_one_chunk(self):
+        """Test audio shorter than a chunk is not split"""
+        chunks = split_audio(np.zeros(SR * 10, dtype=np.float32), chunk_seconds=20, sr=SR)
+
+        assert len(chunks) == 1
+        assert (chunks[0].start, chunks[0].end) == (0.0, 10.0)
+
+    def test_chunks_overlap_and_are_views(self):
+        """Test chunks overlap their neighbours and share memory with the input"""
+        samples = speech_with_pauses(100, [(48.0, 50.0)])
+
+        chunks = split_audio(samples, chunk_seconds=50, overlap_seconds=1.0, sr=SR)
+
+        assert len(chunks) == 2
+        assert chunks[0].own_end == chunks[1].own_start
+        assert chunks[0].end == pytest.approx(chunks[0].own_end + 1.0)
+        assert chunks[1].start == pytest.approx(chunks[1].own_start - 1.0)
+        assert np.shares_memory(chunks[1].samples, samples)
+
+
+@pytest.mark.unit
+class TestMerge:
+    """Tests for stitching chunk transcripts"""
+
+    def test_timestamps_and_boundary_duplicates(self):
+        """Test segments come back in global time, once each"""
+        samples = speech_with_pauses(100, [(48.0, 50.0)])
+        utterances = [(10.0, 20.0, "first part"), (45.0, 48.5, "right before the pause"), (50.5, 60.0, "after it")]
+        backend = UtteranceBackend(utterances)
+
+        result = transcribe_parallel(samples, backend, chunk_seconds=50, overlap_seconds=2.0)
+
+        assert result["chunks"] == 2
+        assert [s["text"] for s in result["segments"]] == [u[2] for u in utterances]
+        assert [s["start"] for s in result["segments"]] == pytest.approx([10.0, 45.0, 50.5])
+        assert [s["id"] for s in result["segments"]] == [0, 1, 2]
+        assert result["text"] == "first part right before the pause after it"
+        assert result["language"] == "en"  # second chunk covers more of the recording
+
+    def test_repeated_words_are_stripped(self):
+        """Test words both chunks heard across a boundary are kept once"""
+        assert strip_repeated_prefix("and then we went home.", "We went home, and slept") == "and slept"
+        assert strip_repeated_prefix("we went", "home again") == "home again"
+        # A single repeated word is not treated as a duplicate
+        assert strip_repeated_prefix("yes", "yes indeed") == "yes indeed"
+
+    def test_word_timestamps_are_shifted(self):
+        """Test word-level timestamps get the chunk offset too"""
+        samples = speech_with_pauses(100, [(48.0, 50.0)])
+        chunks = split_audio(samples, chunk_seconds=50, overlap_seconds=0.0, sr=SR)
+        results = [
+            {"segments": []},
+            {"segments": [{"start": 1.0, "end": 2.0, "text": "hi", "words": [{"word": "hi", "start": 1.0, "end": 2.0}]}]},
+        ]
+
+        merged = merge_chunk_results(chunks, results)
+
+        word = merged["segments"][0]["words"][0]
+        assert word["start"] == pytest.approx(chunks[1].start + 1.0)
+
+
+@pytest.mark.unit
+class TestLocalChunkBackend:
+    """Tests for the in-process stand-in backend"""
+
+    def test_runs_transcribe_fn_per_chunk_in_order(self):
+        """Test results come back in chunk order with the requested language"""
+        samples = speech_with_pauses(100, [(18.0, 19.0), (43.0, 44.0), (61.0, 62.0), (83.0, 84.0)])
+
+        def transcribe(chunk_samples, language):
+            seconds = len(chunk_samples) / SR
+            return {"segments": [{"start": 0.5, "end": seconds - 0.5, "text": f"{seconds:.0f}s"}], "language": language}
+
+        result = transcribe_parallel(samples, LocalChunkBackend(transcribe, max_workers=3),
+                                     language="de", chunk_seconds=20, overlap_seconds=0.0)
+
+        assert result["chunks"] == 5
+        starts = [s["start"] for s in result["segments"]]
+        assert starts == sorted(starts)
+        assert result["language"] == "de"
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+class TestEncodeChunk:
+    """Tests for encoding chunks for Modal"""
+
+    def test_encodes_ogg(self):
+        """Test a chunk is encoded to an Ogg stream"""
+        from app.services.parallel_transcription import encode_chunk
+
+        payload = encode_chunk(speech_with_pauses(5, []))
+
+        assert payload[:4] == b"OggS"
+
+
+@pytest.mark.unit
+class TestParallelEligibility:
+    """Tests for the worker's decision to split a recording"""
+
+    def test_probes_before_decoding(self):
+        """Test the container duration decides without decoding the file"""
+        from app.services import local_language_detector
+        from app.workers.transcription_worker import is_long_enough_for_parallel, settings
+
+        minimum = settings.PARALLEL_TRANSCRIPTION_MIN_SECONDS
+        with patch.object(local_language_detector, "probe_duration", return_value=minimum - 1) as probe, \
+             patch("app.services.audio_buffer.get_audio_buffer") as decode:
+            assert is_long_enough_for_parallel("short.mp3") is False
+            assert is_long_enough_for_parallel("long.mp3", duration=minimum) is True
+
+        probe.assert_called_once_with("short.mp3")
+        decode.assert_not_called()
+
+    def test_unknown_duration_is_not_parallel(self):
+        """Test a file ffprobe cannot read goes the single-request path"""
+        from app.services import local_language_detector
+        from app.workers.transcription_worker import is_long_enough_for_parallel
+
+        with patch.object(local_language_detector, "probe_duration", return_value=None):
+            assert is_long_enough_for_parallel("broken.mp3") is False
@@ -0,0 +1,221 @@
+"""
+Unit tests for the incremental PKB indexer
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register related mappers
+from app.models.rag import PKBChunk
+from app.models.source import Source
+from app.services.pkb_indexer import PKBIndexer, chunk_point_id
+from app.services.rag_service import EmbeddingResult, shared_collection_name
+
+
+class FakeEmbeddingService:
+    """Returns a fixed vector and records which texts were embedded"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def get_embeddings_batch(self, texts, model, token_counts=None, progress_callback=None):
+        self.embedded.extend(texts)
+        return [EmbeddingResult(text, [0.1] * 3, model.value, 1, 3) for text in texts]
+
+
+class FakeVectorStore:
+    """Records point operations on one collection"""
+
+    client = True
+
+    def __init__(self):
+        self.points = {}
+        self.payload_updates = {}
+
+    def create_collection(self, *args, **kwargs):
+        return True
+
+    def delete_collection(self, collection_name):
+        self.points.clear()
+        return True
+
+    def delete_points_by_filter(self, collection_name, filter_conditions):
+        for point_id, payload in list(self.points.items()):
+            if all(payload.get(key) == value for key, value in filter_conditions.items()):
+                del self.points[point_id]
+        return True
+
+    def existing_point_ids(self, collection_name, point_ids):
+        return {point_id for point_id in point_ids if point_id in self.points}
+
+    def upsert_vectors(self, collection_name, points):
+        self.points.update({p["id"]: p["payload"] for p in points})
+        return True
+
+    def set_payloads(self, collection_name, payloads):
+        self.payload_updates.update(payloads)
+        for point_id, payload in payloads.items():
+            self.points[point_id].update(payload)
+        return True
+
+    def delete_points(self, collection_name, point_ids):
+        for point_id in point_ids:
+            self.points.pop(point_id)
+        return True
+
+
+def section(title, sentence, repeat=40):
+    return f"### {title}\n" + " ".join([sentence] * repeat)
+
+
+@pytest.fixture
+def indexer():
+    engine = create_engine("sqlite://")
+    PKBChunk.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    yield PKBIndexer(db, embedding_service=FakeEmbeddingService(), vector_store=FakeVectorStore())
+    db.close()
+
+
+def sync(indexer, content):
+    return indexer.sync(
+        source_id=5, user_id=2, content=content,
+        collection_name=shared_collection_name(), chunk_size=64, chunk_overlap=0
+    )
+
+
+@pytest.mark.unit
+class TestPKBIndexer:
+    """Tests for PKBIndexer"""
+
+    items = [
+        section("Intro", "The cat sat on the mat."),
+        section("Middle", "Dogs like to run in the park."),
+        section("End", "Birds sing early in the morning."),
+    ]
+
+    def test_unchanged_content_embeds_nothing(self, indexer):
+        """Test a second sync of the same content is a no-op"""
+        first = sync(indexer, "\n\n".join(self.items))
+        indexer.embedding_service.embedded.clear()
+        second = sync(indexer, "\n\n".join(self.items))
+
+        assert first["added"] == first["chunk_count"] > 3
+        assert second["added"] == second["removed"] == 0
+        assert second["unchanged"] == first["chunk_count"]
+        assert indexer.embedding_service.embedded == []
+
+    def test_editing_one_item_only_touches_its_chunks(self, indexer):
+        """Test chunks of other items keep their point IDs"""
+        sync(indexer, "\n\n".join(self.items))
+        before = set(indexer.vector_store.points)
+        indexer.embedding_service.embedded.clear()
+
+        edited = [self.items[0], section("Middle", "Horses gallop across the field."), self.items[2]]
+        result = sync(indexer, "\n\n".join(edited))
+
+        after = set(indexer.vector_store.points)
+        assert result["added"] > 0 and result["removed"] > 0
+        assert all("Horses" in text or "Middle" in text for text in indexer.embedding_service.embedded)
+        assert not any("Dogs" in payload["text"] for payload in indexer.vector_store.points.values())
+        assert len(before & after) == result["unchanged"] + result["moved"]
+        rows = indexer.db.query(PKBChunk).order_by(PKBChunk.chunk_index).all()
+        assert [row.vector_point_id for row in rows] == [row.chunk_id for row in rows]
+        assert {row.vector_point_id for row in rows} == after
+
+    def test_removed_item_shifts_positions_without_reembedding(self, indexer):
+        """Test deleting the first item patches the payload positions of the rest"""
+        sync(indexer, "\n\n".join(self.items))
+        indexer.embedding_service.embedded.clear()
+
+        result = sync(indexer, "\n\n".join(self.items[1:]))
+
+        assert result["added"] == 0
+        assert result["moved"] == result["chunk_count"]
+        assert indexer.embedding_service.embedded == []
+        positions = sorted(payload["chunk_idx"] for payload in indexer.vector_store.points.values())
+        assert positions == list(range(result["chunk_count"]))
+
+    def test_rows_without_points_are_reembedded(self, indexer):
+        """Test chunk rows are not trusted once their points are gone"""
+        first = sync(indexer, "\n\n".join(self.items))
+        indexer.vector_store.points.clear()
+        indexer.embedding_service.embedded.clear()
+
+        result = sync(indexer, "\n\n".join(self.items))
+
+        assert result["added"] == first["chunk_count"]
+        assert result["unchanged"] == 0
+        assert len(indexer.vector_store.points) == first["chunk_count"]
+        assert indexer.db.query(PKBChunk).count() == first["chunk_count"]
+
+    def test_point_ids_are_content_defined(self):
+        """Test IDs depend on owner, source, text and occurrence only"""
+        assert chunk_point_id(1, 2, "h") == chunk_point_id(1, 2, "h", 0)
+        assert len({chunk_point_id(1, 2, "h"), chunk_point_id(1, 2, "h", 1), chunk_point_id(1, 3, "h")}) == 3
+
+
+class AsyncStore:
+    """Async facade over FakeVectorStore (what get_vector_store() returns)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def delete_points_by_filter(self, collection_name, filter_conditions):
+        return self.store.delete_points_by_filter(collection_name, filter_conditions)
+
+    async def delete_collection(self, collection_name):
+        return self.store.delete_collection(collection_name)
+
+
+@pytest.mark.unit
+class TestDeleteAndRecreatePKB:
+    """Tests for deleting a PKB through the API and building it again"""
+
+    def test_recreated_pkb_upserts_points(self):
+        """Test a PKB deleted through the API gets its points back on the next build"""
+        from app.api import sources
+        from app.services import pkb_indexer
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Source.__table__.create(engine)
+        PKBChunk.__table__.create(engine)
+        db = sessionmaker(bind=engine)()
+        content = "\n\n".join(TestPKBIndexer.items)
+        collection = shared_collection_name()
+        db.add(Source(id=5, user_id=2, title="Notes", content=content,
+                      pkb_enabled=True, pkb_status="ready", pkb_collection_name=collection))
+        db.commit()
+
+        store, embedder = FakeVectorStore(), FakeEmbeddingService()
+        make_indexer = lambda session: PKBIndexer(session, embedding_service=embedder, vector_store=store)
+
+        def build():
+            with patch("app.database.SessionLocal", return_value=db), \
+                 patch.object(pkb_indexer, "PKBIndexer", side_effect=make_indexer), \
+                 patch("app.services.credit_service.get_credit_service", return_value=MagicMock()), \
+                 patch.object(pkb_indexer, "get_answer_cache"):
+                asyncio.run(sources.process_pkb_creation(5, 2, content, collection, "text-embedding-3-small", 64, 0))
+
+        build()
+        chunk_count = len(store.points)
+        assert chunk_count > 3
+
+        with patch("app.services.rag_service.get_vector_store", return_value=AsyncStore(store)), \
+             patch("app.services.answer_cache.get_answer_cache"):
+            asyncio.run(sources.delete_pkb(source_id=5, db=db, current_user=SimpleNamespace(id=2)))
+        assert store.points == {}
+        assert db.query(PKBChunk).count() == 0
+
+        embedder.embedded.clear()
+        build()
+
+        assert len(store.points) == chunk_count
+        assert len(embedder.embedded) == chunk_count
+        assert db.query(Source).get(5).pkb_status == "ready"
+        engine.dispose()
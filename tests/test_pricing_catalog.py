@@ -0,0 +1,190 @@
+"""
+Unit tests for the cached pricing catalogue
+"""
+
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services import pricing_catalog
+from app.services.credit_service import CreditService
+from app.services.pricing_catalog import ModelPrice, PricingCatalog, PricingCatalogCache
+from tests.fakes import FakeRedis as _FakeRedis
+
+
+class FakeRedis(_FakeRedis):
+    """Adds the counter command the version stamp uses"""
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+
+def price(model_key, provider="gemini", multiplier=1.0, is_active=True, is_default=False):
+    return ModelPrice(
+        model_key=model_key,
+        provider=provider,
+        credit_multiplier=multiplier,
+        cost_per_1k_chars=None,
+        is_active=is_active,
+        is_default=is_default
+    )
+
+
+def make_catalog(version=None, **operation_prices):
+    default = price("gemini-2.5-flash", is_default=True)
+    models = {
+        ("gemini-2.5-flash", "gemini"): default,
+        ("gemini-2.5-pro", "gemini"): price("gemini-2.5-pro", multiplier=2.5),
+        ("gpt-4o", "openai"): price("gpt-4o", provider="openai", multiplier=3.0, is_active=False),
+    }
+    return PricingCatalog(
+        operation_prices=operation_prices,
+        models=models,
+        default_model=default,
+        version=version,
+        loaded_at=time.monotonic()
+    )
+
+
+@pytest.fixture
+def loads():
+    """Patch load_catalog and record every load"""
+    calls = []
+
+    def fake_load(db, version=None):
+        calls.append(version)
+        return make_catalog(version, lecture_notes=30.0 + len(calls))
+
+    with patch.object(pricing_catalog, "load_catalog", side_effect=fake_load):
+        yield calls
+
+
+@pytest.mark.unit
+class TestPricingCatalogCache:
+    """Tests for PricingCatalogCache"""
+
+    def test_reloads_only_when_version_changes(self, loads):
+        """Test the snapshot is reused until invalidate() bumps the stamp"""
+        cache = PricingCatalogCache(redis_client=FakeRedis(), check_interval=0, ttl_seconds=60)
+        db = MagicMock()
+
+        first = cache.get(db)
+        assert cache.get(db) is first
+        assert loads == [0]
+
+        cache.invalidate()
+        second = cache.get(db)
+
+        assert loads == [0, 1]
+        assert second.version == 1
+        assert second.operation_prices["lecture_notes"] == 32.0
+
+    def test_other_process_edit_is_picked_up(self, loads):
+        """Test a stamp bumped by another process triggers a reload"""
+        redis = FakeRedis()
+        cache = PricingCatalogCache(redis_client=redis, check_interval=0, ttl_seconds=60)
+        cache.get(MagicMock())
+
+        PricingCatalogCache(redis_client=redis).invalidate()
+        cache.get(MagicMock())
+
+        assert loads == [0, 1]
+
+    def test_version_is_checked_at_most_every_interval(self, loads):
+        """Test Redis is not read again within the check interval"""
+        redis = MagicMock()
+        redis.get.return_value = b"3"
+        cache = PricingCatalogCache(redis_client=redis, check_interval=3600, ttl_seconds=60)
+
+        for _ in range(5):
+            cache.get(MagicMock())
+
+        assert redis.get.call_count == 1
+        assert loads == [3]
+
+    def test_ttl_fallback_without_redis(self, loads):
+        """Test snapshots expire after the TTL when Redis is unreachable"""
+        redis = MagicMock()
+        redis.get.side_effect = ConnectionError("redis down")
+        redis.incr.side_effect = ConnectionError("redis down")
+        cache = PricingCatalogCache(redis_client=redis, check_interval=0, ttl_seconds=3600)
+
+        cache.get(MagicMock())
+        cache.get(MagicMock())
+        assert loads == [None]
+
+        cache.ttl_seconds = 0
+        cache.get(MagicMock())
+        assert loads == [None, None]
+
+        cache.invalidate()
+        cache.get(MagicMock())
+        assert loads == [None, None, None]
+
+    def test_failed_reload_keeps_previous_snapshot(self):
+        """Test a database error keeps serving the last loaded catalogue"""
+        redis = FakeRedis()
+        cache = PricingCatalogCache(redis_client=redis, check_interval=0, ttl_seconds=60)
+
+        with patch.object(pricing_catalog, "load_catalog", return_value=make_catalog(0, lecture_notes=30.0)):
+            first = cache.get(MagicMock())
+        redis.incr(PricingCatalogCache.VERSION_KEY)
+        with patch.object(pricing_catalog, "load_catalog", side_effect=RuntimeError("db down")):
+            assert cache.get(MagicMock()) is first
+
+
+@pytest.mark.unit
+class TestPricingCatalog:
+    """Tests for the pricing snapshot itself"""
+
+    def test_snapshot_is_read_only(self):
+        """Test neither the snapshot nor the prices it hands out can be changed"""
+        operation_prices = {"lecture_notes": 30.0}
+        catalog = PricingCatalog(operation_prices=operation_prices, models=make_catalog().models)
+        operation_prices["lecture_notes"] = 0.0
+
+        assert catalog.operation_prices["lecture_notes"] == 30.0
+        with pytest.raises(TypeError):
+            catalog.operation_prices["lecture_notes"] = 0.0
+        with pytest.raises(TypeError):
+            catalog.models[("gpt-4o", "openai")] = price("gpt-4o")
+        with pytest.raises(AttributeError):
+            catalog.version = 5
+
+
+@pytest.mark.unit
+class TestCreditServicePricing:
+    """Tests for CreditService cost calculation from the catalogue"""
+
+    def make_service(self, catalog):
+        db = MagicMock()
+        with patch("app.services.credit_service.get_pricing_catalog", return_value=catalog):
+            service = CreditService(db)
+        return service, db
+
+    def test_operation_cost_uses_model_multiplier(self):
+        """Test cost = base price × model multiplier without database queries"""
+        catalog = make_catalog(lecture_notes=30.0)
+        service, db = self.make_service(catalog)
+
+        with patch("app.services.credit_service.get_pricing_catalog", return_value=catalog):
+            cost = service.calculate_operation_cost("lecture_notes", "gemini-2.5-pro", "gemini")
+
+        assert cost == 75.0
+        db.query.assert_not_called()
+
+    def test_unknown_or_inactive_model_uses_default(self):
+        """Test inactive or unknown models fall back to the default model"""
+        catalog = make_catalog(lecture_notes=30.0)
+        service, _ = self.make_service(catalog)
+
+        with patch("app.services.credit_service.get_pricing_catalog", return_value=catalog):
+            assert service.calculate_operation_cost("lecture_notes", "gpt-4o", "openai") == 30.0
+            assert service.calculate_operation_cost("lecture_notes", "gemini-2.5-pro", "openai") == 30.0
+
+    def test_empty_catalogue_uses_default_prices(self):
+        """Test hardcoded defaults are used when no pricing rows exist"""
+        service, _ = self.make_service(PricingCatalog())
+
+        assert service.pricing.get_price("lecture_notes") == service.pricing._DEFAULT_PRICING["lecture_notes"]
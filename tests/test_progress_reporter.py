@@ -0,0 +1,72 @@
+"""
+Unit tests for ProgressReporter
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.services.progress_reporter import ProgressReporter, get_live_progress
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the Redis calls used by the reporter"""
+
+    def __init__(self):
+        self.data = {}
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def record():
+    return SimpleNamespace(id=7, progress=0)
+
+
+@pytest.mark.unit
+class TestProgressReporter:
+    """Tests for coalesced progress reporting"""
+
+    def test_commits_are_rate_limited(self, record):
+        """Test rapid steps commit once but every step reaches Redis and the task"""
+        db, task, redis = MagicMock(), MagicMock(), FakeRedis()
+        reporter = ProgressReporter(db, record, task=task, redis_client=redis, min_interval=60)
+
+        for step in (10, 20, 30, 40):
+            reporter.report(step, f"step {step}")
+
+        assert db.commit.call_count == 1
+        assert task.update_state.call_count == 4
+        assert record.progress == 40
+        assert get_live_progress("transcription", 7, redis_client=redis)["progress"] == 40
+
+    def test_forced_commit_and_finish(self, record):
+        """Test commit=True writes through and finish() drops the live entry"""
+        db, redis = MagicMock(), FakeRedis()
+        reporter = ProgressReporter(db, record, kind="video", redis_client=redis, min_interval=60)
+
+        reporter.report(5, "start")
+        reporter.report(50, "half", commit=True)
+        assert db.commit.call_count == 2
+        assert json.loads(redis.get("progress:video:7"))["status"] == "half"
+
+        reporter.finish()
+        assert get_live_progress("video", 7, redis_client=redis) is None
+
+    def test_redis_failure_does_not_break_reporting(self, record):
+        """Test progress still lands on the row when Redis is down"""
+        redis = MagicMock()
+        redis.setex.side_effect = ConnectionError("redis down")
+        reporter = ProgressReporter(MagicMock(), record, redis_client=redis, min_interval=0)
+
+        reporter.report(30, "working")
+
+        assert record.progress == 30
@@ -0,0 +1,132 @@
+"""
+Unit tests for speaker/segment alignment
+"""
+
+import random
+import pytest
+
+from app.services.speaker_alignment import align_segments, assign_speakers, smooth_speakers
+
+
+def turn(speaker, start, end):
+    return {"speaker": speaker, "start": start, "end": end}
+
+
+def brute_force(starts, ends, speakers):
+    """Overlap with each speaker's merged turns by scanning every turn"""
+    labels = list(dict.fromkeys(s["speaker"] for s in speakers))
+    merged = {label: [] for label in labels}
+    for s in sorted(speakers, key=lambda s: s["start"]):
+        blocks = merged[s["speaker"]]
+        if blocks and s["start"] <= blocks[-1][1]:
+            blocks[-1][1] = max(blocks[-1][1], s["end"])
+        else:
+            blocks.append([s["start"], s["end"]])
+
+    result = []
+    for a, b in zip(starts, ends):
+        totals = {
+            label: sum(max(0.0, min(b, end) - max(a, start)) for start, end in blocks)
+            for label, blocks in merged.items()
+        }
+        best, best_overlap = None, 0.0
+        for label in labels:
+            if totals[label] > best_overlap + 1e-9:
+                best, best_overlap = label, totals[label]
+        result.append(best)
+    return result
+
+
+@pytest.mark.unit
+class TestAssignSpeakers:
+    """Tests for assign_speakers()"""
+
+    def test_largest_overlap_wins(self):
+        """Test each interval gets the speaker it overlaps most, None without overlap"""
+        speakers = [turn("A", 0, 4), turn("B", 4, 10), turn("A", 12, 15)]
+
+        labels = assign_speakers([0, 3, 9, 10.5], [2, 6, 13, 11.5], speakers)
+
+        assert labels == ["A", "B", "A", None]
+
+    def test_overlap_is_summed_per_speaker(self):
+        """Test several short turns of one speaker beat one longer turn of another"""
+        speakers = [turn("A", 0, 1), turn("B", 1, 2.5), turn("A", 2.5, 3.5), turn("A", 3.5, 4)]
+
+        assert assign_speakers([0], [4], speakers) == ["A"]
+
+    def test_nearest_fallback(self):
+        """Test intervals in gaps take the closest turn when nearest=True"""
+        speakers = [turn("A", 0, 2), turn("B", 10, 12)]
+
+        assert assign_speakers([3, 8], [4, 9], speakers, nearest=True) == ["A", "B"]
+        assert assign_speakers([13], [14], speakers, nearest=True) == ["B"]
+
+    def test_zero_length_intervals(self):
+        """Test instant words inside a turn get its speaker"""
+        speakers = [turn("A", 0, 2), turn("B", 2.5, 4)]
+
+        assert assign_speakers([1, 3, 2.2], [1, 3, 2.2], speakers) == ["A", "B", None]
+
+    def test_matches_brute_force(self):
+        """Test random overlapping turns give the same result as a full scan"""
+        rng = random.Random(7)
+        speakers = []
+        for _ in range(200):
+            start = rng.uniform(0, 600)
+            speakers.append(turn(rng.choice("ABCD"), start, start + rng.uniform(0.1, 20)))
+        starts = [rng.uniform(0, 620) for _ in range(300)]
+        ends = [s + rng.uniform(0.2, 15) for s in starts]
+
+        assert assign_speakers(starts, ends, speakers) == brute_force(starts, ends, speakers)
+
+
+@pytest.mark.unit
+class TestAlignSegments:
+    """Tests for segment and word alignment"""
+
+    def test_segments_and_words(self):
+        """Test segments and their words are labelled without touching the input"""
+        segments = [{
+            "start": 0, "end": 6, "text": "hello there hi",
+            "words": [
+                {"word": "hello", "start": 0, "end": 1},
+                {"word": "there", "start": 1, "end": 2},
+                {"word": "hi", "start": 4.5, "end": 5.5},
+                {"word": "42"},
+            ],
+        }]
+        speakers = [turn("A", 0, 4), turn("B", 4, 6)]
+
+        aligned = align_segments(segments, speakers)
+
+        assert aligned[0]["speaker"] == "A"
+        assert [w["speaker"] for w in aligned[0]["words"]] == ["A", "A", "B", "A"]
+        assert "speaker" not in segments[0] and "speaker" not in segments[0]["words"][0]
+
+    def test_word_flicker_is_smoothed(self):
+        """Test a short switch between words of the same speaker is removed"""
+        segments = [{
+            "start": 0, "end": 3, "text": "a b c",
+            "words": [
+                {"word": "a", "start": 0, "end": 1},
+                {"word": "b", "start": 1, "end": 1.3},
+                {"word": "c", "start": 1.3, "end": 3},
+            ],
+        }]
+        speakers = [turn("A", 0, 1), turn("B", 1, 1.3), turn("A", 1.3, 3)]
+
+        smoothed = align_segments(segments, speakers)
+        raw = align_segments(segments, speakers, word_smoothing=0)
+
+        assert [w["speaker"] for w in smoothed[0]["words"]] == ["A", "A", "A"]
+        assert [w["speaker"] for w in raw[0]["words"]] == ["A", "B", "A"]
+
+    def test_smoothing_keeps_long_runs(self):
+        """Test runs longer than min_duration or at the edges are kept"""
+        labels = ["A", "B", "A", "C", "C", "D"]
+        starts = [0, 1, 3, 4, 5, 6]
+        ends = [1, 3, 4, 5, 5.2, 7]
+
+        assert smooth_speakers(labels, starts, ends, min_duration=0.5) == labels
+        assert smooth_speakers(labels, starts, ends, min_duration=2.5) == ["A", "A", "A", "C", "C", "D"]
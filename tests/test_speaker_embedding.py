@@ -0,0 +1,53 @@
+"""
+Unit tests for batched speaker embeddings
+"""
+
+import numpy as np
+import pytest
+
+from app.services.speaker_embedding import embed_spans, pool_partials
+
+
+@pytest.mark.unit
+class TestPoolPartials:
+    """Tests for pooling partial window embeddings per segment"""
+
+    def test_matches_per_segment_mean(self):
+        """Test pooled embeddings equal the normalized mean of each segment's windows"""
+        rng = np.random.default_rng(0)
+        partials = rng.normal(size=(6, 4))
+        counts = [1, 3, 2]
+
+        pooled = pool_partials(partials, counts)
+
+        start = 0
+        for row, count in zip(pooled, counts):
+            mean = partials[start:start + count].mean(axis=0)
+            np.testing.assert_allclose(row, mean / np.linalg.norm(mean))
+            start += count
+        np.testing.assert_allclose(np.linalg.norm(pooled, axis=1), 1.0)
+
+
+@pytest.mark.unit
+class TestEmbedSpans:
+    """Tests for embed_spans() against Resemblyzer's embed_utterance()"""
+
+    def test_batched_equals_embed_utterance(self):
+        """Test batching gives the same embeddings as embedding segments one by one"""
+        pytest.importorskip("torch")
+        resemblyzer = pytest.importorskip("resemblyzer")
+
+        encoder = resemblyzer.VoiceEncoder(device="cpu", verbose=False)
+        rng = np.random.default_rng(1)
+        t = np.arange(16000 * 12) / 16000
+        wav = (0.3 * np.sin(2 * np.pi * 220 * t) * (1 + rng.normal(scale=0.1, size=t.shape))).astype(np.float32)
+        spans = [(0.0, 2.0), (2.0, 2.1), (2.5, 7.5), (8.0, 12.0)]
+
+        batched = embed_spans(encoder, wav, spans, min_seconds=0.3, batch_partials=3)
+
+        assert batched[1] is None
+        for (start, end), embedding in zip(spans, batched):
+            if embedding is None:
+                continue
+            single = encoder.embed_utterance(resemblyzer.preprocess_wav(wav[int(start * 16000):int(end * 16000)]))
+            np.testing.assert_allclose(embedding, single, atol=1e-5)
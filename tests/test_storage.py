@@ -0,0 +1,339 @@
+"""
+Unit tests for FileStorageService streaming saves
+"""
+
+import hashlib
+import io
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services import storage as storage_module
+from app.services.storage import FileStorageService, FileTooLargeError, UploadSessionError
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Storage service on a temp dir with R2 disabled"""
+    with patch('app.services.storage.boto3.client', side_effect=Exception("no R2 in tests")):
+        service = FileStorageService(base_path=str(tmp_path))
+    assert service.r2_enabled is False
+    return service
+
+
+@pytest.mark.unit
+class TestStreamingSave:
+    """Tests for save_file_stream"""
+
+    def test_save_file_stream_writes_and_hashes(self, storage):
+        """Test content is written in blocks and hashed"""
+        data = b"abc123" * 10000
+        stored = storage.save_file_stream(io.BytesIO(data), "lecture.mp4", chunk_size=4096)
+
+        assert stored.file_size == len(data)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert stored.file_path.endswith(f"{stored.file_id}.mp4")
+        assert open(stored.file_path, "rb").read() == data
+        assert storage.get_file_path(stored.file_id) is not None
+
+    def test_save_file_stream_enforces_max_size(self, storage, tmp_path):
+        """Test oversize uploads are rejected and the partial file removed"""
+        data = b"x" * 10000
+
+        with pytest.raises(FileTooLargeError) as exc_info:
+            storage.save_file_stream(io.BytesIO(data), "big.wav", max_size=5000, chunk_size=1024)
+
+        assert exc_info.value.max_size == 5000
+        stored_files = [p for p in tmp_path.rglob("*")
+                        if p.is_file() and not p.relative_to(tmp_path).parts[0].startswith(".")]
+        assert stored_files == []
+
+    def test_save_file_keeps_tuple_interface(self, storage):
+        """Test save_file still returns (file_id, file_path)"""
+        file_id, file_path = storage.save_file(io.BytesIO(b"hello"), "a.mp3")
+
+        assert open(file_path, "rb").read() == b"hello"
+        assert storage.get_file_size(file_id) == 5
+
+
+@pytest.mark.unit
+class TestR2Upload:
+    """Tests for uploads to R2"""
+
+    def test_provider_upload_streams_multipart(self, storage, tmp_path):
+        """Test content uploads go through the multipart stream, not a whole-file upload"""
+        from botocore.exceptions import ClientError
+        from app.services.storage import R2_MULTIPART_CHUNK_SIZE
+
+        stored = storage.save_file_stream(io.BytesIO(b"audio"), "talk.mp3")
+        storage.r2_enabled = True
+        storage.bucket_name = "bucket"
+        storage.s3_client = MagicMock()
+        storage.s3_client.head_object.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+        with patch.object(storage, "get_public_url", return_value="https://r2/x"):
+            url = storage.upload_content_to_r2(stored.file_path, stored.sha256)
+
+        assert url == "https://r2/x"
+        storage.s3_client.upload_file.assert_not_called()
+        args, kwargs = storage.s3_client.upload_fileobj.call_args
+        assert args[2] == f"content/{stored.sha256}.mp3"
+        assert kwargs["Config"].multipart_chunksize == R2_MULTIPART_CHUNK_SIZE
+
+
+@pytest.mark.unit
+class TestResumableUpload:
+    """Tests for resumable upload sessions"""
+
+    def test_chunks_assemble_into_file(self, storage):
+        """Test chunks written at increasing offsets assemble into one file"""
+        data = b"0123456789" * 100
+        session = storage.create_upload_session("talk.mp3", len(data), "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+
+        offset = storage.write_upload_chunk(upload_id, 0, data[:300])
+        offset = storage.write_upload_chunk(upload_id, offset, data[300:])
+        assert storage.get_upload_session(upload_id)["offset"] == len(data)
+
+        stored = storage.complete_upload_session(upload_id)
+
+        assert stored.file_id == upload_id
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert open(storage.get_file_path(upload_id), "rb").read() == data
+        # Completing twice is idempotent
+        assert storage.complete_upload_session(upload_id).file_path == stored.file_path
+
+    def test_offset_mismatch_reports_current_offset(self, storage):
+        """Test a chunk at the wrong offset is rejected with the resume offset"""
+        session = storage.create_upload_session("talk.mp3", 100, "audio/mpeg", user_id=1)
+        storage.write_upload_chunk(session["upload_id"], 0, b"x" * 40)
+
+        with pytest.raises(UploadSessionError) as exc_info:
+            storage.write_upload_chunk(session["upload_id"], 10, b"y" * 10)
+
+        assert exc_info.value.offset == 40
+
+    def test_incomplete_upload_cannot_complete(self, storage):
+        """Test finalizing before all bytes arrived fails"""
+        session = storage.create_upload_session("talk.mp3", 100, "audio/mpeg", user_id=1)
+        storage.write_upload_chunk(session["upload_id"], 0, b"x" * 40)
+
+        with pytest.raises(UploadSessionError):
+            storage.complete_upload_session(session["upload_id"])
+
+    def test_chunk_past_declared_size_rejected(self, storage):
+        """Test writing more than the declared size fails"""
+        session = storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+
+        with pytest.raises(UploadSessionError):
+            storage.write_upload_chunk(session["upload_id"], 0, b"x" * 11)
+
+    def test_abort_removes_session(self, storage):
+        """Test aborting drops the session"""
+        session = storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+
+        assert storage.abort_upload_session(session["upload_id"]) is True
+        assert storage.get_upload_session(session["upload_id"]) is None
+
+    def test_locked_session_rejects_concurrent_chunk(self, storage, monkeypatch):
+        """Test a chunk is refused while another request holds the session"""
+        monkeypatch.setattr(storage_module, "UPLOAD_SESSION_LOCK_WAIT_SECONDS", 0.1)
+        session = storage.create_upload_session("talk.mp3", 100, "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+
+        with storage._session_lock(upload_id):
+            with pytest.raises(UploadSessionError):
+                storage.write_upload_chunk(upload_id, 0, b"x" * 10)
+
+        assert storage.write_upload_chunk(upload_id, 0, b"x" * 10) == 10
+
+    def test_concurrent_chunks_at_same_offset(self, storage):
+        """Test only one of two racing chunks for the same offset is written"""
+        import threading
+
+        session = storage.create_upload_session("talk.mp3", 1000, "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+        outcomes = []
+
+        def write(byte):
+            try:
+                outcomes.append(storage.write_upload_chunk(upload_id, 0, byte * 100))
+            except UploadSessionError as e:
+                outcomes.append(e.offset)
+
+        threads = [threading.Thread(target=write, args=(b,)) for b in (b"a", b"b", b"c", b"d")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert outcomes == [100] * 4
+        assert storage.get_upload_session(upload_id)["offset"] == 100
+
+    def test_expired_session_is_not_removed_under_a_writer(self, storage):
+        """Test an expired session held by an in-flight chunk is left to the sweep"""
+        session = storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+        storage._write_session({**session, "expires_at": time.time() - 1})
+
+        with storage._session_lock(upload_id):
+            assert storage.get_upload_session(upload_id) is None
+            assert storage._session_meta_path(upload_id).exists()
+
+        assert storage.get_upload_session(upload_id) is None
+        assert not storage._session_meta_path(upload_id).exists()
+
+    def test_expired_sessions_are_swept_periodically(self, storage):
+        """Test creating sessions only sweeps once per cleanup interval"""
+        with patch.object(storage, "cleanup_expired_upload_sessions", return_value=0) as sweep:
+            for _ in range(3):
+                storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+
+        assert sweep.call_count == 1
+
+    def test_abort_busy_session_is_conflict(self, storage, monkeypatch):
+        """Test DELETE on a locked session answers 409 instead of failing"""
+        import asyncio
+        from types import SimpleNamespace
+        from fastapi import HTTPException
+        from app.api.transcription import abort_resumable_upload
+
+        monkeypatch.setattr(storage_module, "UPLOAD_SESSION_LOCK_WAIT_SECONDS", 0.1)
+        session = storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+
+        with storage._session_lock(upload_id):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(abort_resumable_upload(upload_id, current_user=SimpleNamespace(id=1), storage=storage))
+
+        assert exc_info.value.status_code == 409
+        asyncio.run(abort_resumable_upload(upload_id, current_user=SimpleNamespace(id=1), storage=storage))
+        assert storage.get_upload_session(upload_id) is None
+
+    def test_completed_upload_outlives_session_ttl(self, storage, monkeypatch):
+        """Test a finished upload still resolves after the session TTL"""
+        session = storage.create_upload_session("talk.mp3", 10, "audio/mpeg", user_id=1)
+        upload_id = session["upload_id"]
+        storage.write_upload_chunk(upload_id, 0, b"x" * 10)
+        stored = storage.complete_upload_session(upload_id)
+
+        later = time.time() + 365 * 24 * 3600
+        monkeypatch.setattr(storage_module.time, "time", lambda: later)
+
+        assert storage.cleanup_expired_upload_sessions() == 0
+        record = storage.get_upload_session(upload_id)
+        assert record["status"] == "completed"
+        assert record["sha256"] == stored.sha256
+
+        storage.delete_file(upload_id, stored.sha256)
+        assert storage.get_upload_session(upload_id) is None
+
+
+@pytest.mark.unit
+class TestStorageSingleton:
+    """Tests for the shared storage service and its metrics"""
+
+    def test_singleton_is_built_once_across_threads(self):
+        """Test concurrent callers share one instance"""
+        import threading
+        from app.services import storage as storage_module
+
+        with patch.object(storage_module, '_storage_service', None), \
+             patch.object(storage_module, 'FileStorageService') as factory:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(storage_module.get_storage_service()))
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert factory.call_count == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_metrics_record_operation_latency(self, storage):
+        """Test recorded calls show up in the metrics snapshot"""
+        storage.metrics.record("PutObject", 0.02)
+        storage.metrics.record("PutObject", 0.04, error=True)
+
+        ops = storage.get_metrics()["operations"]
+        assert ops["PutObject"]["count"] == 2
+        assert ops["PutObject"]["errors"] == 1
+        assert ops["PutObject"]["max_ms"] == pytest.approx(40.0)
+
+
+@pytest.mark.unit
+class TestShardedLayout:
+    """Tests for the sharded file layout and file_id index"""
+
+    def test_saved_files_are_sharded_and_indexed(self, storage, tmp_path):
+        """Test new files land in ab/cd/ and are found through the index"""
+        stored = storage.save_file_stream(io.BytesIO(b"data"), "clip.mp4")
+        file_id = stored.file_id
+
+        expected = tmp_path / file_id[:2] / file_id[2:4] / f"{file_id}.mp4"
+        assert stored.file_path == str(expected)
+        assert storage.file_index.get(file_id) == str(expected.relative_to(tmp_path))
+        assert storage.get_file_path(file_id) == expected
+
+    def test_delete_removes_index_entry(self, storage):
+        """Test deleting a file drops it from the index"""
+        stored = storage.save_file_stream(io.BytesIO(b"data"), "clip.mp4")
+
+        assert storage.delete_file(stored.file_id) is True
+        assert storage.file_index.get(stored.file_id) is None
+        assert storage.get_file_path(stored.file_id) is None
+
+    def test_processed_upload_leaves_no_content_blob(self, storage, tmp_path):
+        """Test the worker cleanup frees the upload, its index entry and its blob"""
+        from app.workers.transcription_worker import release_uploaded_file
+
+        stored = storage.save_file_stream(io.BytesIO(b"audio" * 100), "talk.mp3")
+        storage.register_content(stored.file_id, stored.sha256)
+        assert storage.get_content_path(stored.sha256) is not None
+
+        release_uploaded_file(storage, stored.file_id, stored.sha256)
+
+        assert storage.get_content_path(stored.sha256) is None
+        assert [p for p in (tmp_path / ".content").rglob("*") if p.is_file()] == []
+        assert storage.file_index.get(stored.file_id) is None
+
+    def test_shared_blob_is_kept_until_last_upload(self, storage):
+        """Test a blob shared by two uploads survives the first delete"""
+        first = storage.save_file_stream(io.BytesIO(b"same"), "a.mp3")
+        second = storage.save_file_stream(io.BytesIO(b"same"), "b.mp3")
+        storage.register_content(first.file_id, first.sha256)
+        storage.register_content(second.file_id, second.sha256)
+
+        storage.delete_file(first.file_id, first.sha256)
+        assert storage.get_content_path(first.sha256) is not None
+
+        storage.delete_file(second.file_id, second.sha256)
+        assert storage.get_content_path(first.sha256) is None
+
+    def test_delete_releases_blob_when_file_already_gone(self, storage):
+        """Test a later delete_file still releases the blob of a removed upload"""
+        stored = storage.save_file_stream(io.BytesIO(b"gone"), "c.mp3")
+        storage.register_content(stored.file_id, stored.sha256)
+        storage.get_file_path(stored.file_id).unlink()
+
+        assert storage.delete_file(stored.file_id, stored.sha256) is False
+        assert storage.get_content_path(stored.sha256) is None
+
+    def test_reshard_moves_legacy_files(self, tmp_path):
+        """Test flat legacy files are found before and after re-sharding"""
+        file_id = "0123abcd-0000-0000-0000-000000000000"
+        (tmp_path / f"{file_id}.wav").write_bytes(b"legacy")
+
+        with patch('app.services.storage.boto3.client', side_effect=Exception("no R2 in tests")):
+            service = FileStorageService(base_path=str(tmp_path))
+
+        assert service.get_file_path(file_id) == tmp_path / f"{file_id}.wav"
+        assert service.reshard_legacy_files(dry_run=True) == 1
+        assert service.reshard_legacy_files() == 1
+
+        moved = tmp_path / "01" / "23" / f"{file_id}.wav"
+        assert moved.read_bytes() == b"legacy"
+        assert service.get_file_path(file_id) == moved
@@ -0,0 +1,90 @@
+"""
+Unit tests for TextChunker
+"""
+
+import re
+import pytest
+
+from app.services.rag_service import TextChunker
+
+
+class WordTokenizer:
+    """tiktoken-like stand-in: one token per word, leading whitespace attached"""
+
+    pattern = re.compile(r"\s*\S+|\s+$")
+
+    def __init__(self):
+        self.encode_calls = 0
+        self._starts = []
+
+    def encode(self, text, disallowed_special=None):
+        self.encode_calls += 1
+        self._starts = [m.start() for m in self.pattern.finditer(text)]
+        return list(range(len(self._starts)))
+
+    def decode_with_offsets(self, tokens):
+        return None, [self._starts[t] for t in tokens]
+
+
+def make_chunker(chunk_size, chunk_overlap, tokenizer=None):
+    chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunker.tokenizer = tokenizer
+    return chunker
+
+
+DOCUMENT = "\n\n".join(
+    " ".join(f"Paragraph {p} sentence {s} has a few words." for s in range(6))
+    for p in range(8)
+)
+
+
+@pytest.mark.unit
+class TestTextChunker:
+    """Tests for single-pass, offset-exact chunking"""
+
+    @pytest.mark.parametrize("tokenizer", [None, WordTokenizer()])
+    def test_offsets_are_exact(self, tokenizer):
+        """Test text[start_char:end_char] is the chunk content"""
+        chunks = make_chunker(40, 8, tokenizer).chunk_text(DOCUMENT)
+
+        assert len(chunks) > 3
+        assert [c.index for c in chunks] == list(range(len(chunks)))
+        for chunk in chunks:
+            assert DOCUMENT[chunk.start_char:chunk.end_char] == chunk.content
+
+    def test_document_is_tokenized_once(self):
+        """Test the tokenizer runs once per document, not per paragraph/chunk"""
+        tokenizer = WordTokenizer()
+        make_chunker(40, 8, tokenizer).chunk_text(DOCUMENT)
+
+        assert tokenizer.encode_calls == 1
+
+    def test_chunks_end_on_sentence_or_paragraph(self):
+        """Test cuts snap to boundaries and respect the token budget"""
+        chunks = make_chunker(40, 0, WordTokenizer()).chunk_text(DOCUMENT)
+
+        assert all(c.content.endswith(".") for c in chunks)
+        assert all(c.token_count <= 40 for c in chunks)
+        assert " ".join(c.content for c in chunks).split() == DOCUMENT.split()
+
+    def test_paragraphs_are_preferred_over_sentences(self):
+        """Test a chunk that can end on a paragraph break does"""
+        chunks = make_chunker(120, 0, WordTokenizer()).chunk_text(DOCUMENT)
+
+        assert all(DOCUMENT[c.end_char:c.end_char + 2] in ("\n\n", "") for c in chunks)
+
+    def test_overlap_repeats_tail_tokens(self):
+        """Test consecutive chunks share up to chunk_overlap tokens"""
+        chunks = make_chunker(40, 8, WordTokenizer()).chunk_text(DOCUMENT)
+
+        for previous, current in zip(chunks, chunks[1:]):
+            assert previous.start_char < current.start_char < previous.end_char
+            shared = DOCUMENT[current.start_char:previous.end_char]
+            assert len(shared.split()) <= 8
+
+    def test_unbroken_text_is_hard_cut(self):
+        """Test text without boundaries is cut at chunk_size tokens"""
+        text = " ".join(["word"] * 100)
+        chunks = make_chunker(30, 0, WordTokenizer()).chunk_text(text)
+
+        assert [c.token_count for c in chunks] == [30, 30, 30, 10]
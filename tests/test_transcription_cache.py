@@ -0,0 +1,95 @@
+"""
+Unit tests for the transcription result cache and content-addressed storage
+"""
+
+import io
+import pytest
+from unittest.mock import patch
+
+from app.services.storage import FileStorageService
+from app.services.transcription_cache import TranscriptionResultCache
+from app.services.youtube_service import extract_video_id
+from tests.fakes import FakeRedis
+
+
+@pytest.fixture
+def cache():
+    return TranscriptionResultCache(redis_client=FakeRedis(), ttl_seconds=60, max_entries=2)
+
+
+@pytest.mark.unit
+class TestTranscriptionResultCache:
+    """Tests for TranscriptionResultCache"""
+
+    def test_key_depends_on_options(self):
+        """Test each option that changes provider output changes the key"""
+        base = TranscriptionResultCache.make_key("abc", provider="modal", model="large-v3", language="tr")
+
+        assert base == TranscriptionResultCache.make_key("abc", provider="modal", model="large-v3", language="tr")
+        assert base != TranscriptionResultCache.make_key("abc", provider="assemblyai", model="large-v3", language="tr")
+        assert base != TranscriptionResultCache.make_key("abc", provider="modal", model="large-v3", language="en")
+        assert base != TranscriptionResultCache.make_key(
+            "abc", provider="modal", model="large-v3", language="tr", enable_diarization=True
+        )
+
+    def test_roundtrip(self, cache):
+        """Test a stored result comes back unchanged"""
+        result = {"text": "merhaba", "segments": [{"start": 0.0, "end": 1.5, "text": "merhaba"}]}
+        cache.set("k1", result)
+
+        assert cache.get("k1") == result
+        assert cache.get("missing") is None
+
+    def test_lru_eviction(self, cache):
+        """Test least recently used entries are evicted past max_entries"""
+        with patch("app.services.transcription_cache.time.time", side_effect=[1, 2, 3, 4]):
+            cache.set("a", {"text": "a"})
+            cache.set("b", {"text": "b"})
+            cache.get("a")  # touch a, so b is least recently used
+            cache.set("c", {"text": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"text": "a"}
+        assert cache.get("c") == {"text": "c"}
+
+    def test_alias(self, cache):
+        """Test external IDs resolve to content hashes"""
+        cache.remember_alias("youtube:dQw4w9WgXcQ", "abc123")
+
+        assert cache.resolve_alias("youtube:dQw4w9WgXcQ") == "abc123"
+        assert cache.resolve_alias("youtube:other") is None
+
+
+@pytest.mark.unit
+class TestContentStore:
+    """Tests for content-addressed dedup in FileStorageService"""
+
+    def test_duplicate_uploads_share_storage(self, tmp_path):
+        """Test identical uploads are hardlinked to one blob"""
+        with patch('app.services.storage.boto3.client', side_effect=Exception("no R2 in tests")):
+            storage = FileStorageService(base_path=str(tmp_path))
+
+        first = storage.save_file_stream(io.BytesIO(b"same bytes"), "a.mp3")
+        second = storage.save_file_stream(io.BytesIO(b"same bytes"), "b.mp3")
+
+        assert storage.register_content(first.file_id, first.sha256) is False
+        assert storage.register_content(second.file_id, second.sha256) is True
+        blob = storage.get_content_path(first.sha256)
+        assert blob.stat().st_nlink == 3
+
+        storage.delete_file(first.file_id, first.sha256)
+        storage.delete_file(second.file_id, second.sha256)
+        assert storage.get_content_path(first.sha256) is None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+])
+def test_extract_video_id(url):
+    """Test URL variants map to the same canonical video ID"""
+    assert extract_video_id(url) == "dQw4w9WgXcQ"
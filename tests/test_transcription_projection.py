@@ -0,0 +1,72 @@
+"""
+Unit tests for the transcription list projection and fields= detail loading
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - register related mappers
+from app.models.transcription import Transcription, TranscriptionStatus
+from app.api import transcription as transcription_api
+
+
+@pytest.fixture
+def db():
+    """SQLite session with one large transcription; records executed SQL"""
+    engine = create_engine("sqlite://")
+    Transcription.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Transcription(
+        user_id=1, file_id="f1", filename="lecture.mp3", file_size=1,
+        file_path="f1.mp3", content_type="audio/mpeg",
+        text="word " * 5000, segments=[{"start": 0, "end": 1, "text": "word"}],
+        status=TranscriptionStatus.COMPLETED
+    ))
+    session.commit()
+    session.expunge_all()
+
+    session.statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: session.statements.append(statement))
+    yield session
+    session.close()
+
+
+@pytest.mark.unit
+class TestTranscriptionProjection:
+    """Tests for list/detail column projection"""
+
+    user = SimpleNamespace(id=1)
+
+    def test_list_skips_heavy_columns(self, db):
+        """Test the list query never selects transcript/segment blobs"""
+        result = asyncio.run(transcription_api.list_transcriptions(
+            page=1, page_size=20, db=db, current_user=self.user
+        ))
+
+        assert result.total == 1
+        assert len(result.items[0].text_preview) == transcription_api.TEXT_PREVIEW_CHARS
+        assert not any("segments" in statement for statement in db.statements)
+
+    def test_detail_fields_loads_only_requested(self, db):
+        """Test fields= returns the requested blob in one query and nulls for the rest"""
+        result = asyncio.run(transcription_api.get_transcription(
+            1, fields="segments", db=db, current_user=self.user
+        ))
+
+        assert result.segments == [{"start": 0, "end": 1, "text": "word"}]
+        assert result.text is None
+        assert len(db.statements) == 1
+
+    def test_detail_rejects_unknown_fields(self, db):
+        """Test unknown field names are a 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(transcription_api.get_transcription(
+                1, fields="text,password", db=db, current_user=self.user
+            ))
+
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,188 @@
+"""
+Unit tests for the pooled Qdrant vector store
+"""
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.services import rag_service
+from app.services.rag_service import AsyncVectorStore, QdrantError, VectorStoreService
+
+
+def make_store(handler):
+    """AsyncVectorStore backed by an in-process mock transport"""
+    return AsyncVectorStore(url="http://qdrant.test", api_key="k", transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.unit
+class TestAsyncVectorStore:
+    """Tests for AsyncVectorStore"""
+
+    def test_health_check_is_cached(self):
+        """Test repeated calls probe /collections only once"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/collections":
+                return httpx.Response(200, json={"result": {"collections": []}})
+            return httpx.Response(200, json={"result": []})
+
+        async def run():
+            store = make_store(handler)
+            for _ in range(3):
+                await store.search("kb", [0.1, 0.2], top_k=3, score_threshold=0.0)
+            await store.aclose()
+
+        asyncio.run(run())
+
+        assert calls.count("/collections") == 1
+        assert calls.count("/collections/kb/points/search") == 3
+
+    def test_retries_transient_errors(self):
+        """Test 503 responses are retried and the search result is parsed"""
+        responses = iter([
+            httpx.Response(200, json={}),  # health check
+            httpx.Response(503, text="busy"),
+            httpx.Response(200, json={"result": [
+                {"id": 1, "score": 0.9, "payload": {"text": "chunk", "source_id": 5}}
+            ]}),
+        ])
+
+        async def run():
+            store = make_store(lambda request: next(responses))
+            with patch.object(rag_service.asyncio, "sleep", return_value=None):
+                results = await store.search("kb", [0.1], top_k=1, score_threshold=0.0)
+            await store.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+        assert [(r.chunk_id, r.content, r.score) for r in results] == [("1", "chunk", 0.9)]
+
+    def test_client_errors_are_not_retried(self):
+        """Test 4xx responses raise QdrantError immediately"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400, text="bad request")
+
+        async def run():
+            store = make_store(handler)
+            with pytest.raises(QdrantError) as exc_info:
+                await store._make_request("POST", "/collections/kb/points/search", {})
+            await store.aclose()
+            return exc_info.value
+
+        error = asyncio.run(run())
+
+        assert error.status_code == 400
+        assert len(calls) == 1
+
+
+    def test_existing_point_ids(self):
+        """Test only stored IDs come back and a missing collection has none"""
+        def handler(request):
+            if request.url.path == "/collections/kb/points":
+                return httpx.Response(200, json={"result": [{"id": "a"}]})
+            if request.url.path == "/collections/gone/points":
+                return httpx.Response(404, text="not found")
+            return httpx.Response(200, json={})
+
+        async def run():
+            store = make_store(handler)
+            found = await store.existing_point_ids("kb", ["a", "b"])
+            missing = await store.existing_point_ids("gone", ["a"])
+            await store.aclose()
+            return found, missing
+
+        assert asyncio.run(run()) == ({"a"}, set())
+
+
+@pytest.mark.unit
+class TestVectorStoreFacade:
+    """Tests for the sync VectorStoreService facade"""
+
+    def test_sync_calls_run_on_shared_store(self):
+        """Test the facade reuses one store across calls"""
+        def handler(request):
+            return httpx.Response(200, json={"result": {"points_count": 4, "status": "green"}})
+
+        store = make_store(handler)
+        with patch.object(rag_service, "get_vector_store", return_value=store) as factory:
+            service = VectorStoreService()
+            assert service.client is True
+            info = service.get_collection_info("kb")
+
+        assert info["points_count"] == 4
+        assert factory.call_count == 2
+
+
+@pytest.mark.unit
+class TestSharedCollection:
+    """Tests for the multi-tenant PKB layout"""
+
+    def test_location_filters_shared_collection_only(self):
+        """Test only sources stored in the shared collection get tenant filters"""
+        shared = rag_service.shared_collection_name()
+
+        location = rag_service.pkb_location(3, 9, shared)
+        legacy = rag_service.pkb_location(3, 9, "source_9_abcd1234")
+
+        assert location.shared and location.filter_conditions == {"user_id": 3, "source_id": 9}
+        assert not legacy.shared and legacy.collection_name == "source_9_abcd1234"
+
+    def test_rag_service_uses_stored_collection(self):
+        """Test RAGService resolves a legacy source to the collection it is stored in"""
+        service = rag_service.RAGService.__new__(rag_service.RAGService)
+
+        with patch.object(rag_service.RAGService, "_stored_collection", return_value="source_9_abcd1234"):
+            legacy = service._location(3, 9)
+        with patch.object(rag_service.RAGService, "_stored_collection", return_value=None):
+            unindexed = service._location(3, 9)
+        explicit = service._location(3, 9, rag_service.shared_collection_name())
+
+        assert legacy.collection_name == "source_9_abcd1234" and not legacy.shared
+        assert unindexed.collection_name == rag_service.new_pkb_collection("gistify_user_3_source_9")
+        assert explicit.filter_conditions == {"user_id": 3, "source_id": 9}
+
+    def test_large_model_gets_its_own_collection(self):
+        """Test 3072-dimensional PKBs never go to the 1536-dimensional shared collection"""
+        small = rag_service.new_pkb_collection("own", rag_service.EmbeddingModel.OPENAI_SMALL)
+        large = rag_service.new_pkb_collection("own", rag_service.EmbeddingModel.OPENAI_LARGE)
+
+        assert small == rag_service.shared_collection_name()
+        assert large == "own"
+
+    def test_list_filter_matches_any(self):
+        """Test list values become match-any conditions (cross-source search)"""
+        assert rag_service.build_filter({"user_id": 3, "source_id": [1, 2]}) == {"must": [
+            {"key": "user_id", "match": {"value": 3}},
+            {"key": "source_id", "match": {"any": [1, 2]}},
+        ]}
+
+    def test_shared_collection_is_created_with_payload_indexes_once(self):
+        """Test tenant fields are indexed and later calls skip the round trips"""
+        requests = []
+
+        def handler(request):
+            requests.append((request.method, request.url.path, request.content))
+            if request.method == "GET" and request.url.path == "/collections/shared":
+                return httpx.Response(404, text="not found")
+            return httpx.Response(200, json={"result": True})
+
+        async def run():
+            store = make_store(handler)
+            for _ in range(2):
+                await store.create_collection("shared", 1536, payload_indexes=rag_service.SHARED_PAYLOAD_INDEXES)
+            await store.aclose()
+
+        asyncio.run(run())
+
+        paths = [(method, path) for method, path, _ in requests]
+        assert paths.count(("PUT", "/collections/shared")) == 1
+        assert paths.count(("PUT", "/collections/shared/index")) == 2
+        assert b'"payload_m"' in next(body for method, path, body in requests if path == "/collections/shared" and method == "PUT")
@@ -0,0 +1,54 @@
+"""
+Unit tests for cross-process WebSocket progress publishing
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.websocket import ProgressPublisher
+
+
+@pytest.fixture
+def publisher():
+    """Publisher with a mocked Redis manager"""
+    service = ProgressPublisher(url="redis://localhost:6379/0", channel="test")
+    service._manager = MagicMock()
+    return service
+
+
+@pytest.mark.unit
+class TestProgressPublisher:
+    """Tests for ProgressPublisher"""
+
+    def test_progress_goes_to_transcription_room(self, publisher):
+        """Test progress events are published to the transcription room"""
+        assert publisher.emit_progress(42, 30, "Transcribing...", task="video", video_id=7) is True
+
+        publisher._manager.emit.assert_called_once_with(
+            'progress',
+            {
+                'transcription_id': 42,
+                'progress': 30,
+                'status': 'Transcribing...',
+                'message': None,
+                'task': 'video',
+                'video_id': 7
+            },
+            namespace='/',
+            room='transcription_42'
+        )
+
+    def test_publish_failure_is_swallowed(self, publisher):
+        """Test a Redis error does not propagate to the task"""
+        publisher._manager.emit.side_effect = ConnectionError("redis down")
+
+        assert publisher.emit_error(42, "boom") is False
+
+    def test_disabled_without_url(self):
+        """Test nothing is published when the message queue is disabled"""
+        service = ProgressPublisher(channel="test")
+        service._manager = MagicMock()
+        service.url = None
+
+        assert service.emit_completed(42, {}) is False
+        service._manager.emit.assert_not_called()